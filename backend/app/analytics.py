@@ -0,0 +1,147 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import InsightsResponse
+
+# 直前ANOMALY_WINDOW件（約4週間）の平均から、標準偏差のANOMALY_Z倍以上離れた記録を外れ値とする
+ANOMALY_WINDOW = 28
+ANOMALY_Z = 2.5
+# 返す値の小数点以下の桁数
+DECIMALS = 3
+# 1970-01-01（datetime64の起点）は木曜日（月曜日=0）
+_EPOCH_WEEKDAY = 3
+# 標準偏差がこれ以下の区間（値がほぼ一定）では外れ値を判定しない
+_MIN_STD = 1e-9
+
+
+def series_arrays(
+    rows: Sequence[Tuple[str, float, float]],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(record_date, mood_score, sleep_hours)の列を、記録日・気分スコア・睡眠時間の配列にする"""
+    return (np.array([row[0] for row in rows], dtype="datetime64[D]"),
+            np.array([row[1] for row in rows], dtype=float),
+            np.array([row[2] for row in rows], dtype=float))
+
+
+def _cumsum(values: np.ndarray) -> np.ndarray:
+    """先頭に0を付けた累積和（c[j] - c[i] がi〜j-1番目の和になる）"""
+    return np.concatenate(([0.0], np.cumsum(values)))
+
+
+def moving_averages(values: np.ndarray, window: int) -> np.ndarray:
+    """各記録までの直近window件の平均（先頭付近はそれまでの全件の平均）"""
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    sums = _cumsum(values)
+    return (sums[end] - sums[start]) / (end - start)
+
+
+def anomaly_scores(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    各記録の直前window件（その記録を含まない）の平均と、そこからの偏差を標準偏差（不偏）で割った値。
+    直前の記録がwindow件に満たない位置と、直前window件の値が一定の位置はNaNにする。
+    """
+    n = len(values)
+    expected = np.full(n, np.nan)
+    z = np.full(n, np.nan)
+    if n <= window:
+        return expected, z
+    sums, squares = _cumsum(values), _cumsum(values * values)
+    end = np.arange(window, n)
+    mean = (sums[end] - sums[end - window]) / window
+    variance = (squares[end] - squares[end - window] - window * mean * mean) / (window - 1)
+    std = np.sqrt(np.maximum(variance, 0.0))
+    expected[window:] = mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z[window:] = np.where(std > _MIN_STD, (values[window:] - mean) / std, np.nan)
+    return expected, z
+
+
+def _weekday_effects(dates: np.ndarray, moods: np.ndarray, sleeps: np.ndarray) -> list:
+    weekdays = (dates.astype("int64") + _EPOCH_WEEKDAY) % 7
+    counts = np.bincount(weekdays, minlength=7)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mood_means = np.bincount(weekdays, weights=moods, minlength=7) / counts
+        sleep_means = np.bincount(weekdays, weights=sleeps, minlength=7) / counts
+    overall = moods.mean() if len(moods) else np.nan
+    mood_deltas = mood_means - overall
+    return [
+        {"weekday": weekday, "count": int(counts[weekday]),
+         "mood_score": _round(mood_means[weekday]),
+         "sleep_hours": _round(sleep_means[weekday]),
+         "mood_delta": _round(mood_deltas[weekday])}
+        for weekday in range(7)
+    ]
+
+
+def _sleep_debt(dates: np.ndarray, sleeps: np.ndarray, target: float) -> dict:
+    """目標の睡眠時間に届かなかった日が続いた区間（記録日が1日ずつ連続するもの）を求める"""
+    deficit = np.maximum(target - sleeps, 0.0)
+    short = deficit > 0
+    consecutive = np.diff(dates) == np.timedelta64(1, "D")
+    # 前の記録も不足していて、記録日が連続していれば同じ区間
+    continues = np.concatenate(([False], short[:-1] & consecutive)) if len(short) else short
+    run_starts = short & ~continues
+    starts = np.flatnonzero(run_starts)
+    if not len(starts):
+        return {"target_hours": target, "current_streak": None, "longest_streak": None}
+    run_ids = np.cumsum(run_starts)[short] - 1
+    lengths = np.bincount(run_ids)
+    debts = np.bincount(run_ids, weights=deficit[short])
+
+    def streak(run: int) -> dict:
+        start = starts[run]
+        return {"start": dates[start].item(), "end": dates[start + lengths[run] - 1].item(),
+                "days": int(lengths[run]), "debt_hours": _round(debts[run])}
+
+    # 同じ長さの区間があれば最新のものを返す
+    longest = len(lengths) - 1 - int(np.argmax(lengths[::-1]))
+    return {
+        "target_hours": target,
+        "current_streak": streak(len(lengths) - 1) if short[-1] else None,
+        "longest_streak": streak(longest),
+    }
+
+
+def _anomalies(dates: np.ndarray, values: np.ndarray, metric: str) -> list:
+    expected, z = anomaly_scores(values, ANOMALY_WINDOW)
+    flagged = np.flatnonzero(np.abs(np.nan_to_num(z)) >= ANOMALY_Z)
+    return [
+        {"record_date": record_date, "metric": metric, "value": value,
+         "expected": mean, "z_score": score}
+        for record_date, value, mean, score in zip(
+            dates[flagged].tolist(), values[flagged].tolist(),
+            np.round(expected[flagged], DECIMALS).tolist(),
+            np.round(z[flagged], DECIMALS).tolist())
+    ]
+
+
+def _round(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), DECIMALS)
+
+
+def build_insights(rows: Sequence[Tuple[str, float, float]], window: int,
+                   sleep_target: float) -> InsightsResponse:
+    """
+    記録日の昇順に並んだ(record_date, mood_score, sleep_hours)の全履歴から、
+    曜日ごとの傾向・睡眠負債の連続・移動平均・外れ値をまとめて求める。
+    記録をEntryにせず配列のまま扱い、各指標は累積和とbincountでO(n)で計算する。
+    """
+    dates, moods, sleeps = series_arrays(rows)
+    anomalies = _anomalies(dates, moods, "mood_score") + _anomalies(dates, sleeps, "sleep_hours")
+    anomalies.sort(key=lambda anomaly: anomaly["record_date"])
+    # 組み立てた辞書をまとめて1回で検証する（指標ごとにモデルを作らない）
+    return InsightsResponse.model_validate({
+        "status": "success",
+        "count": len(dates),
+        "weekdays": _weekday_effects(dates, moods, sleeps),
+        "sleep_debt": _sleep_debt(dates, sleeps, sleep_target),
+        "moving_averages": {
+            "window": window,
+            "record_dates": dates.tolist(),
+            "mood_score": np.round(moving_averages(moods, window), DECIMALS).tolist(),
+            "sleep_hours": np.round(moving_averages(sleeps, window), DECIMALS).tolist(),
+        },
+        "anomalies": anomalies,
+    })
@@ -0,0 +1,98 @@
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pymongo.errors import PyMongoError
+
+from .constants import DB
+from .db import AsyncCollection
+
+# Authorization: Bearer <token>（未指定時は自前で401を返すためauto_error=False）
+bearer_scheme = HTTPBearer(
+    auto_error=False, description="POST /usersで発行したAPIトークン")
+
+
+def generate_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_token(token: str) -> str:
+    """DBにはトークンそのものではなくハッシュ値だけを保存する"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """
+    検証済みトークン（ハッシュ値）からユーザーIDへのLRU/TTLキャッシュ。
+    ヒットした場合はDBに問い合わせずに認証できる。
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token_hash: str) -> Optional[str]:
+        cached = self._entries.get(token_hash)
+        if cached is None or cached[1] <= self._clock():
+            self._entries.pop(token_hash, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token_hash)
+        self.hits += 1
+        return cached[0]
+
+    def put(self, token_hash: str, user_id: str) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[token_hash] = (user_id, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(token_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def users_collection(request: Request) -> AsyncCollection:
+    return AsyncCollection(
+        request.app.state.mongo[DB.DATABASE_NAME][DB.USERS_COLLECTION],
+        request.app.state.db_executor)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+async def current_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> str:
+    """Bearerトークンを検証してユーザーIDを返す（検証済みのトークンはDBに問い合わせない）"""
+    if credentials is None:
+        raise _unauthorized("not authenticated")
+    token_hash = hash_token(credentials.credentials)
+    cache: TokenCache = request.app.state.token_cache
+    user_id = cache.get(token_hash)
+    if user_id is not None:
+        return user_id
+    try:
+        doc = await users_collection(request).find_one(
+            {"token_hash": token_hash}, projection={"_id": 1})
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to verify token") from err
+    if doc is None:
+        raise _unauthorized("invalid token")
+    user_id = str(doc["_id"])
+    cache.put(token_hash, user_id)
+    return user_id
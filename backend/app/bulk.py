@@ -0,0 +1,191 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from .changes import UPDATED_AT_FIELD, change_time
+from .db import AsyncCollection
+from .indexes import entry_key
+from .models import BulkEntryResult, BulkItemError, BulkItemErrorDetail, Entry
+from .search import with_memo_terms
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 1行ごとのJSONとして解釈できなかった場合に返す印
+_INVALID_JSON = object()
+
+
+class InvalidBulkBodyError(ValueError):
+    """リクエストボディがJSON配列・NDJSONのいずれとしても解釈できない"""
+
+
+class BulkBodyTooLargeError(ValueError):
+    """リクエストボディが上限のバイト数を超えた"""
+
+
+async def read_bulk_body(chunks: AsyncIterator[bytes], max_bytes: int,
+                         content_length: Optional[str] = None) -> bytes:
+    """
+    リクエストボディを読み込む。
+    件数の上限はボディ全体を解釈するまで確認できないため、先にバイト数の上限で打ち切り、
+    Content-Lengthが上限を超える場合は読み込まずに、それ以外は上限を超えた時点で
+    BulkBodyTooLargeErrorを送出する（送られた分だけメモリを確保しないようにする）。
+    """
+    detail = f"request body too large (max {max_bytes} bytes)"
+    if content_length is not None and content_length.isdigit() \
+            and int(content_length) > max_bytes:
+        raise BulkBodyTooLargeError(detail)
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise BulkBodyTooLargeError(detail)
+    return bytes(body)
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    """
+    リクエストボディをエントリー候補のリストにする。
+    JSON配列・NDJSONとも、UTF-8として不正なバイト列を含むボディはInvalidBulkBodyErrorにする。
+    NDJSONの場合、JSONとして壊れた行はその行だけ検証エラーになるよう印を入れて返す。
+    """
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as err:
+        raise InvalidBulkBodyError("request body must be UTF-8") from err
+    if content_type.split(";")[0].strip() == NDJSON_MEDIA_TYPE:
+        items = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                items.append(_INVALID_JSON)
+        return items
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError as err:
+        raise InvalidBulkBodyError("invalid request body") from err
+    if not isinstance(items, list):
+        raise InvalidBulkBodyError("request body must be a JSON array")
+    return items
+
+
+def validate_entries(items: List[Any]) -> Tuple[List[Tuple[int, Entry]], List[BulkItemError]]:
+    """全件を1回の走査で検証し、有効なエントリーと位置ごとのエラーに振り分ける"""
+    valid: List[Tuple[int, Entry]] = []
+    errors: List[BulkItemError] = []
+    for index, item in enumerate(items):
+        if item is _INVALID_JSON:
+            errors.append(BulkItemError(index=index, errors=[BulkItemErrorDetail(
+                loc=[], msg="Invalid JSON", type="json_invalid")]))
+            continue
+        try:
+            valid.append((index, Entry.model_validate(item)))
+        except ValidationError as err:
+            errors.append(BulkItemError(index=index, errors=[
+                BulkItemErrorDetail(loc=list(e["loc"]), msg=e["msg"], type=e["type"])
+                for e in err.errors(include_url=False)
+            ]))
+    return valid, errors
+
+
+def latest_entries(
+    entries: List[Tuple[int, Entry]],
+) -> Tuple[List[Tuple[int, Entry]], List[BulkItemError]]:
+    """同じユーザー・記録日のエントリーが重複する場合は最後のエントリーを採用し、残りをエラーにする"""
+    latest = {}
+    for index, entry in entries:
+        latest[(entry.user_id, entry.record_date)] = index
+    unique_entries: List[Tuple[int, Entry]] = []
+    errors: List[BulkItemError] = []
+    for index, entry in entries:
+        winner = latest[(entry.user_id, entry.record_date)]
+        if winner == index:
+            unique_entries.append((index, entry))
+        else:
+            errors.append(BulkItemError(index=index, errors=[BulkItemErrorDetail(
+                loc=["record_date"],
+                msg=f"superseded by entry {winner} with the same record_date",
+                type="duplicate_record_date")]))
+    return unique_entries, errors
+
+
+async def bulk_upsert(
+    collection: AsyncCollection, requests: list,
+) -> Tuple[Dict[int, Any], Dict[int, str]]:
+    """
+    ordered=Falseのbulk_writeを実行し、（位置→新規追加した_id、位置→エラーメッセージ）を返す。
+    一部の書き込みに失敗しても残りは保存される。
+    """
+    try:
+        result = await collection.bulk_write(requests, ordered=False)
+        return result.upserted_ids, {}
+    except BulkWriteError as err:
+        upserted = {u["index"]: u["_id"] for u in err.details.get("upserted", [])}
+        failed = {e["index"]: e["errmsg"] for e in err.details.get("writeErrors", [])}
+        return upserted, failed
+
+
+def write_error(index: int, message: str) -> BulkItemError:
+    return BulkItemError(index=index, errors=[BulkItemErrorDetail(
+        loc=[], msg=message, type="write_error")])
+
+
+async def upsert_entries(
+    collection: AsyncCollection,
+    entries: List[Tuple[int, Entry]],
+    chunk_size: int,
+) -> Tuple[List[BulkEntryResult], List[BulkEntryResult], List[BulkItemError]]:
+    """
+    検証済みエントリーをchunk_size件ずつordered=Falseのbulk_writeでupsertする。
+    同じ記録日のエントリーは置き換えるため、再送しても重複しない。
+    一部の書き込みに失敗しても残りは保存され、失敗分は位置ごとのエラーとして返す。
+    戻り値は（新規追加、置き換え、エラー）。
+    """
+    inserted: List[BulkEntryResult] = []
+    updated: List[BulkEntryResult] = []
+    unique_entries, errors = latest_entries(entries)
+
+    for start in range(0, len(unique_entries), chunk_size):
+        chunk = unique_entries[start:start + chunk_size]
+        # idは必ず除外し、メモの検索語と書き込み時刻を追加する
+        updated_at = change_time()
+        documents = [
+            {**with_memo_terms(entry.model_dump(
+                mode="json", exclude_none=True, exclude={"id"})),
+             UPDATED_AT_FIELD: updated_at}
+            for _, entry in chunk
+        ]
+        requests = [
+            ReplaceOne(entry_key(document), document, upsert=True)
+            for document in documents
+        ]
+        upserted, failed = await bulk_upsert(collection, requests)
+
+        # 置き換えたエントリーはbulk_writeの結果に_idが含まれないため、まとめて引く
+        replaced = [position for position in range(len(chunk))
+                    if position not in upserted and position not in failed]
+        replaced_ids = {}
+        if replaced:
+            docs = await collection.find(
+                {"$or": [entry_key(documents[position]) for position in replaced]},
+                projection={"_id": 1, "user_id": 1, "record_date": 1})
+            replaced_ids = {(doc.get("user_id"), doc["record_date"]): doc["_id"]
+                            for doc in docs}
+
+        for position, (index, _) in enumerate(chunk):
+            if position in failed:
+                errors.append(write_error(index, failed[position]))
+            elif position in upserted:
+                inserted.append(BulkEntryResult(
+                    index=index, id=str(upserted[position])))
+            else:
+                document = documents[position]
+                doc_id = replaced_ids.get(
+                    (document.get("user_id"), document["record_date"]))
+                updated.append(BulkEntryResult(index=index, id=str(doc_id)))
+    return inserted, updated, errors
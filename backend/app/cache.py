@@ -0,0 +1,190 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from .compression import ResponseCompressor, weak_etag
+
+# 1件あたりのキー・管理用オブジェクトのおおよそのバイト数（本文とキーの文字列以外）
+_ENTRY_OVERHEAD = 256
+
+# 同じユーザーでもクエリパラメータが異なれば別のレスポンスとして扱う
+CacheKey = Tuple[Optional[str], str, str]
+
+
+@dataclass
+class CachedResponse:
+    key: "CacheKey"
+    body: bytes
+    etag: str
+    media_type: str
+    expires_at: float
+    size: int
+    # 圧縮方式ごとの圧縮済みの本文（同じレスポンスを返すたびに圧縮し直さない）
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+def cache_key(user_id: Optional[str], request: Request) -> CacheKey:
+    """ユーザー・パス・並べ替えたクエリパラメータからキャッシュキーを作る"""
+    query = "&".join(
+        f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    return (user_id, request.url.path, query)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Matchヘッダー（カンマ区切り・弱いETag・*を含む）がETagに一致するか"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    シリアライズ済みレスポンスのバイト列を保持するLRU/TTLキャッシュ。
+    上限は件数ではなくバイト数で管理し、超えた分は最も古く使われたものから追い出す。
+    書き込み時はそのユーザーのレスポンスだけを無効化する。
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float,
+                 clock: Callable[[], float] = time.monotonic, max_users: int = 10000):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max(max_users, 1)
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._keys_by_user: Dict[Optional[str], Set[CacheKey]] = {}
+        # 書き込みのたびに増える世代番号（読み込み中に書き込まれた古いレスポンスを保存しないため）。
+        # max_usersまで保持し、超えると最も古く書き込まれたユーザーから追い出す
+        self._generations: "OrderedDict[Optional[str], int]" = OrderedDict()
+        # 追い出したユーザーの世代番号の最大値。保持していないユーザーの世代番号はこの値とし、
+        # 追い出しの前後で世代番号が減らない（書き込みの前と同じ番号に戻らない）ようにする
+        self._evicted_generation = 0
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def generation(self, user_id: Optional[str]) -> int:
+        return self._generations.get(user_id, self._evicted_generation)
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: CacheKey, body: bytes, media_type: str,
+            generation: int) -> CachedResponse:
+        """
+        レスポンスを保存して返す。
+        読み込み開始時点（generation）以降にそのユーザーへの書き込みがあった場合や、
+        1件で上限を超える場合は保存せずにそのまま返す。
+        """
+        user_id = key[0]
+        size = len(body) + len(key[1]) + len(key[2]) + _ENTRY_OVERHEAD
+        entry = CachedResponse(
+            key=key, body=body, etag=make_etag(body), media_type=media_type,
+            expires_at=self._clock() + self.ttl_seconds, size=size)
+        if generation != self.generation(user_id) or size > self.max_bytes:
+            return entry
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._keys_by_user.setdefault(user_id, set()).add(key)
+        self.current_bytes += size
+        self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def encoded_body(self, entry: CachedResponse, encoding: str,
+                     compressor: ResponseCompressor) -> bytes:
+        """
+        圧縮済みの本文を返す（初回だけ圧縮してentryに保存する）。
+        キャッシュに残っているentryの場合は、圧縮済みの本文も使用量に含める。
+        """
+        body = entry.encoded.get(encoding)
+        if body is not None:
+            return body
+        body = entry.encoded[encoding] = compressor.compress(entry.body, encoding)
+        if self._entries.get(entry.key) is entry:
+            entry.size += len(body)
+            self.current_bytes += len(body)
+            self._evict()
+        return body
+
+    def invalidate(self, user_id: Optional[str]) -> None:
+        """そのユーザーのキャッシュをすべて破棄する（書き込み経路から呼ぶ）"""
+        self._generations[user_id] = self.generation(user_id) + 1
+        self._generations.move_to_end(user_id)
+        while len(self._generations) > self.max_users:
+            _, generation = self._generations.popitem(last=False)
+            self._evicted_generation = max(self._evicted_generation, generation)
+        for key in self._keys_by_user.pop(user_id, set()):
+            entry = self._entries.pop(key)
+            self.current_bytes -= entry.size
+            self.invalidations += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+        keys = self._keys_by_user[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_user[key[0]]
+
+
+def cached_response(request: Request, entry: CachedResponse,
+                    cache: Optional[ResponseCache] = None,
+                    compressor: Optional[ResponseCompressor] = None) -> Response:
+    """
+    キャッシュしたレスポンスを返す（If-None-MatchがETagに一致すれば304）。
+    compressorを指定すると、Accept-Encodingに応じて圧縮済みの本文を再利用して返す
+    （CompressionMiddlewareはContent-Encodingのあるレスポンスを圧縮し直さない）。
+    """
+    # ユーザーごとのレスポンスのため共有キャッシュには保存させず、毎回ETagで再検証させる
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    encoding = None
+    if compressor is not None and compressor.enabled:
+        headers["Vary"] = "Accept-Encoding"
+        if len(entry.body) >= compressor.minimum_size:
+            encoding = compressor.negotiate(request.headers.get("accept-encoding"))
+    if encoding is not None:
+        headers["ETag"] = weak_etag(entry.etag)
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+    body = (cache.encoded_body(entry, encoding, compressor) if cache is not None
+            else entry.encoded.get(encoding) or compressor.compress(entry.body, encoding))
+    headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=entry.media_type, headers=headers)
@@ -0,0 +1,241 @@
+import base64
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+
+from .constants import DB
+from .db import AsyncCollection, DatabaseExecutor
+from .pagination import InvalidCursorError
+
+# エントリーを書き込んだ時刻を保存するフィールド（変更の取得に使う）
+UPDATED_AT_FIELD = "updated_at"
+# 変更の取得順（書き込んだ時刻の古い順、同時刻は_idの昇順）
+# 書き込み時刻のないエントリー（この仕組みの導入前に保存したもの）はnullとして先頭に並ぶ
+CHANGES_SORT = [(UPDATED_AT_FIELD, 1), ("_id", 1)]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+def change_time() -> datetime:
+    """書き込み時刻（BSONの日時と同じミリ秒精度に切り捨てる）"""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """MongoDBから読み出した日時（タイムゾーンなしのUTC）をUTCの日時にする"""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _to_ms(value: datetime) -> int:
+    return (value - _EPOCH) // _MILLISECOND
+
+
+def _from_ms(value: int) -> datetime:
+    return _EPOCH + value * _MILLISECOND
+
+
+@dataclass(frozen=True)
+class ChangeToken:
+    """
+    変更の取得位置。
+    watermark以降に書き込まれたエントリーは、次にこのトークンで取得すると必ず含まれる。
+    afterはページの途中の位置（最後に返したエントリーの(updated_at, _id)）で、続きはその次から返す。
+    """
+    watermark: datetime
+    after: Optional[Tuple[Optional[datetime], Any]] = None
+
+
+def encode_change_token(token: ChangeToken) -> str:
+    """ChangeTokenを不透明なトークン文字列にする"""
+    payload: dict = {"w": _to_ms(token.watermark)}
+    if token.after is not None:
+        updated_at, doc_id = token.after
+        payload.update({
+            "t": None if updated_at is None else _to_ms(updated_at),
+            "i": str(doc_id),
+            "o": isinstance(doc_id, ObjectId),
+        })
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_change_token(token: str) -> ChangeToken:
+    """トークン文字列をChangeTokenに戻す"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        watermark = _from_ms(int(payload["w"]))
+        after = None
+        if "i" in payload:
+            updated_at = None if payload["t"] is None else _from_ms(int(payload["t"]))
+            doc_id = ObjectId(payload["i"]) if payload["o"] else payload["i"]
+            after = (updated_at, doc_id)
+    except (ValueError, TypeError, KeyError, OverflowError, InvalidId) as err:
+        raise InvalidCursorError("invalid change token") from err
+    return ChangeToken(watermark=watermark, after=after)
+
+
+def changes_lower_bound(token: Optional[ChangeToken]) -> Optional[datetime]:
+    """トークンの位置より後のエントリーが持つ書き込み時刻の下限（書き込み時刻のないものも含む場合はNone）"""
+    if token is None:
+        return None
+    if token.after is None:
+        return token.watermark
+    return token.after[0]
+
+
+def build_changes_query(user_id: str, token: Optional[ChangeToken]) -> dict:
+    """
+    トークンの位置より後に書き込まれたエントリーの検索条件。
+    常にuser_idの等価条件を含むため、(user_id, updated_at, _id)の複合インデックスで
+    変更のあったドキュメントだけを走査する。
+    """
+    query: dict = {"user_id": user_id}
+    if token is None:
+        return query
+    if token.after is None:
+        query[UPDATED_AT_FIELD] = {"$gte": token.watermark}
+        return query
+    updated_at, doc_id = token.after
+    if updated_at is None:
+        # 書き込み時刻のないエントリーの続きと、書き込み時刻のあるすべてのエントリー
+        query["$or"] = [
+            {UPDATED_AT_FIELD: None, "_id": {"$gt": doc_id}},
+            {UPDATED_AT_FIELD: {"$ne": None}},
+        ]
+    else:
+        query["$or"] = [
+            {UPDATED_AT_FIELD: {"$gt": updated_at}},
+            {UPDATED_AT_FIELD: updated_at, "_id": {"$gt": doc_id}},
+        ]
+    return query
+
+
+def change_key(doc: dict) -> tuple:
+    """CHANGES_SORTと同じ順序の並べ替えキー（書き込み時刻のないエントリーが先頭）"""
+    updated_at = doc.get(UPDATED_AT_FIELD)
+    return (updated_at is not None, updated_at or _EPOCH, doc["_id"])
+
+
+def is_after(doc: dict, token: Optional[ChangeToken]) -> bool:
+    """エントリーがトークンの位置より後に書き込まれたか（build_changes_queryと同じ条件）"""
+    if token is None:
+        return True
+    updated_at = doc.get(UPDATED_AT_FIELD)
+    if token.after is None:
+        return updated_at is not None and updated_at >= token.watermark
+    after_updated_at, after_id = token.after
+    return change_key(doc) > change_key({UPDATED_AT_FIELD: after_updated_at, "_id": after_id})
+
+
+def next_change_token(docs: list, limit: int, token: Optional[ChangeToken],
+                      now: datetime, lag: timedelta) -> Tuple[ChangeToken, bool]:
+    """
+    limit+1件まで取得した変更から、次回のトークンと続きの有無を返す。
+    続きがある場合は最後に返すエントリーの位置を、最後のページでは読み出し開始時刻からlag前を
+    次回の起点にする（書き込み時刻を決めてからDBに反映されるまでの間に読み出した場合や、
+    サーバー間の時計のずれで取りこぼさないよう、直近lagの間の変更は次回も返す）。
+    ページをたどる間は最初のページの起点を引き継ぐ。
+    """
+    watermark = token.watermark if token is not None and token.after is not None else now - lag
+    if len(docs) > limit:
+        last = docs[limit - 1]
+        return ChangeToken(
+            watermark=watermark,
+            after=(last.get(UPDATED_AT_FIELD), last["_id"])), True
+    return ChangeToken(watermark=watermark), False
+
+
+class ChangeCounter:
+    """
+    ユーザーごとのエントリーの書き込み回数（entry_versionsコレクションの {"_id": user_id, "version": n}）。
+    エントリーを書き込んだ後に$incで1ずつ進めるため、書き込み時刻と違い、
+    プロセス間の時計のずれや同じミリ秒の書き込み、書き込み時刻を決めてからDBに反映されるまでの
+    順序の入れ替わりがあっても、書き込みがあれば必ず値が変わる。
+    """
+
+    def __init__(self, collection: AsyncCollection):
+        self._collection = collection
+
+    async def current(self, user_id: str) -> int:
+        """書き込み回数を返す（書き込んだことのないユーザーは0）"""
+        doc = await self._collection.find_one(
+            {"_id": user_id}, projection={"_id": 0, "version": 1})
+        return doc["version"] if doc else 0
+
+    async def bump(self, user_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        エントリーを書き込んだユーザーの書き込み回数を1ずつ進め、進めた後の値を返す。
+        書き込みの前に進めると、進めた後・書き込む前に読み出した古い内容が新しい回数で保持されるため、
+        必ず書き込みの後に呼ぶ。
+        """
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return {}
+        if len(user_ids) == 1:
+            doc = await self._collection.find_one_and_update(
+                {"_id": user_ids[0]}, {"$inc": {"version": 1}},
+                projection={"_id": 0, "version": 1}, upsert=True,
+                return_document=ReturnDocument.AFTER)
+            return {user_ids[0]: doc["version"]}
+        await self._collection.bulk_write([
+            UpdateOne({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+            for user_id in user_ids], ordered=False)
+        # 進めた後に他のプロセスがさらに進めていれば、その値が返る（ChangeTracker.advanceは進めない）
+        docs = await self._collection.find(
+            {"_id": {"$in": user_ids}}, projection={"version": 1})
+        return {doc["_id"]: doc["version"] for doc in docs}
+
+
+def change_counter(database, executor: DatabaseExecutor) -> ChangeCounter:
+    return ChangeCounter(AsyncCollection(database[DB.ENTRY_VERSIONS_COLLECTION], executor))
+
+
+class ChangeTracker:
+    """
+    ユーザーごとに、このプロセスが最後に確認した書き込み回数（ChangeCounter）を保持するLRU。
+    複数のプロセス（ワーカー・インスタンス）で動かす場合に、他のプロセスの書き込みで
+    このプロセスの読み出しキャッシュ・予測モデルが古くなったことを検出するために使う。
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _remember(self, user_id: str, version: int) -> None:
+        self._seen[user_id] = version
+        self._seen.move_to_end(user_id)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+
+    def observe(self, user_id: str, version: int) -> bool:
+        """
+        書き込み回数を記録し、前回の確認から変わった場合にTrueを返す。
+        確認したことのない（追い出した）ユーザーは、それまでの書き込みを知らないためTrueを返す。
+        """
+        changed = self._seen.get(user_id) != version
+        self._remember(user_id, version)
+        return changed
+
+    def advance(self, versions: Dict[str, int]) -> None:
+        """
+        このプロセスの書き込みで進めた書き込み回数を記録する（書き込み時にキャッシュ・予測モデルは更新済み）。
+        前回の確認から自分の1回しか進んでいない場合だけ記録し、他のプロセスの書き込みが
+        間に入った場合は、次の読み出しで変更として検出させるため記録しない。
+        """
+        for user_id, version in versions.items():
+            if self._seen.get(user_id) == version - 1:
+                self._remember(user_id, version)
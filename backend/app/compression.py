@@ -0,0 +1,230 @@
+import logging
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotliは任意の依存（未インストールならgzipだけを使う）
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+GZIP = "gzip"
+BROTLI = "br"
+SUPPORTED_ENCODINGS = (BROTLI, GZIP)
+
+# 圧縮する本文の種類（画像などの圧縮済みの形式は対象にしない）
+_COMPRESSIBLE_TYPES = {"application/json", "application/x-ndjson"}
+
+
+def compressible(media_type: Optional[str]) -> bool:
+    if not media_type:
+        return False
+    media_type = media_type.split(";")[0].strip().lower()
+    return (media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES
+            or media_type.endswith("+json"))
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encodingヘッダーを（方式→q値）にする（q値が不正な方式は無視する）"""
+    weights: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = -1.0
+        if q >= 0:
+            weights[coding] = q
+    return weights
+
+
+def weak_etag(etag: str) -> str:
+    """圧縮した本文は元の本文とバイト列が異なるため、ETagを弱いETagにする"""
+    return etag if etag.startswith("W/") else "W/" + etag
+
+
+class StreamCompressor:
+    """分割して届く本文を順に圧縮する（チャンクごとにフラッシュして途中まで送れるようにする）"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == BROTLI:
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=16+MAX_WBITSでgzip形式（ヘッダーの更新日時は0）にする
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == BROTLI:
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, chunk: bytes = b"") -> bytes:
+        if self.encoding == BROTLI:
+            return self._brotli.process(chunk) + self._brotli.finish()
+        return self._zlib.compress(chunk) + self._zlib.flush()
+
+
+class ResponseCompressor:
+    """
+    レスポンスの圧縮方式の選択と圧縮を行う。
+    encodingsはサーバー側の優先順で、クライアントのq値が同じ場合は先の方式を選ぶ。
+    """
+
+    def __init__(self, encodings: Iterable[str], minimum_size: int,
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.encodings: List[str] = []
+        for encoding in encodings:
+            if encoding == BROTLI and brotli is None:
+                logger.info("brotli is not installed; br compression is disabled")
+                continue
+            if encoding not in SUPPORTED_ENCODINGS:
+                raise ValueError(f"unsupported compression encoding: {encoding}")
+            self.encodings.append(encoding)
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.encodings)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Accept-Encodingから使う圧縮方式を選ぶ（圧縮しない場合はNone）"""
+        if not self.encodings or not accept_encoding:
+            return None
+        weights = parse_accept_encoding(accept_encoding)
+        best: Tuple[float, Optional[str]] = (0.0, None)
+        for encoding in self.encodings:
+            q = weights.get(encoding, weights.get("*", 0.0))
+            if q > best[0]:
+                best = (q, encoding)
+        return best[1]
+
+    def stream(self, encoding: str) -> StreamCompressor:
+        return StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        return self.stream(encoding).finish(body)
+
+
+class CompressionMiddleware:
+    """
+    レスポンスの本文を圧縮するASGIミドルウェア。
+    minimum_size未満の本文、圧縮に向かない種類、すでにContent-Encodingのある
+    レスポンス（読み出しキャッシュの圧縮済み本文など）はそのまま返す。
+    ストリーミングのレスポンス（エクスポート）はチャンクごとに圧縮して送る。
+    """
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] == "HEAD"
+                or not self.compressor.enabled):
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = self.compressor.negotiate(accept_encoding)
+        compressor = self.compressor
+        start_message = None
+        stream: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # 本文の大きさと続きの有無が分かるまで、ヘッダーの送信を保留する
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if stream is not None:
+                more_body = message.get("more_body", False)
+                body = message.get("body", b"")
+                chunk = stream.compress(body) if more_body else stream.finish(body)
+                await send({"type": "http.response.body", "body": chunk,
+                            "more_body": more_body})
+                return
+
+            headers = _Headers(start_message["headers"])
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if (not compressible(headers.get("content-type"))
+                    or headers.get("content-encoding") is not None):
+                passthrough = True
+            else:
+                # 圧縮しない場合もAccept-Encodingによって本文が変わることを示す
+                headers.add_vary("Accept-Encoding")
+                start_message = {**start_message, "headers": headers.raw}
+                passthrough = encoding is None or (
+                    not more_body and len(body) < compressor.minimum_size)
+            if passthrough:
+                await send(start_message)
+                await send(message)
+                return
+
+            headers.set("content-encoding", encoding)
+            etag = headers.get("etag")
+            if etag is not None:
+                headers.set("etag", weak_etag(etag))
+            if more_body:
+                stream = compressor.stream(encoding)
+                headers.remove("content-length")
+                body = stream.compress(body)
+            else:
+                body = compressor.compress(body, encoding)
+                headers.set("content-length", str(len(body)))
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body,
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class _Headers:
+    """ASGIのヘッダー（(bytes, bytes)のリスト）を名前で読み書きする"""
+
+    def __init__(self, raw):
+        self.raw = list(raw)
+
+    def get(self, name: str) -> Optional[str]:
+        key = name.encode("latin-1")
+        for header, value in self.raw:
+            if header.lower() == key:
+                return value.decode("latin-1")
+        return None
+
+    def remove(self, name: str) -> None:
+        key = name.encode("latin-1")
+        self.raw = [(h, v) for h, v in self.raw if h.lower() != key]
+
+    def set(self, name: str, value: str) -> None:
+        self.remove(name)
+        self.raw.append((name.encode("latin-1"), value.encode("latin-1")))
+
+    def add_vary(self, value: str) -> None:
+        vary = self.get("vary")
+        if vary is None:
+            self.set("vary", value)
+        elif value.lower() not in vary.lower():
+            self.set("vary", f"{vary}, {value}")
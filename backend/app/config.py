@@ -0,0 +1,368 @@
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Tuple
+
+
+def _env_str(name: str, default: str) -> str:
+    """文字列の環境変数を読み込む（未設定・空文字はデフォルト値）"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    """整数の環境変数を読み込む（未設定・空文字はデフォルト値）"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """真偽値の環境変数を読み込む（1/true/yes/onを真とする。未設定・空文字はデフォルト値）"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# MongoClientがサーバーごとに開く監視用の接続数（ハートビートとRTT計測）×レプリカセットのノード数（Atlasは3）
+MONITOR_CONNECTIONS = 2 * 3
+
+
+@dataclass(frozen=True)
+class MongoSettings:
+    """MongoDB接続とデータアクセス層の設定"""
+
+    # DB呼び出しを実行するスレッドプールのワーカー数
+    executor_threads: int = 10
+    # MongoClientのコネクションプール上限（connection_limitに収まるよう切り詰める）
+    max_pool_size: int = 10
+    # 常に確保しておく接続数（pymongoがバックグラウンドで接続を開き、維持する）
+    min_pool_size: int = 0
+    # 1回のDB操作のタイムアウト（ミリ秒、待ち行列での待機を含む。0で無効）
+    timeout_ms: int = 10000
+    # コネクションプールの空きを待つ最大時間（ミリ秒、0で無制限）
+    # timeoutMSを指定している間はpymongoが操作の残り時間を上限にするため、timeout_ms=0の場合にだけ使われる
+    wait_queue_timeout_ms: int = 0
+    # 接続先のサーバーが見つかるまで待つ最大時間（ミリ秒、timeoutMSの残り時間の方が短ければそちら）
+    server_selection_timeout_ms: int = 5000
+    # クラスターが受け付ける同時接続数の上限（Atlas M0は100）
+    connection_limit: int = 100
+    # 同じクラスターに接続するアプリのインスタンス数（Cloud Runの最大インスタンス数など）
+    app_instances: int = 1
+    # 1インスタンスあたりのワーカープロセス数（SERVER_WORKERS。プロセスごとにMongoClientを持つ）
+    workers: int = 1
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        settings = cls(
+            executor_threads=_env_int(
+                "MONGO_EXECUTOR_THREADS", cls.executor_threads),
+            max_pool_size=_env_int("MONGO_MAX_POOL_SIZE", cls.max_pool_size),
+            min_pool_size=_env_int("MONGO_MIN_POOL_SIZE", cls.min_pool_size),
+            timeout_ms=_env_int("MONGO_TIMEOUT_MS", cls.timeout_ms),
+            wait_queue_timeout_ms=_env_int(
+                "MONGO_WAIT_QUEUE_TIMEOUT_MS", cls.wait_queue_timeout_ms),
+            server_selection_timeout_ms=_env_int(
+                "MONGO_SERVER_SELECTION_TIMEOUT_MS", cls.server_selection_timeout_ms),
+            connection_limit=_env_int(
+                "MONGO_CONNECTION_LIMIT", cls.connection_limit),
+            app_instances=_env_int("MONGO_APP_INSTANCES", cls.app_instances),
+            workers=_env_int("SERVER_WORKERS", cls.workers),
+        )
+        if settings.pool_budget < 1:
+            raise ValueError(
+                f"MONGO_APP_INSTANCES={settings.app_instances} x SERVER_WORKERS={settings.workers} "
+                f"leaves no connections under MONGO_CONNECTION_LIMIT={settings.connection_limit}")
+        return settings
+
+    @property
+    def processes(self) -> int:
+        """同じクラスターに接続するアプリのプロセス数の合計"""
+        return self.app_instances * self.workers
+
+    @property
+    def pool_budget(self) -> int:
+        """1プロセスのコネクションプールに割り当てられる接続数（監視用の接続を除く）"""
+        return self.connection_limit // self.processes - MONITOR_CONNECTIONS
+
+    @property
+    def effective_max_pool_size(self) -> int:
+        return min(self.max_pool_size, self.pool_budget)
+
+    @property
+    def executor_timeout(self) -> Optional[float]:
+        """DatabaseExecutorのタイムアウト（秒、Noneで無制限）"""
+        return self.timeout_ms / 1000 if self.timeout_ms > 0 else None
+
+    def client_options(self) -> dict:
+        """MongoClientに渡す接続オプション"""
+        max_pool_size = self.effective_max_pool_size
+        options = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min(self.min_pool_size, max_pool_size),
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+        }
+        if self.timeout_ms > 0:
+            options["timeoutMS"] = self.timeout_ms
+        if self.wait_queue_timeout_ms > 0:
+            options["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        return options
+
+
+@dataclass(frozen=True)
+class ServerSettings:
+    """HTTPサーバー（python -m app.server で起動するuvicorn）の設定"""
+
+    host: str = "0.0.0.0"
+    # Cloud RunはPORTで待ち受けるポートを指定する
+    port: int = 8080
+    # ワーカープロセス数（各ワーカーがMongoClient・キャッシュなどを別々に持つ）
+    workers: int = 1
+    # 終了時（SIGTERM）に処理中のリクエストと書き込みキューの書き込みを待つ最大時間（秒）
+    # Cloud RunはSIGTERMの10秒後に強制終了するため、それより短くする
+    graceful_shutdown_seconds: int = 8
+
+    @classmethod
+    def from_env(cls) -> "ServerSettings":
+        settings = cls(
+            host=_env_str("SERVER_HOST", cls.host),
+            port=_env_int("PORT", cls.port),
+            workers=_env_int("SERVER_WORKERS", cls.workers),
+            graceful_shutdown_seconds=_env_int(
+                "SERVER_GRACEFUL_SHUTDOWN_SECONDS", cls.graceful_shutdown_seconds),
+        )
+        if settings.workers < 1:
+            raise ValueError(f"SERVER_WORKERS must be at least 1: {settings.workers}")
+        return settings
+
+
+@dataclass(frozen=True)
+class BulkSettings:
+    """一括登録APIの設定"""
+
+    # bulk_write 1回あたりの件数
+    chunk_size: int = 500
+    # 1リクエストで受け付ける最大件数
+    max_entries: int = 10000
+    # 1リクエストで受け付けるボディの最大バイト数（超えた時点で読み込みをやめる）
+    max_bytes: int = 16 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls) -> "BulkSettings":
+        return cls(
+            chunk_size=_env_int("BULK_INSERT_CHUNK_SIZE", cls.chunk_size),
+            max_entries=_env_int("BULK_MAX_ENTRIES", cls.max_entries),
+            max_bytes=_env_int("BULK_MAX_BYTES", cls.max_bytes),
+        )
+
+
+@dataclass(frozen=True)
+class StartupSettings:
+    """起動処理の設定"""
+
+    # Trueの場合、インデックス作成・接続確認・予測モデルの読み込みを起動完了後にバックグラウンドで行う
+    # （Falseの場合はインデックス作成が終わるまでリクエストを受け付けない）
+    background_init: bool = False
+
+    @classmethod
+    def from_env(cls) -> "StartupSettings":
+        return cls(
+            background_init=_env_bool(
+                "STARTUP_BACKGROUND_INIT", cls.background_init),
+        )
+
+
+@dataclass(frozen=True)
+class StorageSettings:
+    """エントリーの保存形式の設定"""
+
+    # documents: 1日1ドキュメント / buckets: ユーザー・月ごとに1ドキュメント
+    layout: str = "documents"
+
+    @classmethod
+    def from_env(cls) -> "StorageSettings":
+        layout = _env_str("ENTRY_STORAGE_LAYOUT", cls.layout)
+        if layout not in ("documents", "buckets"):
+            raise ValueError(
+                f"ENTRY_STORAGE_LAYOUT must be documents or buckets: {layout}")
+        return cls(layout=layout)
+
+
+@dataclass(frozen=True)
+class ChangesSettings:
+    """変更の取得（GET /entries/changes）の設定"""
+
+    # 直近この時間（ミリ秒）の変更は次回の取得でも返す。
+    # 書き込み時刻を決めてからDBに反映されるまでの最大時間（MONGO_TIMEOUT_MS）と
+    # サーバー間の時計のずれの合計より長くする
+    lag_ms: int = 15000
+
+    @classmethod
+    def from_env(cls) -> "ChangesSettings":
+        return cls(lag_ms=_env_int("CHANGES_LAG_MS", cls.lag_ms))
+
+    @property
+    def lag(self) -> timedelta:
+        return timedelta(milliseconds=self.lag_ms)
+
+
+@dataclass(frozen=True)
+class CacheSettings:
+    """読み出しレスポンスキャッシュの設定"""
+
+    # キャッシュ全体の上限（バイト数、0で無効）
+    max_bytes: int = 32 * 1024 * 1024
+    # 1件あたりの有効期間（秒）
+    ttl_seconds: int = 300
+    # 書き込みを検出するための世代番号を保持するユーザー数の上限
+    max_users: int = 10000
+
+    @classmethod
+    def from_env(cls) -> "CacheSettings":
+        return cls(
+            max_bytes=_env_int("CACHE_MAX_BYTES", cls.max_bytes),
+            ttl_seconds=_env_int("CACHE_TTL_SECONDS", cls.ttl_seconds),
+            max_users=_env_int("CACHE_MAX_USERS", cls.max_users),
+        )
+
+
+@dataclass(frozen=True)
+class InsightsSettings:
+    """分析結果（GET /insights）の設定"""
+
+    # 計算済みの結果を保持する件数の上限（ユーザー・パラメーターごとに1件、0で無効）
+    memo_size: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "InsightsSettings":
+        return cls(memo_size=_env_int("INSIGHTS_MEMO_SIZE", cls.memo_size))
+
+
+@dataclass(frozen=True)
+class PredictionSettings:
+    """気分スコア予測（GET /predict）の設定"""
+
+    # 予測モデルを保持するユーザー数の上限（超えると最も古く使われたユーザーのモデルを捨てる）
+    max_users: int = 10000
+
+    @classmethod
+    def from_env(cls) -> "PredictionSettings":
+        return cls(max_users=_env_int("PREDICTION_MAX_USERS", cls.max_users))
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    """レスポンス圧縮の設定"""
+
+    # 使う圧縮方式（優先順、空で無効。brはbrotliパッケージがある場合だけ使う）
+    encodings: Tuple[str, ...] = ("br", "gzip")
+    # この大きさ（バイト数）未満の本文は圧縮しない（小さい本文は圧縮してもほとんど減らない）
+    minimum_size: int = 1024
+    # gzipの圧縮レベル（1〜9）
+    gzip_level: int = 6
+    # brotliの品質（0〜11、動的なレスポンスのため圧縮率とCPU時間の釣り合う4を既定値にする）
+    brotli_quality: int = 4
+
+    @classmethod
+    def from_env(cls) -> "CompressionSettings":
+        value = os.getenv("COMPRESSION_ENCODINGS")
+        encodings = cls.encodings if value is None else tuple(
+            encoding.strip().lower() for encoding in value.split(",")
+            if encoding.strip() and encoding.strip().lower() != "none")
+        for encoding in encodings:
+            if encoding not in ("br", "gzip"):
+                raise ValueError(
+                    f"COMPRESSION_ENCODINGS must be a list of br and gzip: {value}")
+        return cls(
+            encodings=encodings,
+            minimum_size=_env_int("COMPRESSION_MIN_SIZE", cls.minimum_size),
+            gzip_level=_env_int("COMPRESSION_GZIP_LEVEL", cls.gzip_level),
+            brotli_quality=_env_int(
+                "COMPRESSION_BROTLI_QUALITY", cls.brotli_quality),
+        )
+
+
+@dataclass(frozen=True)
+class AuthSettings:
+    """トークン認証の設定"""
+
+    # 検証済みトークンを保持する件数の上限
+    token_cache_size: int = 10000
+    # 検証済みトークンの有効期間（秒、ユーザー削除などの反映はこの時間だけ遅れる）
+    token_cache_ttl_seconds: int = 300
+
+    @classmethod
+    def from_env(cls) -> "AuthSettings":
+        return cls(
+            token_cache_size=_env_int(
+                "AUTH_TOKEN_CACHE_SIZE", cls.token_cache_size),
+            token_cache_ttl_seconds=_env_int(
+                "AUTH_TOKEN_CACHE_TTL_SECONDS", cls.token_cache_ttl_seconds),
+        )
+
+
+@dataclass(frozen=True)
+class WriteBehindSettings:
+    """POST /entries の書き込みをまとめて行うキューの設定"""
+
+    # off: 1件ずつupsert / wait: まとめて書き込み、完了を待って応答 / ack: キューに入れた時点で応答
+    mode: str = "off"
+    # 1回の書き込みにまとめる最大件数
+    batch_size: int = 500
+    # 1件目をキューに入れてから書き込むまでの最大待ち時間（ミリ秒）
+    max_delay_ms: int = 20
+    # キューにためられる最大件数（超えた分は空きが出るまで待たせる）
+    max_pending: int = 10000
+    # キューの空きを待つ最大時間（ミリ秒、過ぎると503を返す）
+    enqueue_timeout_ms: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "WriteBehindSettings":
+        mode = _env_str("WRITE_BEHIND_MODE", cls.mode)
+        if mode not in ("off", "wait", "ack"):
+            raise ValueError(f"WRITE_BEHIND_MODE must be off, wait or ack: {mode}")
+        return cls(
+            mode=mode,
+            batch_size=_env_int("WRITE_BEHIND_BATCH_SIZE", cls.batch_size),
+            max_delay_ms=_env_int("WRITE_BEHIND_MAX_DELAY_MS", cls.max_delay_ms),
+            max_pending=_env_int("WRITE_BEHIND_MAX_PENDING", cls.max_pending),
+            enqueue_timeout_ms=_env_int(
+                "WRITE_BEHIND_ENQUEUE_TIMEOUT_MS", cls.enqueue_timeout_ms),
+        )
+
+
+@dataclass(frozen=True)
+class MetricsSettings:
+    """リクエスト計測の設定"""
+
+    # この時間（ミリ秒）以上かかったリクエストを警告ログに出力する（0で無効）
+    slow_request_ms: int = 0
+
+    @classmethod
+    def from_env(cls) -> "MetricsSettings":
+        return cls(
+            slow_request_ms=_env_int(
+                "METRICS_SLOW_REQUEST_MS", cls.slow_request_ms),
+        )
+
+    @property
+    def slow_request_seconds(self) -> Optional[float]:
+        return self.slow_request_ms / 1000 if self.slow_request_ms > 0 else None
+
+
+@dataclass(frozen=True)
+class HealthSettings:
+    """/healthz・/readyzの設定"""
+
+    # DBへのpingの結果をキャッシュする時間（ミリ秒、プローブの回数によらずpingはこの間隔で高々1回）
+    ping_cache_ms: int = 5000
+
+    @classmethod
+    def from_env(cls) -> "HealthSettings":
+        return cls(
+            ping_cache_ms=_env_int("HEALTH_PING_CACHE_MS", cls.ping_cache_ms),
+        )
@@ -4,3 +4,7 @@ class DB:
     DATABASE_NAME = "mindtrack"
     ENTRIES_COLLECTION = "entries"
     USERS_COLLECTION = "users"
+    # 月単位にまとめたエントリー（ENTRY_STORAGE_LAYOUT=bucketsの場合）
+    ENTRY_BUCKETS_COLLECTION = "entry_buckets"
+    # ユーザーごとのエントリーの書き込み回数（他のプロセスの書き込みの検出に使う）
+    ENTRY_VERSIONS_COLLECTION = "entry_versions"
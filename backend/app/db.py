@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from .metrics import MetricsRegistry
+
+
+class DatabaseTimeoutError(PyMongoError):
+    """DB操作が待ち行列での待機を含めて制限時間内に終わらなかった"""
+
+
+class DatabaseExecutor:
+    """
+    同期pymongoの呼び出しを専用のスレッドプールで実行する。
+    ワーカー数で同時実行数を制限し、イベントループをブロックしない。
+    """
+
+    def __init__(self, max_workers: int, timeout: float,
+                 metrics: Optional[MetricsRegistry] = None):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mongo")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # 指定した場合、AsyncCollection経由のDB操作の所要時間を記録する
+        self.metrics = metrics
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._pool, functools.partial(func, *args, **kwargs))
+        try:
+            # 待ち行列にいる間にタイムアウトした処理は実行前にキャンセルされる
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError as err:
+            raise DatabaseTimeoutError(
+                f"database operation timed out after {self.timeout}s") from err
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncCollection:
+    """pymongoのCollectionをDatabaseExecutor経由で非同期に扱うラッパー"""
+
+    def __init__(self, collection, executor: DatabaseExecutor):
+        self._collection = collection
+        self._executor = executor
+        self._metrics = getattr(executor, "metrics", None)
+        self._name = getattr(collection, "name", "unknown")
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args) -> Any:
+        """DB操作を実行し、計測が有効なら待ち行列での待機を含めた所要時間を記録する"""
+        if self._metrics is None:
+            return await self._executor.run(func, *args)
+        start = time.perf_counter()
+        try:
+            return await self._executor.run(func, *args)
+        finally:
+            self._metrics.observe_mongo(
+                self._name, operation, time.perf_counter() - start)
+
+    async def find(self, filter: Optional[dict] = None, **kwargs) -> List[dict]:
+        # カーソルの走査もネットワークI/Oを伴うため、スレッド内でリスト化する
+        def _find():
+            return list(self._collection.find(filter or {}, **kwargs))
+        return await self._run("find", _find)
+
+    async def find_one(self, filter: dict, **kwargs) -> Optional[dict]:
+        return await self._run(
+            "find_one",
+            functools.partial(self._collection.find_one, filter, **kwargs))
+
+    async def aggregate(self, pipeline: List[dict], **kwargs) -> List[dict]:
+        def _aggregate():
+            return list(self._collection.aggregate(pipeline, **kwargs))
+        return await self._run("aggregate", _aggregate)
+
+    async def find_batches(
+        self, filter: Optional[dict] = None, batch_size: int = 500, **kwargs
+    ) -> AsyncIterator[List[dict]]:
+        """
+        検索結果をbatch_size件ずつ返す。
+        一度に保持するのは1バッチ分だけなので、件数によらずメモリ使用量が一定になる。
+        """
+        cursor = await self._run("find", lambda: iter(self._collection.find(
+            filter or {}, batch_size=batch_size, **kwargs)))
+        try:
+            while True:
+                batch = await self._run(
+                    "get_more", lambda: list(itertools.islice(cursor, batch_size)))
+                if batch:
+                    yield batch
+                if len(batch) < batch_size:
+                    break
+        finally:
+            close = getattr(cursor, "close", None)
+            if close is not None:
+                await self._executor.run(close)
+
+    async def insert_one(self, document: dict):
+        return await self._run(
+            "insert_one", self._collection.insert_one, document)
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True):
+        return await self._run(
+            "insert_many", functools.partial(
+                self._collection.insert_many, documents, ordered=ordered))
+
+    async def find_one_and_replace(self, filter: dict, replacement: dict, **kwargs):
+        return await self._run(
+            "find_one_and_replace", functools.partial(
+                self._collection.find_one_and_replace, filter, replacement,
+                **kwargs))
+
+    async def find_one_and_update(self, filter: dict, update: dict, **kwargs):
+        return await self._run(
+            "find_one_and_update", functools.partial(
+                self._collection.find_one_and_update, filter, update, **kwargs))
+
+    async def bulk_write(self, requests: list, ordered: bool = True):
+        return await self._run(
+            "bulk_write", functools.partial(
+                self._collection.bulk_write, requests, ordered=ordered))
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from contextlib import aclosing
+from typing import AsyncIterator, Iterable, List
+
+from .models import entry_row
+
+# エクスポートの並び順（記録日の古い順）
+EXPORT_SORT = [("record_date", 1), ("_id", 1)]
+# DBから1回に取り出す件数（メモリ使用量の上限を決める）
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FIELDS = ["id", "record_date", "mood_score", "sleep_hours", "memo"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def export_row(doc: dict) -> dict:
+    """エクスポートする行（他環境・他ユーザーへ取り込めるようuser_idは含めない）"""
+    row = entry_row(doc)
+    del row["user_id"]
+    return row
+
+
+def format_ndjson(docs: Iterable[dict]) -> bytes:
+    return "".join(
+        json.dumps(export_row(doc), ensure_ascii=False) + "\n" for doc in docs
+    ).encode()
+
+
+def format_csv(docs: Iterable[dict], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(export_row(doc) for doc in docs)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+    first_batch: List[dict],
+    batches: AsyncIterator[List[dict]],
+    export_format: str,
+) -> AsyncIterator[bytes]:
+    """
+    バッチ単位でエクスポート形式に変換して返す。
+    先頭バッチは呼び出し元で取得済み（DBエラーをレスポンス開始前に検出するため）。
+    クライアントの切断などで途中で閉じられた場合も、batchesを閉じてDBのカーソルを解放する。
+    """
+    async with aclosing(batches):
+        if export_format == "csv":
+            yield format_csv(first_batch, header=True)
+            async for batch in batches:
+                yield format_csv(batch)
+        else:
+            if first_batch:
+                yield format_ndjson(first_batch)
+            async for batch in batches:
+                yield format_ndjson(batch)
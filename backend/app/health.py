@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class HealthCheck:
+    """
+    DBへのpingの結果をttl_secondsの間キャッシュする（/healthz・/readyz用）。
+    キャッシュが切れた時に同時に来たプローブは実行中の1回のpingの結果を待つため、
+    プローブの数によらずDBへのpingは有効期間ごとに高々1回になる。
+    """
+
+    def __init__(self, ping: Callable[[], Awaitable[object]], ttl_seconds: float):
+        self._ping = ping
+        self.ttl_seconds = ttl_seconds
+        self.ok: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.latency_seconds: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.pings = 0
+        self._inflight: Optional[asyncio.Task] = None
+
+    def _fresh(self) -> bool:
+        return (self.checked_at is not None
+                and time.monotonic() - self.checked_at < self.ttl_seconds)
+
+    async def check(self) -> bool:
+        """キャッシュが有効ならその結果を、切れていればpingして結果を返す"""
+        if self._fresh():
+            return self.ok
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._run())
+        # 待っているプローブがキャンセルされても、実行中のpingは他のプローブのために続ける
+        return await asyncio.shield(self._inflight)
+
+    async def _run(self) -> bool:
+        start = time.perf_counter()
+        try:
+            await self._ping()
+            self.ok, self.error = True, None
+        except PyMongoError as err:
+            logger.warning("database ping failed: %s", err)
+            self.ok, self.error = False, type(err).__name__
+        finally:
+            self.pings += 1
+            self.latency_seconds = time.perf_counter() - start
+            self.checked_at = time.monotonic()
+            self._inflight = None
+        return self.ok
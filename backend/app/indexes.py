@@ -0,0 +1,79 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+from .constants import DB
+
+logger = logging.getLogger(__name__)
+
+# エントリーコレクションのインデックス定義
+ENTRY_INDEXES = [
+    # 1ユーザー1日1件に制限する（add_entryのupsertキー）
+    IndexModel([("user_id", ASCENDING), ("record_date", ASCENDING)],
+               unique=True, name="user_record_date_unique"),
+    # ユーザーごとの日付範囲の読み出し・キーセットページング用（逆順の走査にも使える）
+    IndexModel([("user_id", ASCENDING), ("record_date", DESCENDING),
+                ("_id", DESCENDING)],
+               name="user_record_date_id"),
+    # メモの検索用（memo_termsは文字n-gramの配列のためマルチキーインデックスになる）
+    IndexModel([("user_id", ASCENDING), ("memo_terms", ASCENDING)],
+               name="user_memo_terms"),
+    # 変更の取得用（書き込み時刻の順のキーセットページング）
+    IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING),
+                ("_id", ASCENDING)],
+               name="user_updated_at_id"),
+]
+
+# ユーザー導入前のインデックス（record_dateだけの一意制約は他ユーザーと衝突するため削除する）
+OBSOLETE_ENTRY_INDEXES = ["record_date_unique", "record_date_id"]
+
+# 月ごとのバケット（ENTRY_STORAGE_LAYOUT=buckets）のインデックス定義
+BUCKET_INDEXES = [
+    # 1ユーザー1か月1バケットに制限する（1日分のupsertキー）。月の範囲の読み出しにも使う
+    IndexModel([("user_id", ASCENDING), ("month", ASCENDING)],
+               unique=True, name="user_month_unique"),
+    # 変更の取得用（最新の書き込み時刻が取得位置以降のバケットだけを読み出す）
+    IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING)],
+               name="user_updated_at"),
+]
+
+# ユーザーコレクションのインデックス定義
+USER_INDEXES = [
+    # トークン検証用（トークンはハッシュ値だけを保存する）
+    IndexModel([("token_hash", ASCENDING)],
+               unique=True, name="token_hash_unique"),
+]
+
+
+def entry_key(document: dict) -> dict:
+    """エントリーを一意に識別する条件（一意インデックスと同じキー）"""
+    return {"user_id": document["user_id"], "record_date": document["record_date"]}
+
+
+def _create_indexes(collection, indexes) -> None:
+    for index in indexes:
+        try:
+            collection.create_indexes([index])
+        except PyMongoError as err:
+            logger.warning(
+                "failed to create index %s: %s", index.document["name"], err)
+
+
+def ensure_indexes(database, layout: str = "documents") -> None:
+    """
+    起動時にインデックスを作成する（既に存在する場合は何もしない）。
+    既存データの重複などで作成できなくても起動は継続し、警告を出力する。
+    """
+    if layout == "buckets":
+        _create_indexes(database[DB.ENTRY_BUCKETS_COLLECTION], BUCKET_INDEXES)
+    entries = database[DB.ENTRIES_COLLECTION]
+    _create_indexes(entries, ENTRY_INDEXES)
+    try:
+        existing = entries.index_information()
+        for name in OBSOLETE_ENTRY_INDEXES:
+            if name in existing:
+                entries.drop_index(name)
+    except PyMongoError as err:
+        logger.warning("failed to drop obsolete indexes: %s", err)
+    _create_indexes(database[DB.USERS_COLLECTION], USER_INDEXES)
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# GET /insights のパラメーターのデフォルト値
+# （計算本体のapp.analyticsはnumpyを読み込むため、エンドポイントの定義からは参照しない）
+DEFAULT_WINDOW = 7
+DEFAULT_SLEEP_TARGET = 7.0
+
+# ユーザー・移動平均の件数・目標の睡眠時間
+InsightsKey = Tuple[str, int, float]
+
+
+class InsightsMemo:
+    """
+    計算済みの/insightsの本文を、計算時点のユーザーの世代番号（ResponseCache.generation）と組にして保持するLRU。
+    世代番号が変わっていなければ全履歴を読み直さずに返す。
+    世代番号はこのプロセスの書き込みのたびに進み、複数のワーカー・インスタンスで動かす場合は
+    他のプロセスの書き込みを検出した時（routes._discard_stale）にも進むため、古い結果を返さない。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[InsightsKey, Tuple[int, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: InsightsKey, generation: int) -> Optional[bytes]:
+        memo = self._entries.get(key)
+        if memo is None or memo[0] != generation:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return memo[1]
+
+    def put(self, key: InsightsKey, generation: int, content: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (generation, content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
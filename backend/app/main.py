@@ -1,71 +1,147 @@
+import asyncio
+import logging
 import os
-from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
-from pymongo.errors import PyMongoError
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager, suppress
 
-from .models import Entry, EntryResponse, EntriesResponse
-from .constants import DB
+# 環境変数の読み込み（設定を読む各モジュールのimportより先に行う。CI環境では.envを使わないため省く）
+if os.getenv("ENV") != "ci":
+    from dotenv import load_dotenv
+    load_dotenv()
 
-# 環境変数の読み込み
-load_dotenv()
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+
+from .constants import DB  # noqa: E402
+from .auth import TokenCache  # noqa: E402
+from .config import (  # noqa: E402
+    AuthSettings, CacheSettings, HealthSettings, InsightsSettings, MetricsSettings,
+    MongoSettings, PredictionSettings, StartupSettings, WriteBehindSettings,
+)
+from .cache import ResponseCache  # noqa: E402
+from .changes import ChangeTracker, change_counter  # noqa: E402
+from .compression import CompressionMiddleware  # noqa: E402
+from .db import DatabaseExecutor  # noqa: E402
+from .health import HealthCheck  # noqa: E402
+from .indexes import ensure_indexes  # noqa: E402
+from .insights import InsightsMemo  # noqa: E402
+from .metrics import MetricsMiddleware, PoolMetricsListener  # noqa: E402
+from .predictor import PredictionService  # noqa: E402
+from .responses import PydanticJSONResponse  # noqa: E402
+from .repository import entry_repository  # noqa: E402
+from .routes import (  # noqa: E402
+    API_SUMMARY, metrics_registry, response_compressor, router, storage_settings,
+)
+from .startup import warm_up  # noqa: E402
+from .write_queue import WriteBehindQueue  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+cache_settings = CacheSettings.from_env()
+auth_settings = AuthSettings.from_env()
+metrics_settings = MetricsSettings.from_env()
+write_behind_settings = WriteBehindSettings.from_env()
+health_settings = HealthSettings.from_env()
+insights_settings = InsightsSettings.from_env()
+prediction_settings = PredictionSettings.from_env()
 
 # 環境確認とDB接続URI取得
 env = os.getenv("ENV", "development")
 if env == "ci":
     # CI環境ではDB接続なし
     print("Running in CI mode - MongoDB connection skipped.")
-    app = FastAPI(summary="KokoroNotoAPI_WithCI")
+    app = FastAPI(
+        summary=f"{API_SUMMARY}_WithCI", default_response_class=PydanticJSONResponse)
 else:
     mongo_uri = os.getenv("MONGODB_URI")
+    mongo_settings = MongoSettings.from_env()
+    startup_settings = StartupSettings.from_env()
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        app.state.mongo = MongoClient(mongo_uri)  # 起動時に1回だけ生成
+        if mongo_settings.effective_max_pool_size < mongo_settings.max_pool_size:
+            logger.warning(
+                "MONGO_MAX_POOL_SIZE=%d exceeds the connection budget; using %d "
+                "(MONGO_CONNECTION_LIMIT=%d, MONGO_APP_INSTANCES=%d, SERVER_WORKERS=%d)",
+                mongo_settings.max_pool_size, mongo_settings.effective_max_pool_size,
+                mongo_settings.connection_limit, mongo_settings.app_instances,
+                mongo_settings.workers)
+        # 起動時に1回だけ生成（接続はpymongoがバックグラウンドで確立するため待たない）
+        # ワーカープロセスごとにlifespanが実行され、それぞれが自分のMongoClientを持つ
+        metrics_registry.pool = PoolMetricsListener()
+        app.state.mongo = MongoClient(
+            mongo_uri, event_listeners=[metrics_registry.pool],
+            **mongo_settings.client_options())
+        app.state.db_executor = DatabaseExecutor(
+            max_workers=mongo_settings.executor_threads,
+            timeout=mongo_settings.executor_timeout,
+            metrics=metrics_registry,
+        )
+        app.state.health = HealthCheck(
+            lambda: app.state.db_executor.run(app.state.mongo.admin.command, "ping"),
+            ttl_seconds=health_settings.ping_cache_ms / 1000,
+        )
+        warmup = None
+        if startup_settings.background_init:
+            # 起動完了（リクエストの受け付け開始）を待たせずにDBの初期化を行う
+            warmup = asyncio.create_task(warm_up(
+                app.state.mongo, app.state.db_executor, storage_settings.layout))
+        else:
+            await app.state.db_executor.run(
+                ensure_indexes, app.state.mongo[DB.DATABASE_NAME],
+                storage_settings.layout)
+        app.state.predictor = PredictionService(max_users=prediction_settings.max_users)
+        app.state.insights_memo = InsightsMemo(max_entries=insights_settings.memo_size)
+        app.state.response_cache = ResponseCache(
+            max_bytes=cache_settings.max_bytes,
+            ttl_seconds=cache_settings.ttl_seconds,
+            max_users=cache_settings.max_users,
+        )
+        app.state.token_cache = TokenCache(
+            max_entries=auth_settings.token_cache_size,
+            ttl_seconds=auth_settings.token_cache_ttl_seconds,
+        )
+        # 複数のプロセスで動かす場合は、他のプロセスの書き込みを読み出しのたびに確認する
+        app.state.change_tracker = ChangeTracker() if mongo_settings.processes > 1 else None
+        app.state.write_queue = None
+        if write_behind_settings.mode != "off":
+            app.state.write_queue = WriteBehindQueue(
+                entry_repository(
+                    storage_settings.layout, app.state.mongo[DB.DATABASE_NAME],
+                    app.state.db_executor),
+                app.state.response_cache,
+                app.state.predictor,
+                wait_for_flush=write_behind_settings.mode == "wait",
+                batch_size=write_behind_settings.batch_size,
+                max_delay_seconds=write_behind_settings.max_delay_ms / 1000,
+                max_pending=write_behind_settings.max_pending,
+                enqueue_timeout_seconds=write_behind_settings.enqueue_timeout_ms / 1000,
+                change_counter=change_counter(
+                    app.state.mongo[DB.DATABASE_NAME], app.state.db_executor),
+                change_tracker=app.state.change_tracker,
+            )
+            app.state.write_queue.start()
         try:
             yield
         finally:
-            app.state.mongo.close()  # 終了時にクローズ
-
-    app = FastAPI(lifespan=lifespan, summary="KokoroNotoAPI")
-
+            if warmup is not None and not warmup.done():
+                warmup.cancel()
+                with suppress(asyncio.CancelledError):
+                    await warmup
+            if app.state.write_queue is not None:
+                # 接続を閉じる前に、キューに残った書き込みをすべて書き込む
+                await app.state.write_queue.close()
+            # 終了時にクローズ（実行中のDB操作を待ってから接続を閉じる）
+            app.state.db_executor.shutdown()
+            app.state.mongo.close()
 
-@app.get("/")
-async def root():
-    print("access success")
-    return {"message": "Hello World"}
+    app = FastAPI(
+        lifespan=lifespan, summary=API_SUMMARY,
+        default_response_class=PydanticJSONResponse)
 
 
-@app.get("/entries", response_model=EntriesResponse)
-async def get_entries(request: Request) -> EntriesResponse:
-    client = request.app.state.mongo
-    entries_collection = client[DB.DATABASE_NAME][DB.ENTRIES_COLLECTION]
-    try:
-        cursor = entries_collection.find({})
-        entries = [Entry(**doc) for doc in cursor]
-        return EntriesResponse(status="success", entries=entries)
-    except PyMongoError as err:
-        raise HTTPException(
-            status_code=500, detail="failed to retrieve entries") from err
-
-
-@app.post("/entries", response_model=EntryResponse)
-async def add_entry(entry: Entry, request: Request) -> EntryResponse:
-    client = request.app.state.mongo
-    entries_collection = client[DB.DATABASE_NAME][DB.ENTRIES_COLLECTION]
-    # dict化して挿入（JSON互換、Noneは除外、idは必ず除外）
-    entry_dict = entry.model_dump(mode="json", exclude_none=True)
-
-    try:
-        result = entries_collection.insert_one(entry_dict)
-    except PyMongoError as err:
-        raise HTTPException(
-            status_code=500, detail="failed to insert entry") from err
-    entry.id = str(result.inserted_id)
-    return EntryResponse(status="success", entry=entry)
-
+# エンドポイントはapp.routesで定義する
+app.include_router(router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -74,3 +150,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+# 最後に追加したミドルウェアが最も外側になるため、CORS・圧縮を含めた処理時間と
+# 圧縮後のレスポンスサイズ（実際に送るバイト数）を計測する
+app.add_middleware(
+    MetricsMiddleware,
+    registry=metrics_registry,
+    slow_request_seconds=metrics_settings.slow_request_seconds,
+)
@@ -0,0 +1,272 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Prometheusのテキスト形式（/metricsのContent-Type）
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# レイテンシ（秒）とレスポンスサイズ（バイト）のヒストグラムの区切り
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# コネクションプールからの接続の取得待ち時間（秒）の区切り（空きがあれば数十µsで終わる）
+CHECKOUT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+# どのルートにも一致しなかったリクエストのルート名（パスをそのまま使うとラベルが際限なく増える）
+UNMATCHED_ROUTE = "unmatched"
+# そのままラベルにするHTTPメソッド（それ以外は任意の文字列を送れるためOTHERにまとめる）
+KNOWN_METHODS = frozenset(("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"))
+OTHER_METHOD = "OTHER"
+
+
+class Histogram:
+    """累積していない区間ごとの件数を持ち、出力時にPrometheusの累積値にする"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # 最後の要素は+Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # le（以下）で数えるため、値と等しい区切りの区間に入れる
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else _format(bound), total))
+        return result
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    """
+    リクエストとDB操作の計測値を保持し、Prometheusのテキスト形式で出力する。
+    更新はイベントループのスレッドからのみ行うため、ロックは使わない。
+    """
+
+    REQUEST_LABELS = ("method", "route", "status")
+    SIZE_LABELS = ("method", "route")
+    MONGO_LABELS = ("collection", "operation")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.request_latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.response_size: Dict[Tuple[str, str], Histogram] = {}
+        self.mongo_latency: Dict[Tuple[str, str], Histogram] = {}
+        # MongoClientに登録したコネクションプールの計測値（PoolMetricsListener）
+        self.pool: Optional["PoolMetricsListener"] = None
+
+    def observe_request(self, method: str, route: str, status: int,
+                        seconds: float, size: int) -> None:
+        key = (method, route, str(status))
+        histogram = self.request_latency.get(key)
+        if histogram is None:
+            histogram = self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+        size_key = (method, route)
+        histogram = self.response_size.get(size_key)
+        if histogram is None:
+            histogram = self.response_size[size_key] = Histogram(SIZE_BUCKETS)
+        histogram.observe(size)
+
+    def observe_mongo(self, collection: str, operation: str, seconds: float) -> None:
+        key = (collection, operation)
+        histogram = self.mongo_latency.get(key)
+        if histogram is None:
+            histogram = self.mongo_latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight 処理中のリクエスト数",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        lines += _render_histograms(
+            "http_request_duration_seconds", "ルートごとのリクエスト処理時間（秒）",
+            self.REQUEST_LABELS, self.request_latency)
+        lines += _render_histograms(
+            "http_response_size_bytes", "ルートごとのレスポンス本文のサイズ（バイト）",
+            self.SIZE_LABELS, self.response_size)
+        lines += _render_histograms(
+            "mongodb_operation_duration_seconds",
+            "コレクション・操作ごとのDB操作時間（秒、待ち行列での待機を含む）",
+            self.MONGO_LABELS, self.mongo_latency)
+        if self.pool is not None:
+            lines += self.pool.render()
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(name: str, help_text: str, label_names: Tuple[str, ...],
+                       histograms: Dict[tuple, Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key in sorted(histograms):
+        histogram = histograms[key]
+        for bound, count in histogram.cumulative():
+            labels = _labels(label_names, key, f'le="{bound}"')
+            lines.append(f"{name}_bucket{labels} {count}")
+        labels = _labels(label_names, key)
+        lines.append(f"{name}_sum{labels} {_format(histogram.sum)}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
+    return lines
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    pymongoのコネクションプールのイベントから、接続の取得待ち時間・取得失敗・接続数を集計する。
+    イベントはDB操作を実行するスレッドから通知されるため、MetricsRegistryと異なりロックで保護する。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_wait = Histogram(CHECKOUT_BUCKETS)
+        # 理由（timeout/connectionError/poolClosed）ごとの取得失敗件数
+        self.checkout_failures: Dict[str, int] = {}
+        self.connections = 0
+        self.checked_out = 0
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self.checkout_wait.observe(event.duration)
+            self.checked_out += 1
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self.checkout_wait.observe(event.duration)
+            self.checkout_failures[event.reason] = \
+                self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.connections -= 1
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def render(self) -> List[str]:
+        with self._lock:
+            lines = [
+                "# HELP mongodb_pool_connections 開いている接続数（全サーバーの合計）",
+                "# TYPE mongodb_pool_connections gauge",
+                f"mongodb_pool_connections {self.connections}",
+                "# HELP mongodb_pool_checked_out_connections 取得中（DB操作に使用中）の接続数",
+                "# TYPE mongodb_pool_checked_out_connections gauge",
+                f"mongodb_pool_checked_out_connections {self.checked_out}",
+                "# HELP mongodb_pool_checkout_failures_total 理由ごとの接続の取得失敗件数",
+                "# TYPE mongodb_pool_checkout_failures_total counter",
+            ]
+            for reason in sorted(self.checkout_failures):
+                labels = _labels(("reason",), (reason,))
+                lines.append(
+                    f"mongodb_pool_checkout_failures_total{labels} "
+                    f"{self.checkout_failures[reason]}")
+            lines += _render_histograms(
+                "mongodb_pool_checkout_wait_seconds",
+                "コネクションプールからの接続の取得待ち時間（秒、失敗を含む）",
+                (), {(): self.checkout_wait})
+        return lines
+
+
+class MetricsMiddleware:
+    """
+    リクエストごとの処理時間・処理中の件数・レスポンスサイズを記録するASGIミドルウェア。
+    BaseHTTPMiddlewareを使わず、sendを包むだけにして1リクエストあたりのオーバーヘッドを抑える。
+    slow_request_secondsを指定すると、それ以上かかったリクエストを警告ログに出力する。
+    """
+
+    def __init__(self, app, registry: MetricsRegistry,
+                 slow_request_seconds: Optional[float] = None):
+        self.app = app
+        self.registry = registry
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        # 例外でレスポンスを返さずに終わった場合は500として数える
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.in_flight -= 1
+            # ルーティング後にscopeへ設定されるルートのパステンプレート（/entries/{id} など）で集計する
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            registry.observe_request(
+                method if method in KNOWN_METHODS else OTHER_METHOD,
+                route_path, status, elapsed, size)
+            if (self.slow_request_seconds is not None
+                    and elapsed >= self.slow_request_seconds):
+                logger.warning(
+                    "slow request: %s %s status=%d duration=%.1fms size=%d",
+                    method, scope["path"], status, elapsed * 1000, size)
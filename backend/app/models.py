@@ -1,6 +1,7 @@
-from pydantic import BaseModel, field_serializer, field_validator, Field, StrictInt, StrictFloat
+from pydantic import BaseModel, TypeAdapter, field_serializer, field_validator, Field, StrictInt, StrictFloat
 from datetime import date
-from typing import Optional, List
+from typing import Literal, Optional, List, Union
+from typing_extensions import TypedDict
 
 
 class Entry(BaseModel):
@@ -30,6 +31,10 @@ class Entry(BaseModel):
         description="メモ（任意、空文字可）",
         json_schema_extra={"example": "今日はよく眠れた"}
     )
+    user_id: Optional[str] = Field(
+        default=None,
+        description="記録したユーザーのID（サーバー側で設定、入力値は無視）"
+    )
 
     model_config = {
         "extra": "forbid",
@@ -71,6 +76,41 @@ class Entry(BaseModel):
         return d
 
 
+class EntryRow(TypedDict):
+    """
+    読み出し専用の軽量なエントリー行。
+    保存時に検証済みのデータをモデル化・再検証せずにシリアライズするために使う。
+    """
+    id: str
+    record_date: str
+    mood_score: int
+    sleep_hours: float
+    memo: Optional[str]
+    user_id: Optional[str]
+
+
+# 読み出し時にMongoDBから取得するフィールド（_idは常に含まれる）
+ENTRY_PROJECTION = {
+    "record_date": 1,
+    "mood_score": 1,
+    "sleep_hours": 1,
+    "memo": 1,
+    "user_id": 1,
+}
+
+
+def entry_row(doc: dict) -> EntryRow:
+    """MongoDBドキュメントをEntryRowに変換する（検証は行わない）"""
+    return {
+        "id": str(doc["_id"]),
+        "record_date": doc["record_date"],
+        "mood_score": doc["mood_score"],
+        "sleep_hours": doc["sleep_hours"],
+        "memo": doc.get("memo"),
+        "user_id": doc.get("user_id"),
+    }
+
+
 class EntryResponse(BaseModel):
     status: str
     entry: Entry
@@ -79,3 +119,208 @@ class EntryResponse(BaseModel):
 class EntriesResponse(BaseModel):
     status: str
     entries: List[Entry]
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="次ページ取得用のカーソル（最終ページの場合はnull）"
+    )
+
+
+class EntriesPage(TypedDict):
+    """EntriesResponseと同じ形のJSONをEntryRowから直接生成するための型"""
+    status: str
+    entries: List[EntryRow]
+    next_cursor: Optional[str]
+
+
+# 読み出し経路で使うシリアライザ（起動時に1回だけスキーマを構築する）
+ENTRIES_PAGE_ADAPTER = TypeAdapter(EntriesPage)
+
+
+class ChangesResponse(BaseModel):
+    status: str
+    entries: List[Entry] = Field(
+        description="前回の取得以降に追加・置き換えられたエントリー（書き込んだ順。記録日で上書きしてマージする）")
+    next_token: str = Field(description="次回の取得でsinceに指定するトークン")
+    has_more: bool = Field(description="続きがある場合はtrue（next_tokenですぐに続きを取得する）")
+
+
+class ChangesPage(TypedDict):
+    """ChangesResponseと同じ形のJSONをEntryRowから直接生成するための型"""
+    status: str
+    entries: List[EntryRow]
+    next_token: str
+    has_more: bool
+
+
+CHANGES_PAGE_ADAPTER = TypeAdapter(ChangesPage)
+
+
+class SearchResult(BaseModel):
+    score: int = Field(description="検索語の出現回数の合計（大きいほど上位）")
+    entry: Entry
+
+
+class SearchResponse(BaseModel):
+    status: str
+    results: List[SearchResult]
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="次ページ取得用のカーソル（最終ページの場合はnull）"
+    )
+
+
+class SearchHit(TypedDict):
+    score: int
+    entry: EntryRow
+
+
+class SearchPage(TypedDict):
+    """SearchResponseと同じ形のJSONをEntryRowから直接生成するための型"""
+    status: str
+    results: List[SearchHit]
+    next_cursor: Optional[str]
+
+
+SEARCH_PAGE_ADAPTER = TypeAdapter(SearchPage)
+
+
+class BulkItemErrorDetail(BaseModel):
+    loc: List[Union[str, int]]
+    msg: str
+    type: str
+
+
+class BulkItemError(BaseModel):
+    index: int = Field(description="リクエスト内でのエントリーの位置（0始まり）")
+    errors: List[BulkItemErrorDetail]
+
+
+class BulkEntryResult(BaseModel):
+    index: int = Field(description="リクエスト内でのエントリーの位置（0始まり）")
+    id: str
+
+
+class BulkEntriesResponse(BaseModel):
+    status: str = Field(description="success（全件成功）/ partial（一部失敗）/ failed（全件失敗）")
+    inserted: List[BulkEntryResult] = Field(description="新規に追加したエントリー")
+    updated: List[BulkEntryResult] = Field(description="同じ記録日の既存エントリーを置き換えたもの")
+    errors: List[BulkItemError]
+
+
+class PredictionResponse(BaseModel):
+    status: str
+    predicted_mood_score: Optional[float] = Field(
+        description="翌日の気分スコアの予測値（0〜5、記録がない場合はnull）")
+    sample_count: int = Field(description="学習に使った（前日, 翌日）の記録の組数")
+    last_record_date: Optional[date] = Field(
+        description="予測の基準にした最新の記録日（記録がない場合はnull）")
+
+
+class MetricStats(BaseModel):
+    mean: float
+    min: float
+    max: float
+
+
+class StatsSummary(BaseModel):
+    count: int = Field(description="記録件数")
+    mood_score: MetricStats
+    sleep_hours: MetricStats
+    correlation: Optional[float] = Field(
+        description="睡眠時間と気分スコアの相関係数（2件未満・どちらかが一定の場合はnull）")
+
+
+class StatsBucket(StatsSummary):
+    start: date = Field(description="区間の開始日（週は月曜日、月は1日）")
+
+
+class StatsResponse(BaseModel):
+    status: str
+    bucket: str = Field(description="集計の単位（day / week / month）")
+    buckets: List[StatsBucket] = Field(description="区間ごとの集計（開始日の昇順）")
+    total: Optional[StatsSummary] = Field(
+        description="期間全体の集計（記録がない場合はnull）")
+
+
+class WeekdayEffect(BaseModel):
+    weekday: int = Field(description="曜日（0=月曜日〜6=日曜日）")
+    count: int = Field(description="記録件数")
+    mood_score: Optional[float] = Field(description="気分スコアの平均（記録がない場合はnull）")
+    sleep_hours: Optional[float] = Field(description="睡眠時間の平均（記録がない場合はnull）")
+    mood_delta: Optional[float] = Field(
+        description="全体の平均に対する気分スコアの平均の差（記録がない場合はnull）")
+
+
+class SleepDebtStreak(BaseModel):
+    start: date = Field(description="連続の初日")
+    end: date = Field(description="連続の最終日")
+    days: int = Field(description="目標の睡眠時間に届かなかった日が続いた日数")
+    debt_hours: float = Field(description="期間中の不足時間の合計")
+
+
+class SleepDebt(BaseModel):
+    target_hours: float = Field(description="目標の睡眠時間")
+    current_streak: Optional[SleepDebtStreak] = Field(
+        description="最新の記録まで続いている連続（最新の記録が目標以上の場合はnull）")
+    longest_streak: Optional[SleepDebtStreak] = Field(
+        description="最も長い連続（同じ長さの場合は最新のもの、なければnull）")
+
+
+class MovingAverages(BaseModel):
+    window: int = Field(description="平均する直近の記録件数")
+    record_dates: List[date] = Field(description="記録日（昇順）")
+    mood_score: List[float] = Field(description="各記録日までの直近window件の気分スコアの平均")
+    sleep_hours: List[float] = Field(description="各記録日までの直近window件の睡眠時間の平均")
+
+
+class Anomaly(BaseModel):
+    record_date: date
+    metric: Literal["mood_score", "sleep_hours"]
+    value: float
+    expected: float = Field(description="直前28件の平均")
+    z_score: float = Field(description="直前28件の平均からの偏差を標準偏差で割った値")
+
+
+class InsightsResponse(BaseModel):
+    status: str
+    count: int = Field(description="記録件数")
+    weekdays: List[WeekdayEffect] = Field(description="曜日ごとの傾向（月曜日から順に7件）")
+    sleep_debt: SleepDebt
+    moving_averages: MovingAverages
+    anomalies: List[Anomaly] = Field(
+        description="直前28件の平均から標準偏差の2.5倍以上離れた記録（記録日の昇順）")
+
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    evictions: int = Field(description="上限を超えたため追い出した件数")
+    expirations: int = Field(description="有効期間切れで破棄した件数")
+    invalidations: int = Field(description="書き込みにより破棄した件数")
+    entries: int
+    bytes: int = Field(description="現在の使用量（バイト数）")
+    max_bytes: int
+
+
+class HealthResponse(BaseModel):
+    status: str = Field(description="ok: 処理可能 / unavailable: DBに接続できない")
+    database: Optional[bool] = Field(
+        description="直近（キャッシュ有効期間内）のDBへのpingの成否（未確認はnull）")
+    checked_ms_ago: Optional[int] = Field(description="pingを実行してからの経過時間（ミリ秒）")
+
+
+class UserCreate(BaseModel):
+    name: str = Field(
+        min_length=1,
+        max_length=100,
+        description="ユーザー名（必須、1〜100文字）",
+        json_schema_extra={"example": "yusei"}
+    )
+
+
+class UserResponse(BaseModel):
+    status: str
+    user_id: str
+    name: str
+    token: str = Field(
+        description="APIトークン（Authorization: Bearerで送信。再表示できないため保管すること）")
@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# 一覧取得の並び順（記録日の新しい順、同日内は_idの降順）
+ENTRIES_SORT = [("record_date", -1), ("_id", -1)]
+
+
+class InvalidCursorError(ValueError):
+    """カーソル文字列を復元できない"""
+
+
+def encode_cursor(doc: dict) -> str:
+    """ドキュメントの(record_date, _id)を不透明なカーソル文字列にする"""
+    doc_id = doc["_id"]
+    payload = {
+        "d": doc["record_date"],
+        "i": str(doc_id),
+        "o": isinstance(doc_id, ObjectId),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any]:
+    """カーソル文字列を(record_date, _id)に戻す"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        record_date = date.fromisoformat(payload["d"]).isoformat()
+        doc_id = ObjectId(payload["i"]) if payload["o"] else payload["i"]
+    except (ValueError, TypeError, KeyError, InvalidId) as err:
+        raise InvalidCursorError("invalid cursor") from err
+    return record_date, doc_id
+
+
+def build_entries_query(
+    user_id: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """
+    ユーザー・日付範囲・カーソルからMongoDBの検索条件を組み立てる。
+    record_dateはISO形式の文字列で保存されているため、文字列比較で範囲検索できる。
+    常にuser_idの等価条件を含むため、(user_id, record_date)の複合インデックスで
+    そのユーザーのドキュメントだけを走査する。
+    """
+    query: dict = {"user_id": user_id}
+    date_range = {}
+    if date_from is not None:
+        date_range["$gte"] = date_from.isoformat()
+    if date_to is not None:
+        date_range["$lte"] = date_to.isoformat()
+    if date_range:
+        query["record_date"] = date_range
+    if cursor is not None:
+        record_date, doc_id = decode_cursor(cursor)
+        # 降順のキーセットページング: カーソル位置より「後ろ」のドキュメントのみ
+        query["$or"] = [
+            {"record_date": {"$lt": record_date}},
+            {"record_date": record_date, "_id": {"$lt": doc_id}},
+        ]
+    return query
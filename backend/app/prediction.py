@@ -0,0 +1,106 @@
+from collections import deque
+from typing import Deque, Iterable, Optional, Tuple
+
+import numpy as np
+
+# 移動平均に使う直近の記録件数
+WINDOW = 7
+# 特徴量: [切片, 当日の気分, 当日の睡眠時間, 直近WINDOW件の気分の平均]
+N_FEATURES = 4
+# 回帰を使うのに必要な学習サンプル数（これ未満は移動平均をそのまま予測値にする）
+MIN_SAMPLES = N_FEATURES + 1
+# 係数を安定させるためのリッジ正則化（切片には掛けない）
+RIDGE = 1e-3
+MOOD_MIN, MOOD_MAX = 0.0, 5.0
+
+_PENALTY = np.diag([0.0] + [RIDGE] * (N_FEATURES - 1))
+
+
+class UserModel:
+    """
+    1ユーザー分の翌日予測モデル。
+    直前の記録の特徴量から次の記録の気分スコアを当てる線形回帰を、
+    正規方程式の累積量（XᵀX, Xᵀy）として保持し、記録1件ごとにO(1)で更新する。
+    """
+
+    def __init__(self):
+        self.xtx = np.zeros((N_FEATURES, N_FEATURES))
+        self.xty = np.zeros(N_FEATURES)
+        self.n_samples = 0
+        self.last_date: Optional[str] = None
+        self.last_features: Optional[np.ndarray] = None
+        self._moods: Deque[float] = deque(maxlen=WINDOW)
+        self._mood_sum = 0.0
+
+    def add(self, record_date: str, mood_score: float, sleep_hours: float) -> bool:
+        """
+        最新の記録より後の日付の記録を追加する。
+        過去日・同日の記録（追記順が崩れる・既存日の置き換え）は追加せずFalseを返す。
+        """
+        if self.last_date is not None and record_date <= self.last_date:
+            return False
+        if self.last_features is not None:
+            x = self.last_features
+            self.xtx += np.outer(x, x)
+            self.xty += x * mood_score
+            self.n_samples += 1
+        if len(self._moods) == WINDOW:
+            self._mood_sum -= self._moods[0]
+        self._moods.append(mood_score)
+        self._mood_sum += mood_score
+        self.last_features = np.array([
+            1.0, mood_score, sleep_hours, self._mood_sum / len(self._moods)])
+        self.last_date = record_date
+        return True
+
+    def coefficients(self) -> Optional[np.ndarray]:
+        if self.n_samples < MIN_SAMPLES:
+            return None
+        return np.linalg.solve(self.xtx + _PENALTY, self.xty)
+
+    def predict(self) -> Optional[float]:
+        """最新の記録の翌日の気分スコアを予測する（記録がなければNone）"""
+        if self.last_features is None:
+            return None
+        coefficients = self.coefficients()
+        if coefficients is None:
+            # 学習サンプル不足のうちは直近の移動平均を返す
+            prediction = self.last_features[3]
+        else:
+            prediction = float(self.last_features @ coefficients)
+        return float(np.clip(prediction, MOOD_MIN, MOOD_MAX))
+
+
+def batch_features(moods: np.ndarray, sleeps: np.ndarray) -> np.ndarray:
+    """記録日順に並んだ全履歴から各記録時点の特徴量行列をまとめて計算する"""
+    n = len(moods)
+    cumsum = np.concatenate([[0.0], np.cumsum(moods)])
+    end = np.arange(1, n + 1)
+    counts = np.minimum(end, WINDOW)
+    rolling_mean = (cumsum[end] - cumsum[end - counts]) / counts
+    return np.column_stack([np.ones(n), moods, sleeps, rolling_mean])
+
+
+def fit_batch(rows: Iterable[Tuple[str, float, float]]) -> UserModel:
+    """
+    全履歴から一括でモデルを作り直す（初回の予測時や、追記順が崩れた後に使う）。
+    rowsは(record_date, mood_score, sleep_hours)を記録日の昇順で並べたもの。
+    """
+    rows = list(rows)
+    model = UserModel()
+    if not rows:
+        return model
+    dates = [row[0] for row in rows]
+    moods = np.array([row[1] for row in rows], dtype=float)
+    sleeps = np.array([row[2] for row in rows], dtype=float)
+    features = batch_features(moods, sleeps)
+    x, y = features[:-1], moods[1:]
+    model.xtx = x.T @ x
+    model.xty = x.T @ y
+    model.n_samples = len(y)
+    model.last_date = dates[-1]
+    model.last_features = features[-1]
+    recent = moods[-WINDOW:]
+    model._moods.extend(recent.tolist())
+    model._mood_sum = float(recent.sum())
+    return model
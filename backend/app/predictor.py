@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    # numpyの読み込みは起動時間に響くため、モデル本体（app.prediction）は予測時まで読み込まない
+    from .prediction import UserModel
+
+
+class _UserState:
+    __slots__ = ("model", "stale", "generation")
+
+    def __init__(self, generation: int):
+        self.model: Optional["UserModel"] = None
+        self.stale = False
+        # 書き込みのたびに増える世代番号（作り直し中の書き込みを検出するため）
+        self.generation = generation
+
+
+class PredictionService:
+    """
+    ユーザーごとの予測モデルを保持する。
+    add_entryのたびにobserveで増分更新し、予測時に全件を読み直す必要をなくす。
+    追記順が崩れた場合などはstaleとし、次の予測時に全履歴から作り直す。
+    保持するユーザー数はmax_usersまでで、超えると最も古く使われたユーザーのモデルを捨てる
+    （捨てたユーザーは次の予測時に全履歴から作り直す）。
+    """
+
+    def __init__(self, max_users: int = 10000):
+        self.max_users = max(max_users, 1)
+        self._users: "OrderedDict[Optional[str], _UserState]" = OrderedDict()
+        # 追い出したユーザーの世代番号の最大値。追い出したユーザーの世代番号はこの値から再開し、
+        # 作り直しの間に書き込み・追い出しがあっても、作り直し開始時点と同じ番号に戻らないようにする
+        self._evicted_generation = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _state(self, user_id: Optional[str]) -> _UserState:
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = _UserState(self._evicted_generation)
+            while len(self._users) > self.max_users:
+                _, evicted = self._users.popitem(last=False)
+                self._evicted_generation = max(self._evicted_generation, evicted.generation)
+                self.evictions += 1
+        else:
+            self._users.move_to_end(user_id)
+        return state
+
+    def observe(self, user_id: Optional[str], record_date: str,
+                mood_score: float, sleep_hours: float) -> None:
+        state = self._state(user_id)
+        state.generation += 1
+        if state.model is None or state.stale:
+            return
+        if not state.model.add(record_date, mood_score, sleep_hours):
+            state.stale = True
+
+    def invalidate(self, user_id: Optional[str]) -> None:
+        """一括登録など、増分更新できない書き込みの後に呼ぶ"""
+        state = self._state(user_id)
+        state.generation += 1
+        state.stale = True
+
+    def needs_refit(self, user_id: Optional[str]) -> bool:
+        state = self._users.get(user_id)
+        return state is None or state.model is None or state.stale
+
+    def generation(self, user_id: Optional[str]) -> int:
+        state = self._users.get(user_id)
+        return self._evicted_generation if state is None else state.generation
+
+    def replace(self, user_id: Optional[str], model: "UserModel", generation: int) -> None:
+        """
+        作り直したモデルに置き換える。
+        作り直しの間に書き込みがあった場合はstaleのままにして次回もう一度作り直す。
+        """
+        state = self._state(user_id)
+        state.model = model
+        state.stale = state.generation != generation
+
+    def model(self, user_id: Optional[str]) -> Optional["UserModel"]:
+        state = self._users.get(user_id)
+        return None if state is None else state.model
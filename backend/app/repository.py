@@ -0,0 +1,412 @@
+import abc
+from contextlib import aclosing
+from datetime import date
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from .bulk import bulk_upsert, latest_entries, upsert_entries, write_error
+from .changes import (
+    CHANGES_SORT, UPDATED_AT_FIELD, ChangeToken, as_utc,
+    build_changes_query, change_key, change_time, changes_lower_bound, is_after,
+)
+from .constants import DB
+from .db import AsyncCollection, DatabaseExecutor
+from .export import EXPORT_SORT
+from .indexes import entry_key
+from .models import ENTRY_PROJECTION, BulkEntryResult, BulkItemError, Entry
+from .pagination import (
+    ENTRIES_SORT, build_entries_query, decode_cursor, encode_cursor,
+)
+from .search import MEMO_TERMS_FIELD, with_memo_terms
+from .stats import stats_pipeline
+
+# 予測モデルの学習に使う（記録日, 気分スコア, 睡眠時間）
+SeriesRow = Tuple[str, int, float]
+# 一括upsertの結果（新規追加、置き換え、エラー）
+UpsertResult = Tuple[List[BulkEntryResult], List[BulkEntryResult], List[BulkItemError]]
+
+
+class EntryRepository(abc.ABC):
+    """
+    エントリーの読み書きの窓口。保存形式の違いをエンドポイントから隠す。
+    読み出したエントリーは保存形式によらず、_id・user_id・record_date・mood_score・
+    sleep_hours・memoを持つdict（1日1ドキュメントの形式）で返す。
+    """
+
+    @abc.abstractmethod
+    async def find_page(
+        self, user_id: str, limit: int, date_from: Optional[date] = None,
+        date_to: Optional[date] = None, cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """記録日の新しい順に最大limit件と、次ページのカーソル（最終ページはNone）を返す"""
+
+    @abc.abstractmethod
+    async def find_changes(
+        self, user_id: str, limit: int, token: Optional[ChangeToken] = None,
+    ) -> List[dict]:
+        """
+        トークンの位置より後に書き込まれたエントリーを書き込んだ順（CHANGES_SORT）に最大limit+1件返す。
+        tokenがNoneの場合は全エントリーが対象。各エントリーはupdated_at（UTC、導入前のものはNone）を持つ。
+        """
+
+    @abc.abstractmethod
+    async def upsert(self, document: dict) -> str:
+        """同じユーザー・記録日のエントリーがあれば置き換え、なければ追加してIDを返す"""
+
+    @abc.abstractmethod
+    async def upsert_many(
+        self, entries: List[Tuple[int, Entry]], chunk_size: int,
+    ) -> UpsertResult:
+        """検証済みエントリー（リクエスト内の位置, Entry）をchunk_size件ずつまとめてupsertする"""
+
+    @abc.abstractmethod
+    def iter_batches(
+        self, user_id: str, date_from: Optional[date], date_to: Optional[date],
+        batch_size: int,
+    ) -> AsyncIterator[List[dict]]:
+        """記録日の古い順に、最大batch_size件ずつ返す"""
+
+    @abc.abstractmethod
+    async def aggregate_stats(
+        self, bucket: str, user_id: str, date_from: Optional[date],
+        date_to: Optional[date],
+    ) -> List[dict]:
+        """stats_pipelineと同じ形の区間ごとの集計結果を返す"""
+
+    @abc.abstractmethod
+    async def series(self, user_id: str) -> List[SeriesRow]:
+        """そのユーザーの全エントリーを記録日の古い順に返す"""
+
+    @abc.abstractmethod
+    async def find_by_terms(self, user_id: str, terms: List[str]) -> List[dict]:
+        """
+        メモの検索語（search.query_terms）をすべて含む可能性のあるエントリーを返す。
+        語が連続しているかの確認と順位付けは呼び出し側（search.rank）で行う。
+        """
+
+
+class DocumentEntryRepository(EntryRepository):
+    """1日1ドキュメントで保存する（デフォルト）"""
+
+    def __init__(self, collection: AsyncCollection):
+        self._collection = collection
+
+    async def find_page(self, user_id, limit, date_from=None, date_to=None,
+                        cursor=None):
+        query = build_entries_query(user_id, date_from, date_to, cursor)
+        # 次ページの有無を判定するため1件多く取得する
+        docs = await self._collection.find(
+            query, projection=ENTRY_PROJECTION, sort=ENTRIES_SORT,
+            limit=limit + 1)
+        next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        return docs[:limit], next_cursor
+
+    async def find_changes(self, user_id, limit, token=None):
+        docs = await self._collection.find(
+            build_changes_query(user_id, token),
+            projection={**ENTRY_PROJECTION, UPDATED_AT_FIELD: 1},
+            sort=CHANGES_SORT, limit=limit + 1)
+        for doc in docs:
+            doc[UPDATED_AT_FIELD] = as_utc(doc.get(UPDATED_AT_FIELD))
+        return docs
+
+    async def upsert(self, document):
+        # メモの検索語も同じドキュメントに保存し、置き換えと同時に更新する
+        document = {**with_memo_terms(document), UPDATED_AT_FIELD: change_time()}
+
+        async def upsert():
+            return await self._collection.find_one_and_replace(
+                entry_key(document), document,
+                projection={"_id": 1}, upsert=True,
+                return_document=ReturnDocument.AFTER)
+        try:
+            doc = await upsert()
+        except DuplicateKeyError:
+            # 同じ日への同時upsertが競合した場合、既存ドキュメントの置き換えとして再試行する
+            doc = await upsert()
+        return str(doc["_id"])
+
+    async def upsert_many(self, entries, chunk_size):
+        return await upsert_entries(self._collection, entries, chunk_size)
+
+    def iter_batches(self, user_id, date_from, date_to, batch_size):
+        return self._collection.find_batches(
+            build_entries_query(user_id, date_from, date_to),
+            batch_size=batch_size, projection=ENTRY_PROJECTION, sort=EXPORT_SORT)
+
+    async def aggregate_stats(self, bucket, user_id, date_from, date_to):
+        return await self._collection.aggregate(
+            stats_pipeline(bucket, build_entries_query(user_id, date_from, date_to)))
+
+    async def series(self, user_id):
+        docs = await self._collection.find(
+            {"user_id": user_id},
+            projection={"_id": 0, "record_date": 1,
+                        "mood_score": 1, "sleep_hours": 1},
+            sort=[("record_date", 1)],
+        )
+        return [(doc["record_date"], doc["mood_score"], doc["sleep_hours"])
+                for doc in docs]
+
+    async def find_by_terms(self, user_id, terms):
+        return await self._collection.find(
+            {"user_id": user_id, MEMO_TERMS_FIELD: {"$all": terms}},
+            projection=ENTRY_PROJECTION)
+
+
+def _month(record_date: str) -> str:
+    return record_date[:7]
+
+
+def _day(record_date: str) -> str:
+    return record_date[8:]
+
+
+def _pack(document: dict) -> list:
+    """1日分の値を[気分スコア, 睡眠時間, メモ]の配列にする（メモがない場合は省く）"""
+    value = [document["mood_score"], document["sleep_hours"]]
+    if document.get("memo") is not None:
+        value.append(document["memo"])
+    return value
+
+
+def _entry_id(bucket_id, record_date: str) -> str:
+    """バケットの_idと日からエントリーのIDを作る"""
+    return f"{bucket_id}-{_day(record_date)}"
+
+
+def _day_update(document: dict, updated_at) -> dict:
+    """
+    1日分の書き込み。日ごとの書き込み時刻を "updated.DD" に、バケット内の最新の書き込み時刻を
+    updated_atに保存する（変更の取得でupdated_atの新しいバケットだけを読み出すため）
+    """
+    day = _day(document["record_date"])
+    return {
+        "$set": {f"days.{day}": _pack(document), f"updated.{day}": updated_at},
+        "$max": {UPDATED_AT_FIELD: updated_at},
+    }
+
+
+def _unpack(bucket: dict) -> List[dict]:
+    """バケットを1日1ドキュメントの形式に展開する（記録日の古い順）"""
+    docs = []
+    for day in sorted(bucket.get("days", {})):
+        value = bucket["days"][day]
+        record_date = f"{bucket['month']}-{day}"
+        docs.append({
+            "_id": _entry_id(bucket["_id"], record_date),
+            "user_id": bucket["user_id"],
+            "record_date": record_date,
+            "mood_score": value[0],
+            "sleep_hours": value[1],
+            "memo": value[2] if len(value) > 2 else None,
+        })
+    return docs
+
+
+def _bucket_query(user_id: str, lower: Optional[str], upper: Optional[str]) -> dict:
+    """記録日の範囲（YYYY-MM-DD、両端を含む）に重なる月のバケットの検索条件"""
+    query: dict = {"user_id": user_id}
+    months = {}
+    if lower is not None:
+        months["$gte"] = _month(lower)
+    if upper is not None:
+        months["$lte"] = _month(upper)
+    if months:
+        query["month"] = months
+    return query
+
+
+def _in_range(record_date: str, lower: Optional[str], upper: Optional[str]) -> bool:
+    return ((lower is None or record_date >= lower)
+            and (upper is None or record_date <= upper))
+
+
+class BucketEntryRepository(EntryRepository):
+    """
+    ユーザー・月ごとに1ドキュメント（バケット）で保存する。
+    {"user_id", "month": "YYYY-MM", "days": {"DD": [気分スコア, 睡眠時間, メモ]}}
+    の形で、フィールド名を日ごとに繰り返さず、_idとインデックスのキーも月に1つで済む。
+    1日分の書き込みは "days.DD" の$setだけで行えるため、同じ月への同時書き込みも失われない。
+    """
+
+    def __init__(self, collection: AsyncCollection):
+        self._collection = collection
+
+    async def find_page(self, user_id, limit, date_from=None, date_to=None,
+                        cursor=None):
+        lower = date_from.isoformat() if date_from else None
+        upper = date_to.isoformat() if date_to else None
+        before = None
+        if cursor is not None:
+            # 1ユーザー1日1件のため、記録日だけでカーソルの位置が決まる
+            before, _ = decode_cursor(cursor)
+            upper = before if upper is None else min(upper, before)
+
+        docs: List[dict] = []
+        # 1バケットは最大31日分のため、limit+1件に必要なバケット数ずつ取り出す
+        batches = self._collection.find_batches(
+            _bucket_query(user_id, lower, upper),
+            batch_size=(limit + 1) // 28 + 2, sort=[("month", -1)])
+        async with aclosing(batches):
+            async for buckets in batches:
+                for bucket in buckets:
+                    docs.extend(
+                        doc for doc in reversed(_unpack(bucket))
+                        if _in_range(doc["record_date"], lower, upper)
+                        and doc["record_date"] != before)
+                if len(docs) > limit:
+                    break
+        next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        return docs[:limit], next_cursor
+
+    async def find_changes(self, user_id, limit, token=None):
+        query: dict = {"user_id": user_id}
+        lower = changes_lower_bound(token)
+        if lower is not None:
+            query[UPDATED_AT_FIELD] = {"$gte": lower}
+        buckets = await self._collection.find(
+            query, projection={"user_id": 1, "month": 1, "days": 1, "updated": 1})
+        docs = []
+        for bucket in buckets:
+            updated = bucket.get("updated", {})
+            for doc in _unpack(bucket):
+                doc[UPDATED_AT_FIELD] = as_utc(updated.get(_day(doc["record_date"])))
+                if is_after(doc, token):
+                    docs.append(doc)
+        docs.sort(key=change_key)
+        return docs[:limit + 1]
+
+    async def upsert(self, document):
+        record_date = document["record_date"]
+        update = _day_update(document, change_time())
+
+        async def upsert():
+            return await self._collection.find_one_and_update(
+                {"user_id": document["user_id"], "month": _month(record_date)},
+                update, projection={"_id": 1}, upsert=True,
+                return_document=ReturnDocument.AFTER)
+        try:
+            bucket = await upsert()
+        except DuplicateKeyError:
+            # 同じ月のバケットの同時作成が競合した場合、既存バケットへの書き込みとして再試行する
+            bucket = await upsert()
+        return _entry_id(bucket["_id"], record_date)
+
+    async def upsert_many(self, entries, chunk_size):
+        inserted: List[BulkEntryResult] = []
+        updated: List[BulkEntryResult] = []
+        unique_entries, errors = latest_entries(entries)
+
+        for start in range(0, len(unique_entries), chunk_size):
+            chunk = unique_entries[start:start + chunk_size]
+            documents = [
+                entry.model_dump(mode="json", exclude_none=True, exclude={"id"})
+                for _, entry in chunk
+            ]
+            keys = [(document["user_id"], _month(document["record_date"]))
+                    for document in documents]
+            # 新規追加・置き換えの判定とIDのため、書き込み前のバケットを引く
+            existing = await self._collection.find(
+                {"$or": [{"user_id": user_id, "month": month}
+                         for user_id, month in set(keys)]},
+                projection={"user_id": 1, "month": 1, "days": 1})
+            bucket_ids: Dict[Tuple[str, str], object] = {
+                (bucket["user_id"], bucket["month"]): bucket["_id"]
+                for bucket in existing}
+            existing_days = {
+                (bucket["user_id"], bucket["month"]): set(bucket.get("days", {}))
+                for bucket in existing}
+
+            updated_at = change_time()
+            requests = [
+                UpdateOne(
+                    {"user_id": user_id, "month": month},
+                    _day_update(document, updated_at), upsert=True)
+                for (user_id, month), document in zip(keys, documents)
+            ]
+            upserted, failed = await bulk_upsert(self._collection, requests)
+            for position, bucket_id in upserted.items():
+                bucket_ids.setdefault(keys[position], bucket_id)
+            missing = {key for position, key in enumerate(keys)
+                       if key not in bucket_ids and position not in failed}
+            if missing:
+                # 他のリクエストが同時に作成したバケットは_idを引き直す
+                buckets = await self._collection.find(
+                    {"$or": [{"user_id": user_id, "month": month}
+                             for user_id, month in missing]},
+                    projection={"user_id": 1, "month": 1})
+                bucket_ids.update({(bucket["user_id"], bucket["month"]): bucket["_id"]
+                                   for bucket in buckets})
+
+            for position, (index, _) in enumerate(chunk):
+                if position in failed:
+                    errors.append(write_error(index, failed[position]))
+                    continue
+                record_date = documents[position]["record_date"]
+                result = BulkEntryResult(
+                    index=index, id=_entry_id(bucket_ids[keys[position]], record_date))
+                if _day(record_date) in existing_days.get(keys[position], ()):
+                    updated.append(result)
+                else:
+                    inserted.append(result)
+        return inserted, updated, errors
+
+    async def iter_batches(self, user_id, date_from, date_to, batch_size):
+        lower = date_from.isoformat() if date_from else None
+        upper = date_to.isoformat() if date_to else None
+        batches = self._collection.find_batches(
+            _bucket_query(user_id, lower, upper),
+            batch_size=max(1, batch_size // 31), sort=[("month", 1)])
+        async with aclosing(batches):
+            async for buckets in batches:
+                docs = [doc for bucket in buckets for doc in _unpack(bucket)
+                        if _in_range(doc["record_date"], lower, upper)]
+                if docs:
+                    yield docs
+
+    async def aggregate_stats(self, bucket, user_id, date_from, date_to):
+        lower = date_from.isoformat() if date_from else None
+        upper = date_to.isoformat() if date_to else None
+        # バケットを1日1ドキュメントの形に展開してから、通常と同じ集計を行う
+        unpack_stages = [
+            {"$match": _bucket_query(user_id, lower, upper)},
+            {"$project": {"_id": 0, "user_id": 1, "month": 1,
+                          "day": {"$objectToArray": "$days"}}},
+            {"$unwind": "$day"},
+            {"$project": {
+                "user_id": 1,
+                "record_date": {"$concat": ["$month", "-", "$day.k"]},
+                "mood_score": {"$arrayElemAt": ["$day.v", 0]},
+                "sleep_hours": {"$arrayElemAt": ["$day.v", 1]},
+            }},
+        ]
+        return await self._collection.aggregate(unpack_stages + stats_pipeline(
+            bucket, build_entries_query(user_id, date_from, date_to)))
+
+    async def series(self, user_id):
+        buckets = await self._collection.find(
+            {"user_id": user_id},
+            projection={"user_id": 1, "month": 1, "days": 1},
+            sort=[("month", 1)])
+        return [(doc["record_date"], doc["mood_score"], doc["sleep_hours"])
+                for bucket in buckets for doc in _unpack(bucket)]
+
+    async def find_by_terms(self, user_id, terms):
+        # バケットには検索語を保存しないため、ユーザーの全バケット（1か月に1つ）を走査する
+        buckets = await self._collection.find(
+            {"user_id": user_id},
+            projection={"user_id": 1, "month": 1, "days": 1})
+        return [doc for bucket in buckets for doc in _unpack(bucket)
+                if doc["memo"] is not None]
+
+
+def entry_repository(layout: str, database, executor: DatabaseExecutor) -> EntryRepository:
+    """保存形式に応じたリポジトリを返す"""
+    if layout == "buckets":
+        return BucketEntryRepository(AsyncCollection(
+            database[DB.ENTRY_BUCKETS_COLLECTION], executor))
+    return DocumentEntryRepository(AsyncCollection(
+        database[DB.ENTRIES_COLLECTION], executor))
@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    pydantic-coreでJSONのバイト列を直接生成するレスポンス（アプリ全体のデフォルト）。
+    標準のjson.dumpsを経由せず、BaseModelを渡した場合はdict化もせずに描画する。
+    """
+
+    def render(self, content: Any) -> bytes:
+        # JSONResponseと同じく非ASCII文字はエスケープしない（NaN/Infinityはnullにする）
+        return to_json(content, inf_nan_mode="null")
@@ -0,0 +1,527 @@
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pymongo.errors import PyMongoError
+
+from .models import (
+    CHANGES_PAGE_ADAPTER, ENTRIES_PAGE_ADAPTER, BulkEntriesResponse,
+    CacheStatsResponse, ChangesResponse, Entry, EntryResponse, EntriesResponse, HealthResponse,
+    InsightsResponse, SEARCH_PAGE_ADAPTER, PredictionResponse, SearchResponse, StatsResponse,
+    UserCreate, UserResponse, entry_row,
+)
+from .constants import DB
+from .auth import (
+    current_user, generate_token, hash_token, users_collection,
+)
+from .changes import (
+    ChangeCounter, ChangeTracker, change_counter, change_time, decode_change_token,
+    encode_change_token, next_change_token,
+)
+from .config import BulkSettings, ChangesSettings, CompressionSettings, StorageSettings
+from .bulk import (
+    NDJSON_MEDIA_TYPE, BulkBodyTooLargeError, InvalidBulkBodyError, parse_bulk_body,
+    read_bulk_body, validate_entries,
+)
+from .cache import ResponseCache, cache_key, cached_response
+from .compression import ResponseCompressor
+from .health import HealthCheck
+from .insights import DEFAULT_SLEEP_TARGET, DEFAULT_WINDOW, InsightsMemo
+from .export import (
+    EXPORT_BATCH_SIZE, EXPORT_MEDIA_TYPES, stream_export,
+)
+from .metrics import PROMETHEUS_MEDIA_TYPE, MetricsRegistry
+from .responses import PydanticJSONResponse
+from .repository import EntryRepository, entry_repository
+from .predictor import PredictionService
+from .write_queue import WriteBehindQueue, WriteQueueFullError
+from .search import decode_search_cursor, parse_query, query_terms, rank
+from .stats import build_stats_response
+from .pagination import InvalidCursorError
+
+# APIのエンドポイントの定義。
+# DB接続やlifespanを持たないため、app.mainをimportせずにOpenAPIスキーマを生成できる
+# （generate_openapi.py）。DB接続などはapp.mainのlifespanがapp.stateに設定する。
+
+# OpenAPIのinfo.summary（app.mainとgenerate_openapi.pyで共有する）
+API_SUMMARY = "KokoroNotoAPI"
+
+bulk_settings = BulkSettings.from_env()
+storage_settings = StorageSettings.from_env()
+changes_settings = ChangesSettings.from_env()
+compression_settings = CompressionSettings.from_env()
+# リクエスト・DB操作の計測値（/metricsで出力する）
+metrics_registry = MetricsRegistry()
+# レスポンスの圧縮（CompressionMiddlewareと読み出しキャッシュの圧縮済み本文で共有する）
+response_compressor = ResponseCompressor(
+    compression_settings.encodings,
+    minimum_size=compression_settings.minimum_size,
+    gzip_level=compression_settings.gzip_level,
+    brotli_quality=compression_settings.brotli_quality,
+)
+
+router = APIRouter()
+
+
+def _entries_repository(request: Request) -> EntryRepository:
+    client = request.app.state.mongo
+    return entry_repository(
+        storage_settings.layout, client[DB.DATABASE_NAME],
+        request.app.state.db_executor,
+    )
+
+
+def _change_counter(request: Request) -> ChangeCounter:
+    return change_counter(
+        request.app.state.mongo[DB.DATABASE_NAME], request.app.state.db_executor)
+
+
+async def _discard_stale(request: Request, user_id: str) -> None:
+    """
+    他のプロセス（ワーカー・インスタンス）がそのユーザーの記録を書き込んでいれば、
+    このプロセスの読み出しキャッシュと予測モデルを破棄する。
+    プロセス間で状態を共有しないため、ユーザーの書き込み回数（ChangeCounter）を読んで前回と比べる
+    （単一プロセスではchange_trackerがNoneで、書き込み時の無効化だけで足りる）。
+    """
+    tracker: Optional[ChangeTracker] = request.app.state.change_tracker
+    if tracker is None:
+        return
+    try:
+        version = await _change_counter(request).current(user_id)
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to check for changes") from err
+    if tracker.observe(user_id, version):
+        request.app.state.response_cache.invalidate(user_id)
+        request.app.state.predictor.invalidate(user_id)
+
+
+async def _record_write(request: Request, user_id: str) -> None:
+    """
+    エントリーを書き込んだ後（失敗した場合も）にユーザーの書き込み回数を進め、他のプロセスに知らせる。
+    このプロセスのキャッシュ・予測モデルは書き込み時に更新済みのため、
+    自分の書き込みだけで進んだ場合は確認済みとし、次の読み出しで破棄しない
+    （単一プロセスでは知らせる相手がいないため、DBへの問い合わせを増やさないよう進めない）。
+    """
+    tracker: Optional[ChangeTracker] = request.app.state.change_tracker
+    if tracker is None:
+        return
+    tracker.advance(await _change_counter(request).bump([user_id]))
+
+
+@router.get("/")
+async def root():
+    print("access success")
+    return {"message": "Hello World"}
+
+
+async def _health(request: Request) -> HealthResponse:
+    health: HealthCheck = request.app.state.health
+    ok = await health.check()
+    return HealthResponse(
+        status="ok" if ok else "unavailable",
+        database=ok,
+        checked_ms_ago=int((time.monotonic() - health.checked_at) * 1000),
+    )
+
+
+@router.get("/healthz", response_model=HealthResponse, include_in_schema=False)
+async def healthz(request: Request) -> Response:
+    """
+    生存確認（liveness）。DBの状態は参考として返すが、DBに接続できなくても200を返す
+    （DBの障害でインスタンスが再起動され続けないようにする）。
+    """
+    return PydanticJSONResponse(await _health(request))
+
+
+@router.get("/readyz", response_model=HealthResponse, include_in_schema=False)
+async def readyz(request: Request) -> Response:
+    """準備完了の確認（readiness）。DBへのpingに失敗している間は503を返す"""
+    result = await _health(request)
+    return PydanticJSONResponse(result, status_code=200 if result.database else 503)
+
+
+@router.get("/entries", response_model=EntriesResponse)
+async def get_entries(
+    request: Request,
+    user_id: str = Depends(current_user),
+    limit: int = Query(100, ge=1, le=1000, description="1ページの最大件数"),
+    cursor: Optional[str] = Query(
+        None, description="前ページのnext_cursor（先頭ページでは省略）"),
+    date_from: Optional[date] = Query(
+        None, alias="from", description="記録日の下限（この日を含む）"),
+    date_to: Optional[date] = Query(
+        None, alias="to", description="記録日の上限（この日を含む）"),
+) -> Response:
+    await _discard_stale(request, user_id)
+    cache: ResponseCache = request.app.state.response_cache
+    key = cache_key(user_id, request)
+    cached = cache.get(key)
+    if cached is None:
+        generation = cache.generation(user_id)
+        try:
+            docs, next_cursor = await _entries_repository(request).find_page(
+                user_id, limit, date_from, date_to, cursor)
+        except InvalidCursorError as err:
+            raise HTTPException(status_code=400, detail="invalid cursor") from err
+        except PyMongoError as err:
+            raise HTTPException(
+                status_code=500, detail="failed to retrieve entries") from err
+        # 保存時に検証済みのため、Entryを経由せず軽量な行から直接JSONを生成する
+        # （Responseを返すことでresponse_modelによる再検証も行われない）
+        content = ENTRIES_PAGE_ADAPTER.dump_json({
+            "status": "success",
+            "entries": [entry_row(doc) for doc in docs],
+            "next_cursor": next_cursor,
+        })
+        cached = cache.put(key, content, "application/json", generation)
+    return cached_response(request, cached, cache, response_compressor)
+
+
+@router.get("/entries/changes", response_model=ChangesResponse)
+async def get_entry_changes(
+    request: Request,
+    user_id: str = Depends(current_user),
+    since: Optional[str] = Query(
+        None, description="前回のレスポンスのnext_token（初回は省略して全件を取得）"),
+    limit: int = Query(500, ge=1, le=1000, description="1回の最大件数"),
+) -> Response:
+    try:
+        token = decode_change_token(since) if since is not None else None
+    except InvalidCursorError as err:
+        raise HTTPException(status_code=400, detail="invalid change token") from err
+    # 次回の起点は読み出しを始める前の時刻から決める
+    now = change_time()
+    try:
+        docs = await _entries_repository(request).find_changes(user_id, limit, token)
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to retrieve changes") from err
+    next_token, has_more = next_change_token(
+        docs, limit, token, now, changes_settings.lag)
+    # 取得位置と時刻で結果が変わるため、読み出しキャッシュは使わない
+    return Response(content=CHANGES_PAGE_ADAPTER.dump_json({
+        "status": "success",
+        "entries": [entry_row(doc) for doc in docs[:limit]],
+        "next_token": encode_change_token(next_token),
+        "has_more": has_more,
+    }), media_type="application/json")
+
+
+@router.get(
+    "/entries/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {
+        "application/x-ndjson": {}, "text/csv": {}}}},
+)
+async def export_entries(
+    request: Request,
+    user_id: str = Depends(current_user),
+    export_format: Literal["ndjson", "csv"] = Query(
+        "ndjson", alias="format", description="出力形式（ndjson または csv）"),
+    date_from: Optional[date] = Query(
+        None, alias="from", description="記録日の下限（この日を含む）"),
+    date_to: Optional[date] = Query(
+        None, alias="to", description="記録日の上限（この日を含む）"),
+) -> StreamingResponse:
+    batches = _entries_repository(request).iter_batches(
+        user_id, date_from, date_to, EXPORT_BATCH_SIZE)
+    try:
+        # 先頭バッチだけはレスポンス開始前に取得し、DBエラーを500で返せるようにする
+        first_batch = await anext(batches, [])
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to export entries") from err
+    return StreamingResponse(
+        stream_export(first_batch, batches, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition":
+                 f'attachment; filename="entries.{export_format}"'},
+    )
+
+
+@router.get("/entries/stats", response_model=StatsResponse)
+async def get_entries_stats(
+    request: Request,
+    user_id: str = Depends(current_user),
+    bucket: Literal["day", "week", "month"] = Query(
+        "day", description="集計の単位（day / week / month）"),
+    date_from: Optional[date] = Query(
+        None, alias="from", description="記録日の下限（この日を含む）"),
+    date_to: Optional[date] = Query(
+        None, alias="to", description="記録日の上限（この日を含む）"),
+) -> Response:
+    await _discard_stale(request, user_id)
+    cache: ResponseCache = request.app.state.response_cache
+    key = cache_key(user_id, request)
+    cached = cache.get(key)
+    if cached is None:
+        generation = cache.generation(user_id)
+        try:
+            # 集計はMongoDB側で行い、区間ごとの結果だけを受け取る
+            docs = await _entries_repository(request).aggregate_stats(
+                bucket, user_id, date_from, date_to)
+        except PyMongoError as err:
+            raise HTTPException(
+                status_code=500, detail="failed to aggregate entries") from err
+        content = build_stats_response(bucket, docs).model_dump_json().encode()
+        cached = cache.put(key, content, "application/json", generation)
+    return cached_response(request, cached, cache, response_compressor)
+
+
+async def _enqueue_entry(write_queue: WriteBehindQueue, entry: Entry) -> Response:
+    """書き込みキューに入れ、他のリクエストの書き込みとまとめて保存する"""
+    try:
+        doc_id = await write_queue.submit(entry)
+    except WriteQueueFullError as err:
+        raise HTTPException(
+            status_code=503, detail="write queue is full",
+            headers={"Retry-After": "1"}) from err
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to insert entry") from err
+    if not write_queue.wait_for_flush:
+        # 書き込み前に応答するため、IDは返さない
+        return PydanticJSONResponse(
+            EntryResponse(status="accepted", entry=entry), status_code=202)
+    entry.id = doc_id
+    return PydanticJSONResponse(EntryResponse(status="success", entry=entry))
+
+
+@router.get("/entries/search", response_model=SearchResponse)
+async def search_entries(
+    request: Request,
+    user_id: str = Depends(current_user),
+    q: str = Query(
+        ..., min_length=1, max_length=100,
+        description="メモの検索語（空白区切りで複数指定するとすべてを含むメモを検索）"),
+    limit: int = Query(20, ge=1, le=100, description="1ページの最大件数"),
+    cursor: Optional[str] = Query(
+        None, description="前ページのnext_cursor（先頭ページでは省略）"),
+) -> Response:
+    words = parse_query(q)
+    if not words:
+        raise HTTPException(status_code=400, detail="empty query")
+    try:
+        after = decode_search_cursor(cursor) if cursor is not None else None
+    except InvalidCursorError as err:
+        raise HTTPException(status_code=400, detail="invalid cursor") from err
+    await _discard_stale(request, user_id)
+    cache: ResponseCache = request.app.state.response_cache
+    key = cache_key(user_id, request)
+    cached = cache.get(key)
+    if cached is None:
+        generation = cache.generation(user_id)
+        try:
+            # インデックスで文字n-gramをすべて含むメモに絞り込み、順位付けはアプリ側で行う
+            docs = await _entries_repository(request).find_by_terms(
+                user_id, query_terms(words))
+        except PyMongoError as err:
+            raise HTTPException(
+                status_code=500, detail="failed to search entries") from err
+        hits, next_cursor = await asyncio.to_thread(rank, docs, words, limit, after)
+        content = SEARCH_PAGE_ADAPTER.dump_json({
+            "status": "success", "results": hits, "next_cursor": next_cursor,
+        })
+        cached = cache.put(key, content, "application/json", generation)
+    return cached_response(request, cached, cache, response_compressor)
+
+
+@router.post("/entries", response_model=EntryResponse)
+async def add_entry(
+    entry: Entry, request: Request, user_id: str = Depends(current_user),
+) -> Response:
+    # 記録したユーザーは認証結果から設定する（入力値は使わない）
+    entry.user_id = user_id
+    write_queue: Optional[WriteBehindQueue] = request.app.state.write_queue
+    if write_queue is not None:
+        return await _enqueue_entry(write_queue, entry)
+
+    # dict化して保存（JSON互換、Noneは除外、idは必ず除外）
+    entry_dict = entry.model_dump(
+        mode="json", exclude_none=True, exclude={"id"})
+
+    try:
+        try:
+            # 同じ記録日のエントリーがあれば置き換えるため、再送してもエントリーは増えない
+            entry.id = await _entries_repository(request).upsert(entry_dict)
+        finally:
+            # タイムアウトなどで失敗しても書き込まれている可能性があるため必ず無効化する
+            request.app.state.response_cache.invalidate(user_id)
+            await _record_write(request, user_id)
+    except PyMongoError as err:
+        # 書き込まれたかわからず増分更新できないため、予測モデルは次回の予測時に作り直す
+        request.app.state.predictor.invalidate(user_id)
+        raise HTTPException(
+            status_code=500, detail="failed to insert entry") from err
+    # 予測モデルを増分更新（全履歴の再読み込みは不要）
+    request.app.state.predictor.observe(
+        user_id, entry_dict["record_date"], entry.mood_score, entry.sleep_hours)
+    # 組み立てたモデルをそのまま描画する（response_modelによる再検証・dict化を行わない）
+    return PydanticJSONResponse(EntryResponse(status="success", entry=entry))
+
+
+@router.post(
+    "/entries/bulk",
+    response_model=BulkEntriesResponse,
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {
+                "type": "array",
+                "items": {"$ref": "#/components/schemas/Entry-Input"},
+            }},
+            NDJSON_MEDIA_TYPE: {"schema": {
+                "type": "string",
+                "description": "1行に1件のEntryを記述したNDJSON",
+            }},
+        },
+    }},
+)
+async def add_entries_bulk(
+    request: Request, user_id: str = Depends(current_user),
+) -> Response:
+    try:
+        body = await read_bulk_body(
+            request.stream(), bulk_settings.max_bytes, request.headers.get("content-length"))
+        items = parse_bulk_body(body, request.headers.get("content-type", ""))
+    except BulkBodyTooLargeError as err:
+        raise HTTPException(status_code=413, detail=str(err)) from err
+    except InvalidBulkBodyError as err:
+        raise HTTPException(status_code=400, detail=str(err)) from err
+    if len(items) > bulk_settings.max_entries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"too many entries (max {bulk_settings.max_entries})")
+
+    valid, errors = validate_entries(items)
+    for _, entry in valid:
+        entry.user_id = user_id
+    try:
+        try:
+            inserted, updated, write_errors = await _entries_repository(request).upsert_many(
+                valid, bulk_settings.chunk_size)
+        finally:
+            # 失敗してもそれまでのチャンクは書き込まれている可能性があるため必ず無効化する。
+            # 過去日を含む可能性があるため、予測モデルは次回の予測時に作り直す
+            request.app.state.response_cache.invalidate(user_id)
+            request.app.state.predictor.invalidate(user_id)
+            await _record_write(request, user_id)
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to insert entries") from err
+    errors = sorted(errors + write_errors, key=lambda e: e.index)
+
+    if not errors:
+        status = "success"
+    elif inserted or updated:
+        status = "partial"
+    else:
+        status = "failed"
+    return PydanticJSONResponse(BulkEntriesResponse(
+        status=status, inserted=inserted, updated=updated, errors=errors))
+
+
+@router.get("/predict", response_model=PredictionResponse)
+async def predict(
+    request: Request, user_id: str = Depends(current_user),
+) -> Response:
+    await _discard_stale(request, user_id)
+    predictor: PredictionService = request.app.state.predictor
+    if predictor.needs_refit(user_id):
+        # 初回・増分更新できない書き込みの後だけ全履歴から作り直す
+        generation = predictor.generation(user_id)
+        try:
+            rows = await _entries_repository(request).series(user_id)
+        except PyMongoError as err:
+            raise HTTPException(
+                status_code=500, detail="failed to predict mood") from err
+        # numpyの読み込みは起動時間に響くため、予測モデルは最初の作り直しの時に読み込む
+        from .prediction import fit_batch
+        model = await asyncio.to_thread(fit_batch, rows)
+        predictor.replace(user_id, model, generation)
+
+    model = predictor.model(user_id)
+    return PydanticJSONResponse(PredictionResponse(
+        status="success",
+        predicted_mood_score=model.predict(),
+        sample_count=model.n_samples,
+        last_record_date=model.last_date,
+    ))
+
+
+@router.get("/insights", response_model=InsightsResponse)
+async def get_insights(
+    request: Request,
+    user_id: str = Depends(current_user),
+    window: int = Query(
+        DEFAULT_WINDOW, ge=2, le=90, description="移動平均に使う直近の記録件数"),
+    sleep_target: float = Query(
+        DEFAULT_SLEEP_TARGET, gt=0, le=24, description="睡眠負債を数える目標の睡眠時間"),
+) -> Response:
+    await _discard_stale(request, user_id)
+    memo: InsightsMemo = request.app.state.insights_memo
+    key = (user_id, window, sleep_target)
+    # そのユーザーへの書き込み（他のプロセスの書き込みは_discard_staleで検出済み）がなければ、
+    # 全履歴を読み直さずに計算済みの結果を返す
+    generation = request.app.state.response_cache.generation(user_id)
+    content = memo.get(key, generation)
+    try:
+        if content is None:
+            rows = await _entries_repository(request).series(user_id)
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to compute insights") from err
+    if content is None:
+        # 予測モデルと同じく、numpyは最初の計算の時に読み込む
+        from .analytics import build_insights
+
+        def render() -> bytes:
+            return build_insights(rows, window, sleep_target).model_dump_json().encode()
+        content = await asyncio.to_thread(render)
+        memo.put(key, generation, content)
+    return Response(content, media_type="application/json")
+
+
+@router.post("/users", response_model=UserResponse)
+async def create_user(user: UserCreate, request: Request) -> Response:
+    token = generate_token()
+    token_hash = hash_token(token)
+    try:
+        result = await users_collection(request).insert_one({
+            "name": user.name,
+            "token_hash": token_hash,
+            "created_at": datetime.now(timezone.utc),
+        })
+    except PyMongoError as err:
+        raise HTTPException(
+            status_code=500, detail="failed to create user") from err
+    user_id = str(result.inserted_id)
+    request.app.state.token_cache.put(token_hash, user_id)
+    return PydanticJSONResponse(UserResponse(
+        status="success", user_id=user_id, name=user.name, token=token))
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+async def get_cache_stats(request: Request) -> Response:
+    cache: ResponseCache = request.app.state.response_cache
+    return PydanticJSONResponse(CacheStatsResponse(
+        hits=cache.hits,
+        misses=cache.misses,
+        evictions=cache.evictions,
+        expirations=cache.expirations,
+        invalidations=cache.invalidations,
+        entries=len(cache),
+        bytes=cache.current_bytes,
+        max_bytes=cache.max_bytes,
+    ))
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Prometheusのテキスト形式で計測値を返す"""
+    return Response(
+        content=metrics_registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
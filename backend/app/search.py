@@ -0,0 +1,160 @@
+import base64
+import heapq
+import json
+import os
+import unicodedata
+from typing import List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .constants import DB
+from .models import SearchHit, entry_row
+from .pagination import InvalidCursorError
+
+# メモの検索語（n-gram）を保存するフィールド
+MEMO_TERMS_FIELD = "memo_terms"
+# 検索語に使うn-gramの最大文字数（1文字の検索にも使えるよう1文字のn-gramも含める）
+MAX_NGRAM = 2
+# 1回の検索に指定できる語の数
+MAX_QUERY_TERMS = 10
+
+
+def normalize(text: str) -> str:
+    """全角・半角や大文字・小文字の違いを吸収する（NFKC正規化して小文字にする）"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _ngrams(word: str, n: int) -> List[str]:
+    return [word[i:i + n] for i in range(len(word) - n + 1)]
+
+
+def memo_terms(memo: Optional[str]) -> List[str]:
+    """
+    メモを空白で区切り、それぞれを1〜MAX_NGRAM文字のn-gramに分けた検索語のリストにする。
+    日本語は単語の区切りがないため、形態素解析ではなく文字単位のn-gramで索引する。
+    """
+    if not memo:
+        return []
+    terms = set()
+    for word in normalize(memo).split():
+        for n in range(1, MAX_NGRAM + 1):
+            terms.update(_ngrams(word, n))
+    return sorted(terms)
+
+
+def with_memo_terms(document: dict) -> dict:
+    """保存するドキュメントにメモの検索語を追加する（メモがない場合はそのまま）"""
+    terms = memo_terms(document.get("memo"))
+    if not terms:
+        return document
+    return {**document, MEMO_TERMS_FIELD: terms}
+
+
+def parse_query(q: str) -> List[str]:
+    """検索文字列を空白で区切った語のリストにする（重複は除き、最大MAX_QUERY_TERMS語）"""
+    words = list(dict.fromkeys(normalize(q).split()))
+    return words[:MAX_QUERY_TERMS]
+
+
+def query_terms(words: List[str]) -> List[str]:
+    """語を含むメモが必ず持つ検索語（インデックスで候補を絞り込む条件）"""
+    terms = set()
+    for word in words:
+        terms.update(_ngrams(word, min(len(word), MAX_NGRAM)))
+    return sorted(terms)
+
+
+def score(memo: Optional[str], words: List[str]) -> int:
+    """
+    すべての語を含むメモについて、語の出現回数の合計を返す（含まない語があれば0）。
+    n-gramの一致だけでは語が連続しているとは限らないため、ここで部分文字列として確かめる。
+    """
+    if not memo:
+        return 0
+    text = normalize(memo)
+    total = 0
+    for word in words:
+        count = text.count(word)
+        if count == 0:
+            return 0
+        total += count
+    return total
+
+
+def encode_search_cursor(hit: SearchHit) -> str:
+    """検索結果の(score, record_date)を不透明なカーソル文字列にする"""
+    payload = {"s": hit["score"], "d": hit["entry"]["record_date"]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[int, str]:
+    """カーソル文字列を(score, record_date)に戻す"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        position = (int(payload["s"]), str(payload["d"]))
+    except (ValueError, TypeError, KeyError) as err:
+        raise InvalidCursorError("invalid cursor") from err
+    return position
+
+
+def rank(docs: List[dict], words: List[str], limit: int,
+         after: Optional[Tuple[int, str]] = None) -> Tuple[List[SearchHit], Optional[str]]:
+    """
+    候補のドキュメントをスコアの高い順（同点は記録日の新しい順）に並べ、afterより後の
+    最大limit件と次ページのカーソルを返す。
+    1ユーザー1日1件のため、(score, record_date)で順位が一意に決まる。
+    """
+    scored = []
+    for position, doc in enumerate(docs):
+        value = score(doc.get("memo"), words)
+        if value == 0:
+            continue
+        key = (value, doc["record_date"], position)
+        if after is not None and key[:2] >= after:
+            continue
+        scored.append(key)
+    # 次ページの有無を判定するため、全件を並べ替えずに上位limit+1件だけを取り出す
+    # （記録日は一意のため、positionまで比較されることはない）
+    top = heapq.nlargest(limit + 1, scored)
+    hits: List[SearchHit] = [
+        {"score": value, "entry": entry_row(docs[position])}
+        for value, _, position in top[:limit]]
+    next_cursor = encode_search_cursor(hits[-1]) if len(top) > limit else None
+    return hits, next_cursor
+
+
+def backfill_memo_terms(collection, batch_size: int = 500) -> int:
+    """
+    検索語を導入する前に保存したエントリー（memo_termsのないメモ）に検索語を追加し、件数を返す。
+    書き込みのたびに検索語も置き換わるため、1回実行すれば以降は不要。
+    """
+    updated = 0
+    requests = []
+    cursor = collection.find(
+        {"memo": {"$type": "string"}, MEMO_TERMS_FIELD: {"$exists": False}},
+        projection={"memo": 1})
+    for doc in cursor:
+        terms = memo_terms(doc["memo"])
+        if terms:
+            requests.append(UpdateOne(
+                {"_id": doc["_id"], "memo": doc["memo"]},
+                {"$set": {MEMO_TERMS_FIELD: terms}}))
+        if len(requests) >= batch_size:
+            updated += collection.bulk_write(requests, ordered=False).modified_count
+            requests = []
+    if requests:
+        updated += collection.bulk_write(requests, ordered=False).modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    # python -m app.search で既存のエントリーに検索語を追加する
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    with MongoClient(os.getenv("MONGODB_URI")) as client:
+        count = backfill_memo_terms(client[DB.DATABASE_NAME][DB.ENTRIES_COLLECTION])
+    print(f"added memo terms to {count} entries")
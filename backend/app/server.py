@@ -0,0 +1,44 @@
+"""
+HTTPサーバーの起動（python -m app.server）
+
+uvicornをSERVER_WORKERS個のワーカープロセスで起動する。
+ワーカーはspawnで起動した別々のプロセスで、それぞれがapp.mainをimportし、
+lifespanでMongoClient・DB呼び出しのスレッドプール・キャッシュを作る（プロセス間で状態を共有しない）。
+app.mainのimportではMongoClientを作らないため、forkで起動する場合も接続が子プロセスに引き継がれることはない。
+"""
+import importlib.util
+import os
+
+import uvicorn
+
+from .config import ServerSettings
+
+APP = "app.main:app"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options(settings: ServerSettings) -> dict:
+    """uvicorn.runに渡すオプション（uvloop・httptoolsがなければ標準の実装を使う）"""
+    return {
+        "host": settings.host,
+        "port": settings.port,
+        "workers": settings.workers,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "timeout_graceful_shutdown": settings.graceful_shutdown_seconds,
+    }
+
+
+def main() -> None:
+    # app.mainと同じく、設定を読む前に.envを読み込む
+    if os.getenv("ENV") != "ci":
+        from dotenv import load_dotenv
+        load_dotenv()
+    uvicorn.run(APP, **uvicorn_options(ServerSettings.from_env()))
+
+
+if __name__ == "__main__":
+    main()
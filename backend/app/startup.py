@@ -0,0 +1,32 @@
+import asyncio
+import importlib
+import logging
+import time
+
+from pymongo.errors import PyMongoError
+
+from .constants import DB
+from .db import DatabaseExecutor
+from .indexes import ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up(mongo, executor: DatabaseExecutor, layout: str) -> None:
+    """
+    起動完了後にバックグラウンドで行う初期化（STARTUP_BACKGROUND_INIT）。
+    インデックス作成と接続確認を済ませ、予測モデル・分析（numpy）を読み込んでおく。
+    失敗しても起動は継続し、警告を出力する（インデックス作成は次回の起動で再試行される）。
+    """
+    started = time.perf_counter()
+    try:
+        await executor.run(ensure_indexes, mongo[DB.DATABASE_NAME], layout)
+        # サーバー選択・TLS・認証を済ませ、最初のリクエストが接続の確立を待たないようにする
+        await executor.run(mongo.admin.command, "ping")
+    except PyMongoError as err:
+        logger.warning("startup warm-up: database is not reachable: %s", err)
+    # 最初の予測・分析のリクエストがnumpyの読み込みを待たないよう、別スレッドで読み込む
+    for module in (".prediction", ".analytics"):
+        await asyncio.to_thread(importlib.import_module, module, __package__)
+    logger.info("startup warm-up finished in %.0f ms",
+                (time.perf_counter() - started) * 1000)
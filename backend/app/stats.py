@@ -0,0 +1,92 @@
+import math
+from typing import List, Optional
+
+from .models import MetricStats, StatsBucket, StatsResponse, StatsSummary
+
+# 区間ごとに集計する累積量（平均・相関係数は区間をまたいで合算できるよう和で持つ）
+_SUMS = {
+    "sum_mood": {"$sum": "$mood_score"},
+    "sum_sleep": {"$sum": "$sleep_hours"},
+    "sum_mood_sq": {"$sum": {"$multiply": ["$mood_score", "$mood_score"]}},
+    "sum_sleep_sq": {"$sum": {"$multiply": ["$sleep_hours", "$sleep_hours"]}},
+    "sum_mood_sleep": {"$sum": {"$multiply": ["$mood_score", "$sleep_hours"]}},
+}
+
+
+def bucket_key(bucket: str):
+    """記録日（YYYY-MM-DD文字列）から区間の開始日を求める式"""
+    if bucket == "day":
+        return "$record_date"
+    trunc = {
+        "date": {"$dateFromString": {
+            "dateString": "$record_date", "format": "%Y-%m-%d"}},
+        "unit": bucket,
+    }
+    if bucket == "week":
+        trunc["startOfWeek"] = "monday"
+    return {"$dateToString": {"date": {"$dateTrunc": trunc}, "format": "%Y-%m-%d"}}
+
+
+def stats_pipeline(bucket: str, query: dict) -> List[dict]:
+    """
+    区間ごとの件数・最小・最大と、平均・相関係数の計算に使う和を求める集計パイプライン。
+    全件の走査と集計はMongoDB側で行い、返るのは区間の数だけのドキュメントになる。
+    """
+    return [
+        {"$match": query},
+        {"$group": {
+            "_id": bucket_key(bucket),
+            "count": {"$sum": 1},
+            "mood_min": {"$min": "$mood_score"},
+            "mood_max": {"$max": "$mood_score"},
+            "sleep_min": {"$min": "$sleep_hours"},
+            "sleep_max": {"$max": "$sleep_hours"},
+            **_SUMS,
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def correlation(n: int, sum_x: float, sum_y: float, sum_xx: float,
+                sum_yy: float, sum_xy: float) -> Optional[float]:
+    """和から求めるピアソンの相関係数（求められない場合はNone）"""
+    if n < 2:
+        return None
+    var_x = n * sum_xx - sum_x * sum_x
+    var_y = n * sum_yy - sum_y * sum_y
+    if var_x <= 0 or var_y <= 0:
+        return None
+    r = (n * sum_xy - sum_x * sum_y) / math.sqrt(var_x * var_y)
+    return max(-1.0, min(1.0, r))
+
+
+def _summary(doc: dict) -> dict:
+    n = doc["count"]
+    return {
+        "count": n,
+        "mood_score": MetricStats(
+            mean=doc["sum_mood"] / n, min=doc["mood_min"], max=doc["mood_max"]),
+        "sleep_hours": MetricStats(
+            mean=doc["sum_sleep"] / n, min=doc["sleep_min"], max=doc["sleep_max"]),
+        "correlation": correlation(
+            n, doc["sum_sleep"], doc["sum_mood"], doc["sum_sleep_sq"],
+            doc["sum_mood_sq"], doc["sum_mood_sleep"]),
+    }
+
+
+def build_stats_response(bucket: str, docs: List[dict]) -> StatsResponse:
+    """集計パイプラインの結果から区間ごとと期間全体の統計を組み立てる"""
+    buckets = [StatsBucket(start=doc["_id"], **_summary(doc)) for doc in docs]
+    total = None
+    if docs:
+        # 期間全体は区間ごとの和を合算して求める（全件を読み直さない）
+        merged = {key: sum(doc[key] for doc in docs)
+                  for key in ("count", *_SUMS)}
+        merged.update(
+            mood_min=min(doc["mood_min"] for doc in docs),
+            mood_max=max(doc["mood_max"] for doc in docs),
+            sleep_min=min(doc["sleep_min"] for doc in docs),
+            sleep_max=max(doc["sleep_max"] for doc in docs),
+        )
+        total = StatsSummary(**_summary(merged))
+    return StatsResponse(status="success", bucket=bucket, buckets=buckets, total=total)
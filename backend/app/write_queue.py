@@ -0,0 +1,189 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from pymongo.errors import WriteError
+
+from .cache import ResponseCache
+from .changes import ChangeCounter, ChangeTracker
+from .models import Entry
+from .predictor import PredictionService
+from .repository import EntryRepository
+
+logger = logging.getLogger(__name__)
+
+# キューを閉じたことをフラッシュ用タスクに知らせる印
+_STOP = object()
+
+
+class WriteQueueFullError(Exception):
+    """キューが一杯のまま待機時間を過ぎた、またはキューが閉じられている"""
+
+
+@dataclass
+class PendingWrite:
+    entry: Entry
+    # waitモードで書き込み結果（_id）を受け取るFuture（ackモードではNone）
+    future: Optional[asyncio.Future]
+
+
+class WriteBehindQueue:
+    """
+    POST /entries の書き込みをasyncioのキューにため、batch_size件たまるか
+    max_delay_seconds経過するごとにリポジトリのupsert_manyでまとめて書き込む。
+    キューがmax_pending件で一杯の場合、submitは空きが出るまで待ち（バックプレッシャー）、
+    enqueue_timeout_secondsを過ぎるとWriteQueueFullErrorを送出する。
+    closeでキューに残った書き込みをすべて書き込んでから終了する。
+    """
+
+    def __init__(self, repository: EntryRepository, response_cache: ResponseCache,
+                 predictor: PredictionService, wait_for_flush: bool,
+                 batch_size: int, max_delay_seconds: float, max_pending: int,
+                 enqueue_timeout_seconds: float, change_counter: ChangeCounter,
+                 change_tracker: Optional[ChangeTracker] = None):
+        self._repository = repository
+        self._response_cache = response_cache
+        self._predictor = predictor
+        self._change_counter = change_counter
+        self._change_tracker = change_tracker
+        self.wait_for_flush = wait_for_flush
+        self.batch_size = batch_size
+        self.max_delay_seconds = max_delay_seconds
+        self.enqueue_timeout_seconds = enqueue_timeout_seconds
+        self._queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_pending)
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_entries = 0
+        self.failed_entries = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """新しい書き込みの受け付けを止め、キューに残った書き込みを書き込んでから終了する"""
+        self._closed = True
+        if self._task is None:
+            return
+        # 一杯のキューでも終了の印を入れられるよう、put_nowaitではなくputで待つ
+        await self._queue.put(_STOP)
+        await self._task
+        # 終了処理中に空きを待っていた書き込みが後から入った場合も書き込む
+        remaining = self._drain_remaining()
+        if remaining:
+            await self._flush(remaining)
+
+    async def submit(self, entry: Entry) -> Optional[str]:
+        """
+        書き込みをキューに入れる（entry.user_idは設定済みであること）。
+        waitモードでは書き込み後の_idを、ackモードではキューに入れた時点でNoneを返す。
+        """
+        if self._closed:
+            raise WriteQueueFullError("write queue is closed")
+        future = (asyncio.get_running_loop().create_future()
+                  if self.wait_for_flush else None)
+        try:
+            async with asyncio.timeout(self.enqueue_timeout_seconds):
+                await self._queue.put(PendingWrite(entry=entry, future=future))
+        except TimeoutError as err:
+            raise WriteQueueFullError("write queue is full") from err
+        if future is None:
+            return None
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if stopping:
+                return
+
+    async def _next_batch(self):
+        """1件目を待ち、batch_size件たまるか1件目からmax_delay_seconds経過するまで集める"""
+        item = await self._queue.get()
+        if item is _STOP:
+            return self._drain_remaining(), True
+        batch = [item]
+        try:
+            async with asyncio.timeout(self.max_delay_seconds):
+                while len(batch) < self.batch_size:
+                    item = await self._queue.get()
+                    if item is _STOP:
+                        return batch + self._drain_remaining(), True
+                    batch.append(item)
+        except TimeoutError:
+            pass
+        return batch, False
+
+    def _drain_remaining(self) -> List[PendingWrite]:
+        """終了の印より後に入った書き込み（キューが一杯で待っていたもの）も取り出す"""
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                remaining.append(item)
+        return remaining
+
+    async def _flush(self, batch: List[PendingWrite]) -> None:
+        user_ids = {pending.entry.user_id for pending in batch}
+        try:
+            try:
+                inserted, updated, errors = await self._repository.upsert_many(
+                    [(index, pending.entry) for index, pending in enumerate(batch)],
+                    chunk_size=len(batch))
+            finally:
+                # タイムアウトなどで失敗しても書き込まれている可能性があるため必ず無効化し、
+                # 複数のプロセスで動かす場合は書き込み回数を進めて他のプロセスに知らせる
+                for user_id in user_ids:
+                    self._response_cache.invalidate(user_id)
+                if self._change_tracker is not None:
+                    self._change_tracker.advance(await self._change_counter.bump(user_ids))
+        except Exception as err:
+            # 一部または全部が書き込まれている可能性があり増分更新できないため、予測モデルは次回の予測時に作り直す
+            for user_id in user_ids:
+                self._predictor.invalidate(user_id)
+            # フラッシュ用タスクを止めないよう、DB以外の例外もこのバッチの失敗として扱う
+            self._fail(batch, err)
+            return
+
+        self.flushes += 1
+        ids = {result.index: result.id for result in inserted + updated}
+        # 同じユーザー・記録日の書き込みが重複した場合は最後の書き込みが採用される
+        winners = {}
+        for index, pending in enumerate(batch):
+            winners[(pending.entry.user_id, pending.entry.record_date)] = index
+        write_errors = {error.index: error.errors[0].msg for error in errors}
+
+        for index, pending in enumerate(batch):
+            entry = pending.entry
+            winner = winners[(entry.user_id, entry.record_date)]
+            doc_id = ids.get(winner)
+            if doc_id is None:
+                self._fail([pending], WriteError(
+                    write_errors.get(winner, "failed to write entry")))
+                continue
+            self.flushed_entries += 1
+            if index == winner:
+                # 予測モデルを増分更新（全履歴の再読み込みは不要）
+                self._predictor.observe(
+                    entry.user_id, entry.record_date.isoformat(),
+                    entry.mood_score, entry.sleep_hours)
+            if pending.future is not None and not pending.future.done():
+                pending.future.set_result(doc_id)
+
+    def _fail(self, batch: List[PendingWrite], err: Exception) -> None:
+        self.failed_entries += len(batch)
+        for pending in batch:
+            if pending.future is not None:
+                if not pending.future.done():
+                    pending.future.set_exception(err)
+            else:
+                # ackモードでは応答済みのため、失敗はログでのみ知らせる
+                logger.error(
+                    "write-behind flush failed: user_id=%s record_date=%s: %s",
+                    pending.entry.user_id, pending.entry.record_date, err)
@@ -0,0 +1,83 @@
+"""
+エントリー一括登録の取り込み速度ベンチマーク
+
+DBの1往復あたりのレイテンシを time.sleep で再現したモックに対し、
+N件を POST /entries で1件ずつ送る場合と POST /entries/bulk でまとめて送る場合の
+取り込み速度（entries/s）とDB往復回数を比較する。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_bulk --entries 2000 --latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+os.environ.setdefault("ENV", "ci")
+
+import app.main  # noqa: E402
+import app.routes  # noqa: E402
+from app.config import BulkSettings  # noqa: E402
+from app.db import DatabaseExecutor  # noqa: E402
+from benchmarks.common import (  # noqa: E402
+    AUTH_HEADERS, SlowClient, SlowCollection, bench_entry, prepare_app,
+)
+
+
+async def ingest_single(client: httpx.AsyncClient, entries: list) -> None:
+    for entry in entries:
+        (await client.post("/entries", json=entry)).raise_for_status()
+
+
+async def ingest_bulk(client: httpx.AsyncClient, entries: list, ndjson: bool) -> None:
+    if ndjson:
+        body = "\n".join(json.dumps(e, ensure_ascii=False) for e in entries)
+        response = await client.post(
+            "/entries/bulk", content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"})
+    else:
+        response = await client.post("/entries/bulk", json=entries)
+    response.raise_for_status()
+    assert response.json()["status"] == "success"
+
+
+async def run(mode: str, entries: list, latency: float) -> tuple:
+    collection = SlowCollection(latency)
+    prepare_app(app.main.app, SlowClient(collection),
+                DatabaseExecutor(max_workers=4, timeout=600))
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as client:
+        start = time.perf_counter()
+        if mode == "single":
+            await ingest_single(client, entries)
+        else:
+            await ingest_bulk(client, entries, ndjson=(mode == "bulk-ndjson"))
+        elapsed = time.perf_counter() - start
+    app.main.app.state.db_executor.shutdown()
+    return elapsed, collection.operations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エントリー一括登録の取り込み速度ベンチマーク")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--chunk-size", type=int, default=BulkSettings.chunk_size)
+    args = parser.parse_args()
+
+    app.routes.bulk_settings = BulkSettings(chunk_size=args.chunk_size)
+    entries = [bench_entry(day) for day in range(args.entries)]
+    print(f"entries={args.entries} db_latency={args.latency_ms}ms "
+          f"chunk_size={args.chunk_size}")
+    for mode in ("single", "bulk-json", "bulk-ndjson"):
+        elapsed, round_trips = asyncio.run(run(mode, entries, args.latency_ms / 1000))
+        print(f"  {mode:<11} {args.entries / elapsed:10.1f} entries/s  "
+              f"elapsed={elapsed * 1000:8.1f}ms  db_round_trips={round_trips}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+変更の取得（GET /entries/changes）のベンチマーク
+
+履歴の日数ごとに、クライアントを開いたときの同期について以下の2方式を比較する。
+  - full:  GET /entries を最終ページまでたどって全件を取得し直す（従来のgetEntries）
+  - delta: 前回のnext_tokenをsinceに指定して、その後に書き込まれた --changes 件だけを取得する
+それぞれ1回の同期で受け取る本文のバイト数（圧縮前）・リクエスト数・所要時間を出力する。
+
+HTTPサーバーを介さずASGIで直接呼び出し、DBはmongomockを使う（所要時間はPython側の処理の比較にとどまる）。
+履歴は書き込み時刻をCHANGES_LAG_MSより前にして保存し、変更分だけを計測の直前に書き込む。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_changes --days 30 365 1825 --changes 1 7
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import date, timedelta
+
+import httpx
+import mongomock
+
+os.environ.setdefault("ENV", "ci")
+
+import app.main  # noqa: E402
+import app.routes  # noqa: E402
+from app.changes import change_time  # noqa: E402
+from app.constants import DB  # noqa: E402
+from app.db import DatabaseExecutor  # noqa: E402
+from benchmarks.common import AUTH_HEADERS, BENCH_USER_ID, prepare_app  # noqa: E402
+
+
+def make_documents(days: int, updated_at) -> list:
+    """記録日の古い順のdays日分の履歴"""
+    start = date(2025, 8, 31) - timedelta(days=days - 1)
+    return [{
+        "user_id": BENCH_USER_ID,
+        "record_date": (start + timedelta(days=i)).isoformat(),
+        "mood_score": i % 6,
+        "sleep_hours": 4.0 + (i % 9) * 0.5,
+        "memo": "今日はよく眠れた" if i % 3 == 0 else None,
+        "updated_at": updated_at,
+    } for i in range(days)]
+
+
+async def sync_full(client: httpx.AsyncClient):
+    """GET /entries を最終ページまでたどる。(バイト数, リクエスト数)を返す"""
+    size = requests = 0
+    cursor = None
+    while True:
+        response = await client.get(
+            "/entries", params={"limit": 1000, **({"cursor": cursor} if cursor else {})})
+        response.raise_for_status()
+        size += len(response.content)
+        requests += 1
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return size, requests
+
+
+async def sync_delta(client: httpx.AsyncClient, since):
+    """GET /entries/changes をhas_moreがfalseになるまでたどる。(バイト数, リクエスト数, 次回のトークン)を返す"""
+    size = requests = 0
+    while True:
+        params = {"since": since} if since else {}
+        response = await client.get("/entries/changes", params=params)
+        response.raise_for_status()
+        size += len(response.content)
+        requests += 1
+        body = response.json()
+        since = body["next_token"]
+        if not body["has_more"]:
+            return size, requests, since
+
+
+async def measure(days: int, changes: int, repeat: int):
+    mongo = mongomock.MongoClient()
+    collection = mongo[DB.DATABASE_NAME][DB.ENTRIES_COLLECTION]
+    history = change_time() - app.routes.changes_settings.lag - timedelta(minutes=1)
+    collection.insert_many(make_documents(days, history))
+    # mongomockはスレッドセーフではないため1スレッドで実行する
+    executor = DatabaseExecutor(max_workers=1, timeout=60)
+    prepare_app(app.main.app, mongo, executor)
+    transport = httpx.ASGITransport(app=app.main.app)
+    results = {}
+    try:
+        async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as client:
+            # 初回の同期で次回のトークンを得てから、直近changes日分を書き換える
+            _, _, token = await sync_delta(client, None)
+            for doc in make_documents(changes, change_time()):
+                doc["mood_score"] = 5
+                collection.replace_one(
+                    {"user_id": BENCH_USER_ID, "record_date": doc["record_date"]}, doc)
+
+            for name, sync in (("full", lambda: sync_full(client)),
+                               ("delta", lambda: sync_delta(client, token))):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    size, requests, *_ = await sync()
+                results[name] = (size, requests, (time.perf_counter() - start) / repeat)
+    finally:
+        executor.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="変更の取得のベンチマーク")
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365, 1825])
+    parser.add_argument("--changes", type=int, nargs="+", default=[1, 7],
+                        help="前回の同期以降に書き換える件数")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'days':>6}  {'changes':>7}  {'mode':<5}  {'bytes':>9}  {'requests':>8}  {'time':>10}")
+    for days in args.days:
+        for changes in args.changes:
+            results = asyncio.run(measure(days, min(changes, days), args.repeat))
+            for name, (size, requests, elapsed) in results.items():
+                print(f"{days:>6}  {changes:>7}  {name:<5}  {size:>9}  {requests:>8}  "
+                      f"{elapsed * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+レスポンス圧縮のベンチマーク
+
+履歴の件数ごとに、実際の GET /entries について圧縮方式別に以下を計測する。
+  - bytes:     実際に送られる本文のバイト数（展開前）と、圧縮しない場合に対する割合
+  - cpu miss:  読み出しキャッシュを無効にした場合の1リクエストあたりのCPU時間（毎回圧縮する）
+  - cpu hit:   読み出しキャッシュが有効な場合の1リクエストあたりのCPU時間
+               （2回目以降はキャッシュの圧縮済み本文を再利用するため、圧縮しない場合とほぼ同じになる）
+
+HTTPサーバーを介さずASGIで直接呼び出し、DBは件数分のドキュメントを返すモックを使う。
+brはbrotliパッケージがインストールされている場合だけ計測する。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_compression --sizes 30 100 365 1000 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import httpx
+from bson import ObjectId
+
+os.environ.setdefault("ENV", "ci")
+
+import app.main  # noqa: E402
+import app.routes  # noqa: E402
+from app.compression import ResponseCompressor  # noqa: E402
+from app.config import CompressionSettings  # noqa: E402
+from benchmarks.bench_response import StaticClient  # noqa: E402
+from benchmarks.common import AUTH_HEADERS, prepare_app  # noqa: E402
+from benchmarks.load_entries import InlineExecutor  # noqa: E402
+
+MEMOS = ["今日はよく眠れた", "頭痛がする", "散歩した", "残業で疲れた", "友達と会った",
+         "雨で気分が沈む", "運動した", "寝坊した", ""]
+
+
+def make_docs(n: int, seed: int = 0) -> list:
+    """実際の記録に近い、新しい順に並んだn日分のドキュメント（メモは日本語で長さがまちまち）"""
+    rng = random.Random(seed)
+    start = date(2025, 8, 31)
+    docs = []
+    for i in range(n):
+        doc = {
+            "_id": ObjectId(),
+            "user_id": "bench_user",
+            "record_date": (start - timedelta(days=i)).isoformat(),
+            "mood_score": rng.randint(0, 5),
+            "sleep_hours": rng.choice([5.0, 5.5, 6.0, 6.5, 7.0, 7.5, 8.0]),
+        }
+        memo = "、".join(m for m in rng.sample(MEMOS, rng.randint(0, 3)) if m)
+        if memo:
+            doc["memo"] = memo
+        docs.append(doc)
+    return docs
+
+
+async def get_raw(client: httpx.AsyncClient, size: int, headers: dict) -> int:
+    """GET /entriesを実行し、展開せずに受け取った本文のバイト数を返す（クライアント側の展開は計測しない）"""
+    async with client.stream(
+            "GET", "/entries", params={"limit": size}, headers=headers) as response:
+        response.raise_for_status()
+        return sum([len(chunk) async for chunk in response.aiter_raw()])
+
+
+async def measure(size: int, encoding: str, requests: int):
+    """(本文のバイト数, キャッシュなしのCPU時間, キャッシュありのCPU時間)を返す"""
+    results = []
+    for cache_max_bytes in (0, 64 * 1024 * 1024):
+        prepare_app(app.main.app, StaticClient(make_docs(size)), InlineExecutor(),
+                    cache_max_bytes=cache_max_bytes)
+        transport = httpx.ASGITransport(app=app.main.app)
+        headers = {**AUTH_HEADERS, "Accept-Encoding": encoding}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            size_bytes = await get_raw(client, size, headers)
+            start = time.process_time()
+            for _ in range(requests):
+                await get_raw(client, size, headers)
+            results.append((time.process_time() - start) / requests)
+    return size_bytes, results[0], results[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="レスポンス圧縮のベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 100, 365, 1000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    settings = CompressionSettings()
+    # 閾値で圧縮されない件数でも比較できるよう、計測中は閾値を0にする
+    app.routes.response_compressor = compressor = ResponseCompressor(
+        settings.encodings, minimum_size=0, gzip_level=settings.gzip_level,
+        brotli_quality=settings.brotli_quality)
+    encodings = ["identity"] + compressor.encodings
+    print(f"requests={args.requests}  gzip level={settings.gzip_level}  "
+          f"br quality={settings.brotli_quality}  (CPU time per request)")
+    print(f"{'entries':>8}  {'encoding':<8}  {'bytes':>9}  {'ratio':>6}  "
+          f"{'cpu miss':>10}  {'cpu hit':>10}")
+    for size in args.sizes:
+        raw = None
+        for encoding in encodings:
+            size_bytes, miss, hit = asyncio.run(measure(size, encoding, args.requests))
+            raw = raw or size_bytes
+            print(f"{size:>8}  {encoding:<8}  {size_bytes:>9}  {size_bytes / raw:6.1%}  "
+                  f"{miss * 1000:8.3f}ms  {hit * 1000:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
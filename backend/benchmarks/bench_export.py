@@ -0,0 +1,158 @@
+"""
+エントリーエクスポートのベンチマーク
+
+合成エントリー（デフォルト10万件）に対して、以下を比較する。
+  - full:   全件を1つのEntriesResponseにして返す（ページング導入前の GET /entries 相当）
+  - ndjson: GET /entries/export?format=ndjson
+  - csv:    GET /entries/export?format=csv
+各モードは別プロセスで実行し、ピークRSS（ru_maxrss）と最初の1バイトまでの時間(TTFB)、
+全体の所要時間を出力する。合成データは生成しながら返すため、RSSに元データは含まれない。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_export --entries 100000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("ENV", "ci")
+
+MODES = ["full", "ndjson", "csv"]
+
+
+class SyntheticCollection:
+    """find のたびに n 件の合成ドキュメントを生成して返すコレクション"""
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def find(self, query, **kwargs):
+        start = date(2000, 1, 1)
+        limit = kwargs.get("limit") or self.n
+        for i in range(min(self.n, limit)):
+            yield {
+                "_id": f"{i:024x}",
+                "record_date": (start + timedelta(days=i)).isoformat(),
+                "mood_score": i % 6,
+                "sleep_hours": 4.0 + (i % 9) * 0.5,
+                "memo": "今日はよく眠れた" if i % 3 else "",
+            }
+
+
+class SyntheticClient:
+    def __init__(self, n: int):
+        self.collection = SyntheticCollection(n)
+
+    def __getitem__(self, name):
+        from app.constants import DB
+        return {DB.ENTRIES_COLLECTION: self.collection}
+
+
+def build_full_list_app():
+    """ページング導入前の GET /entries と同じく、全件をモデル化して返すアプリ"""
+    from fastapi import FastAPI, Request
+    from app.models import Entry, EntriesResponse
+
+    baseline = FastAPI()
+
+    @baseline.get("/entries", response_model=EntriesResponse)
+    async def get_entries(request: Request) -> EntriesResponse:
+        docs = request.app.state.mongo.collection.find({})
+        return EntriesResponse(
+            status="success", entries=[Entry(**doc) for doc in docs])
+
+    return baseline
+
+
+async def measure(asgi_app, path: str, query: str):
+    """ASGIアプリを直接呼び出し、TTFB・総時間・総バイト数を返す"""
+    from benchmarks.common import AUTH_HEADERS
+
+    started = time.perf_counter()
+    first_byte = None
+    total_bytes = 0
+
+    request_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # レスポンス送信中にクライアントは切断しない
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte, total_bytes
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            total_bytes += len(message["body"])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode())
+                    for name, value in AUTH_HEADERS.items()],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    await asgi_app(scope, receive, send)
+    finished = time.perf_counter()
+    return first_byte - started, finished - started, total_bytes
+
+
+def run_mode(mode: str, n: int) -> None:
+    from app.db import DatabaseExecutor
+    from benchmarks.common import prepare_app
+
+    if mode == "full":
+        asgi_app = build_full_list_app()
+        path, query = "/entries", ""
+    else:
+        from app.main import app as asgi_app
+        path, query = "/entries/export", f"format={mode}"
+    prepare_app(asgi_app, SyntheticClient(n),
+                DatabaseExecutor(max_workers=2, timeout=600))
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ttfb, total, size = asyncio.run(measure(asgi_app, path, query))
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    asgi_app.state.db_executor.shutdown()
+    # ru_maxrss はLinuxではKB単位
+    print(f"  {mode:<7} peak_rss={rss_peak / 1024:7.1f}MB "
+          f"(+{(rss_peak - rss_before) / 1024:6.1f}MB)  "
+          f"ttfb={ttfb * 1000:8.1f}ms  total={total * 1000:8.1f}ms  "
+          f"bytes={size:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エントリーエクスポートのベンチマーク")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.entries)
+        return
+
+    print(f"entries={args.entries:,}")
+    for mode in MODES:
+        # ピークRSSをモードごとに独立して測るため、別プロセスで実行する
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_export",
+             "--entries", str(args.entries), "--mode", mode],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
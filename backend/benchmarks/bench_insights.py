@@ -0,0 +1,233 @@
+"""
+分析結果（GET /insights）のベンチマーク
+
+履歴の件数ごとに、同じ指標（曜日ごとの傾向・睡眠負債の連続・移動平均・外れ値）を求める以下の2方式を比較する。
+  - python: 全フィールドのドキュメントをEntryにし、Pythonのループで1件ずつ集計する
+  - numpy:  射影した(record_date, mood_score, sleep_hours)を配列にし、app.analyticsでまとめて計算する
+2方式の結果が一致することも確認する。
+
+--endpoint-days を指定すると、mongomockに保存した履歴に対してASGIで /insights を呼び出し、
+計算する場合（書き込み回数が進んだ後）と計算済みの結果を返す場合の所要時間も出力する。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_insights --sizes 100 1000 10000 100000 --endpoint-days 1825
+"""
+import argparse
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from datetime import date, timedelta
+from typing import List
+
+import numpy as np
+
+os.environ.setdefault("ENV", "ci")
+
+from app.analytics import ANOMALY_WINDOW, ANOMALY_Z, DECIMALS, build_insights  # noqa: E402
+from app.insights import DEFAULT_SLEEP_TARGET, DEFAULT_WINDOW  # noqa: E402
+from app.models import (  # noqa: E402
+    Anomaly, Entry, InsightsResponse, MovingAverages, SleepDebt, SleepDebtStreak,
+    WeekdayEffect,
+)
+from benchmarks.common import AUTH_HEADERS, BENCH_USER_ID, prepare_app  # noqa: E402
+
+
+def make_documents(n: int) -> List[dict]:
+    """記録日の昇順のn件（1割ほどの日は記録がない）"""
+    rng = np.random.default_rng(0)
+    gaps = np.where(rng.random(n) < 0.1, 2, 1).cumsum()
+    moods = rng.integers(0, 6, size=n)
+    sleeps = rng.uniform(3, 10, size=n).round(1)
+    start = date(1800, 1, 1)
+    return [{
+        "_id": f"entry_{i}",
+        "user_id": BENCH_USER_ID,
+        "record_date": (start + timedelta(days=int(gaps[i]))).isoformat(),
+        "mood_score": int(moods[i]),
+        "sleep_hours": float(sleeps[i]),
+        "memo": "今日はよく眠れた" if i % 3 == 0 else None,
+    } for i in range(n)]
+
+
+def _round(value: float):
+    return None if math.isnan(value) else round(value, DECIMALS)
+
+
+def python_insights(docs: List[dict], window: int, sleep_target: float) -> InsightsResponse:
+    """Entryを1件ずつループで集計する比較用の実装（app.analytics.build_insightsと同じ結果を返す）"""
+    entries = [Entry.model_validate(doc) for doc in docs]
+
+    counts = [0] * 7
+    mood_sums = [0.0] * 7
+    sleep_sums = [0.0] * 7
+    for entry in entries:
+        weekday = entry.record_date.weekday()
+        counts[weekday] += 1
+        mood_sums[weekday] += entry.mood_score
+        sleep_sums[weekday] += entry.sleep_hours
+    overall = sum(entry.mood_score for entry in entries) / len(entries) if entries else math.nan
+    weekdays = []
+    for weekday in range(7):
+        mood = mood_sums[weekday] / counts[weekday] if counts[weekday] else math.nan
+        sleep = sleep_sums[weekday] / counts[weekday] if counts[weekday] else math.nan
+        weekdays.append(WeekdayEffect(
+            weekday=weekday, count=counts[weekday], mood_score=_round(mood),
+            sleep_hours=_round(sleep), mood_delta=_round(mood - overall)))
+
+    streaks = []
+    previous = None
+    for entry in entries:
+        deficit = max(sleep_target - entry.sleep_hours, 0.0)
+        if deficit > 0:
+            if (streaks and previous is not None and previous[1] > 0
+                    and entry.record_date - previous[0] == timedelta(days=1)):
+                streaks[-1][1] = entry.record_date
+                streaks[-1][2] += 1
+                streaks[-1][3] += deficit
+            else:
+                streaks.append([entry.record_date, entry.record_date, 1, deficit])
+        previous = (entry.record_date, deficit)
+    longest = None
+    for streak in streaks:
+        if longest is None or streak[2] >= longest[2]:
+            longest = streak
+
+    def to_streak(streak):
+        return SleepDebtStreak(start=streak[0], end=streak[1], days=streak[2],
+                               debt_hours=_round(streak[3]))
+    current = streaks[-1] if entries and previous[1] > 0 else None
+    sleep_debt = SleepDebt(
+        target_hours=sleep_target,
+        current_streak=to_streak(current) if current else None,
+        longest_streak=to_streak(longest) if longest else None)
+
+    averages = {"mood_score": [], "sleep_hours": []}
+    anomalies = []
+    for metric in ("mood_score", "sleep_hours"):
+        recent = deque()
+        total = 0.0
+        for entry in entries:
+            value = getattr(entry, metric)
+            if len(recent) == window:
+                total -= recent.popleft()
+            recent.append(value)
+            total += value
+            averages[metric].append(round(total / len(recent), DECIMALS))
+
+        baseline = deque()
+        total = squares = 0.0
+        for entry in entries:
+            value = getattr(entry, metric)
+            if len(baseline) == ANOMALY_WINDOW:
+                mean = total / ANOMALY_WINDOW
+                variance = (squares - ANOMALY_WINDOW * mean * mean) / (ANOMALY_WINDOW - 1)
+                std = math.sqrt(max(variance, 0.0))
+                if std > 1e-9 and abs((value - mean) / std) >= ANOMALY_Z:
+                    anomalies.append(Anomaly(
+                        record_date=entry.record_date, metric=metric, value=value,
+                        expected=_round(mean), z_score=_round((value - mean) / std)))
+                oldest = baseline.popleft()
+                total -= oldest
+                squares -= oldest * oldest
+            baseline.append(value)
+            total += value
+            squares += value * value
+    anomalies.sort(key=lambda anomaly: anomaly.record_date)
+
+    return InsightsResponse(
+        status="success", count=len(entries), weekdays=weekdays, sleep_debt=sleep_debt,
+        moving_averages=MovingAverages(
+            window=window, record_dates=[entry.record_date for entry in entries],
+            **averages),
+        anomalies=anomalies)
+
+
+def agree(a, b) -> bool:
+    """小数点以下の丸めの差を許して2つの結果が一致するか"""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(agree(a[key], b[key]) for key in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(agree(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, abs_tol=10 ** -DECIMALS * 1.5)
+    return a == b
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_compute(sizes: List[int], repeat: int) -> None:
+    print(f"{'entries':>8}  {'python':>10}  {'numpy':>10}  {'speedup':>7}  agree")
+    for n in sizes:
+        docs = make_documents(n)
+        rows = [(doc["record_date"], doc["mood_score"], doc["sleep_hours"]) for doc in docs]
+        expected = python_insights(docs, DEFAULT_WINDOW, DEFAULT_SLEEP_TARGET).model_dump()
+        actual = build_insights(rows, DEFAULT_WINDOW, DEFAULT_SLEEP_TARGET).model_dump()
+        python = best_of(max(repeat // 10, 1) if n >= 100000 else repeat, lambda: python_insights(
+            docs, DEFAULT_WINDOW, DEFAULT_SLEEP_TARGET))
+        vectorized = best_of(repeat, lambda: build_insights(
+            rows, DEFAULT_WINDOW, DEFAULT_SLEEP_TARGET))
+        print(f"{n:>8}  {python * 1000:8.2f}ms  {vectorized * 1000:8.2f}ms  "
+              f"{python / vectorized:6.1f}x  {'yes' if agree(expected, actual) else 'NO'}")
+
+
+async def bench_endpoint(days: int, repeat: int) -> None:
+    import httpx
+    import mongomock
+
+    import app.main
+    from app.constants import DB
+    from app.db import DatabaseExecutor
+
+    mongo = mongomock.MongoClient()
+    collection = mongo[DB.DATABASE_NAME][DB.ENTRIES_COLLECTION]
+    collection.insert_many(make_documents(days))
+    versions = mongo[DB.DATABASE_NAME][DB.ENTRY_VERSIONS_COLLECTION]
+    # mongomockはスレッドセーフではないため1スレッドで実行する
+    executor = DatabaseExecutor(max_workers=1, timeout=60)
+    prepare_app(app.main.app, mongo, executor)
+    transport = httpx.ASGITransport(app=app.main.app)
+    try:
+        async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as client:
+            timings = {"compute": [], "memo": []}
+            for _ in range(repeat):
+                # 書き込み回数を進めて、計算済みの結果を使えないようにする
+                versions.update_one(
+                    {"_id": BENCH_USER_ID}, {"$inc": {"version": 1}}, upsert=True)
+                for name in ("compute", "memo"):
+                    start = time.perf_counter()
+                    response = await client.get("/insights")
+                    response.raise_for_status()
+                    timings[name].append(time.perf_counter() - start)
+    finally:
+        executor.shutdown()
+    print(f"/insights ({days} entries, mongomock): "
+          + "  ".join(f"{name}={np.median(values) * 1000:.2f}ms"
+                      for name, values in timings.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析結果のベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--endpoint-days", type=int, default=0,
+                        help="/insightsをASGIで呼び出して計測する履歴の件数（0で省略）")
+    args = parser.parse_args()
+
+    bench_compute(args.sizes, args.repeat)
+    if args.endpoint_days:
+        asyncio.run(bench_endpoint(args.endpoint_days, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+計測ミドルウェアのオーバーヘッドのベンチマーク
+
+HTTPサーバーやルーティングを介さず、最小のASGIアプリをミドルウェアあり/なしで
+直接呼び出し、1リクエストあたりの差をオーバーヘッドとして計測する。
+予算（--budget-us、デフォルト50µs）を超えた場合は終了コード1で終了する。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_metrics --requests 100000
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from app.metrics import MetricsMiddleware, MetricsRegistry
+
+
+class Route:
+    path = "/entries"
+
+
+async def endpoint(scope, receive, send):
+    # ルーティング後と同じくscopeにルートを設定してレスポンスを返す
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def per_request(app, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/entries"}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def measure(requests: int, repeat: int, slow_request_seconds) -> tuple:
+    wrapped = MetricsMiddleware(
+        endpoint, MetricsRegistry(), slow_request_seconds=slow_request_seconds)
+    # 複数回計測した最小値を使い、他の処理やCPU周波数の揺らぎの影響を抑える
+    bare = min([await per_request(endpoint, requests) for _ in range(repeat)])
+    measured = min([await per_request(wrapped, requests) for _ in range(repeat)])
+    return bare, measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description="計測ミドルウェアのオーバーヘッドのベンチマーク")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-us", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"requests={args.requests}  (best of {args.repeat})")
+    exceeded = False
+    # 遅いリクエストのログはしきい値を超えない設定で、判定のコストだけを含める
+    for name, slow in (("metrics", None), ("metrics+slow_log", 60.0)):
+        bare, measured = asyncio.run(measure(args.requests, args.repeat, slow))
+        overhead = (measured - bare) * 1e6
+        exceeded |= overhead > args.budget_us
+        print(f"  {name:<17} bare={bare * 1e6:6.2f}µs  with={measured * 1e6:6.2f}µs  "
+              f"overhead={overhead:6.2f}µs  (budget {args.budget_us:.0f}µs)")
+    sys.exit(1 if exceeded else 0)
+
+
+if __name__ == "__main__":
+    main()
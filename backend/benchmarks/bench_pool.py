@@ -0,0 +1,110 @@
+"""
+コネクションプールの負荷試験
+
+MongoSettingsと同じ方法でMongoClient・DatabaseExecutorを作り、concurrency個の同時リクエストで
+find_oneを繰り返して以下を計測する。
+  - 1操作のレイテンシ（待ち行列での待機を含む）のp50/p99とスループット
+  - コネクションプールからの接続の取得待ち時間（PoolMetricsListener）とタイムアウト件数
+  - 計測中に開いていた接続数の最大値と、--app-instances個のプロセスが同じ設定で動いた場合の
+    クラスター全体の見積もり（監視用の接続を含む）が --connection-limit に収まるか
+
+同時リクエストがプールの上限を超えても、接続数は上限で止まり、待ちきれない操作は
+タイムアウトとして失敗する（無制限には待たない）ことを確認する。
+実際のMongoDBが必要（MONGODB_TEST_URI または --uri）。計測用のデータベースは終了時に削除する。
+
+実行例:
+    cd backend
+    MONGODB_TEST_URI=mongodb://localhost:27017 python -m benchmarks.bench_pool --concurrency 200
+    python -m benchmarks.bench_pool --uri mongodb+srv://... --app-instances 4 --timeout-ms 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+from pymongo import MongoClient
+
+from app.config import MONITOR_CONNECTIONS, MongoSettings
+from app.db import DatabaseExecutor
+from app.metrics import PoolMetricsListener
+
+
+async def drive(executor, collection, pool, requests: int, concurrency: int):
+    remaining = iter(range(requests))
+    latencies = []
+    failures = 0
+    peak = 0
+
+    async def worker():
+        nonlocal failures, peak
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                await executor.run(collection.find_one, {"_id": 1})
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+            peak = max(peak, pool.connections)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures, peak, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="コネクションプールの負荷試験")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--executor-threads", type=int, default=MongoSettings.executor_threads)
+    parser.add_argument("--max-pool-size", type=int, default=MongoSettings.max_pool_size)
+    parser.add_argument("--timeout-ms", type=int, default=MongoSettings.timeout_ms)
+    parser.add_argument("--connection-limit", type=int, default=MongoSettings.connection_limit)
+    parser.add_argument("--app-instances", type=int, default=MongoSettings.app_instances)
+    parser.add_argument("--workers", type=int, default=MongoSettings.workers,
+                        help="1インスタンスあたりのワーカープロセス数（SERVER_WORKERS）")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_TEST_URI"))
+    args = parser.parse_args()
+
+    if not args.uri:
+        parser.error("MONGODB_TEST_URI or --uri is required")
+
+    settings = MongoSettings(
+        executor_threads=args.executor_threads, max_pool_size=args.max_pool_size,
+        timeout_ms=args.timeout_ms, connection_limit=args.connection_limit,
+        app_instances=args.app_instances, workers=args.workers)
+    pool = PoolMetricsListener()
+    client = MongoClient(args.uri, event_listeners=[pool], **settings.client_options())
+    executor = DatabaseExecutor(
+        max_workers=settings.executor_threads, timeout=settings.executor_timeout)
+    name = f"bench_pool_{uuid.uuid4().hex[:8]}"
+    collection = client[name]["entries"]
+    try:
+        collection.insert_one({"_id": 1, "record_date": "2025-08-14"})
+        latencies, failures, peak, elapsed = asyncio.run(drive(
+            executor, collection, pool, args.requests, args.concurrency))
+    finally:
+        executor.shutdown()
+        client.drop_database(name)
+        client.close()
+
+    options = settings.client_options()
+    print(f"maxPoolSize={options['maxPoolSize']} executor_threads={settings.executor_threads} "
+          f"concurrency={args.concurrency} requests={args.requests}")
+    if latencies:
+        p99 = statistics.quantiles(latencies, n=100)[-1]
+        print(f"  latency p50={statistics.median(latencies) * 1000:7.2f} ms  "
+              f"p99={p99 * 1000:7.2f} ms  throughput={len(latencies) / elapsed:8.0f} op/s")
+    wait = pool.checkout_wait
+    print(f"  pool checkout: count={wait.count} "
+          f"mean wait={wait.sum / max(wait.count, 1) * 1000:.3f} ms  "
+          f"failures={dict(pool.checkout_failures) or 0}  operation failures={failures}")
+    cluster = settings.processes * (peak + MONITOR_CONNECTIONS)
+    print(f"  peak pool connections={peak}  estimated cluster connections "
+          f"({settings.processes} processes incl. monitoring)={cluster} "
+          f"/ limit {args.connection_limit}  {'ok' if cluster <= args.connection_limit else 'OVER'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+翌日の気分スコア予測のマイクロベンチマーク
+
+履歴の件数ごとに以下を比較する。
+  - refit:       全履歴からfit_batchでモデルを作り直して予測する（毎回全件を読む場合のコスト）
+  - incremental: 学習済みモデルに1件追加して予測する（add_entryごとの増分更新のコスト）
+
+incrementalは履歴の件数によらずほぼ一定になる。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_predict --sizes 100 1000 10000 100000
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.prediction import fit_batch
+
+
+def make_rows(n: int) -> list:
+    rng = np.random.default_rng(0)
+    start = date(1800, 1, 1)
+    moods = rng.integers(0, 6, size=n)
+    sleeps = rng.uniform(3, 10, size=n)
+    return [
+        ((start + timedelta(days=i)).isoformat(), float(moods[i]), float(sleeps[i]))
+        for i in range(n)
+    ]
+
+
+def bench_refit(rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fit_batch(rows).predict()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_incremental(rows, repeat: int) -> float:
+    model = fit_batch(rows[:-repeat])
+    elapsed = []
+    for row in rows[-repeat:]:
+        start = time.perf_counter()
+        model.add(*row)
+        model.predict()
+        elapsed.append(time.perf_counter() - start)
+    return float(np.median(elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翌日の気分スコア予測のマイクロベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}  {'refit':>10}  {'incremental':>12}")
+    for size in args.sizes:
+        rows = make_rows(size + args.repeat)
+        refit = bench_refit(rows[:size], args.repeat)
+        incremental = bench_incremental(rows, args.repeat)
+        print(f"{size:>8}  {refit * 1000:8.2f}ms  {incremental * 1e6:10.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
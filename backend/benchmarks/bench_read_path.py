@@ -0,0 +1,97 @@
+"""
+GET /entries 読み出し経路のマイクロベンチマーク
+
+1エントリーあたりのコストを以下の2経路で比較する。
+  - validated: Entry(**doc) で再検証し、FastAPIのresponse_modelで再度検証・シリアライズ
+               してからJSONResponseで描画する（変更前の経路）
+  - trusted:   entry_row で軽量な行に変換し、事前構築したTypeAdapterで直接バイト列にする
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_read_path --entries 1000 --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from bson import ObjectId
+
+os.environ.setdefault("ENV", "ci")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models import ENTRIES_PAGE_ADAPTER, Entry, EntriesResponse, entry_row  # noqa: E402
+
+
+def make_docs(n: int) -> list:
+    return [
+        {
+            "_id": ObjectId(),
+            "record_date": f"20{10 + i // 365 % 15:02d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "mood_score": i % 6,
+            "sleep_hours": 4.0 + (i % 9) * 0.5,
+            "memo": "今日はよく眠れた",
+        }
+        for i in range(n)
+    ]
+
+
+def response_field():
+    for route in app.routes:
+        if getattr(route, "path", None) == "/entries" and "GET" in route.methods:
+            return route.response_field
+    raise RuntimeError("GET /entries route not found")
+
+
+# serialize_responseはコルーチンのため、計測中は同じイベントループを使い回す
+LOOP = asyncio.new_event_loop()
+
+
+def validated_path(docs, field) -> bytes:
+    # 変更前と同じく_idはそのままでは検証できないため文字列化してから渡す
+    entries = [Entry(**{**doc, "_id": str(doc["_id"])}) for doc in docs]
+    payload = EntriesResponse(status="success", entries=entries)
+    content = LOOP.run_until_complete(
+        serialize_response(field=field, response_content=payload))
+    return JSONResponse(content).body
+
+
+def trusted_path(docs, field) -> bytes:
+    return ENTRIES_PAGE_ADAPTER.dump_json({
+        "status": "success",
+        "entries": [entry_row(doc) for doc in docs],
+        "next_cursor": None,
+    })
+
+
+def bench(func, docs, field, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(docs, field)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /entries 読み出し経路のマイクロベンチマーク")
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = make_docs(args.entries)
+    field = response_field()
+    print(f"entries={args.entries}  (best of {args.repeat})")
+    results = {}
+    for name, func in (("validated", validated_path), ("trusted", trusted_path)):
+        results[name] = bench(func, docs, field, args.repeat)
+        print(f"  {name:<9} total={results[name] * 1000:8.2f}ms  "
+              f"per_entry={results[name] / args.entries * 1e6:6.2f}µs")
+    print(f"  speedup   x{results['validated'] / results['trusted']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+レスポンスのシリアライズのCPUベンチマーク
+
+ペイロードの件数ごとに、1リクエストあたりのCPU時間（time.process_time）を計測する。
+  - stdlib:   response_modelで検証・dict化した後、JSONResponse（json.dumps）で描画する
+              （FastAPIのデフォルトの経路）
+  - pydantic: 組み立てたモデルをPydanticJSONResponseでそのままバイト列にする
+  - entries:  実際の GET /entries（認証・検索条件の組み立て・entry_rowを含む）
+
+いずれもHTTPサーバーを介さずASGIで直接呼び出し、DBは件数分のドキュメントを返すモックを使う。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_response --sizes 10 100 1000 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+os.environ.setdefault("ENV", "ci")
+
+from app.main import app  # noqa: E402
+from app.models import Entry, EntriesResponse  # noqa: E402
+from app.responses import PydanticJSONResponse  # noqa: E402
+from benchmarks.bench_read_path import make_docs  # noqa: E402
+from benchmarks.common import AUTH_HEADERS, prepare_app  # noqa: E402
+from benchmarks.load_entries import InlineExecutor  # noqa: E402
+
+
+class StaticCollection:
+    """件数分のドキュメントをそのまま返すコレクション"""
+
+    def __init__(self, docs: list):
+        self.docs = docs
+
+    def find(self, query, limit=0, **kwargs):
+        return self.docs[:limit] if limit else list(self.docs)
+
+
+class StaticDB:
+    def __init__(self, collection: StaticCollection):
+        self.collection = collection
+
+    def __getitem__(self, name):
+        return self.collection
+
+
+class StaticClient:
+    def __init__(self, docs: list):
+        self.db = StaticDB(StaticCollection(docs))
+
+    def __getitem__(self, name):
+        return self.db
+
+
+def comparison_app(docs: list) -> FastAPI:
+    """同じモデルをJSONResponseとPydanticJSONResponseで返す比較用のアプリ"""
+    compare = FastAPI()
+    rows = [{**doc, "_id": str(doc["_id"])} for doc in docs]
+
+    def build() -> EntriesResponse:
+        return EntriesResponse(
+            status="success", entries=[Entry(**row) for row in rows])
+
+    @compare.get("/stdlib", response_model=EntriesResponse,
+                 response_class=JSONResponse)
+    async def stdlib():
+        return build()
+
+    @compare.get("/pydantic", response_model=EntriesResponse)
+    async def pydantic():
+        return PydanticJSONResponse(build())
+
+    return compare
+
+
+async def cpu_per_request(target, path: str, requests: int, **kwargs) -> float:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # 初回のみの処理（ルーティングの準備など）を除くため1回空打ちする
+        (await client.get(path, **kwargs)).raise_for_status()
+        start = time.process_time()
+        for _ in range(requests):
+            (await client.get(path, **kwargs)).raise_for_status()
+        return (time.process_time() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="レスポンスのシリアライズのCPUベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"requests={args.requests}  (CPU time per request)")
+    print(f"{'size':>8}  {'stdlib':>10}  {'pydantic':>10}  {'speedup':>8}  {'/entries':>10}")
+    for size in args.sizes:
+        docs = make_docs(size)
+        compare = comparison_app(docs)
+        prepare_app(app, StaticClient(docs), InlineExecutor())
+        stdlib = asyncio.run(cpu_per_request(compare, "/stdlib", args.requests))
+        pydantic = asyncio.run(cpu_per_request(compare, "/pydantic", args.requests))
+        entries = asyncio.run(cpu_per_request(
+            app, "/entries", args.requests,
+            params={"limit": size}, headers=AUTH_HEADERS))
+        print(f"{size:>8}  {stdlib * 1000:8.3f}ms  {pydantic * 1000:8.3f}ms  "
+              f"x{stdlib / pydantic:6.2f}  {entries * 1000:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
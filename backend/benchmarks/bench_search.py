@@ -0,0 +1,153 @@
+"""
+GET /entries/search（メモ検索）のベンチマーク
+
+1ユーザーに大量のメモがある場合の1回の検索のレイテンシを計測し、目標値と比較する。
+  1. 索引: メモを文字n-gram（memo_terms）にする時間と、1件あたりの検索語の数
+  2. 検索: 検索語ごとに、候補の取得（memo_termsの$all）と順位付け（search.rank）の
+     それぞれの時間のp50と、目標値と比較するp95
+
+--uri を指定すると実際のMongoDBの一時データベースに(user_id, memo_terms)のインデックスを
+作成して計測する（終了時に削除する）。
+省略時は候補の取得をPythonで再現し、目標値は順位付けの時間だけに適用する。
+いずれかの検索語のp95が --target-ms を超えると終了コード1で終了する。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_search --memos 100000 --target-ms 100
+    python -m benchmarks.bench_search --uri mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+from bson import ObjectId
+
+from app.db import AsyncCollection, DatabaseExecutor
+from app.indexes import ENTRY_INDEXES
+from app.repository import DocumentEntryRepository
+from app.search import MEMO_TERMS_FIELD, parse_query, query_terms, rank, with_memo_terms
+
+USER_ID = "bench_user"
+LIMIT = 20
+
+# メモの語彙（出現頻度の異なる語を組み合わせる）
+COMMON = ["今日は", "よく眠れた", "眠い", "疲れた", "普通", "雨", "晴れ", "仕事"]
+MIDDLE = ["頭痛がする", "散歩した", "友達と会った", "寝坊した", "残業", "運動した"]
+RARE = ["歯医者に行った", "映画を観た", "引っ越しの準備", "健康診断"]
+QUERIES = ["眠", "頭痛", "歯医者", "雨 頭痛", "映画を観た"]
+
+
+def make_documents(memos: int, seed: int) -> list:
+    rng = random.Random(seed)
+    start = date(2025, 8, 31)
+    docs = []
+    for i in range(memos):
+        words = rng.sample(COMMON, 2) + rng.sample(MIDDLE, 1)
+        if rng.random() < 0.02:
+            words.append(rng.choice(RARE))
+        rng.shuffle(words)
+        docs.append({
+            "_id": ObjectId(),
+            "user_id": USER_ID,
+            # 1ユーザー1日1件のため、日付を1日ずつずらす
+            "record_date": (start - timedelta(days=i)).isoformat(),
+            "mood_score": i % 6,
+            "sleep_hours": 4.0 + (i % 9) * 0.5,
+            "memo": "、".join(words),
+        })
+    return docs
+
+
+def build_index(docs: list) -> list:
+    start = time.perf_counter()
+    indexed = [with_memo_terms(doc) for doc in docs]
+    elapsed = time.perf_counter() - start
+    terms = sum(len(doc[MEMO_TERMS_FIELD]) for doc in indexed)
+    print(f"index: {len(docs)} memos in {elapsed * 1000:.0f} ms "
+          f"({elapsed / len(docs) * 1e6:.1f} µs/memo, {terms / len(docs):.1f} terms/memo)")
+    return indexed
+
+
+class InMemoryCandidates:
+    """(user_id, memo_terms)のインデックスによる候補の取得をPythonで再現する"""
+
+    def __init__(self, docs: list):
+        self.postings = {}
+        for doc in docs:
+            for term in doc[MEMO_TERMS_FIELD]:
+                self.postings.setdefault(term, []).append(doc)
+
+    async def find_by_terms(self, user_id, terms):
+        lists = sorted((self.postings.get(term, []) for term in terms), key=len)
+        others = [set(map(id, postings)) for postings in lists[1:]]
+        return [doc for doc in lists[0] if all(id(doc) in ids for ids in others)]
+
+
+async def measure(repository, repeat: int, target_ms: float, include_fetch: bool) -> bool:
+    """検索語ごとに候補の取得と順位付けの時間を計測し、目標値を満たすかを返す"""
+    ok = True
+    measured = "fetch+rank" if include_fetch else "rank"
+    print(f"search latency (limit={LIMIT}, repeat={repeat}, "
+          f"target: {measured} p95 <= {target_ms} ms)")
+    for q in QUERIES:
+        words = parse_query(q)
+        fetch_timings, rank_timings = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            docs = await repository.find_by_terms(USER_ID, query_terms(words))
+            fetched = time.perf_counter()
+            hits, _ = rank(docs, words, LIMIT)
+            fetch_timings.append((fetched - start) * 1000)
+            rank_timings.append((time.perf_counter() - fetched) * 1000)
+        timings = ([f + r for f, r in zip(fetch_timings, rank_timings)]
+                   if include_fetch else rank_timings)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        ok = ok and p95 <= target_ms
+        print(f"  q={q!r:<14} candidates={len(docs):6d} hits={len(hits):3d} "
+              f"fetch p50={statistics.median(fetch_timings):7.2f} ms  "
+              f"rank p50={statistics.median(rank_timings):7.2f} ms  "
+              f"{measured} p95={p95:7.2f} ms  {'ok' if p95 <= target_ms else 'SLOW'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="メモ検索のベンチマーク")
+    parser.add_argument("--memos", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=100.0,
+                        help="検索1回のp95の目標値（ミリ秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--uri", help="計測に使うMongoDBの接続URI（省略時は候補の取得をPythonで再現）")
+    args = parser.parse_args()
+
+    docs = build_index(make_documents(args.memos, args.seed))
+    if not args.uri:
+        ok = asyncio.run(measure(
+            InMemoryCandidates(docs), args.repeat, args.target_ms, include_fetch=False))
+        sys.exit(0 if ok else 1)
+
+    from pymongo import MongoClient
+    client = MongoClient(args.uri)
+    name = f"bench_search_{uuid.uuid4().hex[:8]}"
+    collection = client[name]["entries"]
+    executor = DatabaseExecutor(max_workers=10, timeout=60)
+    try:
+        collection.create_indexes(ENTRY_INDEXES)
+        collection.insert_many(docs)
+        repository = DocumentEntryRepository(AsyncCollection(collection, executor))
+        ok = asyncio.run(measure(
+            repository, args.repeat, args.target_ms, include_fetch=True))
+    finally:
+        executor.shutdown()
+        client.drop_database(name)
+        client.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+起動時間（Cloud Runのコールドスタート）のベンチマーク
+
+新しいインタープリターで以下を計測する。
+  1. import: app.mainのimportにかかる時間の中央値と、-X importtimeによる時間のかかるモジュール上位
+  2. lifespan: STARTUP_BACKGROUND_INITの無効・有効それぞれについて、lifespanの開始
+     （リクエストの受け付け開始）までの時間と、最初のリクエスト（GET /entries）の完了までの時間
+
+--uri を指定すると実際のMongoDBに接続して計測する（省略時はmongomockを使う）。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --uri mongodb://localhost:27017
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+IMPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app.main
+print(json.dumps({"import_ms": (time.perf_counter() - start) * 1000}))
+"""
+
+LIFESPAN_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+if not {uri!r}:
+    import mongomock, pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+import httpx
+import app.main
+from app.auth import hash_token
+from benchmarks.common import AUTH_HEADERS, BENCH_TOKEN, BENCH_USER_ID
+imported = time.perf_counter()
+
+async def main():
+    app_ = app.main.app
+    async with app_.router.lifespan_context(app_):
+        started = time.perf_counter()
+        app_.state.token_cache.put(hash_token(BENCH_TOKEN), BENCH_USER_ID)
+        transport = httpx.ASGITransport(app=app_)
+        async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as client:
+            response = await client.get("/entries")
+            response.raise_for_status()
+        first = time.perf_counter()
+    return {{"import_ms": (imported - start) * 1000,
+            "lifespan_ms": (started - imported) * 1000,
+            "first_request_ms": (first - started) * 1000}}
+
+print(json.dumps(asyncio.run(main())))
+"""
+
+
+def run(script: str, env: dict, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", script], cwd=BACKEND_DIR,
+        env={**os.environ, **env}, capture_output=True, text=True, check=True)
+
+
+def last_json(result: subprocess.CompletedProcess) -> dict:
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top: int) -> None:
+    """-X importtimeの出力から、app.mainが読み込むモジュールを累積時間の長い順に表示する"""
+    result = run("import app.main", {"ENV": "ci"}, "-X", "importtime")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # インデントの深さで依存関係を表しているため、app.mainが直接読み込んだもの（深さ1）だけを対象にする
+        if len(name) - len(name.lstrip()) == 3:
+            rows.append((int(cumulative), name.strip()))
+    print(f"  top {top} imports by cumulative time:")
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="起動時間のベンチマーク")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--uri", help="計測に使うMongoDBの接続URI（省略時はmongomock）")
+    args = parser.parse_args()
+
+    timings = [last_json(run(IMPORT_SCRIPT, {"ENV": "ci"}))["import_ms"]
+               for _ in range(args.runs)]
+    print(f"import app.main (ENV=ci, runs={args.runs}): "
+          f"median={statistics.median(timings):.0f} ms  min={min(timings):.0f} ms")
+    import_profile(args.top)
+
+    script = LIFESPAN_SCRIPT.format(uri=args.uri or "")
+    print(f"lifespan ({'mongodb' if args.uri else 'mongomock'}, runs={args.runs}, median)")
+    for background in ("0", "1"):
+        env = {"ENV": "development", "MONGODB_URI": args.uri or "mongodb://localhost",
+               "STARTUP_BACKGROUND_INIT": background}
+        results = [last_json(run(script, env)) for _ in range(args.runs)]
+        medians = {key: statistics.median(r[key] for r in results) for key in results[0]}
+        print(f"  STARTUP_BACKGROUND_INIT={background}: "
+              f"import={medians['import_ms']:6.0f} ms  "
+              f"lifespan={medians['lifespan_ms']:6.0f} ms  "
+              f"first request={medians['first_request_ms']:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+時系列集計（GET /entries/stats）のベンチマーク
+
+エントリーの件数ごとに以下を比較する。
+  - raw:   グラフ描画のために全エントリーを取得してJSONにする（変更前にフロントエンドが行う取得）
+  - stats: 集計パイプラインで区間ごとの統計を求めてJSONにする
+
+いずれもDBからの取得・レスポンスのJSON生成までの時間とレスポンスのバイト数を計測する。
+集計はMongoDB側で行われるため、MONGODB_TEST_URI（または --uri）で実際のMongoDBを指定する
+（mongomockはパイプラインをPythonで評価し、週・月単位の日付演算子にも未対応のため使わない）。
+計測用のデータベースは終了時に削除する。
+
+実行例:
+    cd backend
+    MONGODB_TEST_URI=mongodb://localhost:27017 python -m benchmarks.bench_stats --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import time
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+from pymongo import MongoClient
+
+from app.models import ENTRIES_PAGE_ADAPTER, ENTRY_PROJECTION, entry_row
+from app.pagination import ENTRIES_SORT
+from app.stats import build_stats_response, stats_pipeline
+
+
+def make_docs(n: int) -> list:
+    rng = np.random.default_rng(0)
+    moods = rng.integers(0, 6, size=n)
+    sleeps = rng.uniform(3, 10, size=n).round(1)
+    start = date(2025, 8, 31) - timedelta(days=n - 1)
+    return [
+        {"record_date": (start + timedelta(days=i)).isoformat(),
+         "mood_score": int(moods[i]), "sleep_hours": float(sleeps[i]),
+         "memo": "今日はよく眠れた"}
+        for i in range(n)
+    ]
+
+
+def raw_path(collection) -> bytes:
+    docs = list(collection.find({}, projection=ENTRY_PROJECTION, sort=ENTRIES_SORT))
+    return ENTRIES_PAGE_ADAPTER.dump_json({
+        "status": "success",
+        "entries": [entry_row(doc) for doc in docs],
+        "next_cursor": None,
+    })
+
+
+def stats_path(collection, bucket: str) -> bytes:
+    docs = list(collection.aggregate(stats_pipeline(bucket, {})))
+    return build_stats_response(bucket, docs).model_dump_json().encode()
+
+
+def bench(func, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        best = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="時系列集計のベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_TEST_URI"))
+    args = parser.parse_args()
+
+    if not args.uri:
+        parser.error("MONGODB_TEST_URI or --uri is required")
+
+    client = MongoClient(args.uri)
+    database = client[f"bench_stats_{uuid.uuid4().hex}"]
+    print(f"best of {args.repeat}")
+    print(f"{'entries':>8}  {'path':<11}  {'time':>10}  {'bytes':>10}")
+    try:
+        for size in args.sizes:
+            collection = database[f"entries_{size}"]
+            collection.insert_many(make_docs(size))
+            results = [("raw", lambda: raw_path(collection))]
+            results += [(f"stats/{bucket}", lambda b=bucket: stats_path(collection, b))
+                        for bucket in ("day", "week", "month")]
+            for name, func in results:
+                elapsed, size_bytes = bench(func, args.repeat)
+                print(f"{size:>8}  {name:<11}  {elapsed * 1000:8.2f}ms  {size_bytes:>10}")
+    finally:
+        client.drop_database(database.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
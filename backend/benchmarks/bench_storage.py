@@ -0,0 +1,164 @@
+"""
+エントリーの保存形式（ENTRY_STORAGE_LAYOUT）のベンチマーク
+
+1ユーザー分の長期間の履歴について、以下の2形式を比較する。
+  - documents: 1日1ドキュメント（デフォルト）
+  - buckets:   ユーザー・月ごとに1ドキュメント（"days.DD": [気分スコア, 睡眠時間, メモ]）
+  1. 保存サイズ: BSONにエンコードしたドキュメントの合計バイト数と、インデックスのキー数
+  2. 範囲読み出し: リポジトリ経由でGET /entries 相当の1ページ（直近N日）と、
+     エクスポート相当の全期間の読み出しにかかる時間
+
+--uri を指定すると実際のMongoDBの一時データベースで計測する（終了時に削除する）。
+省略時はmongomockで計測する（読み出し時間はPython側の処理の比較にとどまる）。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_storage --days 1095 --page 90
+    python -m benchmarks.bench_storage --uri mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, timedelta
+
+import bson
+from bson import ObjectId
+
+from app.db import AsyncCollection, DatabaseExecutor
+from app.indexes import BUCKET_INDEXES, ENTRY_INDEXES
+from app.repository import BucketEntryRepository, DocumentEntryRepository
+
+USER_ID = "bench_user"
+
+
+def make_documents(days: int) -> list:
+    """1日1ドキュメント形式の履歴（古い順、メモは3日に1回）"""
+    start = date(2025, 8, 31) - timedelta(days=days - 1)
+    docs = []
+    for i in range(days):
+        doc = {
+            "_id": ObjectId(),
+            "user_id": USER_ID,
+            "record_date": (start + timedelta(days=i)).isoformat(),
+            "mood_score": i % 6,
+            "sleep_hours": 4.0 + (i % 9) * 0.5,
+        }
+        if i % 3 == 0:
+            doc["memo"] = "今日はよく眠れた"
+        docs.append(doc)
+    return docs
+
+
+def make_buckets(docs: list) -> list:
+    """同じ履歴をユーザー・月ごとのバケットにまとめる"""
+    buckets = {}
+    for doc in docs:
+        month, day = doc["record_date"][:7], doc["record_date"][8:]
+        bucket = buckets.setdefault(month, {
+            "_id": ObjectId(), "user_id": USER_ID, "month": month, "days": {}})
+        value = [doc["mood_score"], doc["sleep_hours"]]
+        if "memo" in doc:
+            value.append(doc["memo"])
+        bucket["days"][day] = value
+    return list(buckets.values())
+
+
+def storage_size(docs: list, buckets: list) -> None:
+    doc_bytes = sum(len(bson.encode(doc)) for doc in docs)
+    bucket_bytes = sum(len(bson.encode(bucket)) for bucket in buckets)
+    # _idインデックスを含むインデックスのキー数（1キーごとにインデックスの容量を使う）
+    doc_keys = len(docs) * (len(ENTRY_INDEXES) + 1)
+    bucket_keys = len(buckets) * (len(BUCKET_INDEXES) + 1)
+    print("storage size (BSON)")
+    print(f"  documents {len(docs):6d} docs {doc_bytes:9d} bytes "
+          f"({doc_bytes / len(docs):5.1f} bytes/day)  index keys={doc_keys}")
+    print(f"  buckets   {len(buckets):6d} docs {bucket_bytes:9d} bytes "
+          f"({bucket_bytes / len(docs):5.1f} bytes/day)  index keys={bucket_keys}")
+    print(f"  reduction {1 - bucket_bytes / doc_bytes:.1%} bytes, "
+          f"{1 - bucket_keys / doc_keys:.1%} index keys")
+
+
+async def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def range_reads(database, executor, page: int, repeat: int) -> None:
+    repositories = {
+        "documents": DocumentEntryRepository(
+            AsyncCollection(database["entries"], executor)),
+        "buckets": BucketEntryRepository(
+            AsyncCollection(database["entry_buckets"], executor)),
+    }
+    results = {}
+    print(f"range reads (best of {repeat})")
+    for layout, repository in repositories.items():
+        async def first_page():
+            docs, _ = await repository.find_page(USER_ID, page)
+            assert len(docs) == page
+
+        async def export_all():
+            async for _ in repository.iter_batches(USER_ID, None, None, 500):
+                pass
+
+        results[layout] = (await best_of(first_page, repeat),
+                           await best_of(export_all, repeat))
+        print(f"  {layout:<9} page({page}) {results[layout][0] * 1000:8.2f} ms  "
+              f"export {results[layout][1] * 1000:8.2f} ms")
+    for index, name in enumerate((f"page({page})", "export")):
+        print(f"  {name} speedup x"
+              f"{results['documents'][index] / results['buckets'][index]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エントリーの保存形式のベンチマーク")
+    parser.add_argument("--days", type=int, default=1095, help="履歴の日数")
+    parser.add_argument("--page", type=int, default=90, help="1ページの件数")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--uri", help="計測に使うMongoDBの接続URI（省略時はmongomock）")
+    args = parser.parse_args()
+
+    docs = make_documents(args.days)
+    buckets = make_buckets(docs)
+    storage_size(docs, buckets)
+
+    if args.uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.uri)
+        threads = 10
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+        # mongomockはスレッドセーフではないため1スレッドで実行する
+        threads = 1
+    name = f"bench_storage_{uuid.uuid4().hex[:8]}"
+    database = client[name]
+    database["entries"].create_indexes(ENTRY_INDEXES)
+    database["entry_buckets"].create_indexes(BUCKET_INDEXES)
+    database["entries"].insert_many(docs)
+    database["entry_buckets"].insert_many(buckets)
+    if args.uri:
+        stats = {layout: database.command("collStats", collection)
+                 for layout, collection in (("documents", "entries"),
+                                            ("buckets", "entry_buckets"))}
+        print("storage size (collStats)")
+        for layout, stat in stats.items():
+            print(f"  {layout:<9} storageSize={stat['storageSize']:9d} "
+                  f"totalIndexSize={stat['totalIndexSize']:9d}")
+
+    executor = DatabaseExecutor(max_workers=threads, timeout=60)
+    try:
+        asyncio.run(range_reads(database, executor, args.page, args.repeat))
+    finally:
+        executor.shutdown()
+        client.drop_database(name)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+ワーカープロセス数によるスループットのスケーリングの負荷試験
+
+ワーカー数ごとに python -m app.server と同じオプション（uvloop・httptools）でuvicornを起動し、
+複数のクライアントプロセスからHTTP/1.1のkeep-alive接続で --path にGETを送り続けて、
+req/s・レイテンシ（p50・p99）と、1ワーカーに対するスループットの倍率を出力する。
+
+--uri を省略すると各ワーカーがmongomockのDBを持つ（benchmarks/worker_app.py）。
+DBの待ち時間がないため、アプリ側のCPU時間（認証・DB呼び出し・シリアライズ）がコア数でどこまで伸びるかを見る。
+mongomockはスレッドセーフではないため、DB呼び出しのスレッドは1つにする。
+読み出しキャッシュは無効（--cache-max-bytes 0）で、2ワーカー以上では他のプロセスの書き込みの確認
+（最新の書き込み時刻の読み出し）がリクエストごとに加わる。
+
+サーバーとクライアントが同じマシンのコアを取り合うため、ワーカー数とクライアントプロセス数の合計が
+コア数を超えない範囲で比較する（例: 8コアで --workers 1 2 4 --clients 4）。
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_workers --workers 1 2 4 --clients 4 --duration 10
+    python -m benchmarks.bench_workers --uri mongodb://localhost:27017 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.auth import hash_token
+from app.constants import DB
+from benchmarks.common import BENCH_TOKEN, BENCH_USER_ID
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+SERVER_SCRIPT = """
+import uvicorn
+from app.config import ServerSettings
+from app.server import uvicorn_options
+
+options = uvicorn_options(ServerSettings.from_env())
+uvicorn.run("benchmarks.worker_app:app", **options, log_level="warning", access_log=False)
+"""
+
+
+def seed(database, entries: int) -> None:
+    """ベンチマーク用のユーザーと記録を保存する（mongomockではワーカーごと、実際のMongoDBでは計測前に1回）"""
+    database[DB.USERS_COLLECTION].replace_one(
+        {"_id": BENCH_USER_ID},
+        {"_id": BENCH_USER_ID, "name": "bench", "token_hash": hash_token(BENCH_TOKEN)},
+        upsert=True)
+    database[DB.ENTRIES_COLLECTION].delete_many({"user_id": BENCH_USER_ID})
+    start = date(2025, 8, 31) - timedelta(days=entries - 1)
+    database[DB.ENTRIES_COLLECTION].insert_many([{
+        "user_id": BENCH_USER_ID,
+        "record_date": (start + timedelta(days=i)).isoformat(),
+        "mood_score": i % 6,
+        "sleep_hours": 4.0 + (i % 9) * 0.5,
+        "memo": "今日はよく眠れた" if i % 3 == 0 else None,
+    } for i in range(entries)])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as sock:
+                sock.sendall(b"GET /healthz HTTP/1.1\r\nHost: bench\r\n\r\n")
+                if sock.recv(64).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def connection(port: int, request: bytes, stop_at: float, latencies: list) -> None:
+    """1本のkeep-alive接続で、応答を受け取るたびに次のリクエストを送る"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head.startswith(b"HTTP/1.1 200"):
+                raise RuntimeError(head.split(b"\r\n", 1)[0].decode())
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+def client_process(port: int, request: bytes, connections: int, start_at: float,
+                   duration: float) -> list:
+    """クライアントプロセス1つ分の負荷（start_atまで待ってから一斉に送り始める）"""
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    async def run():
+        await asyncio.sleep(max(start_at - time.time(), 0))
+        stop_at = time.monotonic() + duration
+        latencies: list = []
+        await asyncio.gather(*(
+            connection(port, request, stop_at, latencies) for _ in range(connections)))
+        return latencies
+
+    return asyncio.run(run())
+
+
+def measure(args, workers: int) -> tuple:
+    port = free_port()
+    env = {
+        **os.environ,
+        "ENV": "development",
+        "PORT": str(port),
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_WORKERS": str(workers),
+        "CACHE_MAX_BYTES": str(args.cache_max_bytes),
+        "BENCH_ENTRIES": str(args.entries),
+        "COMPRESSION_ENCODINGS": "none",
+    }
+    if args.uri:
+        env["MONGODB_URI"] = args.uri
+    else:
+        env.pop("MONGODB_URI", None)
+        env["MONGO_EXECUTOR_THREADS"] = "1"
+    server = subprocess.Popen(
+        [sys.executable, "-c", SERVER_SCRIPT], cwd=BACKEND_DIR, env=env)
+    request = (f"GET {args.path} HTTP/1.1\r\nHost: bench\r\n"
+               f"Authorization: Bearer {BENCH_TOKEN}\r\n\r\n").encode()
+    try:
+        wait_until_ready(port)
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.clients) as pool:
+            # ウォームアップ（全ワーカーの起動とトークンの検証を済ませる）
+            pool.starmap(client_process, [
+                (port, request, args.connections, time.time() + 1, args.warmup)
+            ] * args.clients)
+            start_at = time.time() + 1
+            results = pool.starmap(client_process, [
+                (port, request, args.connections, start_at, args.duration)
+            ] * args.clients)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    latencies = [latency for result in results for latency in result]
+    p99 = statistics.quantiles(latencies, n=100)[-1]
+    return len(latencies) / args.duration, statistics.median(latencies), p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ワーカープロセス数によるスループットの負荷試験")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="負荷をかけるクライアントプロセス数")
+    parser.add_argument("--connections", type=int, default=16,
+                        help="クライアントプロセスあたりの同時接続数")
+    parser.add_argument("--duration", type=float, default=10, help="計測時間（秒）")
+    parser.add_argument("--warmup", type=float, default=2, help="計測前の負荷の時間（秒）")
+    parser.add_argument("--path", default="/entries?limit=100")
+    parser.add_argument("--entries", type=int, default=365,
+                        help="mongomockに用意する記録の日数")
+    parser.add_argument("--cache-max-bytes", type=int, default=0)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_TEST_URI"),
+                        help="実際のMongoDBに接続する（ベンチマーク用のデータを保存する）")
+    args = parser.parse_args()
+
+    if args.uri:
+        from pymongo import MongoClient
+        with MongoClient(args.uri) as client:
+            seed(client[DB.DATABASE_NAME], args.entries)
+
+    print(f"cpus={os.cpu_count()} clients={args.clients} x {args.connections} connections "
+          f"path={args.path} db={'mongodb' if args.uri else 'mongomock'}")
+    print(f"{'workers':>7}  {'req/s':>9}  {'p50':>9}  {'p99':>9}  {'speedup':>7}")
+    baseline = None
+    for workers in args.workers:
+        throughput, p50, p99 = measure(args, workers)
+        baseline = baseline or throughput
+        print(f"{workers:>7}  {throughput:9.0f}  {p50 * 1000:7.2f}ms  {p99 * 1000:7.2f}ms  "
+              f"{throughput / baseline:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
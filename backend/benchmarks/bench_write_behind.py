@@ -0,0 +1,97 @@
+"""
+POST /entries の書き込みキュー（write-behind）のベンチマーク
+
+DBのレイテンシを time.sleep で再現したモックコレクションに対して、
+ASGIで直接POSTを同時に送り、スループット(req/s)とDB操作の回数を比較する。
+  - off:  1件ごとにfind_one_and_replaceでupsertする（デフォルト）
+  - wait: キューにため、bulk_writeでまとめて書き込んでから応答する
+  - ack:  キューに入れた時点で応答する（計測は終了時の書き込み完了まで含む）
+
+実行例:
+    cd backend
+    python -m benchmarks.bench_write_behind --requests 2000 --concurrency 100 --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+os.environ.setdefault("ENV", "ci")
+
+from app.changes import change_counter  # noqa: E402
+from app.db import AsyncCollection, DatabaseExecutor  # noqa: E402
+from app.main import app  # noqa: E402
+from app.repository import DocumentEntryRepository  # noqa: E402
+from app.write_queue import WriteBehindQueue  # noqa: E402
+from benchmarks.common import (  # noqa: E402
+    AUTH_HEADERS, SlowClient, SlowCollection, bench_entry, prepare_app,
+)
+
+
+async def post_entries(requests: int, concurrency: int) -> None:
+    """記録日が重複しないようにずらしながら、concurrency件ずつ同時にPOSTする"""
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as client:
+        async def worker():
+            for index in remaining:
+                response = await client.post("/entries", json=bench_entry(index))
+                response.raise_for_status()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run(mode: str, args) -> tuple:
+    collection = SlowCollection(args.latency_ms / 1000)
+    executor = DatabaseExecutor(max_workers=args.threads, timeout=60)
+    prepare_app(app, SlowClient(collection), executor)
+    queue = None
+    if mode != "off":
+        queue = WriteBehindQueue(
+            DocumentEntryRepository(AsyncCollection(collection, executor)),
+            app.state.response_cache, app.state.predictor,
+            wait_for_flush=mode == "wait", batch_size=args.batch_size,
+            max_delay_seconds=args.max_delay_ms / 1000,
+            max_pending=args.requests, enqueue_timeout_seconds=60,
+            change_counter=change_counter(app.state.mongo["bench"], executor))
+        queue.start()
+        app.state.write_queue = queue
+    start = time.perf_counter()
+    try:
+        await post_entries(args.requests, args.concurrency)
+    finally:
+        if queue is not None:
+            # ackモードはキューに残った書き込みが終わるまでを計測に含める
+            await queue.close()
+        elapsed = time.perf_counter() - start
+        executor.shutdown()
+    return elapsed, collection.operations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="POST /entries の書き込みキューのベンチマーク")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--threads", type=int, default=10, help="DB呼び出しのスレッド数")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} "
+          f"latency={args.latency_ms}ms threads={args.threads}")
+    results = {}
+    for mode in ("off", "wait", "ack"):
+        elapsed, operations = asyncio.run(run(mode, args))
+        results[mode] = elapsed
+        print(f"  {mode:<5} {args.requests / elapsed:9.1f} req/s  "
+              f"mongo_ops={operations:5d}  ({operations / args.requests:.3f}/request)")
+    for mode in ("wait", "ack"):
+        print(f"  {mode} speedup x{results['off'] / results[mode]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
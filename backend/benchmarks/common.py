@@ -0,0 +1,124 @@
+"""ベンチマークで共通に使うアプリの準備処理・DBのモック・負荷ドライバー"""
+import asyncio
+import time
+from datetime import date, timedelta
+
+import httpx
+from pymongo.results import BulkWriteResult
+
+from app.auth import TokenCache, hash_token
+from app.cache import ResponseCache
+from app.health import HealthCheck
+from app.insights import InsightsMemo
+from app.predictor import PredictionService
+
+BENCH_USER_ID = "bench_user"
+BENCH_TOKEN = "bench_token"
+AUTH_HEADERS = {"Authorization": f"Bearer {BENCH_TOKEN}"}
+# bench_entryの記録日の起点
+BENCH_START_DATE = date(2000, 1, 1)
+
+
+def bench_entry(day: int) -> dict:
+    """POST /entries の本文（記録日はBENCH_START_DATEのday日後。dayをずらせば記録日が重複しない）"""
+    return {
+        "record_date": (BENCH_START_DATE + timedelta(days=day)).isoformat(),
+        "mood_score": day % 6,
+        "sleep_hours": 4.0 + (day % 9) * 0.5,
+        "memo": "今日はよく眠れた",
+    }
+
+
+class SlowCollection:
+    """
+    DB操作ごとに指定レイテンシだけブロックし、操作の回数を数えるモックコレクション。
+    findはdocsをそのまま返し、書き込みはすべて新規追加として扱う
+    （置き換えの_idを引くfindは発生しない）。
+    """
+
+    name = "entries"
+
+    def __init__(self, latency: float, docs=()):
+        self.latency = latency
+        self.docs = list(docs)
+        self.operations = 0
+
+    def _wait(self) -> None:
+        self.operations += 1
+        time.sleep(self.latency)
+
+    def find(self, query, **kwargs):
+        self._wait()
+        return [dict(doc) for doc in self.docs]
+
+    def find_one_and_replace(self, filter, replacement, **kwargs):
+        self._wait()
+        return {"_id": "bench_id"}
+
+    def find_one_and_update(self, filter, update, **kwargs):
+        # ユーザーの書き込み回数（ChangeCounter.bump）
+        self._wait()
+        return {"version": self.operations}
+
+    def bulk_write(self, requests, ordered=True):
+        self._wait()
+        return BulkWriteResult({
+            "upserted": [{"index": index, "_id": f"bench_{index}"}
+                         for index in range(len(requests))],
+        }, acknowledged=True)
+
+
+class SlowDB:
+    def __init__(self, collection: SlowCollection):
+        self.collection = collection
+
+    def __getitem__(self, name):
+        return self.collection
+
+
+class SlowClient:
+    """どのデータベース・コレクションにもcollectionを返すMongoClientのモック"""
+
+    def __init__(self, collection: SlowCollection):
+        self.db = SlowDB(collection)
+
+    def __getitem__(self, name):
+        return self.db
+
+
+def prepare_app(app, mongo, db_executor, cache_max_bytes: int = 0) -> None:
+    """
+    lifespanの代わりにapp.stateを設定する。
+    DBアクセスのコストを計測するため、レスポンスキャッシュはデフォルトで無効にする。
+    ベンチマーク用のトークンは検証済みとして登録し、認証でDBに問い合わせない。
+    """
+    app.state.mongo = mongo
+    app.state.db_executor = db_executor
+    app.state.predictor = PredictionService()
+    app.state.insights_memo = InsightsMemo(max_entries=100)
+    app.state.response_cache = ResponseCache(
+        max_bytes=cache_max_bytes, ttl_seconds=300)
+    app.state.token_cache = TokenCache(max_entries=10000, ttl_seconds=3600)
+    app.state.token_cache.put(hash_token(BENCH_TOKEN), BENCH_USER_ID)
+    app.state.write_queue = None
+    app.state.change_tracker = None
+    app.state.health = HealthCheck(
+        lambda: db_executor.run(mongo.admin.command, "ping"), ttl_seconds=5)
+
+
+async def drive_asgi(app, requests: int, concurrency: int, method: str,
+                     path: str, **kwargs) -> None:
+    """
+    HTTPサーバーを介さずASGIでアプリを直接呼び出す負荷ドライバー。
+    concurrency個のクライアントが応答を受け取るたびに次のリクエストを送る（クローズドループ）。
+    """
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=AUTH_HEADERS) as client:
+        async def worker():
+            for _ in remaining:
+                response = await client.request(method, path, **kwargs)
+                response.raise_for_status()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
@@ -0,0 +1,88 @@
+"""
+ベンチマークスイートの結果を保存済みのベースラインと比較する
+
+pytest-benchmarkの --benchmark-json の出力を読み込み、ベンチマークごとの統計値
+（デフォルトは中央値）をベースラインと比べる。しきい値（デフォルト1.25倍）より
+遅くなったものがあれば終了コード1で終了する。
+--update を指定すると、比較せずに結果をベースラインとして保存する。
+
+ベースラインは計測したマシンに依存するため、同じマシンで取り直してから比較すること。
+
+実行例:
+    cd backend
+    python -m pytest benchmarks/suite --benchmark-json=/tmp/bench.json
+    python -m benchmarks.compare_baseline /tmp/bench.json
+    python -m benchmarks.compare_baseline /tmp/bench.json --update
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+DEFAULT_BASELINE = Path(__file__).parent / "suite" / "baseline.json"
+STATS = ("min", "median", "mean", "stddev", "rounds")
+
+
+def load_result(path: Path) -> dict:
+    """pytest-benchmarkのJSONをベースラインと同じ形（ベンチマーク名→統計値）にする"""
+    data = json.loads(path.read_text())
+    return {
+        "machine_info": {
+            key: data["machine_info"].get(key)
+            for key in ("python_version", "machine", "system")
+        } | {"cpu": data["machine_info"].get("cpu", {}).get("brand_raw")},
+        "benchmarks": {
+            bench["fullname"]: {key: bench["stats"][key] for key in STATS}
+            for bench in data["benchmarks"]
+        },
+    }
+
+
+def compare(baseline: dict, current: dict, stat: str, threshold: float) -> list:
+    """ベースラインよりthreshold倍以上遅くなったベンチマーク名を返す"""
+    regressions = []
+    print(f"{'benchmark':<60}  {'baseline':>11}  {'current':>11}  {'ratio':>6}")
+    for name in sorted(baseline.keys() | current.keys()):
+        before = baseline.get(name, {}).get(stat)
+        after = current.get(name, {}).get(stat)
+        if before is None or after is None:
+            status = "new" if before is None else "missing"
+            print(f"{name:<60}  {status:>11}")
+            continue
+        ratio = after / before
+        mark = ""
+        if ratio >= threshold:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(f"{name:<60}  {before * 1000:9.4f}ms  {after * 1000:9.4f}ms  "
+              f"x{ratio:5.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク結果とベースラインの比較")
+    parser.add_argument("result", type=Path, help="--benchmark-json で出力したファイル")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--stat", choices=["min", "median", "mean"], default="median")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--update", action="store_true", help="結果をベースラインとして保存する")
+    args = parser.parse_args()
+
+    current = load_result(args.result)
+    if args.update:
+        args.baseline.write_text(
+            json.dumps(current, indent=2, ensure_ascii=False, sort_keys=True) + "\n")
+        print(f"baseline updated: {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(
+        baseline["benchmarks"], current["benchmarks"], args.stat, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than x{args.threshold} "
+              f"({args.stat})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
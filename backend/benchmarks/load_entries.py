@@ -0,0 +1,132 @@
+"""
+/entries の負荷試験
+
+DBのレイテンシを time.sleep で再現したモックコレクションに対して
+別スレッドで起動したuvicornへ同時リクエストを投げ、
+スループット(req/s)とp99レイテンシを計測する。
+`--mode inline` はスレッドプールを使わずイベントループ上で同期呼び出しする
+（変更前の挙動）ため、`--mode executor` との比較に使う。
+
+実行例:
+    cd backend
+    python -m benchmarks.load_entries --requests 400 --concurrency 50 --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import uvicorn
+
+os.environ.setdefault("ENV", "ci")
+
+from app.main import app  # noqa: E402
+from app.db import DatabaseExecutor  # noqa: E402
+from benchmarks.common import (  # noqa: E402
+    AUTH_HEADERS, SlowClient, SlowCollection, bench_entry, prepare_app,
+)
+
+DOC = {"_id": "bench_id", **bench_entry(0)}
+
+
+class InlineExecutor:
+    """変更前と同じく、呼び出し元のスレッドでそのまま実行する"""
+
+    async def run(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    def shutdown(self):
+        pass
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(port: int):
+    """別スレッドのイベントループでuvicornを起動する（負荷をかける側と独立させる）"""
+    config = uvicorn.Config(
+        app, host="127.0.0.1", port=port, lifespan="off", log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def run_load(base_url: str, method: str, total: int, concurrency: int) -> list:
+    """concurrency個のクライアントが応答を受け取るたびに次のリクエストを送る（クローズドループ）"""
+    latencies = []
+    remaining = iter(range(total))
+    payload = {k: v for k, v in DOC.items() if k != "_id"}
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+            base_url=base_url, limits=limits, timeout=60, headers=AUTH_HEADERS) as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                if method == "GET":
+                    response = await client.get("/entries")
+                else:
+                    response = await client.post("/entries", json=payload)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["executor", "inline", "both"], default="both")
+    parser.add_argument("--method", choices=["GET", "POST"], default="GET")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--threads", type=int, default=10)
+    args = parser.parse_args()
+
+    modes = ["inline", "executor"] if args.mode == "both" else [args.mode]
+    mongo = SlowClient(SlowCollection(args.latency_ms / 1000, [DOC]))
+    print(f"{args.method} /entries  requests={args.requests} "
+          f"concurrency={args.concurrency} db_latency={args.latency_ms}ms")
+    for mode in modes:
+        if mode == "inline":
+            prepare_app(app, mongo, InlineExecutor())
+        else:
+            prepare_app(app, mongo, DatabaseExecutor(
+                max_workers=args.threads, timeout=60))
+        port = free_port()
+        with serve(port):
+            start = time.perf_counter()
+            latencies = asyncio.run(run_load(
+                f"http://127.0.0.1:{port}", args.method, args.requests, args.concurrency))
+            elapsed = time.perf_counter() - start
+        app.state.db_executor.shutdown()
+        print(f"  {mode:<9} {len(latencies) / elapsed:8.1f} req/s  "
+              f"p50={statistics.median(latencies) * 1000:7.1f}ms  "
+              f"p99={percentile(latencies, 99) * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
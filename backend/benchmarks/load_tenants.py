@@ -0,0 +1,154 @@
+"""
+マルチテナントの負荷試験
+
+ユーザー数（テナント数）を増やしながら、ランダムなユーザーのトークンで
+GET /entries と GET /entries/stats を実行し、1リクエストあたりのレイテンシ(p50/p99)を計測する。
+(user_id, record_date) の複合インデックスで自分のドキュメントだけを走査するため、
+ユーザー数が増えてもレイテンシ・走査件数はほぼ一定になる。
+
+あわせて以下も出力する。
+  - keys/docs: GET /entries と同じ検索の実行計画で走査したインデックスキー数・ドキュメント数
+  - user_lookups: トークン検証でDBに問い合わせた回数（2回目以降はキャッシュで認証する）
+
+実際のMongoDBが必要（MONGODB_TEST_URI または --uri）。計測用のデータベースは終了時に削除する。
+
+実行例:
+    cd backend
+    MONGODB_TEST_URI=mongodb://localhost:27017 python -m benchmarks.load_tenants --tenants 1 10 100 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+import httpx
+from pymongo import MongoClient
+
+os.environ.setdefault("ENV", "ci")
+
+from app.main import app  # noqa: E402
+from app.auth import TokenCache, hash_token  # noqa: E402
+from app.constants import DB  # noqa: E402
+from app.db import DatabaseExecutor  # noqa: E402
+from app.indexes import ensure_indexes  # noqa: E402
+from app.pagination import ENTRIES_SORT, build_entries_query  # noqa: E402
+from benchmarks.common import prepare_app  # noqa: E402
+from benchmarks.load_entries import percentile  # noqa: E402
+
+
+class CountingClient:
+    """usersコレクションへの問い合わせ回数を数えるMongoClientのラッパー"""
+
+    def __init__(self, client: MongoClient, database_name: str):
+        self.client = client
+        self.database_name = database_name
+        self.user_lookups = 0
+
+    def __getitem__(self, name):
+        return CountingDatabase(self, self.client[self.database_name])
+
+
+class CountingDatabase:
+    def __init__(self, owner: CountingClient, database):
+        self.owner = owner
+        self.database = database
+
+    def __getitem__(self, name):
+        collection = self.database[name]
+        if name != DB.USERS_COLLECTION:
+            return collection
+        owner = self.owner
+
+        class Users:
+            def find_one(self, *args, **kwargs):
+                owner.user_lookups += 1
+                return collection.find_one(*args, **kwargs)
+
+        return Users()
+
+
+def seed(database, tenants: int, entries_per_tenant: int) -> list:
+    """テナント数分のユーザーとエントリーを登録し、各ユーザーのトークンを返す"""
+    ensure_indexes(database)
+    tokens = [f"token_{i}_{uuid.uuid4().hex}" for i in range(tenants)]
+    result = database[DB.USERS_COLLECTION].insert_many(
+        [{"name": f"user_{i}", "token_hash": hash_token(token)}
+         for i, token in enumerate(tokens)])
+    start = date(2025, 8, 31) - timedelta(days=entries_per_tenant - 1)
+    for user_id in result.inserted_ids:
+        database[DB.ENTRIES_COLLECTION].insert_many([
+            {"user_id": str(user_id),
+             "record_date": (start + timedelta(days=day)).isoformat(),
+             "mood_score": day % 6, "sleep_hours": 4.0 + (day % 9) * 0.5,
+             "memo": "今日はよく眠れた"}
+            for day in range(entries_per_tenant)
+        ])
+    return [(str(user_id), token) for user_id, token in zip(result.inserted_ids, tokens)]
+
+
+async def run_requests(users: list, requests: int) -> dict:
+    latencies = {"/entries": [], "/entries/stats": []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(requests):
+            _, token = random.choice(users)
+            headers = {"Authorization": f"Bearer {token}"}
+            for path, params in (("/entries", {"limit": 30}),
+                                 ("/entries/stats", {"bucket": "month"})):
+                start = time.perf_counter()
+                response = await client.get(path, params=params, headers=headers)
+                response.raise_for_status()
+                latencies[path].append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="マルチテナントの負荷試験")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--entries-per-tenant", type=int, default=365)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--uri", default=os.getenv("MONGODB_TEST_URI"))
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error("MONGODB_TEST_URI or --uri is required")
+
+    random.seed(0)
+    client = MongoClient(args.uri)
+    print(f"entries_per_tenant={args.entries_per_tenant} requests={args.requests}")
+    print(f"{'tenants':>8}  {'path':<15}  {'p50':>9}  {'p99':>9}  "
+          f"{'keys':>5}  {'docs':>5}  {'user_lookups':>12}")
+    try:
+        for tenants in args.tenants:
+            database_name = f"bench_tenants_{uuid.uuid4().hex}"
+            database = client[database_name]
+            users = seed(database, tenants, args.entries_per_tenant)
+            mongo = CountingClient(client, database_name)
+            executor = DatabaseExecutor(max_workers=10, timeout=60)
+            prepare_app(app, mongo, executor)
+            # 検証済みトークンは登録せず、初回のリクエストでDBから検証させる
+            app.state.token_cache = TokenCache(max_entries=10000, ttl_seconds=3600)
+
+            latencies = asyncio.run(run_requests(users, args.requests))
+            plan = database[DB.ENTRIES_COLLECTION].find(
+                build_entries_query(users[0][0]), sort=ENTRIES_SORT, limit=31,
+            ).explain()["executionStats"]
+            for path, values in latencies.items():
+                # 実行計画は GET /entries と同じ検索についてのみ取得する
+                keys, docs = ((plan["totalKeysExamined"], plan["totalDocsExamined"])
+                              if path == "/entries" else ("-", "-"))
+                print(f"{tenants:>8}  {path:<15}  "
+                      f"{statistics.median(values) * 1000:7.2f}ms  "
+                      f"{percentile(values, 99) * 1000:7.2f}ms  "
+                      f"{keys:>5}  {docs:>5}  {mongo.user_lookups:>12}")
+            executor.shutdown()
+            client.drop_database(database_name)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import itertools
+from datetime import date, timedelta
+
+import pytest
+
+"""
+/entries のエンドツーエンドのベンチマーク（1ラウンドは同時実行数10で20リクエスト）
+"""
+
+
+@pytest.mark.parametrize("limit", [10, 100])
+def test_get_entries(benchmark, drive, limit):
+    benchmark(drive, "GET", "/entries", params={"limit": limit})
+
+
+def test_post_entries(benchmark, drive):
+    # 登録済みの記録日への上書きと新しい記録日への追加が混ざるよう、日付をずらしながら送る
+    days = itertools.count()
+    start = date(2025, 9, 30)
+
+    def post_round():
+        drive("POST", "/entries", json={
+            "record_date": (start - timedelta(days=next(days) % 60)).isoformat(),
+            "mood_score": 4,
+            "sleep_hours": 6.5,
+            "memo": "今日はよく眠れた",
+        })
+
+    benchmark(post_round)
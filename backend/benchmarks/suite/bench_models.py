@@ -0,0 +1,54 @@
+import pytest
+
+from app.models import ENTRIES_PAGE_ADAPTER, Entry, EntriesResponse, entry_row
+from benchmarks.suite.conftest import make_docs
+
+"""
+モデルの検証・変換・一覧のシリアライズのベンチマーク
+"""
+
+PAYLOAD = {
+    "record_date": "2025-08-14",
+    "mood_score": 4,
+    "sleep_hours": 6.5,
+    "memo": "今日はよく眠れた",
+}
+
+
+def test_entry_validation(benchmark):
+    entry = benchmark(Entry.model_validate, PAYLOAD)
+    assert entry.mood_score == 4
+
+
+def test_to_mongo_dict(benchmark):
+    entry = Entry.model_validate(PAYLOAD)
+    doc = benchmark(entry.to_mongo_dict)
+    assert doc["record_date"] == "2025-08-14"
+
+
+@pytest.mark.parametrize("size", [100, 1000])
+def test_list_serialization_rows(benchmark, size):
+    """GET /entries と同じく、検証済みの行から直接JSONを生成する"""
+    docs = make_docs(size)
+
+    def serialize():
+        return ENTRIES_PAGE_ADAPTER.dump_json({
+            "status": "success",
+            "entries": [entry_row(doc) for doc in docs],
+            "next_cursor": None,
+        })
+
+    assert benchmark(serialize).startswith(b'{"status":"success"')
+
+
+@pytest.mark.parametrize("size", [100, 1000])
+def test_list_serialization_models(benchmark, size):
+    """比較用: Entryで検証してからEntriesResponseとしてシリアライズする"""
+    docs = make_docs(size)
+
+    def serialize():
+        return EntriesResponse(
+            status="success", entries=[Entry(**doc) for doc in docs],
+        ).model_dump_json()
+
+    assert benchmark(serialize).startswith('{"status":"success"')
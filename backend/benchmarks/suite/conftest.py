@@ -0,0 +1,139 @@
+"""
+ベンチマークスイートの共通フィクスチャ
+
+エンドツーエンドのベンチマークは以下のDBに対して実行する。
+  - memory:    保持しているドキュメントを返すだけのモック（アプリ側のコストのみ）
+  - mongomock: pymongo互換のインメモリDB（インデックス・upsertを含む）
+  - mongod:    実際のMongoDB（MONGODB_TEST_URI を設定した場合のみ）
+"""
+import asyncio
+import os
+import uuid
+from datetime import date, timedelta
+
+import mongomock
+import pytest
+from pymongo import MongoClient
+
+os.environ.setdefault("ENV", "ci")
+
+from app.constants import DB  # noqa: E402
+from app.db import DatabaseExecutor  # noqa: E402
+from app.indexes import ensure_indexes  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.common import BENCH_USER_ID, drive_asgi, prepare_app  # noqa: E402
+
+# DBに登録しておくエントリー数
+SEED_ENTRIES = 1000
+# 1ラウンドあたりのリクエスト数と同時実行数
+REQUESTS_PER_ROUND = 20
+CONCURRENCY = 10
+
+
+def make_docs(n: int) -> list:
+    """ベンチマーク用ユーザーのn日分のエントリー（新しい記録日から順）"""
+    end = date(2025, 8, 31)
+    return [
+        {
+            "_id": f"bench_{day}",
+            "user_id": BENCH_USER_ID,
+            "record_date": (end - timedelta(days=day)).isoformat(),
+            "mood_score": day % 6,
+            "sleep_hours": 4.0 + (day % 9) * 0.5,
+            "memo": "今日はよく眠れた",
+        }
+        for day in range(n)
+    ]
+
+
+class MemoryCollection:
+    """保持しているドキュメントを検索条件によらず返すコレクション"""
+
+    name = DB.ENTRIES_COLLECTION
+
+    def __init__(self, docs: list):
+        self.docs = docs
+        # entry_versionsコレクションとして使われた場合のユーザーごとの書き込み回数
+        self.versions: dict = {}
+
+    def find(self, query, limit=0, **kwargs):
+        return self.docs[:limit] if limit else list(self.docs)
+
+    def find_one(self, filter, **kwargs):
+        version = self.versions.get(filter.get("_id"))
+        return None if version is None else {"_id": filter["_id"], "version": version}
+
+    def find_one_and_replace(self, filter, replacement, **kwargs):
+        return {"_id": "bench_id"}
+
+    def find_one_and_update(self, filter, update, **kwargs):
+        # ChangeCounter.bumpの$inc（書き込み後の値を返す）
+        version = self.versions.get(filter["_id"], 0) + update["$inc"]["version"]
+        self.versions[filter["_id"]] = version
+        return {"_id": filter["_id"], "version": version}
+
+
+class SingleDatabaseClient:
+    """どのデータベース名でも同じデータベースを返すクライアント"""
+
+    def __init__(self, database):
+        self.database = database
+
+    def __getitem__(self, name):
+        return self.database
+
+
+class MemoryDatabase:
+    def __init__(self, collection: MemoryCollection):
+        self.collection = collection
+
+    def __getitem__(self, name):
+        return self.collection
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(params=["memory", "mongomock", "mongod"])
+def backend(request):
+    """DBを用意してapp.stateに設定し、バックエンド名を返す"""
+    docs = make_docs(SEED_ENTRIES)
+    server = None
+    if request.param == "memory":
+        client = SingleDatabaseClient(MemoryDatabase(MemoryCollection(docs)))
+    else:
+        if request.param == "mongomock":
+            database = mongomock.MongoClient()[DB.DATABASE_NAME]
+        else:
+            uri = os.getenv("MONGODB_TEST_URI")
+            if not uri:
+                pytest.skip("MONGODB_TEST_URI is not set")
+            server = MongoClient(uri)
+            # 計測用の一時データベースを使い、終了時に削除する
+            database = server[f"bench_suite_{uuid.uuid4().hex}"]
+        ensure_indexes(database)
+        database[DB.ENTRIES_COLLECTION].insert_many(docs)
+        client = SingleDatabaseClient(database)
+
+    # mongomockはスレッドセーフではない（検索時にprojectionのdictを書き換える）ため1スレッドで実行する
+    workers = 1 if request.param == "mongomock" else CONCURRENCY
+    executor = DatabaseExecutor(max_workers=workers, timeout=60)
+    prepare_app(app, client, executor)
+    yield request.param
+    executor.shutdown()
+    if server is not None:
+        server.drop_database(database.name)
+        server.close()
+
+
+@pytest.fixture
+def drive(loop, backend):
+    """1ラウンド分のリクエストをASGIで直接送る関数を返す"""
+    def run(method: str, path: str, **kwargs) -> None:
+        loop.run_until_complete(drive_asgi(
+            app, REQUESTS_PER_ROUND, CONCURRENCY, method, path, **kwargs))
+    return run
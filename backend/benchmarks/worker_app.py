@@ -0,0 +1,30 @@
+"""
+bench_workersで各ワーカープロセスが読み込むアプリ
+
+MONGODB_URIを指定しない場合は、MongoClientをmongomockに置き換え、
+ワーカーごとのメモリ上のDBにベンチマーク用のユーザーと記録（BENCH_ENTRIES日分）を用意してから
+app.main.appを動かす（mongomockのDBはプロセス間で共有されないため、ワーカーごとに用意する）。
+"""
+import os
+
+import mongomock
+import pymongo
+
+from app.constants import DB
+from benchmarks.bench_workers import seed
+
+
+class SeededClient(mongomock.MongoClient):
+    """作成時にベンチマーク用のデータを保存するmongomockのクライアント（接続オプションは無視する）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        seed(self[DB.DATABASE_NAME], int(os.getenv("BENCH_ENTRIES", "100")))
+
+
+if not os.getenv("MONGODB_URI"):
+    os.environ["MONGODB_URI"] = "mongodb://mongomock"
+    # app.mainがimportする前に置き換える
+    pymongo.MongoClient = SeededClient
+
+from app.main import app  # noqa: E402,F401
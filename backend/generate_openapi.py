@@ -1,6 +1,144 @@
-from app.main import app
+"""
+OpenAPIスキーマ（openapi/schema.json）の生成
+
+app.mainはimportせず、app.routesのエンドポイント定義とapp.modelsのモデルだけからスキーマを作る
+（.envの読み込み・DB接続の設定・lifespanは不要）。
+入力（app/*.py・このファイル・FastAPI/pydanticのバージョン）のハッシュをスタンプファイルに記録し、
+入力も出力も前回から変わっていなければ生成を省く。出力はキーの順序と整形が毎回同じになるため、
+内容が変わらない限りschema.jsonの差分は出ない（フロントエンドのnpm run generate:apiで型を生成する）。
+
+実行例:
+    cd backend
+    python generate_openapi.py           # 変更があれば生成する
+    python generate_openapi.py --check   # 生成し直す必要があれば終了コード1（CI用）
+    python generate_openapi.py --force   # ハッシュに関係なく生成する
+"""
+import argparse
+import hashlib
 import json
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+APP_DIR = BACKEND_DIR / "app"
+SCHEMA_PATH = BACKEND_DIR.parent / "openapi" / "schema.json"
+# 入力と出力のハッシュの記録（リポジトリには含めない）
+STAMP_PATH = SCHEMA_PATH.with_name(".schema.json.sha256")
+
+# 整形の設定（フロントエンドのprettierと同じ、1行100文字・インデント4）
+PRINT_WIDTH = 100
+INDENT = 4
+
+
+def input_hash() -> str:
+    """スキーマの元になるファイルとライブラリのバージョンのハッシュ"""
+    from importlib.metadata import version
+
+    digest = hashlib.sha256()
+    for path in sorted(APP_DIR.glob("*.py")) + [Path(__file__).resolve()]:
+        digest.update(path.relative_to(BACKEND_DIR).as_posix().encode())
+        digest.update(path.read_bytes())
+    for package in ("fastapi", "pydantic"):
+        digest.update(f"{package}=={version(package)}".encode())
+    return digest.hexdigest()
+
+
+def build_schema() -> dict:
+    """app.routesのエンドポイントだけを持つアプリからスキーマを作る"""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from fastapi import FastAPI
+
+    from app.responses import PydanticJSONResponse
+    from app.routes import API_SUMMARY, router
+
+    app = FastAPI(summary=API_SUMMARY, default_response_class=PydanticJSONResponse)
+    app.include_router(router)
+    return app.openapi()
+
+
+def _flat(value) -> str:
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        return "{ " + ", ".join(
+            f"{json.dumps(k)}: {_flat(v)}" for k, v in value.items()) + " }"
+    if isinstance(value, list):
+        return "[" + ", ".join(_flat(v) for v in value) + "]"
+    return json.dumps(value)
+
+
+def _format(value, depth: int = 0, prefix: int = 0, suffix: int = 0) -> str:
+    """1行に収まる値は1行に、収まらないオブジェクト・配列は1要素1行に整形する"""
+    flat = _flat(value)
+    if (not isinstance(value, (dict, list))
+            or depth * INDENT + prefix + len(flat) + suffix <= PRINT_WIDTH):
+        return flat
+    pad = " " * ((depth + 1) * INDENT)
+    items = list(value.items()) if isinstance(value, dict) else [(None, v) for v in value]
+    lines = []
+    for i, (key, item) in enumerate(items):
+        head = "" if key is None else f"{json.dumps(key)}: "
+        comma = "," if i < len(items) - 1 else ""
+        lines.append(pad + head + _format(item, depth + 1, len(head), len(comma)) + comma)
+    open_, close = ("{", "}") if isinstance(value, dict) else ("[", "]")
+    return open_ + "\n" + "\n".join(lines) + "\n" + " " * (depth * INDENT) + close
+
+
+def render(schema: dict) -> str:
+    return _format(schema) + "\n"
+
+
+def _read_stamp() -> dict:
+    try:
+        return json.loads(STAMP_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _output_hash() -> str:
+    try:
+        return hashlib.sha256(SCHEMA_PATH.read_bytes()).hexdigest()
+    except OSError:
+        return ""
+
+
+def generate(force: bool = False, check: bool = False) -> bool:
+    """
+    スキーマを生成する。schema.jsonを書き換えた（checkの場合は書き換えが必要）ならTrueを返す。
+    入力と出力のハッシュがスタンプと一致すれば、アプリをimportせずにFalseを返す。
+    """
+    inputs = input_hash()
+    stamp = _read_stamp()
+    if (not force and stamp.get("inputs") == inputs
+            and stamp.get("output") == _output_hash()):
+        return False
+
+    content = render(build_schema())
+    current = SCHEMA_PATH.read_text() if SCHEMA_PATH.exists() else None
+    changed = content != current
+    if check:
+        return changed
+    if changed:
+        SCHEMA_PATH.write_text(content)
+    STAMP_PATH.write_text(json.dumps(
+        {"inputs": inputs, "output": hashlib.sha256(content.encode()).hexdigest()}))
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAPIスキーマの生成")
+    parser.add_argument("--force", action="store_true", help="ハッシュに関係なく生成する")
+    parser.add_argument("--check", action="store_true",
+                        help="schema.jsonが最新でなければ終了コード1で終了する（書き換えない）")
+    args = parser.parse_args()
+
+    changed = generate(force=args.force, check=args.check)
+    if args.check:
+        print(f"{SCHEMA_PATH.name} is {'out of date' if changed else 'up to date'}")
+        sys.exit(1 if changed else 0)
+    print(f"{SCHEMA_PATH.name} {'updated' if changed else 'unchanged'}")
+
 
-with open("../openapi/schema.json", "w") as f:
-    api_spec = app.openapi()
-    f.write(json.dumps(api_spec))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import pytest
+
+from app.db import DatabaseExecutor
+
+"""
+複数のテストで共有するフィクスチャ（テスト用の部品はhelpers.pyに置く）
+"""
+
+
+@pytest.fixture
+def executor(request):
+    """
+    DB呼び出し用のDatabaseExecutor。タイムアウト（既定は5秒）は
+    @pytest.mark.parametrize("executor", [秒数], indirect=True) で変更できる。
+    """
+    # mongomockはスレッドセーフではないため1スレッドで実行する
+    executor = DatabaseExecutor(max_workers=1, timeout=getattr(request, "param", 5))
+    yield executor
+    executor.shutdown()
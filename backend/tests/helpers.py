@@ -0,0 +1,52 @@
+from pymongo import ReplaceOne
+
+"""
+複数のテストで共有するテスト用の部品（フィクスチャはconftest.pyに置く）
+"""
+
+
+class BulkWriteResult:
+    """pymongoのBulkWriteResultのうち、テストで参照する属性だけを持つ"""
+
+    def __init__(self, upserted_ids, modified_count):
+        self.upserted_ids = upserted_ids
+        self.modified_count = modified_count
+
+
+class BulkWriteCollection:
+    """
+    mongomockのコレクションのラッパー。
+    mongomockはpymongo 4.14のUpdateOne・ReplaceOneをbulk_writeで扱えないため、
+    1件ずつreplace_one・update_oneで実行する。bulk_writesに呼び出しごとの件数を記録する。
+    それ以外の操作はそのままmongomockのコレクションで実行する。
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.bulk_writes = []
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(len(requests))
+        upserted_ids = {}
+        modified_count = 0
+        for index, request in enumerate(requests):
+            write = (self.collection.replace_one if isinstance(request, ReplaceOne)
+                     else self.collection.update_one)
+            result = write(request._filter, request._doc, upsert=bool(request._upsert))
+            if result.upserted_id is not None:
+                upserted_ids[index] = result.upserted_id
+            modified_count += result.modified_count
+        return BulkWriteResult(upserted_ids, modified_count)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+class FakeClock:
+    """テストから現在時刻（now）を進められる時計（キャッシュの有効期限のテスト用）"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,45 @@
+from app.auth import TokenCache, hash_token
+from tests.helpers import FakeClock
+
+"""
+トークン認証をテストするためのクラス
+"""
+
+
+class TestTokenCache:
+    """
+    Feature: 検証済みトークンのキャッシュ
+        Scenario: 有効期間を過ぎたトークンは再検証が必要になる
+            Given: 有効期間60秒のキャッシュに検証済みトークンがある
+            When:  60秒経過してから参照する
+            Then:  Noneが返る
+    """
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = TokenCache(max_entries=10, ttl_seconds=60, clock=clock)
+        cache.put(hash_token("token"), "user_1")
+        clock.now = 59
+        assert cache.get(hash_token("token")) == "user_1"
+        clock.now = 60
+        assert cache.get(hash_token("token")) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    """
+    Feature: 検証済みトークンのキャッシュ
+        Scenario: 上限を超えると最も古く使われたトークンから追い出す
+            Given: 上限2件のキャッシュに2件のトークンがある
+            When:  1件目を参照した後に3件目を登録する
+            Then:  2件目が追い出される
+    """
+
+    def test_lru(self):
+        cache = TokenCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", "user_a")
+        cache.put("b", "user_b")
+        cache.get("a")
+        cache.put("c", "user_c")
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "user_a"
+        assert cache.get("c") == "user_c"
@@ -0,0 +1,175 @@
+from app.cache import ResponseCache, etag_matches
+from app.compression import ResponseCompressor
+from tests.helpers import FakeClock
+
+"""
+読み出しレスポンスキャッシュをテストするためのクラス
+"""
+
+
+def key(user_id, query=""):
+    return (user_id, "/entries", query)
+
+
+class TestResponseCache:
+    """
+    Feature: バイト数によるLRUの追い出し
+        Scenario: 上限を超えると最も古く使われたレスポンスから追い出す
+            Given: 2件分の容量のキャッシュに2件のレスポンスがある
+            When:  1件目を読み出した後に3件目を保存する
+            Then:  2件目が追い出され、1件目と3件目が残る
+            And:   使用量は上限以内で、追い出し件数が数えられる
+    """
+
+    def test_lru_eviction_by_bytes(self):
+        body = b"x" * 1000
+        cache = ResponseCache(max_bytes=2 * 1400, ttl_seconds=60)
+        for query in ("a", "b"):
+            cache.put(key(None, query), body, "application/json", 0)
+        assert cache.get(key(None, "a")) is not None
+        cache.put(key(None, "c"), body, "application/json", 0)
+
+        assert cache.get(key(None, "b")) is None
+        assert cache.get(key(None, "a")) is not None
+        assert cache.get(key(None, "c")) is not None
+        assert cache.current_bytes <= cache.max_bytes
+        assert cache.evictions == 1
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    """
+    Feature: 圧縮済みの本文の再利用
+        Scenario: 同じレスポンスは1回だけ圧縮し、圧縮済みの本文も使用量に含める
+            Given: レスポンスを1件保存したキャッシュがある
+            When:  gzipの本文を2回取得する
+            Then:  2回とも同じ圧縮済みの本文が返り、圧縮は1回だけ行われる
+            And:   使用量が圧縮済みの本文の大きさだけ増える
+    """
+
+    def test_encoded_body(self):
+        class CountingCompressor(ResponseCompressor):
+            calls = 0
+
+            def compress(self, body, encoding):
+                CountingCompressor.calls += 1
+                return super().compress(body, encoding)
+
+        compressor = CountingCompressor(("gzip",), minimum_size=0)
+        cache = ResponseCache(max_bytes=1 << 20, ttl_seconds=60)
+        entry = cache.put(key(None), b'{"memo":"x"}' * 100, "application/json", 0)
+        before = cache.current_bytes
+
+        first = cache.encoded_body(entry, "gzip", compressor)
+        second = cache.encoded_body(cache.get(key(None)), "gzip", compressor)
+        assert first is second
+        assert CountingCompressor.calls == 1
+        assert cache.current_bytes == before + len(first)
+
+    """
+    Feature: バイト数によるLRUの追い出し
+        Scenario: 1件で上限を超えるレスポンスは保存しない
+            Given: 上限の小さいキャッシュがある
+            When:  上限より大きいレスポンスを保存する
+            Then:  ETag付きのレスポンスは返るが、キャッシュには残らない
+    """
+
+    def test_too_large(self):
+        cache = ResponseCache(max_bytes=100, ttl_seconds=60)
+        entry = cache.put(key(None), b"x" * 1000, "application/json", 0)
+        assert entry.etag
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    """
+    Feature: 有効期間
+        Scenario: 有効期間を過ぎたレスポンスは返さない
+            Given: 有効期間60秒のキャッシュにレスポンスがある
+            When:  60秒経過してから読み出す
+            Then:  Noneが返り、期限切れの件数が数えられる
+    """
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = ResponseCache(max_bytes=10000, ttl_seconds=60, clock=clock)
+        cache.put(key(None), b"{}", "application/json", 0)
+        clock.now = 59
+        assert cache.get(key(None)) is not None
+        clock.now = 60
+        assert cache.get(key(None)) is None
+        assert cache.expirations == 1
+        assert cache.current_bytes == 0
+
+    """
+    Feature: 書き込みによる無効化
+        Scenario: 書き込んだユーザーのレスポンスだけを破棄する
+            Given: 2人のユーザーのレスポンスがキャッシュにある
+            When:  1人目のユーザーについてinvalidateを呼ぶ
+            Then:  1人目のレスポンスだけが破棄される
+    """
+
+    def test_invalidate_per_user(self):
+        cache = ResponseCache(max_bytes=10000, ttl_seconds=60)
+        for user_id in ("alice", "bob"):
+            for query in ("a", "b"):
+                cache.put(key(user_id, query), b"{}", "application/json", 0)
+        cache.invalidate("alice")
+
+        assert cache.get(key("alice", "a")) is None
+        assert cache.get(key("bob", "a")) is not None
+        assert cache.get(key("bob", "b")) is not None
+        assert cache.invalidations == 2
+        assert len(cache) == 2
+
+    """
+    Feature: 書き込みによる無効化
+        Scenario: 読み込み中に書き込みがあった場合は古いレスポンスを保存しない
+            Given: 読み込み開始時点の世代番号を控えている
+            When:  読み込み中に書き込み（invalidate）があり、その後レスポンスを保存する
+            Then:  レスポンスはキャッシュに残らない
+    """
+
+    def test_stale_generation(self):
+        cache = ResponseCache(max_bytes=10000, ttl_seconds=60)
+        generation = cache.generation(None)
+        cache.invalidate(None)
+        cache.put(key(None), b"{}", "application/json", generation)
+        assert len(cache) == 0
+
+    """
+    Feature: 書き込みによる無効化
+        Scenario: 世代番号を保持するユーザー数の上限を超えても、書き込み前の世代番号には戻らない
+            Given: 1ユーザーまで世代番号を保持するキャッシュで、読み込み開始時点の世代番号を控えている
+            When:  読み込み中にそのユーザーが書き込み、他のユーザーの書き込みで世代番号が追い出される
+            Then:  世代番号は書き込み前と異なり、古いレスポンスは保存されない
+            And:   書き込みのないユーザーの世代番号は、追い出された世代番号から始まる
+    """
+
+    def test_generation_eviction(self):
+        cache = ResponseCache(max_bytes=10000, ttl_seconds=60, max_users=1)
+        generation = cache.generation("alice")
+        cache.invalidate("alice")
+        cache.invalidate("bob")
+        assert cache.generation("alice") != generation
+        cache.put(key("alice"), b"{}", "application/json", generation)
+        assert len(cache) == 0
+
+        assert cache.generation("carol") == cache.generation("alice") == 1
+        cache.put(key("carol"), b"{}", "application/json", cache.generation("carol"))
+        assert len(cache) == 1
+
+
+class TestEtagMatches:
+    """
+    Feature: If-None-Matchの判定
+        Scenario: 複数指定・弱いETag・*に対応する
+            Given: ETagがある
+            When:  様々な形式のIf-None-Matchと比較する
+            Then:  いずれかが一致する場合、または*の場合にTrueになる
+    """
+
+    def test_etag_matches(self):
+        etag = '"abc"'
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('"xyz", W/"abc"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"xyz"', etag)
+        assert not etag_matches(None, etag)
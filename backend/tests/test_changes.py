@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+from app.changes import (
+    ChangeCounter, ChangeToken, ChangeTracker, build_changes_query, decode_change_token, encode_change_token,
+    next_change_token,
+)
+from app.db import AsyncCollection
+from app.pagination import InvalidCursorError
+from tests.helpers import BulkWriteCollection
+
+"""
+変更の取得位置（トークン）をテストするためのクラス
+"""
+
+NOW = datetime(2025, 8, 14, 12, 0, 0, 123000, tzinfo=timezone.utc)
+LAG = timedelta(seconds=15)
+
+
+def make_docs(count):
+    return [{"_id": ObjectId(), "updated_at": NOW - timedelta(minutes=count - i)}
+            for i in range(count)]
+
+
+class TestChangeToken:
+    """
+    Feature: 変更の取得位置
+        Scenario: トークン文字列から同じ位置に戻せる
+            Given: 起点だけのトークン、ページ途中のトークン、書き込み時刻のないエントリーの後のトークンがある
+            When:  文字列にしてから戻す
+            Then:  起点・書き込み時刻（ミリ秒）・_idの型がそのまま戻る
+        Scenario: 不正なトークンはエラーになる
+            When:  復元できない文字列を戻す
+            Then:  InvalidCursorErrorが送出される
+    """
+
+    def test_round_trip(self):
+        doc_id = ObjectId()
+        for token in (ChangeToken(watermark=NOW),
+                      ChangeToken(watermark=NOW, after=(NOW - LAG, doc_id)),
+                      ChangeToken(watermark=NOW, after=(None, "legacy_id"))):
+            assert decode_change_token(encode_change_token(token)) == token
+        with pytest.raises(InvalidCursorError):
+            decode_change_token("invalid")
+
+    """
+    Feature: 変更の取得位置
+        Scenario: 続きがある場合は最後に返すエントリーの位置を、最後のページでは起点を次回の位置にする
+            Given: limit+1件の変更がある
+            When:  次回のトークンを決め、その続きを最後のページとして取得する
+            Then:  1回目は最後に返すエントリーの位置と続きありが返る
+            And:   最後のページでは最初のページの読み出し時刻からlag前が次回の起点になる
+            And:   起点からの検索条件は書き込み時刻の下限だけになる
+    """
+
+    def test_next_change_token(self):
+        docs = make_docs(3)
+        token, has_more = next_change_token(docs, 2, None, NOW, LAG)
+        assert has_more
+        assert token == ChangeToken(
+            watermark=NOW - LAG, after=(docs[1]["updated_at"], docs[1]["_id"]))
+
+        token, has_more = next_change_token(
+            docs[2:], 2, token, NOW + timedelta(seconds=1), LAG)
+        assert not has_more
+        assert token == ChangeToken(watermark=NOW - LAG)
+        assert build_changes_query("user_1", token) == {
+            "user_id": "user_1", "updated_at": {"$gte": NOW - LAG}}
+
+
+class TestChangeTracker:
+    """
+    Feature: 他のプロセスの書き込みの検出
+        Scenario: 書き込み回数が前回の確認から変わった場合だけ変更ありとする
+            Given: 2ユーザーまで保持するトラッカーがある
+            When:  同じユーザーの書き込み回数を繰り返し確認する
+            Then:  初回と回数が変わった時だけTrueが返る
+            And:   上限を超えて追い出したユーザーは、次の確認で変更ありになる
+    """
+
+    def test_observe(self):
+        tracker = ChangeTracker(max_entries=2)
+        assert tracker.observe("user_1", 0)
+        assert not tracker.observe("user_1", 0)
+        assert tracker.observe("user_1", 1)
+        assert not tracker.observe("user_1", 1)
+
+        tracker.observe("user_2", 1)
+        tracker.observe("user_3", 1)
+        assert len(tracker) == 2
+        assert tracker.observe("user_1", 1)
+
+    """
+    Feature: 他のプロセスの書き込みの検出
+        Scenario: このプロセスの書き込みだけで進んだ回数は変更として扱わない
+            Given: 書き込み回数1を確認済みのユーザーがいる
+            When:  このプロセスの書き込みで2に進め、次に他のプロセスの書き込みをはさんで4に進める
+            Then:  2は記録されて次の確認で変更なしになる
+            And:   4は記録されず次の確認で変更ありになる
+            And:   確認したことのないユーザーの回数は記録しない
+    """
+
+    def test_advance(self):
+        tracker = ChangeTracker()
+        tracker.observe("user_1", 1)
+        tracker.advance({"user_1": 2, "user_2": 1})
+        assert not tracker.observe("user_1", 2)
+        assert tracker.observe("user_2", 1)
+
+        tracker.advance({"user_1": 4})
+        assert tracker.observe("user_1", 4)
+
+
+class TestChangeCounter:
+    """
+    Feature: ユーザーごとの書き込み回数
+        Scenario: 書き込みのたびに1ずつ進める
+            Given: 書き込んだことのないユーザーがいる
+            When:  1ユーザー、複数ユーザー（重複あり）の順に進める
+            Then:  書き込んだことのないユーザーは0で、進めた後の回数が返る
+            And:   複数ユーザーはまとめて1回の書き込みで進める
+    """
+
+    def test_current_and_bump(self, executor):
+        collection = BulkWriteCollection(mongomock.MongoClient().db.entry_versions)
+        counter = ChangeCounter(AsyncCollection(collection, executor))
+
+        async def run():
+            before = await counter.current("user_1")
+            first = await counter.bump(["user_1"])
+            second = await counter.bump(["user_2", "user_1", "user_2"])
+            return before, first, second, await counter.bump([])
+
+        before, first, second, empty = asyncio.run(run())
+        assert (before, first, empty) == (0, {"user_1": 1}, {})
+        assert second == {"user_1": 2, "user_2": 1}
+        assert collection.bulk_writes == [2]
@@ -0,0 +1,163 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import (
+    CompressionMiddleware, ResponseCompressor, compressible, parse_accept_encoding,
+)
+
+"""
+レスポンス圧縮をテストするためのクラス
+"""
+
+LARGE_JSON = json.dumps([
+    {"record_date": f"2025-08-{day:02d}", "mood_score": 3, "sleep_hours": 7.0,
+     "memo": "今日はよく眠れた"} for day in range(1, 29)], ensure_ascii=False).encode()
+
+
+def create_app(minimum_size=1024, encodings=("gzip",)):
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large():
+        return Response(content=LARGE_JSON, media_type="application/json",
+                        headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(content=b'{"ok":true}', media_type="application/json")
+
+    @app.get("/image")
+    async def image():
+        return Response(content=b"x" * 4096, media_type="image/png")
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(content=gzip.compress(LARGE_JSON), media_type="application/json",
+                        headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for day in range(1, 29):
+                yield f'{{"record_date":"2025-08-{day:02d}"}}\n'.encode()
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app.add_middleware(CompressionMiddleware, compressor=ResponseCompressor(
+        encodings, minimum_size=minimum_size))
+    return app
+
+
+class TestNegotiate:
+    """
+    Feature: 圧縮方式の選択
+        Scenario: Accept-Encodingのq値とサーバーの優先順で圧縮方式を選ぶ
+            Given: br・gzipの順に優先する設定がある（brotliはインストールされている場合だけ使う）
+            When:  さまざまなAccept-Encodingで圧縮方式を選ぶ
+            Then:  q値が最大の方式、同じq値ならサーバーの優先順の方式が選ばれる
+            And:   q=0の方式・未対応の方式は選ばれない
+    """
+
+    def test_negotiate(self):
+        compressor = ResponseCompressor(("br", "gzip"), minimum_size=0)
+        preferred = "br" if compression.brotli is not None else "gzip"
+        assert compressor.negotiate("gzip, deflate, br") == preferred
+        assert compressor.negotiate("br;q=0.5, gzip") == "gzip"
+        assert compressor.negotiate("*") == preferred
+        assert compressor.negotiate("gzip;q=0, deflate") is None
+        assert compressor.negotiate("identity") is None
+        assert compressor.negotiate(None) is None
+        assert parse_accept_encoding("gzip;q=abc, br;q=0.8") == {"br": 0.8}
+
+    """
+    Feature: 圧縮方式の選択
+        Scenario: テキスト・JSON・NDJSONだけを圧縮の対象にする
+            Given: さまざまなContent-Typeがある
+            When:  圧縮の対象かを判定する
+            Then:  テキスト・JSON・NDJSONは対象、画像とContent-Typeなしは対象外になる
+    """
+
+    def test_compressible(self):
+        assert compressible("application/json")
+        assert compressible("text/csv; charset=utf-8")
+        assert compressible("application/x-ndjson")
+        assert not compressible("image/png")
+        assert not compressible(None)
+
+
+class TestCompressionMiddleware:
+    """
+    Feature: レスポンスの圧縮
+        Scenario: 閾値以上のJSONをgzipで圧縮する
+            Given: 圧縮ミドルウェアを設定したアプリがある
+            When:  Accept-Encoding: gzipで大きなJSONを取得する
+            Then:  Content-Encoding: gzip、Vary: Accept-Encoding、弱いETagが付く
+            And:   Content-Lengthは圧縮後の大きさで、展開すると元の本文に戻る
+    """
+
+    def test_compress_large_json(self):
+        client = TestClient(create_app())
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == 'W/"abc"'
+        assert int(response.headers["content-length"]) < len(LARGE_JSON) // 4
+        assert response.content == LARGE_JSON
+
+    """
+    Feature: レスポンスの圧縮
+        Scenario: 圧縮しないレスポンスはそのまま返す
+            Given: 圧縮ミドルウェアを設定したアプリがある
+            When:  閾値未満の本文、画像、圧縮済みの本文、Accept-Encodingなしのリクエストを送る
+            Then:  いずれも圧縮されずにそのまま返る
+    """
+
+    def test_passthrough(self):
+        client = TestClient(create_app())
+        small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+        assert small.headers["vary"] == "Accept-Encoding"
+        image = client.get("/image", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in image.headers
+        encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        assert encoded.content == LARGE_JSON
+        identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["etag"] == '"abc"'
+
+    """
+    Feature: レスポンスの圧縮
+        Scenario: ストリーミングのレスポンスはチャンクごとに圧縮する
+            Given: NDJSONを1行ずつ返すストリーミングのエンドポイントがある
+            When:  Accept-Encoding: gzipで取得する
+            Then:  Content-Lengthなしで圧縮して返り、展開すると全行がそろう
+    """
+
+    def test_stream(self):
+        client = TestClient(create_app(minimum_size=1 << 20))
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert len(response.text.splitlines()) == 28
+
+    """
+    Feature: レスポンスの圧縮
+        Scenario: brotliがインストールされていればbrで圧縮する
+            Given: br・gzipの順に優先する設定がある
+            When:  Accept-Encoding: br, gzipで大きなJSONを取得する
+            Then:  Content-Encoding: brで返り、展開すると元の本文に戻る
+    """
+
+    def test_brotli(self):
+        # httpxもbrotliがあればbrの本文を展開する
+        pytest.importorskip("brotli")
+        client = TestClient(create_app(encodings=("br", "gzip")))
+        response = client.get("/large", headers={"Accept-Encoding": "br, gzip"})
+        assert response.headers["content-encoding"] == "br"
+        assert response.content == LARGE_JSON
@@ -0,0 +1,75 @@
+import pytest
+
+from app.config import MONITOR_CONNECTIONS, MongoSettings
+
+"""
+コネクションプールの設定をテストするためのクラス
+"""
+
+
+class TestMongoSettings:
+    """
+    Feature: コネクションプールの設定
+        Scenario: プールの上限をクラスターの接続数の上限に収める
+            Given: 接続数の上限が100で、アプリのプロセスが4つある
+            When:  プール上限を50に設定する
+            Then:  1プロセスのプール上限は監視用の接続を除いた残りに切り詰められる
+            And:   最小接続数もプール上限を超えない
+    """
+
+    def test_pool_budget(self):
+        settings = MongoSettings(
+            max_pool_size=50, min_pool_size=30, connection_limit=100, app_instances=4)
+        options = settings.client_options()
+        assert options["maxPoolSize"] == 25 - MONITOR_CONNECTIONS
+        assert options["minPoolSize"] == 25 - MONITOR_CONNECTIONS
+        assert 4 * (options["maxPoolSize"] + MONITOR_CONNECTIONS) <= 100
+
+    """
+    Feature: コネクションプールの設定
+        Scenario: ワーカープロセスごとのプールを合わせて接続数の上限に収める
+            Given: 接続数の上限が100で、アプリのインスタンスが2つ、それぞれワーカーが3つある
+            When:  SERVER_WORKERSから設定を読み込む
+            Then:  6プロセスで上限を分け合い、監視用の接続を除いた残りがプール上限になる
+    """
+
+    def test_pool_budget_per_worker(self, monkeypatch):
+        monkeypatch.setenv("MONGO_APP_INSTANCES", "2")
+        monkeypatch.setenv("SERVER_WORKERS", "3")
+        settings = MongoSettings.from_env()
+        assert settings.processes == 6
+        assert settings.effective_max_pool_size == 100 // 6 - MONITOR_CONNECTIONS
+        assert 6 * (settings.effective_max_pool_size + MONITOR_CONNECTIONS) <= 100
+
+    """
+    Feature: コネクションプールの設定
+        Scenario: 環境変数からタイムアウトを読み込み、0は無効として扱う
+            Given: MONGO_TIMEOUT_MS=0、MONGO_WAIT_QUEUE_TIMEOUT_MS=500が設定されている
+            When:  設定を読み込む
+            Then:  timeoutMSは渡さず、waitQueueTimeoutMSが渡される
+            And:   DB操作のタイムアウトは無制限になる
+    """
+
+    def test_timeouts_from_env(self, monkeypatch):
+        monkeypatch.setenv("MONGO_TIMEOUT_MS", "0")
+        monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "500")
+        monkeypatch.setenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "2000")
+        settings = MongoSettings.from_env()
+        options = settings.client_options()
+        assert "timeoutMS" not in options
+        assert options["waitQueueTimeoutMS"] == 500
+        assert options["serverSelectionTimeoutMS"] == 2000
+        assert settings.executor_timeout is None
+
+    """
+    Feature: コネクションプールの設定
+        Scenario: プロセス数が多すぎて接続を割り当てられない場合は起動しない
+            Given: 接続数の上限が100で、アプリのプロセスが20ある
+            When:  設定を読み込む
+            Then:  ValueErrorが送出される
+    """
+
+    def test_too_many_instances(self, monkeypatch):
+        monkeypatch.setenv("MONGO_APP_INSTANCES", "20")
+        with pytest.raises(ValueError):
+            MongoSettings.from_env()
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from app.db import AsyncCollection, DatabaseTimeoutError
+
+"""
+DB呼び出しのスレッドプール実行をテストするためのクラス
+"""
+
+
+class TestDatabaseExecutor:
+    """
+    Feature: DB呼び出しのスレッドプール実行
+        Scenario: 同期関数がイベントループ外のワーカースレッドで実行される
+            Given: ワーカー数1のDatabaseExecutorがある
+            When:  同期関数をrunで実行する
+            Then:  関数の戻り値が返る
+            And:   関数はメインスレッド以外で実行されている
+    """
+
+    @pytest.mark.asyncio
+    async def test_run_in_worker_thread(self, executor):
+        result = await executor.run(lambda: threading.current_thread().name)
+        assert result.startswith("mongo")
+        assert result != threading.main_thread().name
+
+    """
+    Feature: DB呼び出しのスレッドプール実行
+        Scenario: 制限時間を超えたDB操作はタイムアウトエラーとなる
+            Given: タイムアウト0.2秒のDatabaseExecutorがある
+            When:  0.2秒以上かかる同期関数をrunで実行する
+            Then:  DatabaseTimeoutErrorが送出される
+            And:   DatabaseTimeoutErrorはPyMongoErrorとして扱える
+    """
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("executor", [0.2], indirect=True)
+    async def test_run_timeout(self, executor):
+        with pytest.raises(DatabaseTimeoutError) as exc_info:
+            await executor.run(time.sleep, 0.5)
+        assert isinstance(exc_info.value, PyMongoError)
+
+    """
+    Feature: 非同期コレクションラッパー
+        Scenario: findの結果がスレッド内でリスト化されて返る
+            Given: ジェネレーターを返すfindを持つコレクションがある
+            When:  AsyncCollection.findを実行する
+            Then:  検索結果がリストで返る
+    """
+
+    @pytest.mark.asyncio
+    async def test_async_collection_find(self, executor):
+        class GeneratorCollection:
+            def find(self, query):
+                return (doc for doc in [{"_id": "a"}, {"_id": "b"}])
+
+        collection = AsyncCollection(GeneratorCollection(), executor)
+        docs = await collection.find({})
+        assert docs == [{"_id": "a"}, {"_id": "b"}]
+
+    """
+    Feature: 非同期コレクションラッパー
+        Scenario: find_batchesが検索結果をバッチ単位で返し、最後にカーソルを閉じる
+            Given: 5件を返すカーソルを持つコレクションがある
+            When:  batch_size=2でfind_batchesを走査する
+            Then:  2件・2件・1件のバッチが順に返る
+            And:   カーソルのcloseが呼ばれている
+    """
+
+    @pytest.mark.asyncio
+    async def test_async_collection_find_batches(self, executor):
+        class Cursor:
+            closed = False
+
+            def __init__(self, docs):
+                self._docs = iter(docs)
+
+            def __iter__(self):
+                return self
+
+            def __next__(self):
+                return next(self._docs)
+
+            def close(self):
+                Cursor.closed = True
+
+        class CursorCollection:
+            def find(self, query, **kwargs):
+                assert kwargs["batch_size"] == 2
+                return Cursor([{"_id": i} for i in range(5)])
+
+        collection = AsyncCollection(CursorCollection(), executor)
+        batches = [batch async for batch in collection.find_batches({}, batch_size=2)]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert Cursor.closed
@@ -0,0 +1,61 @@
+import asyncio
+
+from pymongo.errors import PyMongoError
+
+from app.health import HealthCheck
+
+"""
+ヘルスチェックをテストするためのクラス
+"""
+
+
+class SlowPing:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise PyMongoError("no server")
+
+
+class TestHealthCheck:
+    """
+    Feature: pingのキャッシュ
+        Scenario: 同時に来たプローブは1回のpingの結果を共有する
+            Given: 10msかかるpingがある
+            When:  50個のプローブが同時にcheckを実行する
+            Then:  すべてのプローブがTrueを受け取り、pingは1回だけ実行される
+    """
+
+    def test_concurrent_probes_share_ping(self):
+        ping = SlowPing()
+        health = HealthCheck(ping, ttl_seconds=60)
+
+        async def probe():
+            return await asyncio.gather(*(health.check() for _ in range(50)))
+
+        assert asyncio.run(probe()) == [True] * 50
+        assert ping.calls == 1
+
+    """
+    Feature: pingのキャッシュ
+        Scenario: 有効期間が切れると再びpingし、失敗を記録する
+            Given: 有効期間0秒で、失敗するpingがある
+            When:  checkを2回実行する
+            Then:  どちらもFalseを返し、pingは2回実行される
+            And:   失敗した例外の種類が記録される
+    """
+
+    def test_expired_ping(self):
+        ping = SlowPing(fail=True)
+        health = HealthCheck(ping, ttl_seconds=0)
+
+        async def probe():
+            return [await health.check(), await health.check()]
+
+        assert asyncio.run(probe()) == [False, False]
+        assert ping.calls == 2
+        assert health.error == "PyMongoError"
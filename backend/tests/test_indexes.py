@@ -0,0 +1,206 @@
+import os
+import uuid
+
+import pytest
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.indexes import BUCKET_INDEXES, ENTRY_INDEXES, USER_INDEXES, ensure_indexes
+
+"""
+インデックスの作成と利用をテストするためのクラス
+"""
+
+# explainによる実行計画の確認には実際のMongoDBが必要
+MONGODB_TEST_URI = os.getenv("MONGODB_TEST_URI")
+requires_mongodb = pytest.mark.skipif(
+    not MONGODB_TEST_URI, reason="MONGODB_TEST_URI is not set")
+
+
+def plan_stages(plan):
+    """実行計画に含まれるステージ名をすべて列挙する"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+class TestEnsureIndexes:
+    """
+    Feature: 起動時のインデックス作成
+        Scenario: 作成に失敗したインデックスがあっても残りのインデックスを作成する
+            Given: 一意インデックスの作成だけが失敗するコレクションがある
+            When:  ensure_indexesを実行する
+            Then:  例外は送出されない
+            And:   すべてのインデックスの作成が試みられている
+    """
+
+    def test_continue_on_failure(self):
+        created = []
+
+        class FailingCollection:
+            def create_indexes(self, indexes):
+                created.extend(index.document["name"] for index in indexes)
+                if indexes[0].document.get("unique"):
+                    raise OperationFailure("E11000 duplicate key error")
+
+            def index_information(self):
+                return {"_id_": {}}
+
+        ensure_indexes({"entries": FailingCollection(), "users": FailingCollection()})
+        assert created == [index.document["name"]
+                           for index in ENTRY_INDEXES + USER_INDEXES]
+
+    """
+    Feature: 起動時のインデックス作成
+        Scenario: バケット形式ではバケットのコレクションにもインデックスを作成する
+            Given: ENTRY_STORAGE_LAYOUT=buckets の設定である
+            When:  ensure_indexesを実行する
+            Then:  entry_bucketsコレクションに(user_id, month)の一意インデックスが作成される
+    """
+
+    def test_bucket_indexes(self):
+        created = {}
+
+        class RecordingCollection:
+            def __init__(self, name):
+                self.name = name
+
+            def create_indexes(self, indexes):
+                created.setdefault(self.name, []).extend(
+                    index.document["name"] for index in indexes)
+
+            def index_information(self):
+                return {"_id_": {}}
+
+        ensure_indexes({name: RecordingCollection(name)
+                        for name in ("entries", "entry_buckets", "users")}, "buckets")
+        assert created["entry_buckets"] == [
+            index.document["name"] for index in BUCKET_INDEXES]
+        assert created["entries"] == [index.document["name"] for index in ENTRY_INDEXES]
+
+    """
+    Feature: 起動時のインデックス作成
+        Scenario: ユーザー導入前のインデックスを削除する
+            Given: record_dateだけの一意インデックスが残っているコレクションがある
+            When:  ensure_indexesを実行する
+            Then:  古いインデックスだけが削除される
+    """
+
+    def test_drop_obsolete_indexes(self):
+        dropped = []
+
+        class LegacyCollection:
+            def create_indexes(self, indexes):
+                pass
+
+            def index_information(self):
+                return {"_id_": {}, "record_date_unique": {}}
+
+            def drop_index(self, name):
+                dropped.append(name)
+
+        ensure_indexes({"entries": LegacyCollection(), "users": LegacyCollection()})
+        assert dropped == ["record_date_unique"]
+
+
+@requires_mongodb
+class TestIndexUsage:
+    # 他のユーザーのドキュメントがあっても走査量が変わらないことを確認するためのユーザー数
+    TENANTS = 20
+
+    @pytest.fixture
+    def collection(self):
+        from pymongo import MongoClient
+        client = MongoClient(MONGODB_TEST_URI)
+        database = client[f"test_indexes_{uuid.uuid4().hex}"]
+        ensure_indexes(database)
+        collection = database["entries"]
+        collection.insert_many([
+            {"user_id": f"user_{tenant}",
+             "record_date": f"2025-{month:02d}-{day:02d}",
+             "mood_score": day % 6, "sleep_hours": 7.0}
+            for tenant in range(self.TENANTS)
+            for month in range(1, 13) for day in range(1, 29)
+        ])
+        yield collection
+        client.drop_database(database.name)
+        client.close()
+
+    """
+    Feature: 日付範囲の読み出し
+        Scenario: ユーザー・日付範囲・カーソルによる検索がインデックスで処理される
+            Given: 複数ユーザーのドキュメントがあるインデックス作成済みのコレクションがある
+            When:  GET /entries と同じ条件・並び順・件数で実行計画を取得する
+            Then:  IXSCANが使われ、COLLSCANとメモリ上のSORTは使われない
+            And:   走査したインデックスキー・ドキュメントは返した件数分だけである
+    """
+
+    def test_range_query_uses_index(self, collection):
+        from datetime import date
+        from app.pagination import ENTRIES_SORT, build_entries_query, encode_cursor
+
+        first_page = list(collection.find(
+            build_entries_query("user_3", date(2025, 3, 1), date(2025, 6, 30)),
+            sort=ENTRIES_SORT, limit=10))
+        query = build_entries_query(
+            "user_3", date(2025, 3, 1), date(2025, 6, 30),
+            encode_cursor(first_page[-1]))
+        plan = collection.find(query, sort=ENTRIES_SORT, limit=10).explain()
+        stages = set(plan_stages(plan["queryPlanner"]["winningPlan"]))
+        assert "IXSCAN" in stages
+        assert "COLLSCAN" not in stages
+        assert "SORT" not in stages
+        stats = plan["executionStats"]
+        assert stats["nReturned"] == 10
+        assert stats["totalDocsExamined"] == 10
+        assert stats["totalKeysExamined"] <= 11
+
+    """
+    Feature: 変更の取得
+        Scenario: 前回の取得以降に書き込まれたドキュメントだけをインデックスで読み出す
+            Given: 書き込み時刻のない導入前のドキュメントと、5件だけ書き込み時刻を持つユーザーがある
+            When:  GET /entries/changes と同じ条件・並び順・件数で実行計画を取得する
+            Then:  IXSCANが使われ、COLLSCANとメモリ上のSORTは使われない
+            And:   走査したドキュメントは書き込み時刻が起点以降の5件だけである
+    """
+
+    def test_changes_query_uses_index(self, collection):
+        from datetime import datetime, timezone
+        from app.changes import CHANGES_SORT, ChangeToken, build_changes_query
+
+        watermark = datetime(2025, 8, 14, tzinfo=timezone.utc)
+        collection.update_many(
+            {"user_id": "user_3", "record_date": {"$gte": "2025-12-24"}},
+            {"$set": {"updated_at": watermark}})
+        plan = collection.find(
+            build_changes_query("user_3", ChangeToken(watermark=watermark)),
+            sort=CHANGES_SORT, limit=11).explain()
+        stages = set(plan_stages(plan["queryPlanner"]["winningPlan"]))
+        assert "IXSCAN" in stages
+        assert "COLLSCAN" not in stages
+        assert "SORT" not in stages
+        stats = plan["executionStats"]
+        assert stats["nReturned"] == 5
+        assert stats["totalDocsExamined"] == 5
+
+    """
+    Feature: 記録日の一意性
+        Scenario: 同じユーザー・同じ記録日のドキュメントは一意インデックスで拒否される
+            Given: インデックス作成済みのコレクションがある
+            When:  既存と同じユーザー・記録日のドキュメントをinsert_oneする
+            Then:  DuplicateKeyErrorが送出される
+            And:   別のユーザーであれば同じ記録日でも保存できる
+    """
+
+    def test_unique_record_date(self, collection):
+        with pytest.raises(DuplicateKeyError):
+            collection.insert_one(
+                {"user_id": "user_0", "record_date": "2025-01-01",
+                 "mood_score": 1, "sleep_hours": 5.0})
+        collection.insert_one(
+            {"user_id": "new_user", "record_date": "2025-01-01",
+             "mood_score": 1, "sleep_hours": 5.0})
@@ -0,0 +1,156 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.analytics import ANOMALY_WINDOW, anomaly_scores, build_insights, moving_averages
+from app.insights import InsightsMemo
+
+"""
+分析結果（曜日ごとの傾向・睡眠負債・移動平均・外れ値）をテストするためのクラス
+"""
+
+START = date(2025, 8, 4)  # 月曜日
+
+
+def make_rows(moods, sleeps, skip=()):
+    """STARTから1日ずつの記録（skipの位置の日は記録しない）"""
+    rows = []
+    day = START
+    for i, (mood, sleep) in enumerate(zip(moods, sleeps)):
+        if i in skip:
+            day += timedelta(days=1)
+        rows.append((day.isoformat(), mood, sleep))
+        day += timedelta(days=1)
+    return rows
+
+
+class TestBuildInsights:
+    """
+    Feature: 分析結果
+        Scenario: 曜日ごとの傾向と移動平均を求める
+            Given: 月曜日から2週間分の記録がある
+            When:  直近3件の移動平均で分析する
+            Then:  曜日ごとの件数・平均と全体の平均との差が返る
+            And:   移動平均は先頭付近ではそれまでの全件の平均になる
+    """
+
+    def test_weekdays_and_moving_averages(self):
+        moods = [5, 1, 1, 1, 1, 1, 1] * 2
+        rows = make_rows(moods, [7.0] * 14)
+        insights = build_insights(rows, 3, 7.0)
+
+        assert insights.count == 14
+        monday, tuesday = insights.weekdays[0], insights.weekdays[1]
+        assert (monday.weekday, monday.count, monday.mood_score) == (0, 2, 5.0)
+        assert monday.mood_delta == pytest.approx(5 - np.mean(moods), abs=1e-3)
+        assert (tuesday.count, tuesday.mood_score, tuesday.sleep_hours) == (2, 1.0, 7.0)
+
+        averages = insights.moving_averages
+        assert averages.window == 3
+        assert averages.record_dates[0] == START
+        assert averages.mood_score[:4] == [5.0, 3.0, 2.333, 1.0]
+        assert averages.sleep_hours == [7.0] * 14
+
+    """
+    Feature: 分析結果
+        Scenario: 目標の睡眠時間に届かなかった日の連続を求める
+            Given: 不足した日が2日、記録のない日をはさんで3日、最新の記録まで1日続いている
+            When:  目標を7時間として分析する
+            Then:  記録のない日で連続が途切れ、最長の連続は3日になる
+            And:   最新の記録まで続いている連続と、それぞれの不足時間の合計が返る
+    """
+
+    def test_sleep_debt_streaks(self):
+        sleeps = [6.0, 5.0, 8.0, 6.5, 6.0, 4.0, 7.5, 6.0]
+        rows = make_rows([3] * 8, sleeps, skip={5})
+        debt = build_insights(rows, 7, 7.0).sleep_debt
+
+        assert debt.target_hours == 7.0
+        longest = debt.longest_streak
+        assert (longest.start, longest.end, longest.days) == (
+            START + timedelta(days=3), START + timedelta(days=4), 2)
+        assert longest.debt_hours == pytest.approx(1.5)
+        assert debt.current_streak.days == 1
+        assert debt.current_streak.debt_hours == pytest.approx(1.0)
+
+        rows = make_rows([3] * 4, [6.0, 6.0, 6.0, 8.0])
+        debt = build_insights(rows, 7, 7.0).sleep_debt
+        assert debt.longest_streak.days == 3
+        assert debt.current_streak is None
+
+    """
+    Feature: 分析結果
+        Scenario: 直前の記録の平均から大きく離れた記録を外れ値とする
+            Given: 気分スコアが3と4を繰り返した後、0の日がある
+            When:  分析する
+            Then:  0の日だけが気分スコアの外れ値として返り、直前の平均が期待値になる
+            And:   直前の記録がANOMALY_WINDOW件に満たない位置では判定しない
+    """
+
+    def test_anomalies(self):
+        moods = [3, 4] * (ANOMALY_WINDOW // 2) + [0]
+        rows = make_rows(moods, [7.0] * len(moods))
+        (anomaly,) = build_insights(rows, 7, 7.0).anomalies
+
+        assert anomaly.metric == "mood_score"
+        assert anomaly.record_date == START + timedelta(days=ANOMALY_WINDOW)
+        assert (anomaly.value, anomaly.expected) == (0.0, 3.5)
+        assert anomaly.z_score < -2.5
+
+        expected, z = anomaly_scores(np.array(moods, dtype=float), ANOMALY_WINDOW)
+        assert np.isnan(z[:ANOMALY_WINDOW]).all()
+        assert expected[-1] == 3.5
+
+    """
+    Feature: 分析結果
+        Scenario: 累積和による移動平均が直接の平均と一致する
+            Given: 1000件の乱数の記録がある
+            When:  直近7件の移動平均を求める
+            Then:  各位置の直近7件をそのまま平均した値と一致する
+    """
+
+    def test_moving_averages_match_direct(self):
+        values = np.random.default_rng(0).uniform(0, 10, 1000)
+        direct = [values[max(i - 6, 0):i + 1].mean() for i in range(len(values))]
+        np.testing.assert_allclose(moving_averages(values, 7), direct)
+
+    """
+    Feature: 分析結果
+        Scenario: 記録がない場合は空の結果を返す
+            When:  記録なしで分析する
+            Then:  件数0、曜日ごとの平均・連続はnull、移動平均・外れ値は空になる
+    """
+
+    def test_empty(self):
+        insights = build_insights([], 7, 7.0)
+        assert insights.count == 0
+        assert [effect.mood_score for effect in insights.weekdays] == [None] * 7
+        assert insights.sleep_debt.longest_streak is None
+        assert insights.moving_averages.record_dates == []
+        assert insights.anomalies == []
+
+
+class TestInsightsMemo:
+    """
+    Feature: 分析結果の再利用
+        Scenario: 世代番号が変わっていなければ計算済みの結果を返す
+            Given: 世代番号とともに結果を保存している
+            When:  同じ世代番号と、進んだ世代番号で取得する
+            Then:  同じ回数ではヒットし、進んだ回数ではミスになる
+            And:   上限を超えると最も古く使われた結果から追い出す
+    """
+
+    def test_get_put(self):
+        memo = InsightsMemo(max_entries=2)
+        memo.put(("user_1", 7, 7.0), 3, b"1")
+        assert memo.get(("user_1", 7, 7.0), 3) == b"1"
+        assert memo.get(("user_1", 7, 7.0), 4) is None
+        assert memo.get(("user_1", 14, 7.0), 3) is None
+        assert (memo.hits, memo.misses) == (1, 2)
+
+        memo.put(("user_2", 7, 7.0), 0, b"2")
+        memo.get(("user_1", 7, 7.0), 3)
+        memo.put(("user_3", 7, 7.0), 0, b"3")
+        assert len(memo) == 2
+        assert memo.get(("user_2", 7, 7.0), 0) is None
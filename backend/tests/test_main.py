@@ -12,6 +12,12 @@ class TestMainApi:
     # 定数
     DUMMY_ID = "dummy_id"
     FIXED_DATE = date(2025, 8, 14)
+    # 検証済みとしてトークンキャッシュに登録しておくユーザー
+    USER_ID = "user_1"
+    TOKEN = "token_1"
+    # DBへの問い合わせで検証されるユーザー
+    OTHER_USER_ID = "user_2"
+    OTHER_TOKEN = "token_2"
 
     def dummy_entry_as_doc(self):
         """dummy_entryをMongoDB document形式に変換"""
@@ -23,7 +29,29 @@ class TestMainApi:
             sleep_hours=6.5,
             memo="今日はよく眠れた"
         )
-        return dummy.to_mongo_dict()
+        doc = dummy.to_mongo_dict()
+        # 実際のMongoDBと同様にIDは_idキーで保持する
+        doc["_id"] = doc.pop("id")
+        return doc
+
+    def many_entries_as_docs(self):
+        """記録日の新しい順に並んだ3件のMongoDB document"""
+        docs = []
+        for day in (14, 13, 12):
+            doc = self.dummy_entry_as_doc()
+            doc["_id"] = f"id_{day}"
+            doc["record_date"] = date(2025, 8, day).isoformat()
+            docs.append(doc)
+        return docs
+
+    def fit_predictor(self):
+        """予測モデルを作成済み（作り直し不要）の状態にする"""
+        import app.main
+        from app.prediction import fit_batch
+        predictor = app.main.app.state.predictor
+        predictor.replace(self.USER_ID, fit_batch([]), predictor.generation(self.USER_ID))
+        assert not predictor.needs_refit(self.USER_ID)
+        return predictor
 
     @pytest.fixture
     def dummy_entry(self):
@@ -41,13 +69,27 @@ class TestMainApi:
         return self._create_client("normal")
 
     def _create_client(self, mock_type="normal"):
+        self.bulk_write_calls = []
+        self.user_lookups = []
+        self.versions = {}
+        self.version_reads = 0
         from fastapi.testclient import TestClient
         from app.main import app
+        from app.db import DatabaseExecutor
+        from app.predictor import PredictionService
+        from app.cache import ResponseCache
+        from app.auth import TokenCache, hash_token
+        from app.health import HealthCheck
+        from app.insights import InsightsMemo
+        from app.constants import DB
+
+        class MockBulkWriteResult:
+            def __init__(self, upserted_ids):
+                self.upserted_ids = upserted_ids
 
         class MockInsertOneResult:
-            @property
-            def inserted_id(self):
-                return TestMainApi.DUMMY_ID
+            def __init__(self, inserted_id):
+                self.inserted_id = inserted_id
 
         # ダミーデータを生成
         test_instance = self
@@ -56,28 +98,123 @@ class TestMainApi:
             def __init__(self, mock_type="normal"):
                 self.mock_type = mock_type
 
-            def insert_one(self, entry):
+            def find_one(self, filter, **kwargs):
+                # usersコレクションでのトークン検証
+                test_instance.user_lookups.append(filter)
+                if self.mock_type == "error":
+                    from pymongo.errors import PyMongoError
+                    raise PyMongoError("Database connection failed")
+                if filter == {"token_hash": hash_token(TestMainApi.OTHER_TOKEN)}:
+                    return {"_id": TestMainApi.OTHER_USER_ID}
+                return None
+
+            def insert_one(self, document):
+                # usersコレクションへのユーザー登録
+                test_instance.last_insert = document
+                if self.mock_type == "error":
+                    from pymongo.errors import PyMongoError
+                    raise PyMongoError("Database connection failed")
+                return MockInsertOneResult("new_user_id")
+
+            def find_one_and_replace(self, filter, replacement, **kwargs):
+                test_instance.last_replace = (filter, replacement, kwargs)
                 if self.mock_type == "error":
                     from pymongo.errors import PyMongoError
                     raise PyMongoError("Database connection failed")
                 else:
-                    # 実際のDB挿入は不要。inserted_idのみ返す
-                    return MockInsertOneResult()
+                    # 実際のDB保存は不要。_idのみ返す
+                    return {"_id": TestMainApi.DUMMY_ID}
 
-            def find(self, query):
+            def bulk_write(self, requests, ordered=True):
+                test_instance.bulk_write_calls.append(len(requests))
+                if self.mock_type == "error":
+                    from pymongo.errors import PyMongoError
+                    raise PyMongoError("Database connection failed")
+                if self.mock_type == "existing":
+                    # すべて同じ記録日の既存ドキュメントを置き換えた
+                    return MockBulkWriteResult({})
+                upserted_ids = {
+                    i: f"bulk_{request._doc['record_date']}"
+                    for i, request in enumerate(requests)
+                }
+                if self.mock_type == "write_error":
+                    from pymongo.errors import BulkWriteError
+                    raise BulkWriteError({
+                        "writeErrors": [
+                            {"index": 0, "errmsg": "E11000 duplicate key error"}],
+                        "upserted": [
+                            {"index": i, "_id": _id}
+                            for i, _id in upserted_ids.items() if i != 0],
+                    })
+                return MockBulkWriteResult(upserted_ids)
+
+            def aggregate(self, pipeline, **kwargs):
+                test_instance.last_aggregate = pipeline
+                if self.mock_type == "error":
+                    from pymongo.errors import PyMongoError
+                    raise PyMongoError("Database connection failed")
+                if self.mock_type == "empty":
+                    return []
+                # 集計パイプラインの$groupが返す区間ごとのドキュメント
+                return [{
+                    "_id": "2025-08-11", "count": 2,
+                    "mood_min": 2, "mood_max": 4, "sleep_min": 5.0, "sleep_max": 7.0,
+                    "sum_mood": 6, "sum_sleep": 12.0, "sum_mood_sq": 20,
+                    "sum_sleep_sq": 74.0, "sum_mood_sleep": 38.0,
+                }]
+
+            def find(self, query, **kwargs):
+                test_instance.last_find = (query, kwargs)
+                if self.mock_type == "existing":
+                    return [
+                        {"_id": f"existing_{key['record_date']}",
+                         "user_id": key["user_id"],
+                         "record_date": key["record_date"]}
+                        for key in query["$or"]
+                    ]
                 if self.mock_type == "empty":
                     return []
                 elif self.mock_type == "error":
                     from pymongo.errors import PyMongoError
                     raise PyMongoError("Database connection failed")
+                elif self.mock_type == "many":
+                    # 新しい順に並んだ3件（limitは実DBと同様に適用）
+                    docs = test_instance.many_entries_as_docs()
+                    if kwargs.get("sort") == [("record_date", 1)]:
+                        docs.reverse()
+                    return docs[:kwargs.get("limit") or len(docs)]
                 else:
                     return [test_instance.dummy_entry_as_doc()]
 
+        class MockVersionCollection:
+            """entry_versionsコレクション（ユーザーごとの書き込み回数をtest_instance.versionsに保持する）"""
+
+            def __init__(self, mock_type="normal"):
+                self.mock_type = mock_type
+
+            def find_one(self, filter, **kwargs):
+                if self.mock_type == "error":
+                    from pymongo.errors import PyMongoError
+                    raise PyMongoError("Database connection failed")
+                test_instance.version_reads += 1
+                version = test_instance.versions.get(filter["_id"])
+                return None if version is None else {"version": version}
+
+            def find_one_and_update(self, filter, update, **kwargs):
+                if self.mock_type == "error":
+                    from pymongo.errors import PyMongoError
+                    raise PyMongoError("Database connection failed")
+                version = test_instance.versions.get(filter["_id"], 0) + update["$inc"]["version"]
+                test_instance.versions[filter["_id"]] = version
+                return {"version": version}
+
         class MockDB:
             def __init__(self, mock_type="normal"):
                 self.mock_type = mock_type
 
             def __getitem__(self, name):
+                if name == DB.ENTRY_VERSIONS_COLLECTION:
+                    return MockVersionCollection(self.mock_type)
                 return MockCollection(self.mock_type)
 
         class MockClient:
@@ -95,7 +232,25 @@ class TestMainApi:
 
         # lifespan利用のため、app起動前にstate.mongoへ直接MockClientをセット
         app.state.mongo = MockClient(mock_type)
-        return TestClient(app)
+        app.state.db_executor = DatabaseExecutor(max_workers=2, timeout=5)
+        app.state.predictor = PredictionService()
+        app.state.insights_memo = InsightsMemo(max_entries=100)
+        app.state.response_cache = ResponseCache(max_bytes=1024 * 1024, ttl_seconds=60)
+        app.state.token_cache = TokenCache(max_entries=100, ttl_seconds=60)
+        app.state.write_queue = None
+        app.state.change_tracker = None
+        app.state.token_cache.put(hash_token(self.TOKEN), self.USER_ID)
+
+        self.pings = 0
+
+        async def ping():
+            test_instance.pings += 1
+            if mock_type == "error":
+                from pymongo.errors import PyMongoError
+                raise PyMongoError("Database connection failed")
+
+        app.state.health = HealthCheck(ping, ttl_seconds=60)
+        return TestClient(app, headers={"Authorization": f"Bearer {self.TOKEN}"})
 
     # サンプルテスト
     """
@@ -143,6 +298,37 @@ class TestMainApi:
         assert entry["sleep_hours"] == dummy_entry.sleep_hours
         assert entry["memo"] == dummy_entry.memo
 
+    """
+    Feature: エントリー追加API（書き込みキュー）
+        Scenario: fire-and-ackモードではキューに入れた時点で202を返す
+            Given: ackモードの書き込みキューを設定したAPIクライアントがある
+            When:  有効なエントリーデータで'/entries'にPOSTする
+            Then:  レスポンスのステータスコードは202で、statusは'accepted'である
+            And:   書き込み前のためidはnullで、エントリーはキューに入っている
+            And:   DBへの書き込みはまだ行われていない
+    """
+
+    def test_add_entry_write_behind_ack(self, client, dummy_entry):
+        from app.main import app
+        from app.write_queue import WriteBehindQueue
+        queue = WriteBehindQueue(
+            None, app.state.response_cache, app.state.predictor,
+            wait_for_flush=False, batch_size=10, max_delay_seconds=1,
+            max_pending=10, enqueue_timeout_seconds=1, change_counter=None)
+        app.state.write_queue = queue
+        entry_dict = dummy_entry.model_dump()
+        entry_dict.pop("id", None)
+        entry_dict["record_date"] = dummy_entry.record_date.isoformat()
+        response = client.post("/entries", json=entry_dict)
+
+        assert response.status_code == 202
+        resp_json = response.json()
+        assert resp_json["status"] == "accepted"
+        assert resp_json["entry"]["id"] is None
+        assert resp_json["entry"]["user_id"] == self.USER_ID
+        assert len(queue) == 1
+        assert not hasattr(self, "last_replace")
+
     # エントリー追加APIの準正常系/異常系・バリデーション系テスト
     """
     Feature: エントリー追加API
@@ -305,6 +491,30 @@ class TestMainApi:
         assert "error" in resp_json.get(
             "detail", "") or "sleep_hours" in str(resp_json)
     
+    """
+    Feature: エントリー追加API
+        Scenario: ユーザーと記録日をキーにupsertする
+            Given: 実行可能なAPIクライアントがある
+            When:  他人のuser_idを含むエントリーデータで'/entries'にPOSTする
+            Then:  DBには認証したユーザーと記録日を条件にupsertで置き換えを依頼している
+            And:   保存するドキュメントのuser_idは認証したユーザーである
+            And:   保存するドキュメントにidは含まれない
+    """
+
+    def test_add_entry_upsert_by_record_date(self, client, dummy_entry):
+        entry_dict = dummy_entry.model_dump(mode="json")
+        entry_dict["user_id"] = self.OTHER_USER_ID
+        response = client.post("/entries", json=entry_dict)
+        assert response.status_code == 200
+        assert response.json()["entry"]["user_id"] == self.USER_ID
+        filter, replacement, kwargs = self.last_replace
+        assert filter == {
+            "user_id": self.USER_ID, "record_date": self.FIXED_DATE.isoformat()}
+        assert replacement["user_id"] == self.USER_ID
+        assert "id" not in replacement
+        assert "_id" not in replacement
+        assert kwargs["upsert"] is True
+
     """
     Feature: エントリー追加API
     Scenario: データベースエラーが発生した場合は500エラーを返す
@@ -312,6 +522,7 @@ class TestMainApi:
             When:  sleep_hoursが文字列で'/entries'にPOSTする
             Then:  レスポンスのステータスコードは500である
             And:   レスポンスボディにエラーメッセージが含まれる
+            And:   書き込まれたかわからないため、予測モデルは次回の予測時に作り直す
     """
 
     def test_add_entry_database_error(self, client, dummy_entry):
@@ -319,11 +530,13 @@ class TestMainApi:
         entry_dict.pop("id", None)
         entry_dict["record_date"] = dummy_entry.record_date.isoformat()
         client = self._create_client("error")
+        predictor = self.fit_predictor()
         response = client.post("/entries", json=entry_dict)
         assert response.status_code == 500
         resp_json = response.json()
         assert "detail" in resp_json
         assert "failed to insert entry" in resp_json["detail"]
+        assert predictor.needs_refit(self.USER_ID)
 
     # エントリー取得APIのテスト
     """
@@ -345,7 +558,7 @@ class TestMainApi:
         assert isinstance(resp_json["entries"], list)
         if len(resp_json["entries"]) > 0:
             entry = resp_json["entries"][0]
-            assert "id" in entry
+            assert entry["id"] == self.DUMMY_ID
             assert "record_date" in entry
             assert "mood_score" in entry
             assert "sleep_hours" in entry
@@ -385,6 +598,1128 @@ class TestMainApi:
         assert "detail" in resp_json
         assert "failed to retrieve entries" in resp_json["detail"]
 
+    """
+    Feature: エントリー取得API（ページング）
+        Scenario: limitより多くのエントリーがある場合は次ページのカーソルを返す
+            Given: 3件のエントリーを返すAPIクライアントがある
+            When:  '/entries?limit=2'にGETリクエストを実行する
+            Then:  レスポンスのステータスコードは200である
+            And:   レスポンスボディのキー'entries'に2件が含まれる
+            And:   レスポンスボディのキー'next_cursor'がnullではない
+            And:   DBには記録日の降順・limit+1件で問い合わせている
+    """
+
+    def test_get_entries_next_cursor(self):
+        client = self._create_client("many")
+        response = client.get("/entries", params={"limit": 2})
+        assert response.status_code == 200
+        resp_json = response.json()
+        assert [e["id"] for e in resp_json["entries"]] == ["id_14", "id_13"]
+        assert resp_json["next_cursor"] is not None
+        query, kwargs = self.last_find
+        assert query == {"user_id": self.USER_ID}
+        assert kwargs["limit"] == 3
+        assert kwargs["sort"] == [("record_date", -1), ("_id", -1)]
+
+    """
+    Feature: エントリー取得API（ページング）
+        Scenario: 最終ページではnext_cursorがnullになる
+            Given: 3件のエントリーを返すAPIクライアントがある
+            When:  '/entries?limit=3'にGETリクエストを実行する
+            Then:  レスポンスボディのキー'entries'に3件が含まれる
+            And:   レスポンスボディのキー'next_cursor'がnullである
+    """
+
+    def test_get_entries_last_page(self):
+        client = self._create_client("many")
+        response = client.get("/entries", params={"limit": 3})
+        assert response.status_code == 200
+        resp_json = response.json()
+        assert len(resp_json["entries"]) == 3
+        assert resp_json["next_cursor"] is None
+
+    """
+    Feature: エントリー取得API（ページング）
+        Scenario: カーソルと日付範囲がDBの検索条件に変換される
+            Given: 前ページのnext_cursorがある
+            When:  cursor・from・toを指定して'/entries'にGETリクエストを実行する
+            Then:  DBの検索条件にユーザー・日付範囲・カーソル位置以降の条件が含まれる
+    """
+
+    def test_get_entries_cursor_and_range(self):
+        client = self._create_client("many")
+        next_cursor = client.get(
+            "/entries", params={"limit": 1}).json()["next_cursor"]
+        response = client.get("/entries", params={
+            "cursor": next_cursor, "from": "2025-08-01", "to": "2025-08-31"})
+        assert response.status_code == 200
+        query, _ = self.last_find
+        assert query == {
+            "user_id": self.USER_ID,
+            "record_date": {"$gte": "2025-08-01", "$lte": "2025-08-31"},
+            "$or": [
+                {"record_date": {"$lt": "2025-08-14"}},
+                {"record_date": "2025-08-14", "_id": {"$lt": "id_14"}},
+            ],
+        }
+
+    """
+    Feature: エントリー取得API（ページング）
+        Scenario: 不正なカーソルは400エラーとなる
+            Given: 実行可能なAPIクライアントがある
+            When:  復元できないcursorを指定して'/entries'にGETリクエストを実行する
+            Then:  レスポンスのステータスコードは400である
+    """
+
+    def test_get_entries_invalid_cursor(self, client):
+        response = client.get("/entries", params={"cursor": "broken"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "invalid cursor"
+
+    """
+    Feature: エントリー取得API（ページング）
+        Scenario: limitが範囲外の場合は422エラーとなる
+            Given: 実行可能なAPIクライアントがある
+            When:  limit=0で'/entries'にGETリクエストを実行する
+            Then:  レスポンスのステータスコードは422である
+    """
+
+    def test_get_entries_invalid_limit(self, client):
+        response = client.get("/entries", params={"limit": 0})
+        assert response.status_code == 422
+
+    # 変更取得APIのテスト
+    """
+    Feature: 変更取得API
+        Scenario: 初回は全件を書き込んだ順に返し、next_tokenで続きを取得する
+            Given: 書き込み時刻のない3件のエントリーを返すAPIクライアントがある
+            When:  sinceを省略して'/entries/changes?limit=2'にGETし、next_tokenをsinceに指定してもう一度GETする
+            Then:  1回目は2件とhas_more=trueが返り、DBには書き込み時刻順・limit+1件で問い合わせている
+            And:   2回目のDBの検索条件は最後に返したエントリーより後の位置になる
+    """
+
+    def test_get_entry_changes(self):
+        client = self._create_client("many")
+        response = client.get("/entries/changes", params={"limit": 2})
+        assert response.status_code == 200
+        body = response.json()
+        assert [e["id"] for e in body["entries"]] == ["id_14", "id_13"]
+        assert body["has_more"] is True
+        query, kwargs = self.last_find
+        assert query == {"user_id": self.USER_ID}
+        assert kwargs["limit"] == 3
+        assert kwargs["sort"] == [("updated_at", 1), ("_id", 1)]
+
+        response = client.get(
+            "/entries/changes", params={"limit": 2, "since": body["next_token"]})
+        assert response.status_code == 200
+        query, _ = self.last_find
+        assert query == {
+            "user_id": self.USER_ID,
+            "$or": [
+                {"updated_at": None, "_id": {"$gt": "id_13"}},
+                {"updated_at": {"$ne": None}},
+            ],
+        }
+
+    """
+    Feature: 変更取得API
+        Scenario: 不正なトークンは400エラー、DBエラーは500エラーとなる
+            Given: 実行可能なAPIクライアントと、DBエラーを返すAPIクライアントがある
+            When:  復元できないsinceを指定して、またはDBエラーの状態で'/entries/changes'にGETする
+            Then:  それぞれステータスコード400と500が返る
+    """
+
+    def test_get_entry_changes_errors(self, client):
+        response = client.get("/entries/changes", params={"since": "broken"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "invalid change token"
+
+        response = self._create_client("error").get("/entries/changes")
+        assert response.status_code == 500
+        assert response.json()["detail"] == "failed to retrieve changes"
+
+
+    # エントリーエクスポートAPIのテスト
+    """
+    Feature: エントリーエクスポートAPI
+        Scenario: NDJSON形式でエントリーを1行1件でエクスポートする
+            Given: 3件のエントリーを返すAPIクライアントがある
+            When:  '/entries/export?format=ndjson'にGETリクエストを実行する
+            Then:  レスポンスのステータスコードは200である
+            And:   Content-Typeはapplication/x-ndjsonである
+            And:   レスポンスボディは3行のJSONである
+            And:   DBには記録日の昇順・バッチサイズ指定で問い合わせている
+    """
+
+    def test_export_entries_ndjson(self):
+        import json
+        client = self._create_client("many")
+        response = client.get("/entries/export", params={"format": "ndjson"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert len(lines) == 3
+        first = json.loads(lines[0])
+        assert first["id"] == "id_14"
+        assert first["memo"] == "今日はよく眠れた"
+        _, kwargs = self.last_find
+        assert kwargs["sort"] == [("record_date", 1), ("_id", 1)]
+        assert kwargs["batch_size"] > 0
+
+    """
+    Feature: エントリーエクスポートAPI
+        Scenario: CSV形式でヘッダー付きでエクスポートする
+            Given: 3件のエントリーを返すAPIクライアントがある
+            When:  '/entries/export?format=csv'にGETリクエストを実行する
+            Then:  レスポンスのステータスコードは200である
+            And:   1行目はヘッダー行で、続く3行がエントリーである
+    """
+
+    def test_export_entries_csv(self):
+        client = self._create_client("many")
+        response = client.get("/entries/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.splitlines()
+        assert lines[0] == "id,record_date,mood_score,sleep_hours,memo"
+        assert len(lines) == 4
+        assert lines[1] == "id_14,2025-08-14,4,6.5,今日はよく眠れた"
+
+    """
+    Feature: エントリーエクスポートAPI
+        Scenario: エントリーが0件の場合はNDJSONが空になる
+            Given: 0件のエントリーを返すAPIクライアントがある
+            When:  '/entries/export'にGETリクエストを実行する
+            Then:  レスポンスのステータスコードは200である
+            And:   レスポンスボディが空である
+    """
+
+    def test_export_entries_empty(self):
+        client = self._create_client("empty")
+        response = client.get("/entries/export")
+        assert response.status_code == 200
+        assert response.text == ""
+
+    """
+    Feature: エントリーエクスポートAPI
+        Scenario: データベースエラーが発生した場合は500エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  '/entries/export'にGETリクエストを実行する（DB接続エラー）
+            Then:  レスポンスのステータスコードは500である
+    """
+
+    def test_export_entries_database_error(self):
+        client = self._create_client("error")
+        response = client.get("/entries/export")
+        assert response.status_code == 500
+        assert "failed to export entries" in response.json()["detail"]
+
+    """
+    Feature: エントリーエクスポートAPI
+        Scenario: 未対応の形式を指定した場合は422エラーとなる
+            Given: 実行可能なAPIクライアントがある
+            When:  '/entries/export?format=xml'にGETリクエストを実行する
+            Then:  レスポンスのステータスコードは422である
+    """
+
+    def test_export_entries_invalid_format(self, client):
+        response = client.get("/entries/export", params={"format": "xml"})
+        assert response.status_code == 422
+
+    """
+    Feature: エントリーエクスポートAPI
+        Scenario: 途中で閉じられた場合も後続のバッチの読み出しを閉じる
+            Given: 3バッチを返す読み出しがある
+            When:  エクスポートの先頭と2バッチ目だけを受け取って閉じる
+            Then:  3バッチ目は読み出されず、読み出しが閉じられる
+    """
+
+    def test_export_closes_batches(self):
+        import asyncio
+        from app.export import stream_export
+        events = []
+
+        async def batches():
+            try:
+                for day in (2, 3):
+                    events.append(day)
+                    yield [self.dummy_entry_as_doc()]
+            finally:
+                events.append("closed")
+
+        async def consume():
+            stream = stream_export([self.dummy_entry_as_doc()], batches(), "ndjson")
+            chunks = [await anext(stream), await anext(stream)]
+            await stream.aclose()
+            # イベントループの終了時ではなく、閉じた時点で閉じられている
+            return chunks, list(events)
+
+        chunks, closed = asyncio.run(consume())
+        assert len(chunks) == 2
+        assert closed == [2, "closed"]
+
+    # エントリー一括登録APIのテスト
+    def bulk_entry(self, day):
+        return {
+            "record_date": date(2025, 8, day).isoformat(),
+            "mood_score": 3,
+            "sleep_hours": 7.0,
+            "memo": "一括登録",
+        }
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: JSON配列で受け取り、有効なエントリーのみ登録して位置ごとの結果を返す
+            Given: 実行可能なAPIクライアントがある
+            When:  2件目だけmood_scoreが不正な3件のJSON配列を'/entries/bulk'にPOSTする
+            Then:  レスポンスのステータスコードは200である
+            And:   レスポンスボディのキー'status'のバリューが'partial'である
+            And:   1件目と3件目のIDが位置付きで返る
+            And:   2件目の検証エラーが位置付きで返る
+    """
+
+    def test_add_entries_bulk_json(self, client):
+        items = [self.bulk_entry(1), self.bulk_entry(2), self.bulk_entry(3)]
+        items[1]["mood_score"] = 9
+        response = client.post("/entries/bulk", json=items)
+        assert response.status_code == 200
+        resp_json = response.json()
+        assert resp_json["status"] == "partial"
+        assert resp_json["inserted"] == [
+            {"index": 0, "id": "bulk_2025-08-01"},
+            {"index": 2, "id": "bulk_2025-08-03"},
+        ]
+        assert len(resp_json["errors"]) == 1
+        assert resp_json["errors"][0]["index"] == 1
+        assert resp_json["errors"][0]["errors"][0]["loc"] == ["mood_score"]
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: NDJSONで受け取り、JSONとして壊れた行はその行だけエラーになる
+            Given: 実行可能なAPIクライアントがある
+            When:  2行目が壊れた3行のNDJSONを'/entries/bulk'にPOSTする
+            Then:  レスポンスのステータスコードは200である
+            And:   2件が登録され、2行目はjson_invalidのエラーになる
+    """
+
+    def test_add_entries_bulk_ndjson(self, client):
+        import json
+        body = "\n".join([
+            json.dumps(self.bulk_entry(1)),
+            "{broken",
+            json.dumps(self.bulk_entry(3)),
+        ])
+        response = client.post(
+            "/entries/bulk", content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        resp_json = response.json()
+        assert [item["index"] for item in resp_json["inserted"]] == [0, 2]
+        assert resp_json["errors"][0]["index"] == 1
+        assert resp_json["errors"][0]["errors"][0]["type"] == "json_invalid"
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: 設定した件数ごとに分割してbulk_writeする
+            Given: チャンクサイズ2の設定でAPIクライアントがある
+            When:  5件のJSON配列を'/entries/bulk'にPOSTする
+            Then:  bulk_writeが2件・2件・1件の3回呼ばれる
+            And:   レスポンスボディのキー'status'のバリューが'success'である
+    """
+
+    def test_add_entries_bulk_chunked(self, client, monkeypatch):
+        import app.routes
+        from app.config import BulkSettings
+        monkeypatch.setattr(
+            app.routes, "bulk_settings", BulkSettings(chunk_size=2))
+        items = [self.bulk_entry(day) for day in range(1, 6)]
+        response = client.post("/entries/bulk", json=items)
+        assert response.status_code == 200
+        assert response.json()["status"] == "success"
+        assert self.bulk_write_calls == [2, 2, 1]
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: 書き込みに失敗したエントリーは位置ごとのエラーとして返す
+            Given: 1件目の書き込みが失敗するAPIクライアントがある
+            When:  2件のJSON配列を'/entries/bulk'にPOSTする
+            Then:  1件目はwrite_errorのエラー、2件目は登録成功として返る
+    """
+
+    def test_add_entries_bulk_write_error(self):
+        client = self._create_client("write_error")
+        items = [self.bulk_entry(1), self.bulk_entry(2)]
+        response = client.post("/entries/bulk", json=items)
+        assert response.status_code == 200
+        resp_json = response.json()
+        assert resp_json["status"] == "partial"
+        assert resp_json["errors"][0]["index"] == 0
+        assert resp_json["errors"][0]["errors"][0]["type"] == "write_error"
+        assert resp_json["inserted"] == [{"index": 1, "id": "bulk_2025-08-02"}]
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: 同じ記録日の既存エントリーは置き換えとして返す
+            Given: すべての記録日に既存エントリーがあるAPIクライアントがある
+            When:  2件のJSON配列を'/entries/bulk'にPOSTする
+            Then:  2件とも既存エントリーのIDで'updated'に返る
+    """
+
+    def test_add_entries_bulk_existing(self):
+        client = self._create_client("existing")
+        items = [self.bulk_entry(1), self.bulk_entry(2)]
+        response = client.post("/entries/bulk", json=items)
+        assert response.status_code == 200
+        resp_json = response.json()
+        assert resp_json["status"] == "success"
+        assert resp_json["inserted"] == []
+        assert resp_json["updated"] == [
+            {"index": 0, "id": "existing_2025-08-01"},
+            {"index": 1, "id": "existing_2025-08-02"},
+        ]
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: リクエスト内で記録日が重複する場合は最後のエントリーを採用する
+            Given: 実行可能なAPIクライアントがある
+            When:  1件目と3件目の記録日が同じ3件のJSON配列を'/entries/bulk'にPOSTする
+            Then:  1件目はduplicate_record_dateのエラーになる
+            And:   2件目と3件目が登録される
+    """
+
+    def test_add_entries_bulk_duplicate_date(self, client):
+        items = [self.bulk_entry(1), self.bulk_entry(2), self.bulk_entry(1)]
+        response = client.post("/entries/bulk", json=items)
+        assert response.status_code == 200
+        resp_json = response.json()
+        assert [item["index"] for item in resp_json["inserted"]] == [1, 2]
+        assert resp_json["errors"][0]["index"] == 0
+        assert resp_json["errors"][0]["errors"][0]["type"] == "duplicate_record_date"
+        assert self.bulk_write_calls == [2]
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: JSON配列でないボディは400エラーとなる
+            Given: 実行可能なAPIクライアントがある
+            When:  JSONオブジェクトを'/entries/bulk'にPOSTする
+            Then:  レスポンスのステータスコードは400である
+    """
+
+    def test_add_entries_bulk_not_array(self, client):
+        response = client.post("/entries/bulk", json=self.bulk_entry(1))
+        assert response.status_code == 400
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: UTF-8として不正なバイト列を含むボディは形式によらず400エラーとなる
+            Given: 実行可能なAPIクライアントがある
+            When:  不正なバイト列をメモに含むJSON配列とNDJSONを'/entries/bulk'にPOSTする
+            Then:  どちらもレスポンスのステータスコードは400で、書き込まれない
+    """
+
+    def test_add_entries_bulk_invalid_utf8(self, client):
+        import json
+        entry = {**self.bulk_entry(1), "memo": "MEMO"}
+        body = json.dumps([entry]).encode().replace(b"MEMO", b"\xff")
+        line = json.dumps(entry).encode().replace(b"MEMO", b"\xff")
+        for content, content_type in ((body, "application/json"),
+                                      (line, "application/x-ndjson")):
+            response = client.post(
+                "/entries/bulk", content=content, headers={"Content-Type": content_type})
+            assert response.status_code == 400
+            assert response.json()["detail"] == "request body must be UTF-8"
+        assert self.bulk_write_calls == []
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: ボディが上限のバイト数を超える場合は413エラーとなる
+            Given: ボディの上限が100バイトの設定でAPIクライアントがある
+            When:  Content-Lengthのある大きなボディと、Content-Lengthのない分割されたボディをPOSTする
+            Then:  どちらもレスポンスのステータスコードは413である
+            And:   分割されたボディは上限を超えた時点で読み込みをやめる
+    """
+
+    def test_add_entries_bulk_too_large(self, client, monkeypatch):
+        import json
+        import app.routes
+        from app.config import BulkSettings
+        monkeypatch.setattr(
+            app.routes, "bulk_settings", BulkSettings(max_bytes=100))
+        items = [self.bulk_entry(day) for day in range(1, 6)]
+        response = client.post("/entries/bulk", json=items)
+        assert response.status_code == 413
+        assert "max 100 bytes" in response.json()["detail"]
+
+        def chunks():
+            for item in items:
+                yield json.dumps(item).encode() + b"\n"
+
+        response = client.post(
+            "/entries/bulk", content=chunks(),
+            headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 413
+        assert self.bulk_write_calls == []
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: 上限のバイト数を超えた時点でボディの読み込みをやめる
+            Given: 60バイトずつ5回に分けて届くボディがある
+            When:  上限100バイトで読み込む
+            Then:  2回目を読み込んだ時点でBulkBodyTooLargeErrorが送出され、残りは読み込まない
+            And:   Content-Lengthが上限を超える場合は1回も読み込まない
+    """
+
+    def test_read_bulk_body_stops_at_limit(self):
+        import asyncio
+        from app.bulk import BulkBodyTooLargeError, read_bulk_body
+        received = []
+
+        async def chunks():
+            for index in range(5):
+                received.append(index)
+                yield b"x" * 60
+
+        for content_length, expected in ((None, [0, 1]), ("300", [])):
+            received.clear()
+            with pytest.raises(BulkBodyTooLargeError):
+                asyncio.run(read_bulk_body(chunks(), 100, content_length))
+            assert received == expected
+        assert asyncio.run(read_bulk_body(chunks(), 300)) == b"x" * 300
+
+    """
+    Feature: エントリー一括登録API
+        Scenario: データベースエラーが発生した場合は500エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  '/entries/bulk'にPOSTする（DB接続エラー）
+            Then:  レスポンスのステータスコードは500である
+            And:   それまでのチャンクが書き込まれている可能性があるため、予測モデルは次回の予測時に作り直す
+    """
+
+    def test_add_entries_bulk_database_error(self):
+        client = self._create_client("error")
+        predictor = self.fit_predictor()
+        response = client.post("/entries/bulk", json=[self.bulk_entry(1)])
+        assert response.status_code == 500
+        assert "failed to insert entries" in response.json()["detail"]
+        assert predictor.needs_refit(self.USER_ID)
+
+    # ヘルスチェックAPIのテスト
+    """
+    Feature: ヘルスチェックAPI
+        Scenario: DBに接続できる場合は/healthz・/readyzとも200を返し、pingはキャッシュされる
+            Given: DBへのpingに成功するAPIクライアントがある
+            When:  '/healthz'と'/readyz'に2回ずつGETリクエストを実行する
+            Then:  レスポンスのステータスコードはすべて200である
+            And:   レスポンスの'status'は'ok'で、DBへのpingは1回だけ実行される
+    """
+
+    def test_health_ok(self, client):
+        for path in ("/healthz", "/readyz", "/healthz", "/readyz"):
+            response = client.get(path, headers={"Authorization": ""})
+            assert response.status_code == 200
+            assert response.json()["status"] == "ok"
+            assert response.json()["database"] is True
+        assert self.pings == 1
+
+    """
+    Feature: ヘルスチェックAPI
+        Scenario: DBに接続できない場合は/readyzだけが503を返す
+            Given: DBへのpingに失敗するAPIクライアントがある
+            When:  '/healthz'と'/readyz'にGETリクエストを実行する
+            Then:  '/healthz'は200、'/readyz'は503を返す
+            And:   どちらも'status'は'unavailable'である
+    """
+
+    def test_health_db_error(self):
+        client = self._create_client("error")
+        liveness = client.get("/healthz")
+        readiness = client.get("/readyz")
+        assert liveness.status_code == 200
+        assert readiness.status_code == 503
+        assert liveness.json()["status"] == readiness.json()["status"] == "unavailable"
+        assert self.pings == 1
+
+    """
+    Feature: トークン認証
+        Scenario: トークンがない場合は401エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  Authorizationヘッダーなしで'/entries'にGETする
+            Then:  レスポンスのステータスコードは401である
+            And:   WWW-AuthenticateヘッダーでBearer認証を要求している
+    """
+
+    def test_missing_token(self, client):
+        response = client.get("/entries", headers={"Authorization": ""})
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+    """
+    Feature: トークン認証
+        Scenario: 登録されていないトークンは401エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  未登録のトークンで'/entries'にGETする
+            Then:  レスポンスのステータスコードは401である
+            And:   トークンそのものではなくハッシュ値でユーザーを検索している
+    """
+
+    def test_invalid_token(self, client):
+        response = client.get(
+            "/entries", headers={"Authorization": "Bearer unknown"})
+        assert response.status_code == 401
+        assert len(self.user_lookups) == 1
+        assert "unknown" not in str(self.user_lookups[0])
+
+    """
+    Feature: トークン認証
+        Scenario: 検証済みのトークンはDBに問い合わせずに認証する
+            Given: 実行可能なAPIクライアントがある
+            When:  DBに登録されたトークンで'/entries'に2回GETする
+            Then:  ユーザーの検索は1回目だけ行われる
+            And:   エントリーの検索はトークンのユーザーに限定されている
+    """
+
+    def test_token_verification_cached(self, client):
+        headers = {"Authorization": f"Bearer {self.OTHER_TOKEN}"}
+        assert client.get("/entries", headers=headers).status_code == 200
+        assert client.get("/entries?limit=1", headers=headers).status_code == 200
+        assert len(self.user_lookups) == 1
+        query, _ = self.last_find
+        assert query == {"user_id": self.OTHER_USER_ID}
+
+    """
+    Feature: ユーザー登録API
+        Scenario: ユーザーを登録してAPIトークンを発行する
+            Given: 実行可能なAPIクライアントがある
+            When:  '/users'にPOSTする
+            Then:  ユーザーIDとトークンを返す
+            And:   DBにはトークンのハッシュ値だけを保存している
+            And:   発行したトークンはDBに問い合わせずに使える
+    """
+
+    def test_create_user(self, client):
+        response = client.post("/users", json={"name": "yusei"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["user_id"] == "new_user_id"
+        assert data["name"] == "yusei"
+        assert data["token"] not in str(self.last_insert)
+        assert self.last_insert["name"] == "yusei"
+
+        response = client.get(
+            "/entries", headers={"Authorization": f"Bearer {data['token']}"})
+        assert response.status_code == 200
+        assert self.user_lookups == []
+        query, _ = self.last_find
+        assert query == {"user_id": "new_user_id"}
+
+    """
+    Feature: ユーザー登録API
+        Scenario: ユーザー名が空の場合は422エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  空のユーザー名で'/users'にPOSTする
+            Then:  レスポンスのステータスコードは422である
+    """
+
+    def test_create_user_empty_name(self, client):
+        response = client.post("/users", json={"name": ""})
+        assert response.status_code == 422
+
+    """
+    Feature: 読み出しレスポンスのキャッシュ
+        Scenario: 同じクエリの2回目以降はDBを検索せずキャッシュから返す
+            Given: 一度'/entries'にGETしたAPIクライアントがある
+            When:  同じクエリパラメータ（順序違い）で再度GETする
+            Then:  DBを検索せず、1回目と同じ本文・ETagを返す
+            And:   別のクエリパラメータではDBを検索する
+    """
+
+    def test_get_entries_cached(self, client):
+        first = client.get("/entries?limit=10&from=2025-08-01")
+        self.last_find = None
+        second = client.get("/entries?from=2025-08-01&limit=10")
+        assert second.status_code == 200
+        assert self.last_find is None
+        assert second.content == first.content
+        assert second.headers["etag"] == first.headers["etag"]
+
+        client.get("/entries?limit=20&from=2025-08-01")
+        assert self.last_find is not None
+
+    """
+    Feature: 読み出しレスポンスのキャッシュ
+        Scenario: 他のユーザーのキャッシュは使わない
+            Given: あるユーザーが'/entries'にGETしたAPIクライアントがある
+            When:  別のユーザーが同じクエリで'/entries'にGETする
+            Then:  別のユーザーの条件でDBを検索する
+    """
+
+    def test_get_entries_cache_per_user(self, client):
+        client.get("/entries")
+        self.last_find = None
+        client.get("/entries", headers={"Authorization": f"Bearer {self.OTHER_TOKEN}"})
+        query, _ = self.last_find
+        assert query == {"user_id": self.OTHER_USER_ID}
+
+    """
+    Feature: 読み出しレスポンスのキャッシュ
+        Scenario: 複数のプロセスで動かす場合は、他のプロセスの書き込みでキャッシュを破棄する
+            Given: 書き込みの確認を有効にして、一度'/entries'にGETしたAPIクライアントがある
+            When:  同じクエリで再度GETする
+            Then:  ユーザーの書き込み回数だけを確認し、キャッシュから返す
+            And:   他のプロセスが書き込んで書き込み回数が進むと、キャッシュを破棄してDBを検索する
+    """
+
+    def test_get_entries_cache_invalidated_by_other_process(self):
+        import app.main
+        from app.changes import ChangeTracker
+        client = self._create_client("many")
+        app.main.app.state.change_tracker = ChangeTracker()
+        first = client.get("/entries")
+        self.last_find = None
+        second = client.get("/entries")
+        assert second.content == first.content
+        assert self.last_find is None
+
+        # 他のプロセスの書き込み（書き込み時刻によらず、書き込み回数が1進む）
+        self.versions[self.USER_ID] = self.versions.get(self.USER_ID, 0) + 1
+        client.get("/entries")
+        assert self.last_find is not None
+        stats = client.get("/cache/stats").json()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+
+    """
+    Feature: 読み出しレスポンスのキャッシュ
+        Scenario: 複数のプロセスで動かす場合も、自分の書き込みの後は予測モデルを作り直さない
+            Given: 書き込みの確認を有効にして、一度'/predict'にGETしたAPIクライアントがある（エントリー3件）
+            When:  翌日のエントリーを'/entries'にPOSTしてから再度'/predict'にGETする
+            Then:  書き込み回数が進むが、自分の書き込みだけのため履歴を読み直さずに増分更新した予測を返す
+            And:   その後に他のプロセスが書き込むと、次の予測で全履歴から作り直す
+    """
+
+    def test_own_write_keeps_predictor(self, dummy_entry):
+        import app.main
+        from app.changes import ChangeTracker
+        client = self._create_client("many")
+        app.main.app.state.change_tracker = ChangeTracker()
+        client.get("/predict")
+        payload = dummy_entry.model_dump(mode="json", exclude={"id"})
+        payload["record_date"] = "2025-08-15"
+        assert client.post("/entries", json=payload).status_code == 200
+        assert self.versions[self.USER_ID] == 1
+
+        self.last_find = None
+        response = client.get("/predict")
+        assert self.last_find is None
+        assert response.json()["sample_count"] == 3
+
+        self.versions[self.USER_ID] += 1
+        client.get("/predict")
+        query, kwargs = self.last_find
+        assert kwargs["sort"] == [("record_date", 1)]
+
+    """
+    Feature: 読み出しレスポンスのキャッシュ
+        Scenario: If-None-MatchがETagに一致する場合は304を返す
+            Given: 一度'/entries'にGETしてETagを受け取ったAPIクライアントがある
+            When:  If-None-MatchにETagを指定して再度GETする
+            Then:  レスポンスのステータスコードは304で本文は空である
+    """
+
+    def test_get_entries_not_modified(self, client):
+        etag = client.get("/entries").headers["etag"]
+        response = client.get("/entries", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    """
+    Feature: レスポンスの圧縮
+        Scenario: キャッシュしたレスポンスは圧縮済みの本文を再利用して返す
+            Given: 閾値0でgzipを使う設定のAPIクライアントがある
+            When:  Accept-Encoding: gzipで'/entries'に2回GETし、弱いETagで再検証する
+            Then:  どちらもContent-Encoding: gzipで同じ圧縮済みの本文が返る
+            And:   圧縮済みの本文がキャッシュに保存され、再検証には304が返る
+    """
+
+    def test_get_entries_compressed(self, client, monkeypatch):
+        import app.main
+        import app.routes
+        from app.compression import ResponseCompressor
+        monkeypatch.setattr(app.routes, "response_compressor",
+                            ResponseCompressor(("gzip",), minimum_size=0))
+        headers = {"Accept-Encoding": "gzip"}
+        first = client.get("/entries", headers=headers)
+        second = client.get("/entries", headers=headers)
+
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.headers["vary"] == "Accept-Encoding"
+        assert first.headers["etag"].startswith('W/"')
+        assert second.headers["content-length"] == first.headers["content-length"]
+        assert second.json() == first.json()
+        (entry,) = app.main.app.state.response_cache._entries.values()
+        assert set(entry.encoded) == {"gzip"}
+
+        revalidated = client.get(
+            "/entries", headers={**headers, "If-None-Match": first.headers["etag"]})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == first.headers["etag"]
+
+    """
+    Feature: 読み出しレスポンスのキャッシュ
+        Scenario: エントリーの登録でキャッシュが無効化される
+            Given: '/entries'と'/entries/stats'のレスポンスがキャッシュされている
+            When:  '/entries'にPOSTしてから再度GETする
+            Then:  いずれもDBを検索し直す
+            And:   '/cache/stats'でヒット・ミス・無効化の件数を取得できる
+    """
+
+    def test_cache_invalidated_by_add_entry(self, client, dummy_entry):
+        client.get("/entries")
+        client.get("/entries/stats")
+        client.get("/entries")
+        self.last_find = None
+        self.last_aggregate = None
+        payload = dummy_entry.model_dump(mode="json", exclude={"id"})
+        assert client.post("/entries", json=payload).status_code == 200
+
+        client.get("/entries")
+        client.get("/entries/stats")
+        assert self.last_find is not None
+        assert self.last_aggregate is not None
+        stats = client.get("/cache/stats").json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 4
+        assert stats["invalidations"] == 2
+        assert stats["entries"] == 2
+        assert 0 < stats["bytes"] <= stats["max_bytes"]
+
+    """
+    Feature: 時系列集計API
+        Scenario: 区間ごとの統計をMongoDBの集計結果から返す
+            Given: 実行可能なAPIクライアントがある
+            When:  bucket=weekと日付範囲を指定して'/entries/stats'にGETする
+            Then:  レスポンスのステータスコードは200である
+            And:   集計パイプラインの先頭でユーザーと日付範囲を絞り込んでいる
+            And:   区間ごとの件数・平均・最小・最大・相関係数と期間全体の集計を返す
+    """
+
+    def test_get_entries_stats(self, client):
+        response = client.get(
+            "/entries/stats",
+            params={"bucket": "week", "from": "2025-08-01", "to": "2025-08-31"})
+        assert response.status_code == 200
+        assert self.last_aggregate[0] == {"$match": {
+            "user_id": self.USER_ID,
+            "record_date": {"$gte": "2025-08-01", "$lte": "2025-08-31"}}}
+        data = response.json()
+        assert data["bucket"] == "week"
+        bucket = {
+            "count": 2,
+            "mood_score": {"mean": 3.0, "min": 2.0, "max": 4.0},
+            "sleep_hours": {"mean": 6.0, "min": 5.0, "max": 7.0},
+            "correlation": 1.0,
+        }
+        assert data["buckets"] == [{**bucket, "start": "2025-08-11"}]
+        assert data["total"] == bucket
+
+    """
+    Feature: 時系列集計API
+        Scenario: 記録がない場合は空の集計を返す
+            Given: 実行可能なAPIクライアントがある（エントリー0件）
+            When:  '/entries/stats'にGETする
+            Then:  bucketsは空、totalはnullである
+    """
+
+    def test_get_entries_stats_empty(self):
+        client = self._create_client("empty")
+        response = client.get("/entries/stats")
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "success", "bucket": "day", "buckets": [], "total": None}
+
+    """
+    Feature: 時系列集計API
+        Scenario: 未対応の集計単位は422エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  bucket=yearを指定して'/entries/stats'にGETする
+            Then:  レスポンスのステータスコードは422である
+    """
+
+    def test_get_entries_stats_invalid_bucket(self, client):
+        response = client.get("/entries/stats", params={"bucket": "year"})
+        assert response.status_code == 422
+
+    """
+    Feature: 時系列集計API
+        Scenario: データベースエラーが発生した場合は500エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  '/entries/stats'にGETする（DB接続エラー）
+            Then:  レスポンスのステータスコードは500である
+    """
+
+    def test_get_entries_stats_database_error(self):
+        client = self._create_client("error")
+        response = client.get("/entries/stats")
+        assert response.status_code == 500
+        assert "failed to aggregate entries" in response.json()["detail"]
+
+    """
+    Feature: メモ検索API
+        Scenario: メモに検索語を含むエントリーを返す
+            Given: 実行可能なAPIクライアントがある（メモが「今日はよく眠れた」のエントリー3件）
+            When:  '/entries/search?q=眠れ&limit=2'にGETする
+            Then:  レスポンスのステータスコードは200である
+            And:   DBには認証したユーザーと検索語の文字n-gramを条件に問い合わせている
+            And:   記録日の新しい順に2件とスコアが返り、次ページのカーソルで残りの1件を取得できる
+    """
+
+    def test_search_entries(self):
+        client = self._create_client("many")
+        response = client.get("/entries/search", params={"q": "眠れ", "limit": 2})
+        assert response.status_code == 200
+        query, kwargs = self.last_find
+        assert query == {"user_id": self.USER_ID, "memo_terms": {"$all": ["眠れ"]}}
+        body = response.json()
+        assert [result["entry"]["id"] for result in body["results"]] == ["id_14", "id_13"]
+        assert [result["score"] for result in body["results"]] == [1, 1]
+        assert body["results"][0]["entry"]["memo"] == "今日はよく眠れた"
+
+        response = client.get("/entries/search", params={
+            "q": "眠れ", "limit": 2, "cursor": body["next_cursor"]})
+        body = response.json()
+        assert [result["entry"]["id"] for result in body["results"]] == ["id_12"]
+        assert body["next_cursor"] is None
+
+    """
+    Feature: メモ検索API
+        Scenario: n-gramが一致しても語として含まないメモは返さない
+            Given: 実行可能なAPIクライアントがある（メモが「今日はよく眠れた」のエントリー）
+            When:  '/entries/search?q=眠た'にGETする
+            Then:  レスポンスのステータスコードは200である
+            And:   結果は空である
+    """
+
+    def test_search_entries_no_match(self, client):
+        response = client.get("/entries/search", params={"q": "眠た"})
+        assert response.status_code == 200
+        assert response.json() == {"status": "success", "results": [], "next_cursor": None}
+
+    """
+    Feature: メモ検索API
+        Scenario: 検索語が空白だけ、またはカーソルが不正な場合は400エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  空白だけの検索語、または不正なカーソルで'/entries/search'にGETする
+            Then:  レスポンスのステータスコードは400である
+    """
+
+    def test_search_entries_invalid(self, client):
+        assert client.get("/entries/search", params={"q": "　"}).status_code == 400
+        response = client.get("/entries/search", params={"q": "眠", "cursor": "invalid"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "invalid cursor"
+
+    """
+    Feature: メモ検索API
+        Scenario: エントリーの追加時にメモの検索語も保存する
+            Given: 実行可能なAPIクライアントがある
+            When:  メモが「今日はよく眠れた」のエントリーを'/entries'にPOSTする
+            Then:  保存するドキュメントにメモの1〜2文字のn-gramが含まれる
+    """
+
+    def test_add_entry_memo_terms(self, client, dummy_entry):
+        response = client.post("/entries", json=dummy_entry.model_dump(mode="json"))
+        assert response.status_code == 200
+        _, replacement, _ = self.last_replace
+        assert {"眠", "眠れ", "今日", "た"} <= set(replacement["memo_terms"])
+
+    """
+    Feature: 気分スコア予測API
+        Scenario: 記録がない場合は予測値がnullになる
+            Given: 実行可能なAPIクライアントがある（エントリー0件）
+            When:  '/predict'にGETする
+            Then:  レスポンスのステータスコードは200である
+            And:   predicted_mood_scoreとlast_record_dateはnull、sample_countは0である
+    """
+
+    def test_predict_empty(self):
+        client = self._create_client("empty")
+        response = client.get("/predict")
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "success",
+            "predicted_mood_score": None,
+            "sample_count": 0,
+            "last_record_date": None,
+        }
+
+    """
+    Feature: 気分スコア予測API
+        Scenario: 初回の予測時に全履歴を記録日の昇順で1回だけ読み込む
+            Given: 実行可能なAPIクライアントがある（エントリー3件）
+            When:  '/predict'にGETする
+            Then:  そのユーザーの記録を記録日の昇順・必要な項目だけを指定して検索している
+            And:   最新の記録日と学習サンプル数（記録件数-1）を返す
+            And:   学習サンプル不足のため直近の平均が予測値になる
+    """
+
+    def test_predict_fits_history(self):
+        client = self._create_client("many")
+        response = client.get("/predict")
+        assert response.status_code == 200
+        query, kwargs = self.last_find
+        assert query == {"user_id": self.USER_ID}
+        assert kwargs["sort"] == [("record_date", 1)]
+        assert set(kwargs["projection"]) == {
+            "_id", "record_date", "mood_score", "sleep_hours"}
+        data = response.json()
+        assert data["last_record_date"] == "2025-08-14"
+        assert data["sample_count"] == 2
+        assert data["predicted_mood_score"] == pytest.approx(4.0)
+
+    """
+    Feature: 気分スコア予測API
+        Scenario: 予測後に新しい日付のエントリーを登録すると履歴を読み直さずに更新される
+            Given: 一度'/predict'にGETしたAPIクライアントがある（エントリー3件）
+            When:  翌日のエントリーを'/entries'にPOSTしてから再度'/predict'にGETする
+            Then:  2回目の予測ではDBを検索しない
+            And:   最新の記録日と学習サンプル数が登録分だけ進んでいる
+    """
+
+    def test_predict_incremental_after_add_entry(self, dummy_entry):
+        client = self._create_client("many")
+        client.get("/predict")
+        self.last_find = None
+        payload = dummy_entry.model_dump(mode="json", exclude={"id"})
+        payload["record_date"] = "2025-08-15"
+        assert client.post("/entries", json=payload).status_code == 200
+
+        response = client.get("/predict")
+        assert response.status_code == 200
+        assert self.last_find is None
+        data = response.json()
+        assert data["last_record_date"] == "2025-08-15"
+        assert data["sample_count"] == 3
+
+    """
+    Feature: 気分スコア予測API
+        Scenario: データベースエラーが発生した場合は500エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  '/predict'にGETする（DB接続エラー）
+            Then:  レスポンスのステータスコードは500である
+    """
+
+    def test_predict_database_error(self):
+        client = self._create_client("error")
+        response = client.get("/predict")
+        assert response.status_code == 500
+        assert "failed to predict mood" in response.json()["detail"]
+
+    """
+    Feature: 分析結果API
+        Scenario: 全履歴から曜日ごとの傾向・睡眠負債・移動平均・外れ値を返す
+            Given: 実行可能なAPIクライアントがある（エントリー3件）
+            When:  '/insights'にGETする
+            Then:  そのユーザーの記録を記録日の昇順・必要な項目だけを指定して検索している
+            And:   記録件数・曜日ごとの傾向・移動平均を返す
+    """
+
+    def test_get_insights(self):
+        client = self._create_client("many")
+        response = client.get("/insights", params={"window": 2})
+        assert response.status_code == 200
+        query, kwargs = self.last_find
+        assert query == {"user_id": self.USER_ID}
+        assert kwargs["sort"] == [("record_date", 1)]
+        data = response.json()
+        assert data["count"] == 3
+        assert [effect["count"] for effect in data["weekdays"]] == [0, 1, 1, 1, 0, 0, 0]
+        assert data["moving_averages"]["record_dates"] == [
+            "2025-08-12", "2025-08-13", "2025-08-14"]
+        assert data["moving_averages"]["mood_score"] == [4.0, 4.0, 4.0]
+        assert data["sleep_debt"]["current_streak"]["days"] == 3
+        assert data["anomalies"] == []
+
+    """
+    Feature: 分析結果API
+        Scenario: 書き込みがなければ計算済みの結果を返す
+            Given: 一度'/insights'にGETした単一プロセスのAPIクライアントがある
+            When:  同じパラメーターで再度GETする
+            Then:  DBに問い合わせずに同じ結果を返す
+            And:   パラメーターが異なる場合は計算し直す
+            And:   エントリーを書き込んだ後は計算し直し、書き込み回数は読み書きしない
+    """
+
+    def test_get_insights_memoized(self, dummy_entry):
+        import app.main
+        client = self._create_client("many")
+        first = client.get("/insights")
+        self.last_find = None
+        second = client.get("/insights")
+        assert second.content == first.content
+        assert self.last_find is None
+        memo = app.main.app.state.insights_memo
+        assert (memo.hits, memo.misses) == (1, 1)
+
+        client.get("/insights", params={"sleep_target": 6})
+        _, kwargs = self.last_find
+        assert kwargs["sort"] == [("record_date", 1)]
+
+        entry_dict = dummy_entry.model_dump(mode="json", exclude={"id"})
+        assert client.post("/entries", json=entry_dict).status_code == 200
+        self.last_find = None
+        client.get("/insights")
+        assert self.last_find is not None
+        assert (self.versions, self.version_reads) == ({}, 0)
+
+    """
+    Feature: 分析結果API
+        Scenario: 他のプロセスの書き込み時刻が前回の最新以前でも計算し直す
+            Given: 一度'/insights'にGETした、複数プロセスで動かすAPIクライアントがある
+            When:  時計の遅れた他のプロセスが、前回の最新以前の書き込み時刻でエントリーを書き込む
+            Then:  書き込み回数が進むため、次のGETで履歴を読み直す
+            And:   書き込みがなければ書き込み回数だけを確認して計算済みの結果を返す
+    """
+
+    def test_get_insights_invalidated_by_other_process(self):
+        import app.main
+        from app.changes import ChangeTracker
+        client = self._create_client("many")
+        app.main.app.state.change_tracker = ChangeTracker()
+        client.get("/insights")
+        self.last_find = None
+        client.get("/insights")
+        assert self.last_find is None
+        assert self.version_reads == 2
+
+        # 他のプロセスの書き込み（書き込み時刻は見ずに書き込み回数だけで判定する）
+        self.versions[self.USER_ID] = self.versions.get(self.USER_ID, 0) + 1
+        client.get("/insights")
+        _, kwargs = self.last_find
+        assert kwargs["sort"] == [("record_date", 1)]
+        memo = app.main.app.state.insights_memo
+        assert (memo.hits, memo.misses) == (1, 2)
+
+    """
+    Feature: 分析結果API
+        Scenario: 不正なパラメーターの場合は422エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  windowに1、sleep_targetに0を指定して'/insights'にGETする
+            Then:  レスポンスのステータスコードは422である
+        Scenario: データベースエラーが発生した場合は500エラーを返す
+            Given: 実行可能なAPIクライアントがある
+            When:  '/insights'にGETする（DB接続エラー）
+            Then:  レスポンスのステータスコードは500である
+    """
+
+    def test_get_insights_errors(self, client):
+        assert client.get("/insights", params={"window": 1}).status_code == 422
+        assert client.get("/insights", params={"sleep_target": 0}).status_code == 422
+
+        client = self._create_client("error")
+        response = client.get("/insights")
+        assert response.status_code == 500
+        assert "failed to compute insights" in response.json()["detail"]
 
 class TestAppStartup:
     def test_app_ci_env(self, monkeypatch):
@@ -0,0 +1,191 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from app.db import AsyncCollection, DatabaseExecutor
+from app.metrics import Histogram, MetricsMiddleware, MetricsRegistry, PoolMetricsListener
+
+"""
+リクエスト・DB操作の計測をテストするためのクラス
+"""
+
+
+def create_app(registry, slow_request_seconds=None):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return Response(content=b"x" * 10)
+
+    @app.get("/error")
+    async def error():
+        raise RuntimeError("boom")
+
+    app.add_middleware(
+        MetricsMiddleware, registry=registry,
+        slow_request_seconds=slow_request_seconds)
+    return app
+
+
+class TestHistogram:
+    """
+    Feature: ヒストグラム
+        Scenario: 区切りと等しい値はその区切り（le）の区間に数えられる
+            Given: 区切りが1, 2のヒストグラムがある
+            When:  1, 1.5, 3を記録する
+            Then:  累積件数はle=1が1件、le=2が2件、+Infが3件になる
+            And:   合計と件数が記録される
+    """
+
+    def test_cumulative(self):
+        histogram = Histogram((1, 2))
+        for value in (1, 1.5, 3):
+            histogram.observe(value)
+        assert histogram.cumulative() == [("1", 1), ("2", 2), ("+Inf", 3)]
+        assert histogram.sum == 5.5
+        assert histogram.count == 3
+
+
+class TestMetricsMiddleware:
+    """
+    Feature: リクエストの計測
+        Scenario: パスではなくルートのテンプレートごとに集計する
+            Given: 計測ミドルウェアを設定したアプリがある
+            When:  異なるパスパラメータで2回リクエストする
+            Then:  ルートのテンプレートで2件として集計される
+            And:   レスポンスサイズが記録され、処理中の件数は0に戻る
+    """
+
+    def test_route_template(self):
+        registry = MetricsRegistry()
+        client = TestClient(create_app(registry))
+        client.get("/items/a")
+        client.get("/items/b")
+
+        assert registry.request_latency[("GET", "/items/{item_id}", "200")].count == 2
+        assert registry.response_size[("GET", "/items/{item_id}")].sum == 20
+        assert registry.in_flight == 0
+        text = registry.render()
+        assert ('http_request_duration_seconds_count'
+                '{method="GET",route="/items/{item_id}",status="200"} 2') in text
+        assert "http_requests_in_flight 0" in text
+
+    """
+    Feature: リクエストの計測
+        Scenario: ルートに一致しない・例外で終わったリクエストも数える
+            Given: 計測ミドルウェアを設定したアプリがある
+            When:  存在しないパスと、例外を送出するパスにリクエストする
+            Then:  unmatchedの404と、ルートの500として集計される
+    """
+
+    def test_unmatched_and_error(self):
+        registry = MetricsRegistry()
+        client = TestClient(create_app(registry), raise_server_exceptions=False)
+        client.get("/missing")
+        client.get("/error")
+
+        assert registry.request_latency[("GET", "unmatched", "404")].count == 1
+        assert registry.request_latency[("GET", "/error", "500")].count == 1
+        assert registry.in_flight == 0
+
+    """
+    Feature: リクエストの計測
+        Scenario: 既知でないHTTPメソッドはOTHERにまとめて集計する
+            Given: 計測ミドルウェアを設定したアプリがある
+            When:  GETと、任意の名前のメソッド2種類でリクエストする
+            Then:  GETはそのまま、任意のメソッドはOTHERの1系列として集計される
+    """
+
+    def test_unknown_method(self):
+        registry = MetricsRegistry()
+        client = TestClient(create_app(registry))
+        client.get("/items/a")
+        client.request("PROPFIND", "/items/a")
+        client.request("X-RANDOM-1", "/items/a")
+
+        assert {method for method, _, _ in registry.request_latency} == {"GET", "OTHER"}
+        assert sum(histogram.count for (method, _, _), histogram
+                   in registry.request_latency.items() if method == "OTHER") == 2
+
+    """
+    Feature: 遅いリクエストのログ
+        Scenario: しきい値以上かかったリクエストだけを警告ログに出力する
+            Given: しきい値0秒と無効（None）の2つのアプリがある
+            When:  それぞれにリクエストする
+            Then:  しきい値0秒のアプリだけが警告ログを出力する
+    """
+
+    def test_slow_request_log(self, caplog):
+        with caplog.at_level(logging.WARNING, logger="app.metrics"):
+            TestClient(create_app(MetricsRegistry())).get("/items/a")
+            assert not caplog.records
+            TestClient(create_app(MetricsRegistry(), 0.0)).get("/items/a")
+        assert len(caplog.records) == 1
+        assert "slow request: GET /items/a status=200" in caplog.text
+
+
+class TestMongoMetrics:
+    """
+    Feature: DB操作の計測
+        Scenario: AsyncCollection経由の操作の所要時間がコレクション・操作ごとに記録される
+            Given: 計測を有効にしたDatabaseExecutorがある
+            When:  findとinsert_oneを実行する
+            Then:  それぞれの操作が1件ずつ記録される
+    """
+
+    @pytest.mark.asyncio
+    async def test_operation_timings(self):
+        class Collection:
+            name = "entries"
+
+            def find(self, filter, **kwargs):
+                return iter([{"_id": 1}])
+
+            def insert_one(self, document):
+                return "inserted"
+
+        registry = MetricsRegistry()
+        executor = DatabaseExecutor(max_workers=1, timeout=1, metrics=registry)
+        try:
+            collection = AsyncCollection(Collection(), executor)
+            assert await collection.find({}) == [{"_id": 1}]
+            assert await collection.insert_one({}) == "inserted"
+        finally:
+            executor.shutdown()
+
+        assert registry.mongo_latency[("entries", "find")].count == 1
+        assert registry.mongo_latency[("entries", "insert_one")].count == 1
+        assert ('mongodb_operation_duration_seconds_count'
+                '{collection="entries",operation="find"} 1') in registry.render()
+
+
+class TestPoolMetrics:
+    """
+    Feature: コネクションプールの計測
+        Scenario: 接続の取得待ち時間・取得失敗・接続数を/metricsに出力する
+            Given: コネクションプールの計測をMetricsRegistryに設定している
+            When:  接続の作成、2回の取得（うち1回は返却）、タイムアウトによる取得失敗を通知する
+            Then:  取得待ち時間のヒストグラムに3件が記録される
+            And:   開いている接続数・使用中の接続数・理由ごとの失敗件数が出力される
+    """
+
+    def test_checkout_metrics(self):
+        registry = MetricsRegistry()
+        registry.pool = PoolMetricsListener()
+        pool = registry.pool
+        pool.connection_created(SimpleNamespace())
+        pool.connection_checked_out(SimpleNamespace(duration=0.0002))
+        pool.connection_checked_out(SimpleNamespace(duration=0.2))
+        pool.connection_checked_in(SimpleNamespace())
+        pool.connection_check_out_failed(SimpleNamespace(duration=1.5, reason="timeout"))
+
+        text = registry.render()
+        assert "mongodb_pool_connections 1\n" in text
+        assert "mongodb_pool_checked_out_connections 1\n" in text
+        assert 'mongodb_pool_checkout_failures_total{reason="timeout"} 1\n' in text
+        assert 'mongodb_pool_checkout_wait_seconds_bucket{le="0.0005"} 1\n' in text
+        assert "mongodb_pool_checkout_wait_seconds_count 3\n" in text
@@ -0,0 +1,52 @@
+from bson import ObjectId
+
+from app.models import ENTRIES_PAGE_ADAPTER, Entry, EntriesResponse, entry_row
+
+"""
+モデルの変換処理をテストするためのクラス
+"""
+
+
+class TestEntryRow:
+    DOC = {
+        "_id": "dummy_id",
+        "record_date": "2025-08-14",
+        "mood_score": 4,
+        "sleep_hours": 6.5,
+        "memo": "今日はよく眠れた",
+    }
+
+    """
+    Feature: 検証済みドキュメントの軽量行への変換
+        Scenario: 検証ありで生成した場合と同じJSONにシリアライズされる
+            Given: 保存済みのMongoDBドキュメントがある
+            When:  entry_rowで変換しENTRIES_PAGE_ADAPTERでシリアライズする
+            Then:  Entry(**doc)からEntriesResponseを生成した場合と同じJSONになる
+    """
+
+    def test_same_json_as_validated(self):
+        validated = EntriesResponse(status="success", entries=[Entry(**self.DOC)])
+        fast = ENTRIES_PAGE_ADAPTER.dump_json({
+            "status": "success",
+            "entries": [entry_row(self.DOC)],
+            "next_cursor": None,
+        })
+        assert fast == validated.model_dump_json().encode()
+
+    """
+    Feature: 検証済みドキュメントの軽量行への変換
+        Scenario: ObjectIdの_idとmemoなしのドキュメントを変換できる
+            Given: _idがObjectIdでmemoを持たないドキュメントがある
+            When:  entry_rowで変換する
+            Then:  idはObjectIdの文字列表現になる
+            And:   memoはNoneになる
+    """
+
+    def test_object_id_and_missing_memo(self):
+        object_id = ObjectId()
+        doc = {k: v for k, v in self.DOC.items() if k != "memo"}
+        doc["_id"] = object_id
+        row = entry_row(doc)
+        assert row["id"] == str(object_id)
+        assert row["memo"] is None
+        assert row["record_date"] == "2025-08-14"
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import generate_openapi
+
+"""
+OpenAPIスキーマの生成をテストするためのクラス
+"""
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+class TestGenerateOpenAPI:
+    """
+    Feature: OpenAPIスキーマの生成
+        Scenario: app.mainをimportせずにスキーマを生成する
+            Given: .envの読み込みもDBの設定もない新しいインタープリターがある
+            When:  スキーマを作る
+            Then:  app.mainとdotenvは読み込まれない
+            And:   エンドポイントとモデルがスキーマに含まれる
+    """
+
+    def test_build_without_app_main(self):
+        env = {k: v for k, v in os.environ.items() if k not in ("ENV", "MONGODB_URI")}
+        result = subprocess.run(
+            [sys.executable, "-c",
+             "import json, sys, generate_openapi\n"
+             "schema = generate_openapi.build_schema()\n"
+             "print(json.dumps({'paths': sorted(schema['paths']),"
+             " 'modules': [m for m in ('app.main', 'dotenv') if m in sys.modules]}))"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60, check=True)
+        result = json.loads(result.stdout.strip().splitlines()[-1])
+
+        assert result["modules"] == []
+        assert "/entries" in result["paths"]
+
+    """
+    Feature: OpenAPIスキーマの生成
+        Scenario: コミット済みのschema.jsonがエンドポイントの定義と一致する
+            Given: コミット済みのopenapi/schema.jsonがある
+            When:  スキーマを生成して整形する
+            Then:  schema.jsonとバイト単位で一致する（生成し直しても差分が出ない）
+    """
+
+    def test_schema_is_up_to_date(self):
+        rendered = generate_openapi.render(generate_openapi.build_schema())
+        assert rendered == generate_openapi.SCHEMA_PATH.read_text()
+        assert json.loads(rendered)["info"]["summary"] == "KokoroNotoAPI"
+
+    """
+    Feature: OpenAPIスキーマの生成
+        Scenario: 入力が変わっていなければ生成を省く
+            Given: 出力先とスタンプファイルが一時ディレクトリにある
+            When:  2回続けて生成し、その後スタンプの入力ハッシュを変えて生成する
+            Then:  1回目は書き込み、2回目はスキーマを作らずに省く
+            And:   入力ハッシュが変わると作り直すが、内容が同じならファイルは書き換えない
+    """
+
+    def test_incremental(self, tmp_path, monkeypatch):
+        schema_path = tmp_path / "schema.json"
+        stamp_path = tmp_path / ".schema.json.sha256"
+        monkeypatch.setattr(generate_openapi, "SCHEMA_PATH", schema_path)
+        monkeypatch.setattr(generate_openapi, "STAMP_PATH", stamp_path)
+        builds = []
+        build_schema = generate_openapi.build_schema
+        monkeypatch.setattr(generate_openapi, "build_schema",
+                            lambda: builds.append(1) or build_schema())
+
+        assert generate_openapi.generate() is True
+        assert generate_openapi.generate() is False
+        assert len(builds) == 1
+
+        stamp_path.write_text(json.dumps({"inputs": "stale", "output": ""}))
+        assert generate_openapi.generate(check=True) is False
+        assert generate_openapi.generate() is False
+        assert len(builds) == 3
+        assert generate_openapi.generate() is False
+        assert len(builds) == 3
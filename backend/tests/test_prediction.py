@@ -0,0 +1,192 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.prediction import MOOD_MAX, MOOD_MIN, RIDGE, WINDOW, UserModel, fit_batch
+from app.predictor import PredictionService
+
+"""
+翌日の気分スコア予測モデルをテストするためのクラス
+"""
+
+
+def make_rows(n, seed=0):
+    """記録日の昇順に並んだ(record_date, mood_score, sleep_hours)をn件作る"""
+    rng = np.random.default_rng(seed)
+    start = date(2025, 1, 1)
+    return [
+        ((start + timedelta(days=i)).isoformat(),
+         float(rng.integers(0, 6)), float(rng.uniform(3, 10)))
+        for i in range(n)
+    ]
+
+
+class TestUserModel:
+    """
+    Feature: 増分更新と一括学習
+        Scenario: 1件ずつ追加したモデルと全履歴から一括で作ったモデルが一致する
+            Given: 記録日の昇順に並んだ30件の記録がある
+            When:  UserModel.addで1件ずつ追加し、fit_batchでも一括で作る
+            Then:  正規方程式の累積量・学習サンプル数・最新の特徴量・予測値が一致する
+    """
+
+    def test_incremental_equals_batch(self):
+        rows = make_rows(30)
+        incremental = UserModel()
+        for row in rows:
+            assert incremental.add(*row)
+        batch = fit_batch(rows)
+
+        np.testing.assert_allclose(incremental.xtx, batch.xtx)
+        np.testing.assert_allclose(incremental.xty, batch.xty)
+        assert incremental.n_samples == batch.n_samples == 29
+        assert incremental.last_date == batch.last_date == rows[-1][0]
+        np.testing.assert_allclose(incremental.last_features, batch.last_features)
+        assert incremental.predict() == pytest.approx(batch.predict())
+
+        # 一括で作ったモデルにも続けて増分更新できる
+        more = make_rows(40)[30:]
+        for row in more:
+            incremental.add(*row)
+            batch.add(*row)
+        np.testing.assert_allclose(incremental.xtx, batch.xtx)
+        assert incremental.predict() == pytest.approx(batch.predict())
+
+    """
+    Feature: 増分更新と一括学習
+        Scenario: 予測値が全履歴からの回帰の解と一致する
+            Given: 記録日の昇順に並んだ50件の記録がある
+            When:  1件ずつ追加したモデルで予測する
+            Then:  前日の特徴量から翌日の気分を当てるリッジ回帰を直接解いた値と一致する
+    """
+
+    def test_predict_matches_direct_solve(self):
+        rows = make_rows(50, seed=1)
+        model = UserModel()
+        for row in rows:
+            model.add(*row)
+
+        moods = np.array([row[1] for row in rows])
+        sleeps = np.array([row[2] for row in rows])
+        features = []
+        for i in range(len(rows)):
+            recent = moods[max(0, i + 1 - WINDOW):i + 1]
+            features.append([1.0, moods[i], sleeps[i], recent.mean()])
+        features = np.array(features)
+        x, y = features[:-1], moods[1:]
+        penalty = np.diag([0.0] + [RIDGE] * (x.shape[1] - 1))
+        coefficients = np.linalg.solve(x.T @ x + penalty, x.T @ y)
+        expected = np.clip(features[-1] @ coefficients, MOOD_MIN, MOOD_MAX)
+
+        assert model.predict() == pytest.approx(expected)
+
+    """
+    Feature: 増分更新と一括学習
+        Scenario: 学習サンプルが足りない場合は直近の平均を予測値にする
+            Given: 3件の記録を追加したモデルがある
+            When:  予測する
+            Then:  直近の気分スコアの平均を返す
+            And:   記録がないモデルはNoneを返す
+    """
+
+    def test_predict_fallback(self):
+        model = UserModel()
+        assert model.predict() is None
+        for record_date, mood in (("2025-08-12", 2), ("2025-08-13", 3), ("2025-08-14", 5)):
+            model.add(record_date, mood, 7.0)
+        assert model.predict() == pytest.approx(10 / 3)
+
+    """
+    Feature: 増分更新と一括学習
+        Scenario: 最新の記録以前の日付は増分更新しない
+            Given: 記録を追加したモデルがある
+            When:  最新と同じ日付・過去の日付の記録を追加する
+            Then:  Falseを返し、モデルは変化しない
+    """
+
+    def test_add_rejects_out_of_order(self):
+        model = fit_batch(make_rows(10))
+        xtx = model.xtx.copy()
+        assert not model.add(model.last_date, 5.0, 8.0)
+        assert not model.add("2024-12-31", 5.0, 8.0)
+        np.testing.assert_array_equal(model.xtx, xtx)
+
+
+class TestPredictionService:
+    """
+    Feature: ユーザーごとのモデル管理
+        Scenario: 作り直しが必要なときだけneeds_refitがTrueになる
+            Given: PredictionServiceがある
+            When:  モデルを置き換えた後、新しい日付・過去の日付の記録を追加する
+            Then:  未作成のときと過去の日付を追加した後だけ作り直しが必要になる
+    """
+
+    def test_needs_refit(self):
+        service = PredictionService()
+        assert service.needs_refit(None)
+        service.replace(None, fit_batch(make_rows(10)), service.generation(None))
+        assert not service.needs_refit(None)
+
+        service.observe(None, "2025-01-11", 3.0, 7.0)
+        assert not service.needs_refit(None)
+        assert service.model(None).last_date == "2025-01-11"
+
+        service.observe(None, "2025-01-05", 3.0, 7.0)
+        assert service.needs_refit(None)
+
+    """
+    Feature: ユーザーごとのモデル管理
+        Scenario: 作り直しの間に書き込みがあった場合は次回も作り直す
+            Given: 作り直しを始める時点の世代番号を控えている
+            When:  作り直しの間に一括登録があり、その後モデルを置き換える
+            Then:  作り直しが必要なままになる
+    """
+
+    def test_replace_during_write(self):
+        service = PredictionService()
+        generation = service.generation(None)
+        service.invalidate(None)
+        service.replace(None, fit_batch(make_rows(10)), generation)
+        assert service.needs_refit(None)
+
+    """
+    Feature: ユーザーごとのモデル管理
+        Scenario: 上限を超えると最も古く使われたユーザーのモデルを捨て、次の予測時に作り直す
+            Given: 2ユーザーまで保持するPredictionServiceに2ユーザーのモデルがある
+            When:  3人目のモデルを置き換え、その後1人目のモデルを作り直す
+            Then:  1人目のモデルが捨てられて作り直しが必要になる
+            And:   作り直した後は1人目のモデルが使われ、今度は2人目が捨てられる
+    """
+
+    def test_evicts_least_recently_used(self):
+        service = PredictionService(max_users=2)
+        for user_id in ("user_1", "user_2", "user_3"):
+            service.replace(user_id, fit_batch(make_rows(10)), service.generation(user_id))
+        assert len(service) == 2
+        assert service.evictions == 1
+        assert service.needs_refit("user_1")
+        assert service.model("user_1") is None
+        assert not service.needs_refit("user_3")
+
+        service.replace("user_1", fit_batch(make_rows(12)), service.generation("user_1"))
+        assert not service.needs_refit("user_1")
+        assert service.model("user_1").last_date == make_rows(12)[-1][0]
+        assert service.needs_refit("user_2")
+
+    """
+    Feature: ユーザーごとのモデル管理
+        Scenario: 作り直しの間に書き込まれたユーザーが追い出されても次回も作り直す
+            Given: 1ユーザーまで保持するPredictionServiceで、作り直しを始める時点の世代番号を控えている
+            When:  作り直しの間にそのユーザーが書き込み、他のユーザーの利用で追い出された後にモデルを置き換える
+            Then:  世代番号が作り直し開始時点に戻らず、作り直しが必要なままになる
+    """
+
+    def test_eviction_during_refit(self):
+        service = PredictionService(max_users=1)
+        generation = service.generation("user_1")
+        service.observe("user_1", "2025-01-11", 3.0, 7.0)
+        service.invalidate("user_2")
+        assert service.model("user_1") is None
+        service.replace("user_1", fit_batch(make_rows(10)), generation)
+        assert service.needs_refit("user_1")
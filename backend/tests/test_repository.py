@@ -0,0 +1,283 @@
+import asyncio
+from datetime import date, timedelta
+
+import mongomock
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.changes import (
+    change_time, decode_change_token, encode_change_token, next_change_token,
+)
+from app.db import AsyncCollection
+from app.models import Entry
+from app.pagination import InvalidCursorError
+from app.repository import BucketEntryRepository, DocumentEntryRepository
+from app.search import parse_query, query_terms, rank
+from tests.helpers import BulkWriteCollection
+
+"""
+月ごとのバケットでエントリーを保存するリポジトリをテストするためのクラス
+"""
+
+
+def make_document(record_date, mood_score=4, sleep_hours=6.5, memo=None,
+                  user_id="user_1"):
+    document = {"user_id": user_id, "record_date": record_date,
+                "mood_score": mood_score, "sleep_hours": sleep_hours}
+    if memo is not None:
+        document["memo"] = memo
+    return document
+
+
+DATES = ["2025-07-30", "2025-07-31", "2025-08-01", "2025-08-02", "2025-08-03"]
+
+
+class TestBucketEntryRepository:
+    @pytest.fixture
+    def database(self):
+        return mongomock.MongoClient().db
+
+    @pytest.fixture
+    def buckets(self, database, executor):
+        return BucketEntryRepository(AsyncCollection(
+            BulkWriteCollection(database.entry_buckets), executor))
+
+    @pytest.fixture
+    def documents(self, database, executor):
+        return DocumentEntryRepository(AsyncCollection(
+            BulkWriteCollection(database.entries), executor))
+
+    async def fill(self, repository):
+        ids = {}
+        for index, record_date in enumerate(DATES):
+            ids[record_date] = await repository.upsert(make_document(
+                record_date, mood_score=index + 1, sleep_hours=5.0 + index,
+                memo="今日はよく眠れた" if index % 2 else None))
+        # 他のユーザーのエントリーは結果に含まれない
+        await repository.upsert(make_document("2025-08-01", user_id="user_2"))
+        return ids
+
+    """
+    Feature: バケットへの保存
+        Scenario: 1日分の書き込みは同じ月のバケットにまとめて保存される
+            Given: 2か月にまたがる5日分のエントリーを1件ずつupsertする
+            When:  同じ記録日を別の内容でもう一度upsertする
+            Then:  バケットはユーザー・月ごとに1つで、同じ記録日のIDは変わらず内容が置き換わる
+    """
+
+    @pytest.mark.asyncio
+    async def test_upsert(self, buckets, database):
+        ids = await self.fill(buckets)
+        doc_id = await buckets.upsert(make_document("2025-08-02", mood_score=1))
+
+        assert doc_id == ids["2025-08-02"]
+        assert database.entry_buckets.count_documents({"user_id": "user_1"}) == 2
+        bucket = database.entry_buckets.find_one({"user_id": "user_1", "month": "2025-08"})
+        assert bucket["days"] == {
+            "01": [3, 7.0], "02": [1, 6.5], "03": [5, 9.0]}
+        assert doc_id == f"{bucket['_id']}-02"
+
+    """
+    Feature: 一覧取得
+        Scenario: 月をまたいで記録日の新しい順にページングできる
+            Given: 2か月にまたがる5日分のエントリーがある
+            When:  2件ずつカーソルをたどって取得する
+            Then:  1日1ドキュメントの形式で新しい順に全件が返り、最終ページのカーソルはNone
+    """
+
+    @pytest.mark.asyncio
+    async def test_find_page(self, buckets):
+        ids = await self.fill(buckets)
+        pages = []
+        cursor = None
+        while True:
+            docs, cursor = await buckets.find_page("user_1", 2, cursor=cursor)
+            pages.append([doc["record_date"] for doc in docs])
+            if cursor is None:
+                break
+
+        assert pages == [["2025-08-03", "2025-08-02"],
+                         ["2025-08-01", "2025-07-31"], ["2025-07-30"]]
+        docs, _ = await buckets.find_page("user_1", 1)
+        assert docs == [{
+            "_id": ids["2025-08-03"], "user_id": "user_1",
+            "record_date": "2025-08-03", "mood_score": 5, "sleep_hours": 9.0,
+            "memo": None}]
+
+    """
+    Feature: 一覧取得
+        Scenario: 記録日の範囲で絞り込む
+            Given: 2か月にまたがる5日分のエントリーがある
+            When:  7/31〜8/02の範囲で取得する
+            Then:  範囲内の3件だけが返る
+        Scenario: 不正なカーソルはエラーになる
+            When:  復元できないカーソルを指定する
+            Then:  InvalidCursorErrorが送出される
+    """
+
+    @pytest.mark.asyncio
+    async def test_find_page_range(self, buckets):
+        await self.fill(buckets)
+        docs, cursor = await buckets.find_page(
+            "user_1", 10, date(2025, 7, 31), date(2025, 8, 2))
+
+        assert [doc["record_date"] for doc in docs] == [
+            "2025-08-02", "2025-08-01", "2025-07-31"]
+        assert cursor is None
+        with pytest.raises(InvalidCursorError):
+            await buckets.find_page("user_1", 10, cursor="invalid")
+
+    """
+    Feature: 一括登録
+        Scenario: 新規追加と置き換えを振り分け、1件ずつのupsertと同じIDを返す
+            Given: 8/01のエントリーだけが保存されている
+            When:  7/31・8/01・8/02と、重複した8/02をまとめてupsertする
+            Then:  7/31と後の8/02が新規追加、8/01が置き換えになり、先の8/02はエラーになる
+            And:   返ったIDで一覧のエントリーを特定できる
+    """
+
+    @pytest.mark.asyncio
+    async def test_upsert_many(self, buckets):
+        existing_id = await buckets.upsert(make_document("2025-08-01"))
+        entries = [
+            (0, Entry(record_date="2025-07-31", mood_score=2, sleep_hours=5.0, user_id="user_1")),
+            (1, Entry(record_date="2025-08-01", mood_score=3, sleep_hours=6.0, user_id="user_1")),
+            (2, Entry(record_date="2025-08-02", mood_score=1, sleep_hours=7.0, user_id="user_1")),
+            (3, Entry(record_date="2025-08-02", mood_score=5, sleep_hours=8.0, user_id="user_1")),
+        ]
+        inserted, updated, errors = await buckets.upsert_many(entries, chunk_size=2)
+
+        assert [result.index for result in inserted] == [0, 3]
+        assert [(result.index, result.id) for result in updated] == [(1, existing_id)]
+        assert [error.index for error in errors] == [2]
+        docs, _ = await buckets.find_page("user_1", 10)
+        assert {doc["_id"]: doc["mood_score"] for doc in docs} == {
+            inserted[1].id: 5, existing_id: 3, inserted[0].id: 2}
+
+    """
+    Feature: 一括登録
+        Scenario: 書き込みに失敗した位置だけをエラーとして返す
+            Given: 2件目の書き込みが失敗するbulk_writeがある
+            When:  2件をまとめてupsertする
+            Then:  1件目は新規追加として返り、2件目は書き込みエラーになる
+    """
+
+    @pytest.mark.asyncio
+    async def test_upsert_many_write_error(self, database, executor, monkeypatch):
+        collection = BulkWriteCollection(database.entry_buckets)
+        repository = BucketEntryRepository(AsyncCollection(collection, executor))
+
+        def bulk_write(requests, ordered=True):
+            result = collection.collection.update_one(
+                requests[0]._filter, requests[0]._doc, upsert=True)
+            raise BulkWriteError({
+                "upserted": [{"index": 0, "_id": result.upserted_id}],
+                "writeErrors": [{"index": 1, "errmsg": "write failed"}],
+            })
+        monkeypatch.setattr(collection, "bulk_write", bulk_write, raising=False)
+        inserted, updated, errors = await repository.upsert_many([
+            (0, Entry(record_date="2025-07-31", mood_score=2, sleep_hours=5.0, user_id="user_1")),
+            (1, Entry(record_date="2025-08-01", mood_score=3, sleep_hours=6.0, user_id="user_1")),
+        ], chunk_size=10)
+
+        assert [result.index for result in inserted] == [0]
+        assert updated == []
+        assert [(error.index, error.errors[0].msg) for error in errors] == [(1, "write failed")]
+
+    """
+    Feature: エクスポートと予測用の読み出し
+        Scenario: 記録日の古い順に読み出す
+            Given: 2か月にまたがる5日分のエントリーがある
+            When:  8/01以降をバッチで読み出し、全期間の系列を読み出す
+            Then:  どちらも記録日の古い順で、範囲外のエントリーは含まれない
+    """
+
+    @pytest.mark.asyncio
+    async def test_iter_batches_and_series(self, buckets):
+        await self.fill(buckets)
+        batches = [batch async for batch in buckets.iter_batches(
+            "user_1", date(2025, 8, 1), None, 500)]
+
+        assert [[doc["record_date"] for doc in batch] for batch in batches] == [
+            ["2025-08-01", "2025-08-02", "2025-08-03"]]
+        assert await buckets.series("user_1") == [
+            (record_date, index + 1, 5.0 + index)
+            for index, record_date in enumerate(DATES)]
+
+    """
+    Feature: 集計
+        Scenario: バケットを展開して1日1ドキュメントと同じ集計結果を返す
+            Given: 同じ5日分のエントリーを両方の保存形式で保存している
+            When:  7/31以降を日単位で集計する
+            Then:  両方の保存形式で同じ結果になる
+    """
+
+    @pytest.mark.asyncio
+    async def test_aggregate_stats(self, buckets, documents):
+        # mongomockは週・月単位の集計に使う$dateTruncに対応していないため日単位で確かめる
+        await self.fill(buckets)
+        await self.fill(documents)
+        expected = await documents.aggregate_stats(
+            "day", "user_1", date(2025, 7, 31), None)
+
+        assert len(expected) == 4
+        assert await buckets.aggregate_stats(
+            "day", "user_1", date(2025, 7, 31), None) == expected
+
+    """
+    Feature: メモ検索
+        Scenario: バケット形式でも1日1ドキュメントと同じ検索結果になる
+            Given: 同じ5日分のエントリーを両方の保存形式で保存している
+            When:  「よく眠」で候補を取得して順位付けする
+            Then:  両方の保存形式でメモを含む同じ記録日のエントリーが返る
+    """
+
+    @pytest.mark.asyncio
+    async def test_find_by_terms(self, buckets, documents):
+        await self.fill(buckets)
+        await self.fill(documents)
+        words = parse_query("よく眠")
+        results = {}
+        for layout, repository in (("buckets", buckets), ("documents", documents)):
+            docs = await repository.find_by_terms("user_1", query_terms(words))
+            hits, _ = rank(docs, words, limit=10)
+            results[layout] = [hit["entry"]["record_date"] for hit in hits]
+
+        assert results["documents"] == ["2025-08-02", "2025-07-31"]
+        assert results["buckets"] == results["documents"]
+
+    """
+    Feature: 変更の取得
+        Scenario: 前回の取得以降に書き込まれたエントリーだけを返す
+            Given: 同じ5日分のエントリーを両方の保存形式で保存している
+            When:  2件ずつトークンをたどって全件を取得した後、8/02を置き換えて続きを取得する
+            Then:  1回目は書き込んだ順に全件が返り、2回目は置き換えた8/02だけが返る
+            And:   書き込み時刻のない導入前のエントリーも初回の取得に含まれる
+    """
+
+    @pytest.mark.asyncio
+    async def test_find_changes(self, buckets, documents, database):
+        database.entries.insert_one(make_document("2025-07-01"))
+        for layout, repository in (("buckets", buckets), ("documents", documents)):
+            await self.fill(repository)
+            # 書き込み時刻と取得開始の時刻が同じミリ秒にならないようにする
+            await asyncio.sleep(0.002)
+            record_dates = []
+            token = None
+            while True:
+                now = change_time()
+                docs = await repository.find_changes("user_1", 2, token)
+                token, has_more = next_change_token(docs, 2, token, now, timedelta(0))
+                # トークン文字列を経由しても同じ位置から続けられる
+                token = decode_change_token(encode_change_token(token))
+                record_dates += [doc["record_date"] for doc in docs[:2]]
+                if not has_more:
+                    break
+
+            legacy = ["2025-07-01"] if layout == "documents" else []
+            assert record_dates == legacy + DATES
+            assert await repository.find_changes("user_1", 10, token) == []
+            await repository.upsert(make_document("2025-08-02", mood_score=1))
+            docs = await repository.find_changes("user_1", 10, token)
+            assert [(doc["record_date"], doc["mood_score"]) for doc in docs] == [
+                ("2025-08-02", 1)]
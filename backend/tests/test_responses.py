@@ -0,0 +1,42 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+from app.models import Entry, EntryResponse
+from app.responses import PydanticJSONResponse
+
+"""
+pydantic-coreでJSONを生成するレスポンスをテストするためのクラス
+"""
+
+
+class TestPydanticJSONResponse:
+    """
+    Feature: JSONの描画
+        Scenario: モデルをそのまま渡してもJSONResponseと同じJSONになる
+            Given: 非ASCII文字のメモを含むEntryResponseがある
+            When:  PydanticJSONResponseにモデルを、JSONResponseにdict化したものを渡す
+            Then:  同じバイト列が描画され、メモはエスケープされない
+    """
+
+    def test_render_model(self):
+        payload = EntryResponse(status="success", entry=Entry(
+            _id="dummy_id", record_date="2025-08-14", mood_score=4,
+            sleep_hours=6.5, memo="今日はよく眠れた"))
+        body = PydanticJSONResponse(payload).body
+
+        assert body == JSONResponse(payload.model_dump(mode="json")).body
+        assert "今日はよく眠れた".encode() in body
+        assert json.loads(body)["entry"]["id"] == "dummy_id"
+
+    """
+    Feature: JSONの描画
+        Scenario: NaNは不正なJSONにせずnullとして描画する
+            Given: NaNを含むdictがある
+            When:  PydanticJSONResponseで描画する
+            Then:  nullとして出力される
+    """
+
+    def test_render_nan(self):
+        body = PydanticJSONResponse({"value": float("nan")}).body
+        assert json.loads(body) == {"value": None}
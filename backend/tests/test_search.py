@@ -0,0 +1,134 @@
+import mongomock
+import pytest
+
+from app.pagination import InvalidCursorError
+from app.search import (
+    MEMO_TERMS_FIELD, backfill_memo_terms, decode_search_cursor, memo_terms,
+    parse_query, query_terms, rank, score, with_memo_terms,
+)
+from tests.helpers import BulkWriteCollection
+
+"""
+メモ検索の索引と順位付けをテストするためのクラス
+"""
+
+
+def make_doc(day, memo):
+    return {"_id": f"id_{day}", "user_id": "user_1",
+            "record_date": f"2025-08-{day:02d}", "mood_score": 3,
+            "sleep_hours": 7.0, "memo": memo}
+
+
+class TestMemoTerms:
+    """
+    Feature: メモの索引
+        Scenario: 空白で区切った語ごとに1〜2文字のn-gramにする
+            Given: 全角英数字と空白を含むメモがある
+            When:  検索語のリストにする
+            Then:  NFKC正規化・小文字化した語ごとのn-gramが重複なく返る
+            And:   空白をまたぐn-gramは含まれない
+    """
+
+    def test_memo_terms(self):
+        assert memo_terms("ＡＢ　雨") == ["a", "ab", "b", "雨"]
+        assert "b雨" not in memo_terms("ab 雨")
+        assert memo_terms(None) == []
+
+    """
+    Feature: メモの索引
+        Scenario: メモがないドキュメントには検索語を追加しない
+            Given: メモあり・メモなしのドキュメントがある
+            When:  with_memo_termsで検索語を追加する
+            Then:  メモありのドキュメントだけに検索語が追加され、元のdictは変更されない
+    """
+
+    def test_with_memo_terms(self):
+        document = {"record_date": "2025-08-14", "memo": "晴れ"}
+        assert with_memo_terms(document)[MEMO_TERMS_FIELD] == ["れ", "晴", "晴れ"]
+        assert MEMO_TERMS_FIELD not in document
+        assert with_memo_terms({"record_date": "2025-08-14"}) == {
+            "record_date": "2025-08-14"}
+
+    """
+    Feature: 検索語の解釈
+        Scenario: 語ごとに候補の絞り込みに使うn-gramを求める
+            Given: 1文字の語と3文字の語を含む検索文字列がある
+            When:  語とn-gramに分ける
+            Then:  1文字の語はそのまま、2文字以上の語は2文字のn-gramになる
+    """
+
+    def test_query_terms(self):
+        words = parse_query(" 雨  よく眠 雨 ")
+        assert words == ["雨", "よく眠"]
+        assert query_terms(words) == ["く眠", "よく", "雨"]
+
+
+class TestRank:
+    """
+    Feature: 順位付け
+        Scenario: すべての語を含むメモだけを出現回数の多い順に返す
+            Given: 語の出現回数が異なるメモと、片方の語しか含まないメモがある
+            When:  2語で順位付けする
+            Then:  両方の語を含むメモだけが出現回数の多い順（同点は新しい順）に返る
+    """
+
+    def test_rank_by_score(self):
+        docs = [make_doc(1, "雨 頭痛"), make_doc(2, "雨 雨 頭痛"),
+                make_doc(3, "雨"), make_doc(4, "雨で頭痛"), make_doc(5, None)]
+        hits, next_cursor = rank(docs, ["雨", "頭痛"], limit=10)
+
+        assert [(hit["entry"]["id"], hit["score"]) for hit in hits] == [
+            ("id_2", 3), ("id_4", 2), ("id_1", 2)]
+        assert next_cursor is None
+        assert score("雨の日", ["雨", "晴"]) == 0
+
+    """
+    Feature: 順位付け
+        Scenario: カーソルで次のページをたどると重複・漏れなく全件を取得できる
+            Given: スコアが同点のメモを含む7件がある
+            When:  3件ずつカーソルをたどる
+            Then:  全件が1回ずつ順位の順に返り、最終ページのカーソルはNone
+    """
+
+    def test_rank_pagination(self):
+        docs = [make_doc(day, "眠い" * (day % 3 + 1)) for day in range(1, 8)]
+        expected = [hit["entry"]["id"] for hit in rank(docs, ["眠い"], limit=10)[0]]
+        pages = []
+        after = None
+        while True:
+            hits, next_cursor = rank(docs, ["眠い"], limit=3, after=after)
+            pages.append(len(hits))
+            expected, ids = expected[len(hits):], expected[:len(hits)]
+            assert [hit["entry"]["id"] for hit in hits] == ids
+            if next_cursor is None:
+                break
+            after = decode_search_cursor(next_cursor)
+
+        assert pages == [3, 3, 1]
+        assert expected == []
+        with pytest.raises(InvalidCursorError):
+            decode_search_cursor("invalid")
+
+
+class TestBackfillMemoTerms:
+    """
+    Feature: 既存エントリーへの検索語の追加
+        Scenario: 検索語のないメモにだけ検索語を追加する
+            Given: 検索語のないメモ3件、検索語のあるメモ1件、メモなし1件が保存されている
+            When:  2件ずつまとめてbackfill_memo_termsを実行する
+            Then:  検索語のないメモ3件にだけ検索語が追加される
+            And:   もう一度実行しても何も変更されない
+    """
+
+    def test_backfill(self):
+        collection = BulkWriteCollection(mongomock.MongoClient().db.entries)
+        collection.collection.insert_many(
+            [make_doc(day, "よく眠れた") for day in (1, 2, 3)]
+            + [with_memo_terms(make_doc(4, "雨")), make_doc(5, None)])
+
+        assert backfill_memo_terms(collection, batch_size=2) == 3
+        assert collection.bulk_writes == [2, 1]
+        assert collection.collection.find_one({"_id": "id_1"})[MEMO_TERMS_FIELD] == \
+            memo_terms("よく眠れた")
+        assert MEMO_TERMS_FIELD not in collection.collection.find_one({"_id": "id_5"})
+        assert backfill_memo_terms(collection) == 0
@@ -0,0 +1,51 @@
+import pytest
+
+import app.server
+from app.config import ServerSettings
+from app.server import uvicorn_options
+
+"""
+HTTPサーバー（python -m app.server）の起動設定をテストするためのクラス
+"""
+
+
+class TestServerSettings:
+    """
+    Feature: HTTPサーバーの起動設定
+        Scenario: 環境変数からワーカー数とポートを読み込み、uvloop・httptoolsで起動する
+            Given: SERVER_WORKERS=4、PORT=9000が設定されている
+            When:  uvicornに渡すオプションを組み立てる
+            Then:  4ワーカー・ポート9000で、イベントループはuvloop、HTTPパーサーはhttptoolsになる
+            And:   終了時に処理中のリクエストを待つ時間が設定される
+        Scenario: uvloop・httptoolsがない環境では標準の実装で起動する
+            Given: uvloop・httptoolsをimportできない
+            When:  uvicornに渡すオプションを組み立てる
+            Then:  イベントループはasyncio、HTTPパーサーはh11になる
+    """
+
+    def test_uvicorn_options(self, monkeypatch):
+        monkeypatch.setenv("SERVER_WORKERS", "4")
+        monkeypatch.setenv("PORT", "9000")
+        options = uvicorn_options(ServerSettings.from_env())
+        assert options == {
+            "host": "0.0.0.0", "port": 9000, "workers": 4,
+            "loop": "uvloop", "http": "httptools",
+            "timeout_graceful_shutdown": ServerSettings.graceful_shutdown_seconds,
+        }
+
+        monkeypatch.setattr(app.server, "_available", lambda module: False)
+        options = uvicorn_options(ServerSettings())
+        assert (options["loop"], options["http"]) == ("asyncio", "h11")
+
+    """
+    Feature: HTTPサーバーの起動設定
+        Scenario: ワーカー数が1未満の場合は起動しない
+            Given: SERVER_WORKERS=0が設定されている
+            When:  設定を読み込む
+            Then:  ValueErrorが送出される
+    """
+
+    def test_invalid_workers(self, monkeypatch):
+        monkeypatch.setenv("SERVER_WORKERS", "0")
+        with pytest.raises(ValueError):
+            ServerSettings.from_env()
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import mongomock
+
+from app.constants import DB
+from app.db import DatabaseExecutor, DatabaseTimeoutError
+from app.startup import warm_up
+
+"""
+起動時間（コールドスタート）と起動時の初期化をテストするためのクラス
+"""
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# app.mainのimportにかかる時間の上限（CIの実行環境の差を見込んで緩めにしている）
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "3000"))
+
+
+def run_python(code: str, **env) -> dict:
+    """新しいインタープリターでcodeを実行し、最後に出力されたJSONを返す"""
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=BACKEND_DIR, env={**os.environ, **env},
+        capture_output=True, text=True, timeout=60, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportTime:
+    """
+    Feature: 起動時のimport
+        Scenario: app.mainのimportで重いモジュールを読み込まない
+            Given: 新しいインタープリターがある
+            When:  app.mainをimportする
+            Then:  予測モデル（numpy）とdotenv（CI環境）は読み込まれていない
+            And:   importにかかる時間が上限以内に収まる
+    """
+
+    def test_import_app_main(self):
+        result = run_python("""
+            import json, sys, time
+            start = time.perf_counter()
+            import app.main
+            elapsed = (time.perf_counter() - start) * 1000
+            print(json.dumps({"elapsed_ms": elapsed,
+                              "modules": [name for name in ("numpy", "dotenv", "app.prediction",
+                                                           "app.analytics")
+                                          if name in sys.modules]}))
+        """, ENV="ci")
+
+        assert result["modules"] == []
+        assert result["elapsed_ms"] < IMPORT_BUDGET_MS
+
+
+class SlowIndexes:
+    """インデックスの作成に時間がかかる状況を再現する"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, database, layout):
+        time.sleep(self.delay)
+        self.calls.append(layout)
+
+
+class TestWarmUp:
+    """
+    Feature: バックグラウンドでの起動時の初期化
+        Scenario: インデックスを作成し、予測モデルを読み込む
+            Given: 空のデータベースがある
+            When:  warm_upを実行する
+            Then:  エントリーのインデックスが作成されている
+            And:   予測モデル・分析のモジュールが読み込まれている
+    """
+
+    def test_warm_up(self):
+        mongo = mongomock.MongoClient()
+        executor = DatabaseExecutor(max_workers=1, timeout=5)
+        try:
+            asyncio.run(warm_up(mongo, executor, "documents"))
+        finally:
+            executor.shutdown()
+
+        indexes = mongo[DB.DATABASE_NAME][DB.ENTRIES_COLLECTION].index_information()
+        assert "user_record_date_unique" in indexes
+        assert "app.prediction" in sys.modules
+        assert "app.analytics" in sys.modules
+
+    """
+    Feature: バックグラウンドでの起動時の初期化
+        Scenario: DBに接続できなくても例外を送出しない
+            Given: DB操作がタイムアウトする
+            When:  warm_upを実行する
+            Then:  例外は送出されずに終了する
+    """
+
+    def test_warm_up_unreachable(self):
+        class TimeoutExecutor:
+            async def run(self, func, *args, **kwargs):
+                raise DatabaseTimeoutError("timed out")
+
+        asyncio.run(warm_up(mongomock.MongoClient(), TimeoutExecutor(), "documents"))
+
+
+class TestBackgroundInit:
+    """
+    Feature: 起動の高速化
+        Scenario: STARTUP_BACKGROUND_INITを有効にすると、インデックスの作成を待たずに起動する
+            Given: インデックスの作成に1秒かかる
+            And:   STARTUP_BACKGROUND_INIT=1が設定されている
+            When:  lifespanを開始する
+            Then:  インデックスの作成より先に起動が完了する
+            And:   インデックスの作成はその後バックグラウンドで完了する
+    """
+
+    def test_lifespan_does_not_wait_for_indexes(self):
+        result = run_python("""
+            import asyncio, json, time
+            import mongomock, pymongo
+            pymongo.MongoClient = mongomock.MongoClient
+
+            import app.startup
+            from tests.test_startup import SlowIndexes
+            slow = SlowIndexes(delay=1.0)
+            app.startup.ensure_indexes = slow
+            import app.main
+
+            async def main():
+                start = time.perf_counter()
+                async with app.main.app.router.lifespan_context(app.main.app):
+                    started = time.perf_counter() - start
+                    while not slow.calls and time.perf_counter() - start < 10:
+                        await asyncio.sleep(0.05)
+                    return {"startup_ms": started * 1000, "calls": slow.calls}
+
+            print(json.dumps(asyncio.run(main())))
+        """, ENV="development", MONGODB_URI="mongodb://localhost",
+            STARTUP_BACKGROUND_INIT="1")
+
+        assert result["startup_ms"] < 500
+        assert result["calls"] == ["documents"]
@@ -0,0 +1,155 @@
+import os
+import uuid
+from datetime import date, timedelta
+
+import mongomock
+import numpy as np
+import pytest
+
+from app.pagination import build_entries_query
+from app.stats import build_stats_response, correlation, stats_pipeline
+
+"""
+時系列集計（GET /entries/stats）をテストするためのクラス
+"""
+
+# 週・月単位の集計で使う日付演算子はmongomockが未対応のため、実際のMongoDBで確認する
+MONGODB_TEST_URI = os.getenv("MONGODB_TEST_URI")
+requires_mongodb = pytest.mark.skipif(
+    not MONGODB_TEST_URI, reason="MONGODB_TEST_URI is not set")
+
+
+def make_docs(n, start=date(2025, 7, 1), user_id="user_1", seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"user_id": user_id,
+         "record_date": (start + timedelta(days=i)).isoformat(),
+         "mood_score": int(rng.integers(0, 6)),
+         "sleep_hours": round(float(rng.uniform(3, 10)), 1)}
+        for i in range(n)
+    ]
+
+
+def expected_summary(docs):
+    moods = np.array([doc["mood_score"] for doc in docs], dtype=float)
+    sleeps = np.array([doc["sleep_hours"] for doc in docs])
+    return {
+        "count": len(docs),
+        "mood_score": {"mean": moods.mean(), "min": moods.min(), "max": moods.max()},
+        "sleep_hours": {"mean": sleeps.mean(), "min": sleeps.min(), "max": sleeps.max()},
+        "correlation": float(np.corrcoef(sleeps, moods)[0, 1]),
+    }
+
+
+class TestStats:
+    """
+    Feature: 相関係数の計算
+        Scenario: 和から求めた相関係数がNumPyの計算結果と一致する
+            Given: 睡眠時間と気分スコアの組が100件ある
+            When:  各和からcorrelationで相関係数を求める
+            Then:  np.corrcoefの結果と一致する
+            And:   2件未満・値が一定の場合はNoneになる
+    """
+
+    def test_correlation(self):
+        docs = make_docs(100)
+        x = np.array([doc["sleep_hours"] for doc in docs])
+        y = np.array([doc["mood_score"] for doc in docs], dtype=float)
+        r = correlation(len(x), x.sum(), y.sum(), (x * x).sum(), (y * y).sum(), (x * y).sum())
+        assert r == pytest.approx(np.corrcoef(x, y)[0, 1])
+        assert correlation(1, 7.0, 4.0, 49.0, 16.0, 28.0) is None
+        assert correlation(3, 21.0, 6.0, 147.0, 14.0, 42.0) is None
+
+    """
+    Feature: 日単位の集計
+        Scenario: 集計パイプラインで日ごとと期間全体の統計を求める
+            Given: 同じ日の記録を含む60件の記録と、別のユーザーの記録が保存されている
+            When:  ユーザーと日付範囲を指定してbucket=dayの集計パイプラインを実行する
+            Then:  そのユーザーの範囲内の日ごとの件数・平均・最小・最大が記録日の昇順で返る
+            And:   期間全体の統計が範囲内の全件から直接求めた値と一致する
+    """
+
+    def test_day_buckets(self):
+        docs = make_docs(60)
+        collection = mongomock.MongoClient().db.entries
+        collection.insert_many([dict(doc) for doc in docs])
+        collection.insert_many(make_docs(60, user_id="user_2", seed=1))
+        # 同じ日付に2件目を入れ、日ごとの件数を確認する
+        extra = {"user_id": "user_1", "record_date": "2025-07-10",
+                 "mood_score": 5, "sleep_hours": 9.0}
+        collection.insert_one(dict(extra))
+
+        query = build_entries_query("user_1", date(2025, 7, 10), date(2025, 8, 9))
+        response = build_stats_response(
+            "day", list(collection.aggregate(stats_pipeline("day", query))))
+
+        in_range = [doc for doc in docs if "2025-07-10" <= doc["record_date"] <= "2025-08-09"]
+        in_range.append(extra)
+        assert [bucket.start.isoformat() for bucket in response.buckets] == sorted(
+            {doc["record_date"] for doc in in_range})
+        first = response.buckets[0]
+        assert first.count == 2
+        assert first.mood_score.max == 5
+        assert first.sleep_hours.mean == pytest.approx((docs[9]["sleep_hours"] + 9.0) / 2)
+        expected = expected_summary(in_range)
+        assert response.total.count == expected["count"]
+        assert response.total.mood_score.model_dump() == pytest.approx(expected["mood_score"])
+        assert response.total.sleep_hours.model_dump() == pytest.approx(expected["sleep_hours"])
+        assert response.total.correlation == pytest.approx(expected["correlation"])
+
+    """
+    Feature: 日単位の集計
+        Scenario: 記録がない場合は空の結果を返す
+            Given: 空のコレクションがある
+            When:  集計パイプラインを実行する
+            Then:  bucketsは空、totalはNoneである
+    """
+
+    def test_empty(self):
+        collection = mongomock.MongoClient().db.entries
+        response = build_stats_response(
+            "day", list(collection.aggregate(stats_pipeline("day", {}))))
+        assert response.buckets == []
+        assert response.total is None
+
+
+@requires_mongodb
+class TestStatsPipeline:
+    @pytest.fixture
+    def collection(self):
+        from pymongo import MongoClient
+        client = MongoClient(MONGODB_TEST_URI)
+        database = client[f"test_stats_{uuid.uuid4().hex}"]
+        yield database["entries"]
+        client.drop_database(database.name)
+        client.close()
+
+    """
+    Feature: 週・月単位の集計
+        Scenario: 週は月曜日、月は1日を開始日とする区間で集計する
+            Given: 2025-07-01から90日分の記録が保存されている
+            When:  bucket=week・monthの集計パイプラインを実行する
+            Then:  区間の開始日・件数・統計がPythonで区間分けした結果と一致する
+    """
+
+    @pytest.mark.parametrize("bucket", ["week", "month"])
+    def test_week_and_month_buckets(self, collection, bucket):
+        docs = make_docs(90)
+        collection.insert_many([dict(doc) for doc in docs])
+        response = build_stats_response(
+            bucket, list(collection.aggregate(stats_pipeline(bucket, {}))))
+
+        groups = {}
+        for doc in docs:
+            day = date.fromisoformat(doc["record_date"])
+            if bucket == "week":
+                start = day - timedelta(days=day.weekday())
+            else:
+                start = day.replace(day=1)
+            groups.setdefault(start, []).append(doc)
+        assert [b.start for b in response.buckets] == sorted(groups)
+        for b in response.buckets:
+            expected = expected_summary(groups[b.start])
+            assert b.count == expected["count"]
+            assert b.mood_score.model_dump() == pytest.approx(expected["mood_score"])
+            assert b.sleep_hours.model_dump() == pytest.approx(expected["sleep_hours"])
@@ -0,0 +1,196 @@
+import asyncio
+
+import mongomock
+import pytest
+from pymongo.errors import PyMongoError
+
+from app.cache import ResponseCache
+from app.changes import ChangeCounter, ChangeTracker
+from app.db import AsyncCollection
+from app.models import Entry
+from app.predictor import PredictionService
+from app.repository import DocumentEntryRepository
+from app.write_queue import WriteBehindQueue, WriteQueueFullError
+from tests.helpers import BulkWriteCollection
+
+"""
+POST /entries の書き込みをまとめるキューをテストするためのクラス
+"""
+
+
+class FailingCollection(BulkWriteCollection):
+    """bulk_writeが失敗する（タイムアウトなどで書き込まれたかわからない）コレクション"""
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(len(requests))
+        raise PyMongoError("Database connection failed")
+
+
+def make_entry(day, user_id="user_1", mood_score=4):
+    return Entry(record_date=f"2025-08-{day:02d}", mood_score=mood_score,
+                 sleep_hours=6.5, memo="今日はよく眠れた", user_id=user_id)
+
+
+class TestWriteBehindQueue:
+    @pytest.fixture
+    def collection(self):
+        return BulkWriteCollection(mongomock.MongoClient().db.entries)
+
+    def create_queue(self, collection, executor, wait_for_flush=True, batch_size=3,
+                     max_delay_seconds=5.0, max_pending=100,
+                     enqueue_timeout_seconds=1.0):
+        self.cache = ResponseCache(max_bytes=10000, ttl_seconds=60)
+        self.predictor = PredictionService()
+        self.versions = BulkWriteCollection(collection.database.entry_versions)
+        self.tracker = ChangeTracker()
+        return WriteBehindQueue(
+            DocumentEntryRepository(AsyncCollection(collection, executor)),
+            self.cache, self.predictor,
+            wait_for_flush=wait_for_flush, batch_size=batch_size,
+            max_delay_seconds=max_delay_seconds, max_pending=max_pending,
+            enqueue_timeout_seconds=enqueue_timeout_seconds,
+            change_counter=ChangeCounter(AsyncCollection(self.versions, executor)),
+            change_tracker=self.tracker)
+
+    """
+    Feature: 件数によるまとめ書き
+        Scenario: batch_size件たまった時点で1回のbulk_writeで書き込む
+            Given: batch_size=3、待ち時間5秒のwaitモードのキューがある
+            When:  3件を同時に書き込む
+            Then:  待ち時間を待たずに1回のbulk_writeで3件が保存される
+            And:   それぞれに保存されたドキュメントの_idが返り、キャッシュが無効化される
+            And:   ユーザーの書き込み回数が1回だけ進む
+    """
+
+    @pytest.mark.asyncio
+    async def test_flush_on_size(self, collection, executor):
+        queue = self.create_queue(collection, executor)
+        queue.start()
+        generation = self.cache.generation("user_1")
+        ids = await asyncio.wait_for(asyncio.gather(
+            *(queue.submit(make_entry(day)) for day in (1, 2, 3))), timeout=1)
+        await queue.close()
+
+        docs = {doc["record_date"]: str(doc["_id"])
+                for doc in collection.collection.find({"user_id": "user_1"})}
+        assert ids == [docs["2025-08-01"], docs["2025-08-02"], docs["2025-08-03"]]
+        assert collection.bulk_writes == [3]
+        assert queue.flushes == 1
+        assert self.cache.generation("user_1") > generation
+        assert self.versions.find_one({"_id": "user_1"})["version"] == 1
+
+    """
+    Feature: 時間によるまとめ書き
+        Scenario: batch_size件に満たなくても待ち時間を過ぎれば書き込む
+            Given: batch_size=100、待ち時間10ミリ秒のwaitモードのキューがある
+            When:  1件を書き込む
+            Then:  待ち時間の経過後に書き込まれ、_idが返る
+    """
+
+    @pytest.mark.asyncio
+    async def test_flush_on_delay(self, collection, executor):
+        queue = self.create_queue(
+            collection, executor, batch_size=100, max_delay_seconds=0.01)
+        queue.start()
+        doc_id = await asyncio.wait_for(queue.submit(make_entry(1)), timeout=1)
+        await queue.close()
+
+        assert doc_id == str(collection.collection.find_one()["_id"])
+        assert collection.bulk_writes == [1]
+
+    """
+    Feature: 同じ記録日の書き込み
+        Scenario: 同じバッチ内で同じ記録日に書き込むと最後の書き込みが保存される
+            Given: waitモードのキューがある
+            When:  同じユーザー・記録日に2件、別のユーザーの同じ記録日に1件を同時に書き込む
+            Then:  同じユーザーの2件には同じ_idが返り、最後の内容が保存される
+            And:   別のユーザーの記録は別のドキュメントとして保存される
+    """
+
+    @pytest.mark.asyncio
+    async def test_duplicate_record_date(self, collection, executor):
+        queue = self.create_queue(collection, executor)
+        queue.start()
+        first, second, other = await asyncio.wait_for(asyncio.gather(
+            queue.submit(make_entry(1, mood_score=1)),
+            queue.submit(make_entry(1, mood_score=5)),
+            queue.submit(make_entry(1, user_id="user_2")),
+        ), timeout=1)
+        await queue.close()
+
+        assert first == second != other
+        assert collection.collection.count_documents({}) == 2
+        assert collection.collection.find_one({"user_id": "user_1"})["mood_score"] == 5
+
+    """
+    Feature: fire-and-ackモードと終了時の書き込み
+        Scenario: キューに入れた時点で応答し、終了時に残りをすべて書き込む
+            Given: batch_size=100、待ち時間5秒のackモードのキューがある
+            When:  2件を書き込み、すぐにキューを閉じる
+            Then:  書き込みはNoneを返し、閉じた時点で2件とも保存されている
+            And:   閉じた後の書き込みはWriteQueueFullErrorになる
+    """
+
+    @pytest.mark.asyncio
+    async def test_ack_and_drain(self, collection, executor):
+        queue = self.create_queue(
+            collection, executor, wait_for_flush=False, batch_size=100)
+        queue.start()
+        assert await queue.submit(make_entry(1)) is None
+        assert await queue.submit(make_entry(2)) is None
+        assert collection.collection.count_documents({}) == 0
+
+        await asyncio.wait_for(queue.close(), timeout=1)
+        assert collection.collection.count_documents({}) == 2
+        assert queue.flushed_entries == 2
+        with pytest.raises(WriteQueueFullError):
+            await queue.submit(make_entry(3))
+
+    """
+    Feature: バックプレッシャー
+        Scenario: キューが一杯の場合は空きを待ち、待機時間を過ぎるとエラーになる
+            Given: 最大1件、空き待ち50ミリ秒のackモードのキューがあり、書き込みはまだ始まっていない
+            When:  2件を書き込む
+            Then:  2件目はWriteQueueFullErrorになる
+            And:   書き込みを開始して閉じると1件目が保存される
+    """
+
+    @pytest.mark.asyncio
+    async def test_backpressure(self, collection, executor):
+        queue = self.create_queue(
+            collection, executor, wait_for_flush=False, max_pending=1,
+            enqueue_timeout_seconds=0.05)
+        await queue.submit(make_entry(1))
+        with pytest.raises(WriteQueueFullError):
+            await queue.submit(make_entry(2))
+
+        queue.start()
+        await asyncio.wait_for(queue.close(), timeout=1)
+        assert collection.collection.count_documents({}) == 1
+
+    """
+    Feature: 書き込みの失敗
+        Scenario: まとめ書きが失敗した場合は予測モデルを作り直す
+            Given: 予測モデルを作成済みのユーザーがあり、bulk_writeが失敗するwaitモードのキューがある
+            When:  2人のユーザーの記録を書き込む
+            Then:  書き込みはPyMongoErrorになる
+            And:   書き込まれたかわからないため、どちらのユーザーの予測モデルも次回の予測時に作り直す
+    """
+
+    @pytest.mark.asyncio
+    async def test_flush_failure_invalidates_predictor(self, executor):
+        from app.prediction import fit_batch
+        collection = FailingCollection(mongomock.MongoClient().db.entries)
+        queue = self.create_queue(collection, executor, batch_size=2)
+        for user_id in ("user_1", "user_2"):
+            self.predictor.replace(user_id, fit_batch([]), self.predictor.generation(user_id))
+        queue.start()
+        results = await asyncio.wait_for(asyncio.gather(
+            queue.submit(make_entry(1)), queue.submit(make_entry(1, user_id="user_2")),
+            return_exceptions=True), timeout=1)
+        await queue.close()
+
+        assert all(isinstance(result, PyMongoError) for result in results)
+        assert queue.failed_entries == 2
+        assert self.predictor.needs_refit("user_1")
+        assert self.predictor.needs_refit("user_2")
@@ -4,16 +4,61 @@ import type {
     EntryOutput,
     EntriesResponse,
     EntryResponse,
+    GetEntriesQuery,
     GetEntriesResponse,
+    GetEntryChangesResponse,
+    GetEntriesStatsQuery,
+    GetEntriesStatsResponse,
+    SearchEntriesQuery,
+    SearchEntriesResponse,
     AddEntryResponse,
     AddEntryValidationError,
+    PredictResponse,
+    GetInsightsQuery,
+    GetInsightsResponse,
+    UserCreate,
+    CreateUserResponse,
 } from "./schema-util";
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+const API_TOKEN_STORAGE_KEY = "apiToken";
+const ENTRIES_CACHE_STORAGE_KEY = "entriesCache";
+
+// APIトークンの保存（nullで削除）。別のユーザーになるため、エントリーのキャッシュも削除する
+export function setApiToken(token: string | null): void {
+    if (token === null) localStorage.removeItem(API_TOKEN_STORAGE_KEY);
+    else localStorage.setItem(API_TOKEN_STORAGE_KEY, token);
+    localStorage.removeItem(ENTRIES_CACHE_STORAGE_KEY);
+}
+
+// APIトークンの取得（未登録の場合はnull）
+export function getApiToken(): string | null {
+    return localStorage.getItem(API_TOKEN_STORAGE_KEY);
+}
+
+type QueryParams = Record<string, string | number | null | undefined>;
+
+// クエリ文字列の生成（null/undefinedの値は送らない）
+function buildQueryString(query?: QueryParams): string {
+    if (!query) return "";
+    const params = new URLSearchParams();
+    for (const [key, value] of Object.entries(query)) {
+        if (value !== null && value !== undefined) params.append(key, String(value));
+    }
+    const qs = params.toString();
+    return qs ? `?${qs}` : "";
+}
 
 // 共通fetchラッパー
-async function fetchApi<T>(path: APIPath, options?: RequestInit): Promise<T> {
-    const res = await fetch(`${API_BASE_URL}${path}`, options);
+async function fetchApi<T>(path: APIPath, options?: RequestInit, query?: QueryParams): Promise<T> {
+    // 保存済みのAPIトークンがあればBearer認証ヘッダーを付ける
+    const headers = new Headers(options?.headers);
+    const token = getApiToken();
+    if (token && !headers.has("Authorization")) headers.set("Authorization", `Bearer ${token}`);
+    const res = await fetch(`${API_BASE_URL}${path}${buildQueryString(query)}`, {
+        ...options,
+        headers,
+    });
     if (!res.ok) {
         const rawText = await res.text().catch(() => "");
         let body: unknown = rawText;
@@ -31,9 +76,74 @@ async function fetchApi<T>(path: APIPath, options?: RequestInit): Promise<T> {
     return res.json();
 }
 
-// エントリー一覧取得
-export async function getEntries(): Promise<GetEntriesResponse> {
-    return fetchApi<GetEntriesResponse>("/entries", { method: "GET" });
+// エントリー一覧取得（記録日の新しい順。続きはレスポンスのnext_cursorをcursorに指定して取得）
+export async function getEntries(query?: GetEntriesQuery): Promise<GetEntriesResponse> {
+    return fetchApi<GetEntriesResponse>("/entries", { method: "GET" }, query);
+}
+
+// syncEntriesで同期したエントリーのキャッシュ（tokenは次回の変更取得の起点）
+type EntriesCache = {
+    token: string;
+    entries: EntryOutput[];
+};
+
+function loadEntriesCache(): EntriesCache | null {
+    const raw = localStorage.getItem(ENTRIES_CACHE_STORAGE_KEY);
+    if (!raw) return null;
+    try {
+        return JSON.parse(raw) as EntriesCache;
+    } catch {
+        return null;
+    }
+}
+
+// 全エントリーの取得（記録日の新しい順）
+// 前回の同期以降に追加・置き換えられたエントリーだけを取得してキャッシュにマージするため、
+// 2回目以降の通信量とサーバーの処理は履歴の件数ではなく変更の件数に比例する
+export async function syncEntries(): Promise<EntryOutput[]> {
+    const cache = loadEntriesCache();
+    // 1ユーザー1日1件のため、記録日をキーに上書きしてマージする
+    const byDate = new Map((cache?.entries ?? []).map((entry) => [entry.record_date, entry]));
+    let since: string | null = cache?.token ?? null;
+    for (;;) {
+        let res: GetEntryChangesResponse;
+        try {
+            res = await fetchApi<GetEntryChangesResponse>(
+                "/entries/changes",
+                { method: "GET" },
+                { since },
+            );
+        } catch (err) {
+            // トークンを復元できない場合はキャッシュを捨てて全件を取得し直す
+            if (since !== null && (err as { status?: number }).status === 400) {
+                byDate.clear();
+                since = null;
+                continue;
+            }
+            throw err;
+        }
+        for (const entry of res.entries) byDate.set(entry.record_date, entry);
+        since = res.next_token;
+        if (!res.has_more) break;
+    }
+    const entries = [...byDate.values()].sort((a, b) =>
+        b.record_date.localeCompare(a.record_date),
+    );
+    const updated: EntriesCache = { token: since, entries };
+    localStorage.setItem(ENTRIES_CACHE_STORAGE_KEY, JSON.stringify(updated));
+    return entries;
+}
+
+// 日・週・月ごとの集計取得（グラフ表示用）
+export async function getEntriesStats(
+    query?: GetEntriesStatsQuery,
+): Promise<GetEntriesStatsResponse> {
+    return fetchApi<GetEntriesStatsResponse>("/entries/stats", { method: "GET" }, query);
+}
+
+// メモの検索（検索語の出現回数の多い順。続きはレスポンスのnext_cursorをcursorに指定して取得）
+export async function searchEntries(query: SearchEntriesQuery): Promise<SearchEntriesResponse> {
+    return fetchApi<SearchEntriesResponse>("/entries/search", { method: "GET" }, query);
 }
 
 // エントリー追加
@@ -44,3 +154,24 @@ export async function addEntry(entry: EntryInput): Promise<AddEntryResponse> {
         body: JSON.stringify(entry),
     });
 }
+
+// 翌日の気分スコア予測
+export async function getPrediction(): Promise<PredictResponse> {
+    return fetchApi<PredictResponse>("/predict", { method: "GET" });
+}
+
+// 曜日ごとの傾向・睡眠負債の連続・移動平均・外れ値
+export async function getInsights(query?: GetInsightsQuery): Promise<GetInsightsResponse> {
+    return fetchApi<GetInsightsResponse>("/insights", { method: "GET" }, query);
+}
+
+// ユーザー登録（発行されたAPIトークンは保存して以降のリクエストに使う）
+export async function createUser(user: UserCreate): Promise<CreateUserResponse> {
+    const res = await fetchApi<CreateUserResponse>("/users", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(user),
+    });
+    setApiToken(res.token);
+    return res;
+}
@@ -12,14 +12,40 @@ export type EntryOutput = components["schemas"]["Entry-Output"];
 export type EntriesResponse = components["schemas"]["EntriesResponse"];
 // Entryレスポンス型
 export type EntryResponse = components["schemas"]["EntryResponse"];
+// ユーザー登録入力型
+export type UserCreate = components["schemas"]["UserCreate"];
 
 // API操作型
 export type GetEntriesOperation = operations["get_entries_entries_get"];
+export type GetEntryChangesOperation = operations["get_entry_changes_entries_changes_get"];
 export type AddEntryOperation = operations["add_entry_entries_post"];
+export type GetEntriesStatsOperation = operations["get_entries_stats_entries_stats_get"];
+export type SearchEntriesOperation = operations["search_entries_entries_search_get"];
+export type PredictOperation = operations["predict_predict_get"];
+export type GetInsightsOperation = operations["get_insights_insights_get"];
+export type CreateUserOperation = operations["create_user_users_post"];
+
+// クエリパラメータユーティリティ
+export type GetEntriesQuery = NonNullable<GetEntriesOperation["parameters"]["query"]>;
+export type GetEntryChangesQuery = NonNullable<GetEntryChangesOperation["parameters"]["query"]>;
+export type GetEntriesStatsQuery = NonNullable<GetEntriesStatsOperation["parameters"]["query"]>;
+export type SearchEntriesQuery = SearchEntriesOperation["parameters"]["query"];
+export type GetInsightsQuery = NonNullable<GetInsightsOperation["parameters"]["query"]>;
 
 // レスポンスユーティリティ
 export type GetEntriesResponse =
     GetEntriesOperation["responses"][200]["content"]["application/json"];
+export type GetEntryChangesResponse =
+    GetEntryChangesOperation["responses"][200]["content"]["application/json"];
 export type AddEntryResponse = AddEntryOperation["responses"][200]["content"]["application/json"];
 export type AddEntryValidationError =
     AddEntryOperation["responses"][422]["content"]["application/json"];
+export type GetEntriesStatsResponse =
+    GetEntriesStatsOperation["responses"][200]["content"]["application/json"];
+export type SearchEntriesResponse =
+    SearchEntriesOperation["responses"][200]["content"]["application/json"];
+export type PredictResponse = PredictOperation["responses"][200]["content"]["application/json"];
+export type GetInsightsResponse =
+    GetInsightsOperation["responses"][200]["content"]["application/json"];
+export type CreateUserResponse =
+    CreateUserOperation["responses"][200]["content"]["application/json"];
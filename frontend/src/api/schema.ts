@@ -39,16 +39,299 @@ export interface paths {
         patch?: never;
         trace?: never;
     };
+    "/entries/changes": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /** Get Entry Changes */
+        get: operations["get_entry_changes_entries_changes_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/entries/export": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /** Export Entries */
+        get: operations["export_entries_entries_export_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/entries/stats": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /** Get Entries Stats */
+        get: operations["get_entries_stats_entries_stats_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/entries/search": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /** Search Entries */
+        get: operations["search_entries_entries_search_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/entries/bulk": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        get?: never;
+        put?: never;
+        /** Add Entries Bulk */
+        post: operations["add_entries_bulk_entries_bulk_post"];
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/predict": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /** Predict */
+        get: operations["predict_predict_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/insights": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /** Get Insights */
+        get: operations["get_insights_insights_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/users": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        get?: never;
+        put?: never;
+        /** Create User */
+        post: operations["create_user_users_post"];
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
+    "/cache/stats": {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        /** Get Cache Stats */
+        get: operations["get_cache_stats_cache_stats_get"];
+        put?: never;
+        post?: never;
+        delete?: never;
+        options?: never;
+        head?: never;
+        patch?: never;
+        trace?: never;
+    };
 }
 export type webhooks = Record<string, never>;
 export interface components {
     schemas: {
+        /** Anomaly */
+        Anomaly: {
+            /**
+             * Record Date
+             * Format: date
+             */
+            record_date: string;
+            /**
+             * Metric
+             * @enum {string}
+             */
+            metric: "mood_score" | "sleep_hours";
+            /** Value */
+            value: number;
+            /**
+             * Expected
+             * @description 直前28件の平均
+             */
+            expected: number;
+            /**
+             * Z Score
+             * @description 直前28件の平均からの偏差を標準偏差で割った値
+             */
+            z_score: number;
+        };
+        /** BulkEntriesResponse */
+        BulkEntriesResponse: {
+            /**
+             * Status
+             * @description success（全件成功）/ partial（一部失敗）/ failed（全件失敗）
+             */
+            status: string;
+            /**
+             * Inserted
+             * @description 新規に追加したエントリー
+             */
+            inserted: components["schemas"]["BulkEntryResult"][];
+            /**
+             * Updated
+             * @description 同じ記録日の既存エントリーを置き換えたもの
+             */
+            updated: components["schemas"]["BulkEntryResult"][];
+            /** Errors */
+            errors: components["schemas"]["BulkItemError"][];
+        };
+        /** BulkEntryResult */
+        BulkEntryResult: {
+            /**
+             * Index
+             * @description リクエスト内でのエントリーの位置（0始まり）
+             */
+            index: number;
+            /** Id */
+            id: string;
+        };
+        /** BulkItemError */
+        BulkItemError: {
+            /**
+             * Index
+             * @description リクエスト内でのエントリーの位置（0始まり）
+             */
+            index: number;
+            /** Errors */
+            errors: components["schemas"]["BulkItemErrorDetail"][];
+        };
+        /** BulkItemErrorDetail */
+        BulkItemErrorDetail: {
+            /** Loc */
+            loc: (string | number)[];
+            /** Msg */
+            msg: string;
+            /** Type */
+            type: string;
+        };
+        /** CacheStatsResponse */
+        CacheStatsResponse: {
+            /** Hits */
+            hits: number;
+            /** Misses */
+            misses: number;
+            /**
+             * Evictions
+             * @description 上限を超えたため追い出した件数
+             */
+            evictions: number;
+            /**
+             * Expirations
+             * @description 有効期間切れで破棄した件数
+             */
+            expirations: number;
+            /**
+             * Invalidations
+             * @description 書き込みにより破棄した件数
+             */
+            invalidations: number;
+            /** Entries */
+            entries: number;
+            /**
+             * Bytes
+             * @description 現在の使用量（バイト数）
+             */
+            bytes: number;
+            /** Max Bytes */
+            max_bytes: number;
+        };
+        /** ChangesResponse */
+        ChangesResponse: {
+            /** Status */
+            status: string;
+            /**
+             * Entries
+             * @description 前回の取得以降に追加・置き換えられたエントリー（書き込んだ順。記録日で上書きしてマージする）
+             */
+            entries: components["schemas"]["Entry-Output"][];
+            /**
+             * Next Token
+             * @description 次回の取得でsinceに指定するトークン
+             */
+            next_token: string;
+            /**
+             * Has More
+             * @description 続きがある場合はtrue（next_tokenですぐに続きを取得する）
+             */
+            has_more: boolean;
+        };
         /** EntriesResponse */
         EntriesResponse: {
             /** Status */
             status: string;
             /** Entries */
             entries: components["schemas"]["Entry-Output"][];
+            /**
+             * Next Cursor
+             * @description 次ページ取得用のカーソル（最終ページの場合はnull）
+             */
+            next_cursor?: string | null;
         };
         /** Entry */
         "Entry-Input": {
@@ -60,7 +343,6 @@ export interface components {
             _id?: string | null;
             /**
              * Record Date
-             * Format: date
              * @description 記録日（必須、YYYY-MM-DD形式）
              * @example 2025-08-14
              */
@@ -83,6 +365,11 @@ export interface components {
              * @example 今日はよく眠れた
              */
             memo?: string | null;
+            /**
+             * User Id
+             * @description 記録したユーザーのID（サーバー側で設定、入力値は無視）
+             */
+            user_id?: string | null;
         };
         /** Entry */
         "Entry-Output": {
@@ -116,6 +403,11 @@ export interface components {
              * @example 今日はよく眠れた
              */
             memo?: string | null;
+            /**
+             * User Id
+             * @description 記録したユーザーのID（サーバー側で設定、入力値は無視）
+             */
+            user_id?: string | null;
         };
         /** EntryResponse */
         EntryResponse: {
@@ -128,6 +420,214 @@ export interface components {
             /** Detail */
             detail?: components["schemas"]["ValidationError"][];
         };
+        /** InsightsResponse */
+        InsightsResponse: {
+            /** Status */
+            status: string;
+            /**
+             * Count
+             * @description 記録件数
+             */
+            count: number;
+            /**
+             * Weekdays
+             * @description 曜日ごとの傾向（月曜日から順に7件）
+             */
+            weekdays: components["schemas"]["WeekdayEffect"][];
+            sleep_debt: components["schemas"]["SleepDebt"];
+            moving_averages: components["schemas"]["MovingAverages"];
+            /**
+             * Anomalies
+             * @description 直前28件の平均から標準偏差の2.5倍以上離れた記録（記録日の昇順）
+             */
+            anomalies: components["schemas"]["Anomaly"][];
+        };
+        /** MetricStats */
+        MetricStats: {
+            /** Mean */
+            mean: number;
+            /** Min */
+            min: number;
+            /** Max */
+            max: number;
+        };
+        /** MovingAverages */
+        MovingAverages: {
+            /**
+             * Window
+             * @description 平均する直近の記録件数
+             */
+            window: number;
+            /**
+             * Record Dates
+             * @description 記録日（昇順）
+             */
+            record_dates: string[];
+            /**
+             * Mood Score
+             * @description 各記録日までの直近window件の気分スコアの平均
+             */
+            mood_score: number[];
+            /**
+             * Sleep Hours
+             * @description 各記録日までの直近window件の睡眠時間の平均
+             */
+            sleep_hours: number[];
+        };
+        /** PredictionResponse */
+        PredictionResponse: {
+            /** Status */
+            status: string;
+            /**
+             * Predicted Mood Score
+             * @description 翌日の気分スコアの予測値（0〜5、記録がない場合はnull）
+             */
+            predicted_mood_score: number | null;
+            /**
+             * Sample Count
+             * @description 学習に使った（前日, 翌日）の記録の組数
+             */
+            sample_count: number;
+            /**
+             * Last Record Date
+             * @description 予測の基準にした最新の記録日（記録がない場合はnull）
+             */
+            last_record_date: string | null;
+        };
+        /** SearchResponse */
+        SearchResponse: {
+            /** Status */
+            status: string;
+            /** Results */
+            results: components["schemas"]["SearchResult"][];
+            /**
+             * Next Cursor
+             * @description 次ページ取得用のカーソル（最終ページの場合はnull）
+             */
+            next_cursor?: string | null;
+        };
+        /** SearchResult */
+        SearchResult: {
+            /**
+             * Score
+             * @description 検索語の出現回数の合計（大きいほど上位）
+             */
+            score: number;
+            entry: components["schemas"]["Entry-Output"];
+        };
+        /** SleepDebt */
+        SleepDebt: {
+            /**
+             * Target Hours
+             * @description 目標の睡眠時間
+             */
+            target_hours: number;
+            /** @description 最新の記録まで続いている連続（最新の記録が目標以上の場合はnull） */
+            current_streak: components["schemas"]["SleepDebtStreak"] | null;
+            /** @description 最も長い連続（同じ長さの場合は最新のもの、なければnull） */
+            longest_streak: components["schemas"]["SleepDebtStreak"] | null;
+        };
+        /** SleepDebtStreak */
+        SleepDebtStreak: {
+            /**
+             * Start
+             * Format: date
+             * @description 連続の初日
+             */
+            start: string;
+            /**
+             * End
+             * Format: date
+             * @description 連続の最終日
+             */
+            end: string;
+            /**
+             * Days
+             * @description 目標の睡眠時間に届かなかった日が続いた日数
+             */
+            days: number;
+            /**
+             * Debt Hours
+             * @description 期間中の不足時間の合計
+             */
+            debt_hours: number;
+        };
+        /** StatsBucket */
+        StatsBucket: {
+            /**
+             * Count
+             * @description 記録件数
+             */
+            count: number;
+            mood_score: components["schemas"]["MetricStats"];
+            sleep_hours: components["schemas"]["MetricStats"];
+            /**
+             * Correlation
+             * @description 睡眠時間と気分スコアの相関係数（2件未満・どちらかが一定の場合はnull）
+             */
+            correlation: number | null;
+            /**
+             * Start
+             * Format: date
+             * @description 区間の開始日（週は月曜日、月は1日）
+             */
+            start: string;
+        };
+        /** StatsResponse */
+        StatsResponse: {
+            /** Status */
+            status: string;
+            /**
+             * Bucket
+             * @description 集計の単位（day / week / month）
+             */
+            bucket: string;
+            /**
+             * Buckets
+             * @description 区間ごとの集計（開始日の昇順）
+             */
+            buckets: components["schemas"]["StatsBucket"][];
+            /** @description 期間全体の集計（記録がない場合はnull） */
+            total: components["schemas"]["StatsSummary"] | null;
+        };
+        /** StatsSummary */
+        StatsSummary: {
+            /**
+             * Count
+             * @description 記録件数
+             */
+            count: number;
+            mood_score: components["schemas"]["MetricStats"];
+            sleep_hours: components["schemas"]["MetricStats"];
+            /**
+             * Correlation
+             * @description 睡眠時間と気分スコアの相関係数（2件未満・どちらかが一定の場合はnull）
+             */
+            correlation: number | null;
+        };
+        /** UserCreate */
+        UserCreate: {
+            /**
+             * Name
+             * @description ユーザー名（必須、1〜100文字）
+             * @example yusei
+             */
+            name: string;
+        };
+        /** UserResponse */
+        UserResponse: {
+            /** Status */
+            status: string;
+            /** User Id */
+            user_id: string;
+            /** Name */
+            name: string;
+            /**
+             * Token
+             * @description APIトークン（Authorization: Bearerで送信。再表示できないため保管すること）
+             */
+            token: string;
+        };
         /** ValidationError */
         ValidationError: {
             /** Location */
@@ -137,6 +637,34 @@ export interface components {
             /** Error Type */
             type: string;
         };
+        /** WeekdayEffect */
+        WeekdayEffect: {
+            /**
+             * Weekday
+             * @description 曜日（0=月曜日〜6=日曜日）
+             */
+            weekday: number;
+            /**
+             * Count
+             * @description 記録件数
+             */
+            count: number;
+            /**
+             * Mood Score
+             * @description 気分スコアの平均（記録がない場合はnull）
+             */
+            mood_score: number | null;
+            /**
+             * Sleep Hours
+             * @description 睡眠時間の平均（記録がない場合はnull）
+             */
+            sleep_hours: number | null;
+            /**
+             * Mood Delta
+             * @description 全体の平均に対する気分スコアの平均の差（記録がない場合はnull）
+             */
+            mood_delta: number | null;
+        };
     };
     responses: never;
     parameters: never;
@@ -168,7 +696,16 @@ export interface operations {
     };
     get_entries_entries_get: {
         parameters: {
-            query?: never;
+            query?: {
+                /** @description 1ページの最大件数 */
+                limit?: number;
+                /** @description 前ページのnext_cursor（先頭ページでは省略） */
+                cursor?: string | null;
+                /** @description 記録日の下限（この日を含む） */
+                from?: string | null;
+                /** @description 記録日の上限（この日を含む） */
+                to?: string | null;
+            };
             header?: never;
             path?: never;
             cookie?: never;
@@ -184,6 +721,15 @@ export interface operations {
                     "application/json": components["schemas"]["EntriesResponse"];
                 };
             };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
         };
     };
     add_entry_entries_post: {
@@ -219,4 +765,280 @@ export interface operations {
             };
         };
     };
+    get_entry_changes_entries_changes_get: {
+        parameters: {
+            query?: {
+                /** @description 前回のレスポンスのnext_token（初回は省略して全件を取得） */
+                since?: string | null;
+                /** @description 1回の最大件数 */
+                limit?: number;
+            };
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["ChangesResponse"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    export_entries_entries_export_get: {
+        parameters: {
+            query?: {
+                /** @description 出力形式（ndjson または csv） */
+                format?: "ndjson" | "csv";
+                /** @description 記録日の下限（この日を含む） */
+                from?: string | null;
+                /** @description 記録日の上限（この日を含む） */
+                to?: string | null;
+            };
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/x-ndjson": unknown;
+                    "text/csv": unknown;
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    get_entries_stats_entries_stats_get: {
+        parameters: {
+            query?: {
+                /** @description 集計の単位（day / week / month） */
+                bucket?: "day" | "week" | "month";
+                /** @description 記録日の下限（この日を含む） */
+                from?: string | null;
+                /** @description 記録日の上限（この日を含む） */
+                to?: string | null;
+            };
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["StatsResponse"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    search_entries_entries_search_get: {
+        parameters: {
+            query: {
+                /** @description メモの検索語（空白区切りで複数指定するとすべてを含むメモを検索） */
+                q: string;
+                /** @description 1ページの最大件数 */
+                limit?: number;
+                /** @description 前ページのnext_cursor（先頭ページでは省略） */
+                cursor?: string | null;
+            };
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["SearchResponse"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    add_entries_bulk_entries_bulk_post: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody: {
+            content: {
+                "application/json": components["schemas"]["Entry-Input"][];
+                /** @description 1行に1件のEntryを記述したNDJSON */
+                "application/x-ndjson": string;
+            };
+        };
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["BulkEntriesResponse"];
+                };
+            };
+        };
+    };
+    predict_predict_get: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["PredictionResponse"];
+                };
+            };
+        };
+    };
+    get_insights_insights_get: {
+        parameters: {
+            query?: {
+                /** @description 移動平均に使う直近の記録件数 */
+                window?: number;
+                /** @description 睡眠負債を数える目標の睡眠時間 */
+                sleep_target?: number;
+            };
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["InsightsResponse"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    create_user_users_post: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody: {
+            content: {
+                "application/json": components["schemas"]["UserCreate"];
+            };
+        };
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["UserResponse"];
+                };
+            };
+            /** @description Validation Error */
+            422: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["HTTPValidationError"];
+                };
+            };
+        };
+    };
+    get_cache_stats_cache_stats_get: {
+        parameters: {
+            query?: never;
+            header?: never;
+            path?: never;
+            cookie?: never;
+        };
+        requestBody?: never;
+        responses: {
+            /** @description Successful Response */
+            200: {
+                headers: {
+                    [name: string]: unknown;
+                };
+                content: {
+                    "application/json": components["schemas"]["CacheStatsResponse"];
+                };
+            };
+        };
+    };
 }